@@ -0,0 +1,464 @@
+"""Asyncio client for the ComfyUI API.
+
+Counterpart of ``ComfyUIClient`` for async callers such as the MCP tools.
+Requests go through one pooled ``httpx.AsyncClient`` with keep-alive, and
+``wait_for_completion`` awaits the prompt's terminal event from the shared
+WebSocket event stream, so a long generation no longer blocks the event loop
+and concurrent tool calls overlap.
+
+Usage:
+    client = get_async_comfyui_client("http://192.168.1.215:8188")
+    prompt_id = await client.queue_prompt(workflow)
+    status = await client.wait_for_completion(prompt_id, timeout=300)
+"""
+
+import asyncio
+import io
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    import httpx
+
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+
+try:
+    import aiofiles
+
+    AIOFILES_AVAILABLE = True
+except ImportError:
+    AIOFILES_AVAILABLE = False
+
+from clients.comfyui_client import (
+    FALLBACK_POLL_INTERVAL,
+    HISTORY_RETRY_DELAY,
+    WS_CONNECT_TIMEOUT,
+    make_progress_handler,
+    parse_available_models,
+)
+from clients.comfyui_events import ComfyUIEventStream, get_event_stream, ws_url_for
+from clients.model_list_cache import get_model_list_cache, is_missing_model_error
+from clients.output_stream import DEFAULT_CHUNK_SIZE
+
+# Connection pool limits for the shared httpx client
+MAX_CONNECTIONS = 20
+MAX_KEEPALIVE_CONNECTIONS = 10
+KEEPALIVE_EXPIRY = 30.0
+
+# Connect timeout; read timeouts are per request like ComfyUIClient
+CONNECT_TIMEOUT = 5.0
+
+
+class _ExecutorFile:
+    """Binary file whose writes run in the default executor (used when aiofiles is missing)."""
+
+    def __init__(self, path: str):
+        self._file = open(path, "wb")
+        self._loop = asyncio.get_running_loop()
+
+    async def write(self, data: bytes) -> int:
+        return await self._loop.run_in_executor(None, self._file.write, data)
+
+    async def close(self) -> None:
+        await self._loop.run_in_executor(None, self._file.close)
+
+
+async def _open_for_write(path: str) -> Any:
+    """Open a local file for writing without blocking the event loop on disk I/O.
+
+    Args:
+        path: File to create or truncate
+
+    Returns:
+        Async file object with ``await write(data)`` and ``await close()``
+    """
+    if AIOFILES_AVAILABLE:
+        return await aiofiles.open(path, "wb")
+    return _ExecutorFile(path)
+
+
+class AsyncComfyUIClient:
+    """Async client for ComfyUI API interactions over a pooled httpx connection."""
+
+    def __init__(self, host: str = "http://192.168.1.215:8188", timeout: int = 30):
+        """Initialize async ComfyUI client.
+
+        Args:
+            host: ComfyUI server URL
+            timeout: Default timeout for requests in seconds
+        """
+        if not HTTPX_AVAILABLE:
+            raise ImportError("httpx is required for AsyncComfyUIClient. Install with: pip install httpx")
+
+        self.host = host.rstrip("/")
+        self.timeout = timeout
+        self._ws_url = ws_url_for(self.host)
+        self._http: Optional[httpx.AsyncClient] = None
+        self._http_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def event_stream(self) -> Optional[ComfyUIEventStream]:
+        """Process-wide WebSocket event stream for this host (shared with ComfyUIClient)."""
+        return get_event_stream(self._ws_url)
+
+    @property
+    def http(self) -> "httpx.AsyncClient":
+        """Pooled httpx client bound to the running event loop.
+
+        httpx connections belong to the loop that opened them, so a new pool
+        is created if the client is used from a different loop (e.g. one
+        ``asyncio.run`` per script or test).
+        """
+        loop = asyncio.get_running_loop()
+        if self._http is None or self._http_loop is not loop or self._http.is_closed:
+            self._http = httpx.AsyncClient(
+                base_url=self.host,
+                timeout=httpx.Timeout(self.timeout, connect=CONNECT_TIMEOUT),
+                limits=httpx.Limits(
+                    max_connections=MAX_CONNECTIONS,
+                    max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=KEEPALIVE_EXPIRY,
+                ),
+            )
+            self._http_loop = loop
+        return self._http
+
+    async def aclose(self) -> None:
+        """Close the pooled connections."""
+        if self._http is not None and not self._http.is_closed:
+            await self._http.aclose()
+        self._http = None
+        self._http_loop = None
+
+    async def __aenter__(self) -> "AsyncComfyUIClient":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.aclose()
+
+    async def _get_json(self, path: str, timeout: float = 10) -> Optional[Dict[str, Any]]:
+        try:
+            response = await self.http.get(path, timeout=timeout)
+            if response.status_code == 200:
+                return response.json()
+            return None
+        except Exception:
+            return None
+
+    async def check_availability(self) -> bool:
+        """Check if ComfyUI server is available.
+
+        Returns:
+            True if server is reachable, False otherwise
+        """
+        try:
+            response = await self.http.get("/system_stats", timeout=5)
+            return response.status_code == 200
+        except Exception:
+            return False
+
+    async def get_system_stats(self) -> Optional[Dict[str, Any]]:
+        """Get system statistics including GPU and VRAM usage.
+
+        Returns:
+            Dictionary with system stats or None on failure
+        """
+        return await self._get_json("/system_stats", timeout=5)
+
+    async def get_object_info(self) -> Optional[Dict[str, Any]]:
+        """Get ComfyUI object info including available nodes.
+
+        Returns:
+            Dictionary with object info or None on failure
+        """
+        return await self._get_json("/object_info")
+
+    async def get_available_models(self, refresh: bool = False) -> Optional[Dict[str, List[str]]]:
+        """Query available models from ComfyUI API.
+
+        The lists are served from the shared model list cache while fresh.
+
+        Args:
+            refresh: Ignore the cached lists and download /object_info
+
+        Returns:
+            Dictionary of available models by type (checkpoints, loras, vae, etc.)
+        """
+        cache = get_model_list_cache()
+        if not refresh:
+            models = cache.get(self.host)
+            if models is not None:
+                return models
+
+        object_info = await self.get_object_info()
+        if not object_info:
+            return None
+        models = parse_available_models(object_info)
+        cache.put(self.host, models)
+        return models
+
+    async def queue_prompt(self, workflow: Dict[str, Any]) -> Optional[str]:
+        """Queue a workflow for execution.
+
+        Args:
+            workflow: Workflow dictionary to queue
+
+        Returns:
+            Prompt ID on success, None on failure
+        """
+        payload = {"prompt": workflow}
+        stream = self.event_stream
+        if stream is not None:
+            connected = stream.connected
+            if not connected:
+                # The first connect happens on the stream's thread; don't block the loop on it
+                loop = asyncio.get_running_loop()
+                connected = await loop.run_in_executor(None, stream.wait_connected, WS_CONNECT_TIMEOUT)
+            if connected:
+                # ComfyUI then sends this prompt's events only to our shared socket
+                payload["client_id"] = stream.client_id
+
+        try:
+            response = await self.http.post("/prompt", json=payload)
+            if response.status_code == 200:
+                return response.json().get("prompt_id")
+            if response.status_code == 400 and is_missing_model_error(response.json()):
+                get_model_list_cache().invalidate(self.host)
+            return None
+        except Exception:
+            return None
+
+    async def get_history(self, prompt_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Get workflow execution history.
+
+        Args:
+            prompt_id: Optional specific prompt ID to query
+
+        Returns:
+            History dictionary or None on failure
+        """
+        return await self._get_json(f"/history/{prompt_id}" if prompt_id else "/history")
+
+    async def get_queue(self) -> Optional[Dict[str, Any]]:
+        """Get current queue status.
+
+        Returns:
+            Queue information or None on failure
+        """
+        return await self._get_json("/queue")
+
+    async def interrupt(self) -> bool:
+        """Interrupt current generation.
+
+        Returns:
+            True if successful, False otherwise
+        """
+        try:
+            response = await self.http.post("/interrupt", timeout=10)
+            return response.status_code == 200
+        except Exception:
+            return False
+
+    async def cancel_prompt(self, prompt_id: str) -> bool:
+        """Cancel a specific prompt by ID.
+
+        Args:
+            prompt_id: The prompt ID to cancel
+
+        Returns:
+            True if successful, False otherwise
+        """
+        try:
+            response = await self.http.post("/queue", json={"delete": [prompt_id]}, timeout=10)
+            return response.status_code == 200
+        except Exception:
+            return False
+
+    async def upload_image(
+        self, image_path: str, subfolder: str = "", overwrite: bool = False
+    ) -> Optional[Dict[str, Any]]:
+        """Upload an image to ComfyUI.
+
+        Args:
+            image_path: Path to image file
+            subfolder: Optional subfolder in input directory
+            overwrite: Whether to overwrite existing file
+
+        Returns:
+            Upload result dictionary or None on failure
+        """
+        try:
+            with open(image_path, "rb") as f:
+                files = {"image": (os.path.basename(image_path), f.read())}
+            data = {"subfolder": subfolder, "overwrite": str(overwrite).lower()}
+            response = await self.http.post("/upload/image", files=files, data=data)
+            if response.status_code == 200:
+                return response.json()
+            return None
+        except Exception:
+            return None
+
+    async def download_output(
+        self, file_info: Dict[str, Any], output_path: Optional[str] = None, timeout: float = 120
+    ) -> Optional[bytes]:
+        """Download an output from /view in one streamed pass.
+
+        Chunks are written to output_path (if given) as they arrive and
+        collected in memory, so saving and validating need no second download.
+        File writes run off the event loop (aiofiles), so a large video or
+        upscale does not stall other requests or the shared event stream.
+
+        Args:
+            file_info: Output entry from the history ({"filename", "subfolder", "type"})
+            output_path: Optional local file to write
+            timeout: Read timeout in seconds
+
+        Returns:
+            The output's bytes, or None on failure
+        """
+        params = {
+            "filename": file_info["filename"],
+            "subfolder": file_info.get("subfolder", ""),
+            "type": file_info.get("type", "output"),
+        }
+        buffer = io.BytesIO()
+        try:
+            async with self.http.stream("GET", "/view", params=params, timeout=timeout) as response:
+                if response.status_code != 200:
+                    return None
+                file = await _open_for_write(output_path) if output_path else None
+                try:
+                    async for chunk in response.aiter_bytes(DEFAULT_CHUNK_SIZE):
+                        buffer.write(chunk)
+                        if file is not None:
+                            await file.write(chunk)
+                finally:
+                    if file is not None:
+                        await file.close()
+        except Exception:
+            return None
+        return buffer.getvalue()
+
+    async def wait_for_completion(
+        self,
+        prompt_id: str,
+        timeout: Optional[float] = None,
+        poll_interval: float = 2.0,
+        progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """Wait for a workflow to complete without blocking the event loop.
+
+        Awaits the prompt's terminal event from the shared WebSocket event
+        stream and then fetches /history once for the outputs. While the
+        stream is down, /history is polled every poll_interval instead.
+
+        Args:
+            prompt_id: The prompt ID to wait for
+            timeout: Maximum time to wait in seconds (None for no timeout)
+            poll_interval: Time between status polls in seconds when the WebSocket is unavailable
+            progress_callback: Optional callback for progress updates, called on the event loop
+
+        Returns:
+            Workflow status on completion, None on timeout or error
+        """
+        loop = asyncio.get_running_loop()
+        stream = self.event_stream
+        subscription = None
+        if progress_callback and stream is not None:
+            subscription = self._subscribe_progress(stream, prompt_id, progress_callback, loop)
+
+        finished_future = stream.completion_future(prompt_id, loop) if stream is not None else None
+        start_time = time.time()
+        retry_delay = HISTORY_RETRY_DELAY
+
+        try:
+            while True:
+                finished = finished_future is not None and finished_future.done()
+                if not finished:
+                    interval = FALLBACK_POLL_INTERVAL if stream is not None and stream.connected else poll_interval
+                    if timeout:
+                        interval = max(0.0, min(interval, timeout - (time.time() - start_time)))
+                    if finished_future is not None:
+                        done, _ = await asyncio.wait({finished_future}, timeout=interval)
+                        finished = bool(done)
+                    else:
+                        await asyncio.sleep(interval)
+
+                history = await self.get_history(prompt_id)
+
+                if history and prompt_id in history:
+                    status = history[prompt_id]
+                    if "outputs" in status:
+                        return status
+                    elif "status" in status and status["status"].get("status_str") == "error":
+                        return status
+
+                if timeout and (time.time() - start_time) > timeout:
+                    return None
+
+                if finished:
+                    # ComfyUI writes /history just after the final event; retry quickly
+                    await asyncio.sleep(retry_delay)
+                    retry_delay = min(retry_delay * 2, poll_interval)
+        finally:
+            if finished_future is not None:
+                finished_future.cancel()
+            if subscription is not None:
+                subscription.close()
+
+    def _subscribe_progress(
+        self,
+        stream: ComfyUIEventStream,
+        prompt_id: str,
+        progress_callback: Callable[[Dict[str, Any]], None],
+        loop: asyncio.AbstractEventLoop,
+    ):
+        """Subscribe progress updates for a prompt, delivered on the given loop.
+
+        Args:
+            stream: Shared event stream
+            prompt_id: The prompt ID to track
+            progress_callback: Callback function for progress updates
+            loop: Loop the callback runs on
+
+        Returns:
+            Event stream subscription
+        """
+
+        def deliver(update: Dict[str, Any]) -> None:
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(progress_callback, update)
+
+        tracker_state = {"prompt_id": prompt_id, "completed": False, "start_time": time.time()}
+        if stream.connected:
+            progress_callback({"type": "connected", "prompt_id": prompt_id, "message": "Connected to progress stream"})
+        return stream.subscribe(prompt_id, make_progress_handler(prompt_id, deliver, tracker_state))
+
+
+# Clients shared per host so the MCP tools modules use one connection pool
+_clients: Dict[str, AsyncComfyUIClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_async_comfyui_client(host: str) -> AsyncComfyUIClient:
+    """Get the process-wide async client for a ComfyUI host.
+
+    Args:
+        host: ComfyUI server URL
+
+    Returns:
+        Shared AsyncComfyUIClient for the host
+    """
+    key = host.rstrip("/")
+    client = _clients.get(key)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(key)
+            if client is None:
+                client = AsyncComfyUIClient(host=key)
+                _clients[key] = client
+    return client
@@ -1,19 +1,161 @@
 """Client for interacting with ComfyUI API."""
 
-import json
-import threading
 import time
-import uuid
 from typing import Any, Callable, Dict, List, Optional
 
-import requests
+from clients.comfyui_events import WEBSOCKET_AVAILABLE, ComfyUIEventStream, get_event_stream
+from clients.comfyui_transport import ComfyUITransport
+from clients.model_list_cache import get_model_list_cache, is_missing_model_error
 
-try:
-    import websocket
+# Seconds to wait for the shared event stream's first connection before queuing
+WS_CONNECT_TIMEOUT = 0.5
 
-    WEBSOCKET_AVAILABLE = True
-except ImportError:
-    WEBSOCKET_AVAILABLE = False
+# Safety /history poll while the event stream is connected (completion comes from events)
+FALLBACK_POLL_INTERVAL = 15.0
+
+# First retry when /history lags the completion event
+HISTORY_RETRY_DELAY = 0.05
+
+
+def parse_available_models(object_info: Dict[str, Any]) -> Dict[str, List[str]]:
+    """Extract model lists by type from a ComfyUI /object_info response.
+
+    Args:
+        object_info: Parsed /object_info JSON
+
+    Returns:
+        Dictionary of available models by type (checkpoints, loras, vae, etc.)
+    """
+    models = {}
+
+    # Get checkpoints (CheckpointLoaderSimple)
+    if "CheckpointLoaderSimple" in object_info:
+        checkpoint_info = object_info["CheckpointLoaderSimple"]
+        if "input" in checkpoint_info and "required" in checkpoint_info["input"]:
+            if "ckpt_name" in checkpoint_info["input"]["required"]:
+                models["checkpoints"] = checkpoint_info["input"]["required"]["ckpt_name"][0]
+
+    # Get LoRAs (LoraLoader)
+    if "LoraLoader" in object_info:
+        lora_info = object_info["LoraLoader"]
+        if "input" in lora_info and "required" in lora_info["input"]:
+            if "lora_name" in lora_info["input"]["required"]:
+                models["loras"] = lora_info["input"]["required"]["lora_name"][0]
+
+    # Get VAE models (VAELoader)
+    if "VAELoader" in object_info:
+        vae_info = object_info["VAELoader"]
+        if "input" in vae_info and "required" in vae_info["input"]:
+            if "vae_name" in vae_info["input"]["required"]:
+                models["vae"] = vae_info["input"]["required"]["vae_name"][0]
+
+    # Get diffusion models (UNETLoader)
+    if "UNETLoader" in object_info:
+        unet_info = object_info["UNETLoader"]
+        if "input" in unet_info and "required" in unet_info["input"]:
+            if "unet_name" in unet_info["input"]["required"]:
+                models["diffusion_models"] = unet_info["input"]["required"]["unet_name"][0]
+
+    # Get text encoders (DualCLIPLoader, TripleCLIPLoader)
+    if "DualCLIPLoader" in object_info:
+        clip_info = object_info["DualCLIPLoader"]
+        if "input" in clip_info and "required" in clip_info["input"]:
+            if "clip_name1" in clip_info["input"]["required"]:
+                models["text_encoders"] = clip_info["input"]["required"]["clip_name1"][0]
+
+    return models
+
+
+def make_progress_handler(
+    prompt_id: str, progress_callback: Callable[[Dict[str, Any]], None], tracker_state: Dict[str, Any]
+) -> Callable[[Dict[str, Any]], None]:
+    """Build an event-stream callback that turns ComfyUI events into progress updates.
+
+    Args:
+        prompt_id: The prompt ID being tracked
+        progress_callback: Receives start/node/progress/cached/complete/error update dicts
+        tracker_state: Mutable state with "start_time"; "completed" is set on completion
+
+    Returns:
+        Callback for ComfyUIEventStream.subscribe
+    """
+
+    def on_event(data):
+        try:
+            msg_type = data.get("type")
+
+            if msg_type == "execution_start":
+                progress_callback({"type": "start", "prompt_id": prompt_id, "message": "Generation started"})
+
+            elif msg_type == "executing":
+                node = data.get("data", {}).get("node")
+                if node is None:
+                    # Execution complete
+                    tracker_state["completed"] = True
+                    elapsed = time.time() - tracker_state["start_time"]
+                    progress_callback(
+                        {
+                            "type": "complete",
+                            "prompt_id": prompt_id,
+                            "elapsed_seconds": elapsed,
+                            "message": f"Generation complete in {elapsed:.1f}s",
+                        }
+                    )
+                else:
+                    progress_callback(
+                        {
+                            "type": "node",
+                            "prompt_id": prompt_id,
+                            "node": node,
+                            "message": f"Executing node {node}",
+                        }
+                    )
+
+            elif msg_type == "progress":
+                prog_data = data.get("data", {})
+                step = prog_data.get("value", 0)
+                max_steps = prog_data.get("max", 0)
+
+                # Calculate ETA
+                eta = None
+                if tracker_state["start_time"] and max_steps > 0 and step > 0:
+                    elapsed = time.time() - tracker_state["start_time"]
+                    time_per_step = elapsed / step
+                    remaining_steps = max_steps - step
+                    eta = time_per_step * remaining_steps
+
+                progress_callback(
+                    {
+                        "type": "progress",
+                        "prompt_id": prompt_id,
+                        "step": step,
+                        "max_steps": max_steps,
+                        "percent": int((step / max_steps) * 100) if max_steps > 0 else 0,
+                        "eta_seconds": eta,
+                        "message": f"Sampling: {step}/{max_steps} steps ({int((step / max_steps) * 100)}%)"
+                        if max_steps > 0
+                        else f"Step {step}",
+                    }
+                )
+
+            elif msg_type == "execution_cached":
+                nodes = data.get("data", {}).get("nodes", [])
+                if nodes:
+                    progress_callback(
+                        {
+                            "type": "cached",
+                            "prompt_id": prompt_id,
+                            "cached_nodes": len(nodes),
+                            "message": f"Using cached results for {len(nodes)} node(s)",
+                        }
+                    )
+
+        except Exception as e:
+            progress_callback(
+                {"type": "error", "prompt_id": prompt_id, "error": str(e), "message": f"WebSocket error: {e}"}
+            )
+
+    return on_event
 
 
 class ComfyUIClient:
@@ -28,8 +170,15 @@ class ComfyUIClient:
         """
         self.host = host.rstrip("/")
         self.timeout = timeout
+        # Keep-alive session, so polling and downloads reuse connections instead of opening one per call
+        self.transport = ComfyUITransport(self.host, read_timeout=timeout)
         self._ws_url = self.host.replace("http://", "ws://").replace("https://", "wss://") + "/ws"
 
+    @property
+    def event_stream(self) -> Optional[ComfyUIEventStream]:
+        """Process-wide WebSocket event stream for this host (shared by all clients)."""
+        return get_event_stream(self._ws_url)
+
     def check_availability(self) -> bool:
         """Check if ComfyUI server is available.
 
@@ -37,7 +186,7 @@ class ComfyUIClient:
             True if server is reachable, False otherwise
         """
         try:
-            response = requests.get(f"{self.host}/system_stats", timeout=5)
+            response = self.transport.get("/system_stats", timeout=5)
             return response.status_code == 200
         except Exception:
             return False
@@ -49,7 +198,7 @@ class ComfyUIClient:
             Dictionary with system stats or None on failure
         """
         try:
-            response = requests.get(f"{self.host}/system_stats", timeout=5)
+            response = self.transport.get("/system_stats", timeout=5)
             if response.status_code == 200:
                 return response.json()
             return None
@@ -63,61 +212,30 @@ class ComfyUIClient:
             Dictionary with object info or None on failure
         """
         try:
-            response = requests.get(f"{self.host}/object_info", timeout=10)
+            response = self.transport.get("/object_info", timeout=10)
             if response.status_code == 200:
                 return response.json()
             return None
         except Exception:
             return None
 
-    def get_available_models(self) -> Optional[Dict[str, List[str]]]:
+    def get_available_models(self, refresh: bool = False) -> Optional[Dict[str, List[str]]]:
         """Query available models from ComfyUI API.
 
+        The lists are served from the shared model list cache while fresh.
+
+        Args:
+            refresh: Ignore the cached lists and download /object_info
+
         Returns:
             Dictionary of available models by type (checkpoints, loras, vae, etc.)
         """
-        object_info = self.get_object_info()
-        if not object_info:
-            return None
 
-        models = {}
-
-        # Get checkpoints (CheckpointLoaderSimple)
-        if "CheckpointLoaderSimple" in object_info:
-            checkpoint_info = object_info["CheckpointLoaderSimple"]
-            if "input" in checkpoint_info and "required" in checkpoint_info["input"]:
-                if "ckpt_name" in checkpoint_info["input"]["required"]:
-                    models["checkpoints"] = checkpoint_info["input"]["required"]["ckpt_name"][0]
-
-        # Get LoRAs (LoraLoader)
-        if "LoraLoader" in object_info:
-            lora_info = object_info["LoraLoader"]
-            if "input" in lora_info and "required" in lora_info["input"]:
-                if "lora_name" in lora_info["input"]["required"]:
-                    models["loras"] = lora_info["input"]["required"]["lora_name"][0]
-
-        # Get VAE models (VAELoader)
-        if "VAELoader" in object_info:
-            vae_info = object_info["VAELoader"]
-            if "input" in vae_info and "required" in vae_info["input"]:
-                if "vae_name" in vae_info["input"]["required"]:
-                    models["vae"] = vae_info["input"]["required"]["vae_name"][0]
-
-        # Get diffusion models (UNETLoader)
-        if "UNETLoader" in object_info:
-            unet_info = object_info["UNETLoader"]
-            if "input" in unet_info and "required" in unet_info["input"]:
-                if "unet_name" in unet_info["input"]["required"]:
-                    models["diffusion_models"] = unet_info["input"]["required"]["unet_name"][0]
-
-        # Get text encoders (DualCLIPLoader, TripleCLIPLoader)
-        if "DualCLIPLoader" in object_info:
-            clip_info = object_info["DualCLIPLoader"]
-            if "input" in clip_info and "required" in clip_info["input"]:
-                if "clip_name1" in clip_info["input"]["required"]:
-                    models["text_encoders"] = clip_info["input"]["required"]["clip_name1"][0]
-
-        return models
+        def fetch():
+            object_info = self.get_object_info()
+            return parse_available_models(object_info) if object_info else None
+
+        return get_model_list_cache().get_or_fetch(self.host, fetch, refresh=refresh)
 
     def queue_prompt(self, workflow: Dict[str, Any]) -> Optional[str]:
         """Queue a workflow for execution.
@@ -128,11 +246,19 @@ class ComfyUIClient:
         Returns:
             Prompt ID on success, None on failure
         """
+        payload = {"prompt": workflow}
+        stream = self.event_stream
+        if stream is not None and stream.wait_connected(WS_CONNECT_TIMEOUT):
+            # ComfyUI then sends this prompt's events only to our shared socket
+            payload["client_id"] = stream.client_id
+
         try:
-            response = requests.post(f"{self.host}/prompt", json={"prompt": workflow}, timeout=self.timeout)
+            response = self.transport.post("/prompt", json=payload, timeout=self.timeout)
             if response.status_code == 200:
                 result = response.json()
                 return result.get("prompt_id")
+            if response.status_code == 400 and is_missing_model_error(response.json()):
+                get_model_list_cache().invalidate(self.host)
             return None
         except Exception:
             return None
@@ -147,10 +273,8 @@ class ComfyUIClient:
             History dictionary or None on failure
         """
         try:
-            url = f"{self.host}/history"
-            if prompt_id:
-                url += f"/{prompt_id}"
-            response = requests.get(url, timeout=10)
+            path = f"/history/{prompt_id}" if prompt_id else "/history"
+            response = self.transport.get(path, timeout=10)
             if response.status_code == 200:
                 return response.json()
             return None
@@ -164,7 +288,7 @@ class ComfyUIClient:
             Queue information or None on failure
         """
         try:
-            response = requests.get(f"{self.host}/queue", timeout=10)
+            response = self.transport.get("/queue", timeout=10)
             if response.status_code == 200:
                 return response.json()
             return None
@@ -178,7 +302,7 @@ class ComfyUIClient:
             True if successful, False otherwise
         """
         try:
-            response = requests.post(f"{self.host}/interrupt", timeout=10)
+            response = self.transport.post("/interrupt", timeout=10)
             return response.status_code == 200
         except Exception:
             return False
@@ -193,7 +317,7 @@ class ComfyUIClient:
             True if successful, False otherwise
         """
         try:
-            response = requests.post(f"{self.host}/queue", json={"delete": [prompt_id]}, timeout=10)
+            response = self.transport.post("/queue", json={"delete": [prompt_id]}, timeout=10)
             return response.status_code == 200
         except Exception:
             return False
@@ -207,10 +331,14 @@ class ComfyUIClient:
     ) -> Optional[Dict[str, Any]]:
         """Wait for a workflow to complete.
 
+        Completion is taken from the shared WebSocket event stream and /history
+        is fetched once for the outputs. While the stream is down, /history is
+        polled every poll_interval instead.
+
         Args:
             prompt_id: The prompt ID to wait for
             timeout: Maximum time to wait in seconds (None for no timeout)
-            poll_interval: Time between status polls in seconds
+            poll_interval: Time between status polls in seconds when the WebSocket is unavailable
             progress_callback: Optional callback for progress updates (receives dict with progress info)
 
         Returns:
@@ -221,10 +349,23 @@ class ComfyUIClient:
         if progress_callback and WEBSOCKET_AVAILABLE:
             ws_tracker = self._start_progress_tracker(prompt_id, progress_callback)
 
+        stream = self.event_stream
+        waiter = stream.completion_waiter(prompt_id) if stream is not None else None
         start_time = time.time()
+        retry_delay = HISTORY_RETRY_DELAY
 
         try:
             while True:
+                finished = waiter is not None and waiter.done
+                if not finished:
+                    interval = FALLBACK_POLL_INTERVAL if stream is not None and stream.connected else poll_interval
+                    if timeout:
+                        interval = max(0.0, min(interval, timeout - (time.time() - start_time)))
+                    if waiter is not None:
+                        finished = waiter.wait(interval)
+                    else:
+                        time.sleep(interval)
+
                 history = self.get_history(prompt_id)
 
                 if history and prompt_id in history:
@@ -245,12 +386,37 @@ class ComfyUIClient:
                 if timeout and (time.time() - start_time) > timeout:
                     return None
 
-                time.sleep(poll_interval)
+                if finished:
+                    # ComfyUI writes /history just after the final event; retry quickly
+                    time.sleep(retry_delay)
+                    retry_delay = min(retry_delay * 2, poll_interval)
         finally:
+            if waiter is not None:
+                waiter.close()
             # Stop WebSocket tracker
             if ws_tracker:
                 self._stop_progress_tracker(ws_tracker)
 
+    def get_image(self, filename: str, subfolder: str = "", folder_type: str = "output") -> Optional[bytes]:
+        """Download an output file from ComfyUI's /view endpoint.
+
+        Args:
+            filename: File name from the history outputs
+            subfolder: Subfolder from the history outputs
+            folder_type: "output", "input" or "temp"
+
+        Returns:
+            File bytes or None on failure
+        """
+        try:
+            params = {"filename": filename, "subfolder": subfolder, "type": folder_type}
+            response = self.transport.get("/view", params=params, timeout=self.timeout)
+            if response.status_code == 200:
+                return response.content
+            return None
+        except Exception:
+            return None
+
     def upload_image(self, image_path: str, subfolder: str = "", overwrite: bool = False) -> Optional[Dict[str, Any]]:
         """Upload an image to ComfyUI.
 
@@ -266,7 +432,7 @@ class ComfyUIClient:
             with open(image_path, "rb") as f:
                 files = {"image": f}
                 data = {"subfolder": subfolder, "overwrite": str(overwrite).lower()}
-                response = requests.post(f"{self.host}/upload/image", files=files, data=data, timeout=self.timeout)
+                response = self.transport.post("/upload/image", files=files, data=data, timeout=self.timeout)
                 if response.status_code == 200:
                     return response.json()
                 return None
@@ -278,6 +444,9 @@ class ComfyUIClient:
     ) -> Optional[Dict[str, Any]]:
         """Start WebSocket progress tracking for a prompt.
 
+        Subscribes to the prompt on the shared event stream; events received
+        before the subscription (e.g. while queuing) are replayed first.
+
         Args:
             prompt_id: The prompt ID to track
             progress_callback: Callback function for progress updates
@@ -285,158 +454,24 @@ class ComfyUIClient:
         Returns:
             Tracker state dictionary or None if WebSocket not available
         """
-        if not WEBSOCKET_AVAILABLE:
+        stream = self.event_stream
+        if stream is None:
             return None
 
         tracker_state = {
             "prompt_id": prompt_id,
             "callback": progress_callback,
-            "ws": None,
-            "thread": None,
-            "running": False,
+            "subscription": None,
             "completed": False,
             "start_time": time.time(),
         }
 
-        def on_message(ws, message):
-            try:
-                data = json.loads(message)
-                msg_type = data.get("type")
-
-                # Only process messages for our prompt_id
-                if msg_type == "execution_start":
-                    prompt_info = data.get("data", {}).get("prompt_id")
-                    if prompt_info == prompt_id:
-                        progress_callback({"type": "start", "prompt_id": prompt_id, "message": "Generation started"})
-
-                elif msg_type == "executing":
-                    exec_data = data.get("data", {})
-                    if exec_data.get("prompt_id") == prompt_id:
-                        node = exec_data.get("node")
-                        if node is None:
-                            # Execution complete
-                            tracker_state["completed"] = True
-                            elapsed = time.time() - tracker_state["start_time"]
-                            progress_callback(
-                                {
-                                    "type": "complete",
-                                    "prompt_id": prompt_id,
-                                    "elapsed_seconds": elapsed,
-                                    "message": f"Generation complete in {elapsed:.1f}s",
-                                }
-                            )
-                        else:
-                            progress_callback(
-                                {
-                                    "type": "node",
-                                    "prompt_id": prompt_id,
-                                    "node": node,
-                                    "message": f"Executing node {node}",
-                                }
-                            )
-
-                elif msg_type == "progress":
-                    prog_data = data.get("data", {})
-                    if prog_data.get("prompt_id") == prompt_id:
-                        step = prog_data.get("value", 0)
-                        max_steps = prog_data.get("max", 0)
-
-                        # Calculate ETA
-                        eta = None
-                        if tracker_state["start_time"] and max_steps > 0 and step > 0:
-                            elapsed = time.time() - tracker_state["start_time"]
-                            time_per_step = elapsed / step
-                            remaining_steps = max_steps - step
-                            eta = time_per_step * remaining_steps
-
-                        progress_callback(
-                            {
-                                "type": "progress",
-                                "prompt_id": prompt_id,
-                                "step": step,
-                                "max_steps": max_steps,
-                                "percent": int((step / max_steps) * 100) if max_steps > 0 else 0,
-                                "eta_seconds": eta,
-                                "message": f"Sampling: {step}/{max_steps} steps ({int((step / max_steps) * 100)}%)"
-                                if max_steps > 0
-                                else f"Step {step}",
-                            }
-                        )
-
-                elif msg_type == "execution_cached":
-                    cached_data = data.get("data", {})
-                    if cached_data.get("prompt_id") == prompt_id:
-                        nodes = cached_data.get("nodes", [])
-                        if nodes:
-                            progress_callback(
-                                {
-                                    "type": "cached",
-                                    "prompt_id": prompt_id,
-                                    "cached_nodes": len(nodes),
-                                    "message": f"Using cached results for {len(nodes)} node(s)",
-                                }
-                            )
-
-            except json.JSONDecodeError:
-                pass  # Ignore malformed messages
-            except Exception as e:
-                progress_callback(
-                    {"type": "error", "prompt_id": prompt_id, "error": str(e), "message": f"WebSocket error: {e}"}
-                )
-
-        def on_error(ws, error):
-            # Handle various connection error types gracefully
-            try:
-                is_connection_error = isinstance(error, (ConnectionResetError, BrokenPipeError))
-                if WEBSOCKET_AVAILABLE:
-                    # Check for WebSocket-specific errors if the module is available
-                    is_connection_error = is_connection_error or isinstance(error, websocket.WebSocketException)
+        on_event = make_progress_handler(prompt_id, progress_callback, tracker_state)
 
-                if not is_connection_error:
-                    progress_callback(
-                        {
-                            "type": "error",
-                            "prompt_id": prompt_id,
-                            "error": str(error),
-                            "message": f"WebSocket error: {error}",
-                        }
-                    )
-            except Exception:
-                # Catch-all for any error handling issues
-                pass
-
-        def on_close(ws, close_status_code, close_msg):
-            tracker_state["running"] = False
-
-        def on_open(ws):
-            tracker_state["running"] = True
+        if stream.connected:
             progress_callback({"type": "connected", "prompt_id": prompt_id, "message": "Connected to progress stream"})
-
-        # Create WebSocket with client ID
-        client_id = str(uuid.uuid4())
-        ws_url_with_id = f"{self._ws_url}?clientId={client_id}"
-
-        try:
-            ws = websocket.WebSocketApp(
-                ws_url_with_id, on_message=on_message, on_error=on_error, on_close=on_close, on_open=on_open
-            )
-
-            tracker_state["ws"] = ws
-
-            # Run in background thread
-            thread = threading.Thread(target=ws.run_forever, daemon=True)
-            tracker_state["thread"] = thread
-            thread.start()
-
-            # Give WebSocket time to connect
-            time.sleep(0.5)
-
-            return tracker_state
-        except Exception as e:
-            progress_callback(
-                {"type": "error", "prompt_id": prompt_id, "error": str(e), "message": f"Failed to start WebSocket: {e}"}
-            )
-            return None
+        tracker_state["subscription"] = stream.subscribe(prompt_id, on_event)
+        return tracker_state
 
     def _stop_progress_tracker(self, tracker_state: Dict[str, Any]) -> None:
         """Stop WebSocket progress tracking.
@@ -447,10 +482,6 @@ class ComfyUIClient:
         if not tracker_state:
             return
 
-        ws = tracker_state.get("ws")
-        if ws:
-            ws.close()
-
-        thread = tracker_state.get("thread")
-        if thread:
-            thread.join(timeout=2)
+        subscription = tracker_state.get("subscription")
+        if subscription:
+            subscription.close()
@@ -0,0 +1,427 @@
+"""Shared ComfyUI WebSocket event stream.
+
+ComfyUI pushes execution events (execution_start, executing, progress,
+executed, execution_cached, execution_error, ...) over ``/ws``. Instead of every
+prompt opening its own socket with a random clientId, each process keeps one
+persistent socket per ComfyUI host. It reconnects automatically (reusing its
+clientId, so ComfyUI keeps routing our prompts to it), parses each message
+once and hands it to the subscribers of that message's prompt_id.
+
+Subscribers can be callbacks, queues (``subscribe_queue``), blocking waiters
+(``completion_waiter``) or asyncio futures (``completion_future``). Events are
+buffered per prompt, so a subscriber that attaches after the prompt was queued
+still sees everything from the start.
+
+Usage:
+    stream = get_event_stream("http://192.168.1.215:8188")
+    stream.wait_connected(0.5)
+    requests.post(f"{host}/prompt", json={"prompt": workflow, "client_id": stream.client_id})
+    with stream.subscribe(prompt_id, print):
+        ...
+"""
+
+import asyncio
+import json
+import queue
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    import websocket
+
+    WEBSOCKET_AVAILABLE = True
+except ImportError:
+    WEBSOCKET_AVAILABLE = False
+
+# Reconnect backoff while the server is unreachable (doubles up to the max)
+RECONNECT_DELAY = 1.0
+RECONNECT_MAX_DELAY = 30.0
+
+# Keepalive so half-open connections are noticed and reconnected
+PING_INTERVAL = 20
+PING_TIMEOUT = 10
+
+# Events kept for late subscribers (prompts are evicted oldest first)
+MAX_BUFFERED_PROMPTS = 256
+MAX_BUFFERED_EVENTS = 2048
+
+# Events that end a prompt's execution besides ``executing`` with node=None
+TERMINAL_EVENT_TYPES = ("execution_success", "execution_error", "execution_interrupted")
+
+
+def ws_url_for(host: str) -> str:
+    """Convert a ComfyUI HTTP base URL into its WebSocket endpoint URL."""
+    url = host.rstrip("/")
+    if url.startswith("https://"):
+        url = "wss://" + url[len("https://") :]
+    elif url.startswith("http://"):
+        url = "ws://" + url[len("http://") :]
+    return url if url.endswith("/ws") else f"{url}/ws"
+
+
+def event_prompt_id(event: Dict[str, Any]) -> Optional[str]:
+    """Return the prompt_id an event belongs to, if any."""
+    data = event.get("data")
+    if isinstance(data, dict):
+        return data.get("prompt_id")
+    return None
+
+
+def is_terminal_event(event: Dict[str, Any]) -> bool:
+    """Check whether an event marks the end of its prompt's execution."""
+    msg_type = event.get("type")
+    if msg_type == "executing":
+        data = event.get("data") or {}
+        return data.get("node") is None and data.get("prompt_id") is not None
+    return msg_type in TERMINAL_EVENT_TYPES
+
+
+class Subscription:
+    """A subscriber attached to one prompt (or to all events when prompt_id is None)."""
+
+    def __init__(self, stream: "ComfyUIEventStream", prompt_id: Optional[str], callback: Callable[[Dict], None]):
+        self.stream = stream
+        self.prompt_id = prompt_id
+        self.callback = callback
+        self.closed = False
+
+    def deliver(self, event: Dict[str, Any]) -> None:
+        """Hand an event to the callback, isolating the stream from its errors."""
+        if self.closed:
+            return
+        try:
+            self.callback(event)
+        except Exception as e:
+            print(f"[WARN] Event subscriber for prompt {self.prompt_id} failed: {e}")
+
+    def close(self) -> None:
+        """Stop receiving events."""
+        if not self.closed:
+            self.closed = True
+            self.stream.unsubscribe(self)
+
+    def __enter__(self) -> "Subscription":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+class CompletionWaiter:
+    """Blocking wait for one prompt's terminal event (threads' counterpart of completion_future)."""
+
+    def __init__(self, stream: "ComfyUIEventStream", prompt_id: str):
+        self.prompt_id = prompt_id
+        self.event: Optional[Dict[str, Any]] = None
+        self._done = threading.Event()
+        self.subscription = stream.subscribe(prompt_id, self._on_event)
+
+    def _on_event(self, event: Dict[str, Any]) -> None:
+        if self.event is None and is_terminal_event(event):
+            self.event = event
+            self._done.set()
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait for the terminal event.
+
+        Args:
+            timeout: Maximum seconds to wait (None waits forever)
+
+        Returns:
+            True once the prompt finished (successfully or not)
+        """
+        return self._done.wait(timeout)
+
+    def close(self) -> None:
+        self.subscription.close()
+
+    def __enter__(self) -> "CompletionWaiter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+class ComfyUIEventStream:
+    """One persistent, auto-reconnecting ComfyUI WebSocket demultiplexed by prompt_id."""
+
+    def __init__(self, ws_url: str, client_id: Optional[str] = None):
+        """Initialize the event stream (call start() to connect).
+
+        Args:
+            ws_url: ComfyUI WebSocket URL (ws://host:port/ws)
+            client_id: clientId to connect with (default: random per stream)
+        """
+        self.ws_url = ws_url
+        self.client_id = client_id or uuid.uuid4().hex
+        self.stats = {"connects": 0, "messages": 0, "dispatched": 0}
+        self.last_error: Optional[str] = None
+
+        # Reentrant so subscriber callbacks may subscribe/unsubscribe while being called
+        self._lock = threading.RLock()
+        self._subscribers: Dict[Optional[str], List[Subscription]] = {}
+        self._events: OrderedDict[str, List[Dict[str, Any]]] = OrderedDict()
+        self._finished: OrderedDict[str, Dict[str, Any]] = OrderedDict()
+
+        self._connected = threading.Event()
+        # Set once the first connection attempt succeeded or failed
+        self._settled = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._ws = None
+        self._warned = False
+
+    @property
+    def connected(self) -> bool:
+        """Whether the socket is currently open."""
+        return self._connected.is_set()
+
+    def start(self) -> None:
+        """Start the background connection thread (idempotent)."""
+        if not WEBSOCKET_AVAILABLE:
+            self._settled.set()
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="comfyui-events", daemon=True)
+            self._thread.start()
+
+    def wait_connected(self, timeout: float) -> bool:
+        """Wait for the socket to be open.
+
+        Only the first connection attempt is waited for; while the stream is
+        reconnecting in the background this returns immediately.
+
+        Args:
+            timeout: Maximum seconds to wait
+
+        Returns:
+            True if connected
+        """
+        self.start()
+        if not self._settled.is_set():
+            self._settled.wait(timeout)
+        return self.connected
+
+    def stop(self) -> None:
+        """Close the socket and stop reconnecting."""
+        self._stopped.set()
+        ws = self._ws
+        if ws is not None:
+            ws.close()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+
+    def _run(self) -> None:
+        """Connection loop: connect, serve until closed, back off, reconnect."""
+        delay = RECONNECT_DELAY
+        while not self._stopped.is_set():
+            connects_before = self.stats["connects"]
+            self._ws = websocket.WebSocketApp(
+                f"{self.ws_url}?clientId={self.client_id}",
+                on_open=self._on_open,
+                on_message=self._on_message,
+                on_error=self._on_error,
+                on_close=self._on_close,
+            )
+            try:
+                self._ws.run_forever(ping_interval=PING_INTERVAL, ping_timeout=PING_TIMEOUT)
+            except Exception as e:
+                self._on_error(self._ws, e)
+
+            self._connected.clear()
+            self._settled.set()
+            if self._stopped.is_set():
+                break
+            if self.stats["connects"] > connects_before:
+                # The connection was up and dropped: retry promptly
+                delay = RECONNECT_DELAY
+            self._stopped.wait(delay)
+            delay = min(delay * 2, RECONNECT_MAX_DELAY)
+
+    def _on_open(self, ws) -> None:
+        self.stats["connects"] += 1
+        if self.stats["connects"] > 1 or self._warned:
+            print(f"[INFO] Reconnected to ComfyUI event stream at {self.ws_url}")
+        self._warned = False
+        self._connected.set()
+        self._settled.set()
+
+    def _on_message(self, ws, message) -> None:
+        # Binary frames are latent previews; nothing subscribes to them
+        if not isinstance(message, str):
+            return
+        self.stats["messages"] += 1
+        try:
+            event = json.loads(message)
+        except json.JSONDecodeError:
+            return
+        if isinstance(event, dict):
+            self.dispatch(event)
+
+    def _on_error(self, ws, error) -> None:
+        if WEBSOCKET_AVAILABLE and isinstance(error, websocket.WebSocketConnectionClosedException):
+            return
+        self.last_error = str(error)
+        # One warning per outage rather than one per reconnect attempt
+        if not self._warned:
+            self._warned = True
+            print(f"[WARN] ComfyUI event stream error ({error}), reconnecting in the background")
+
+    def _on_close(self, ws, close_status_code, close_msg) -> None:
+        self._connected.clear()
+
+    def dispatch(self, event: Dict[str, Any]) -> None:
+        """Buffer an event and deliver it to its prompt's subscribers.
+
+        Args:
+            event: Parsed ComfyUI message ({"type": ..., "data": {...}})
+        """
+        prompt_id = event_prompt_id(event)
+        with self._lock:
+            if prompt_id is not None:
+                events = self._events.get(prompt_id)
+                if events is None:
+                    events = self._events[prompt_id] = []
+                    while len(self._events) > MAX_BUFFERED_PROMPTS:
+                        evicted, _ = self._events.popitem(last=False)
+                        self._finished.pop(evicted, None)
+                if len(events) < MAX_BUFFERED_EVENTS:
+                    events.append(event)
+                if is_terminal_event(event) and prompt_id not in self._finished:
+                    self._finished[prompt_id] = event
+
+            subscribers = list(self._subscribers.get(prompt_id, ())) if prompt_id is not None else []
+            subscribers.extend(self._subscribers.get(None, ()))
+            for subscription in subscribers:
+                self.stats["dispatched"] += 1
+                subscription.deliver(event)
+
+    def subscribe(
+        self, prompt_id: Optional[str], callback: Callable[[Dict[str, Any]], None], replay: bool = True
+    ) -> Subscription:
+        """Subscribe a callback to one prompt's events.
+
+        Callbacks run on the stream's thread and should return quickly.
+
+        Args:
+            prompt_id: Prompt to follow, or None for every event (e.g. queue status)
+            callback: Called with each parsed event dict
+            replay: Deliver events already received for the prompt first
+
+        Returns:
+            Subscription; close() it (or use it as a context manager) when done
+        """
+        self.start()
+        subscription = Subscription(self, prompt_id, callback)
+        with self._lock:
+            self._subscribers.setdefault(prompt_id, []).append(subscription)
+            if replay and prompt_id is not None:
+                for event in list(self._events.get(prompt_id, ())):
+                    subscription.deliver(event)
+        return subscription
+
+    def subscribe_queue(self, prompt_id: Optional[str], replay: bool = True) -> tuple:
+        """Subscribe a queue.Queue to one prompt's events.
+
+        Returns:
+            Tuple of (Subscription, queue.Queue receiving event dicts)
+        """
+        events: queue.Queue = queue.Queue()
+        return self.subscribe(prompt_id, events.put, replay=replay), events
+
+    def completion_future(
+        self, prompt_id: str, loop: Optional[asyncio.AbstractEventLoop] = None
+    ) -> "asyncio.Future[Dict[str, Any]]":
+        """Return an asyncio future resolved with the prompt's terminal event.
+
+        Args:
+            prompt_id: Prompt to wait for
+            loop: Event loop owning the future (default: the running loop)
+
+        Returns:
+            Future whose result is the executing(node=None), execution_error or
+            execution_interrupted event
+        """
+        loop = loop or asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def resolve(event):
+            if not future.done():
+                future.set_result(event)
+
+        def on_event(event):
+            if is_terminal_event(event):
+                subscription.close()
+                loop.call_soon_threadsafe(resolve, event)
+
+        subscription = Subscription(self, prompt_id, on_event)
+        with self._lock:
+            finished = self._finished.get(prompt_id)
+            if finished is None:
+                self._subscribers.setdefault(prompt_id, []).append(subscription)
+        self.start()
+        if finished is not None:
+            future.set_result(finished)
+        else:
+            future.add_done_callback(lambda _: subscription.close())
+        return future
+
+    def completion_waiter(self, prompt_id: str) -> CompletionWaiter:
+        """Return a CompletionWaiter for a prompt (already done if it has finished)."""
+        return CompletionWaiter(self, prompt_id)
+
+    def finished_event(self, prompt_id: str) -> Optional[Dict[str, Any]]:
+        """Return the terminal event already received for a prompt, if any."""
+        with self._lock:
+            return self._finished.get(prompt_id)
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """Detach a subscription (Subscription.close() calls this)."""
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.prompt_id)
+            if subscribers and subscription in subscribers:
+                subscribers.remove(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.prompt_id]
+
+    def forget(self, prompt_id: str) -> None:
+        """Drop buffered events for a prompt that nobody will ask about again."""
+        with self._lock:
+            self._events.pop(prompt_id, None)
+            self._finished.pop(prompt_id, None)
+
+
+_streams: Dict[str, ComfyUIEventStream] = {}
+_streams_lock = threading.Lock()
+
+
+def get_event_stream(host: str) -> Optional[ComfyUIEventStream]:
+    """Get the process-wide event stream for a ComfyUI host, starting it if needed.
+
+    Args:
+        host: ComfyUI HTTP base URL (or its ws:// URL)
+
+    Returns:
+        The shared ComfyUIEventStream, or None if websocket-client is not installed
+    """
+    if not WEBSOCKET_AVAILABLE:
+        return None
+
+    url = ws_url_for(host)
+    stream = _streams.get(url)
+    if stream is None:
+        with _streams_lock:
+            stream = _streams.get(url)
+            if stream is None:
+                stream = ComfyUIEventStream(url)
+                _streams[url] = stream
+    stream.start()
+    return stream
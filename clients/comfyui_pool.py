@@ -0,0 +1,350 @@
+"""Queue-aware dispatch across several ComfyUI backends.
+
+A ComfyUIPool wraps one ComfyUIClient per server. Before dispatching a
+workflow it polls each backend's /queue and /system_stats (cached for
+``poll_interval``) and checks the backend's /object_info model lists (cached
+for ``models_ttl``) for every checkpoint, LoRA, VAE and UNet the workflow
+loads. The workflow goes to the compatible backend with the fewest queued
+prompts, preferring more free VRAM on ties. Connection failures mark a
+backend down and the next candidate is tried. Prompt IDs are remembered per
+backend, so waiting, history and downloads go to the server that ran them.
+
+The pool is a library API for callers that drive several GPU boxes
+themselves; generate.py, its BatchRunner and the MCP server still talk to
+the single COMFYUI_HOST through the shared transport.
+
+Usage:
+    pool = ComfyUIPool.from_config()  # COMFYUI_HOSTS, presets.yaml comfyui.backends, or COMFYUI_HOST
+    prompt_id = pool.queue_prompt(workflow)
+    status = pool.wait_for_completion(prompt_id, timeout=300)
+    image = pool.get_image(prompt_id, status["outputs"]["9"]["images"][0])
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from clients.comfyui_client import ComfyUIClient, parse_available_models
+
+# Seconds a backend's /queue and /system_stats snapshot is reused
+POLL_INTERVAL = 2.0
+
+# Seconds a backend's /object_info model lists are reused
+MODELS_TTL = 300.0
+
+# Loader nodes and the model list each one's input must appear in
+MODEL_INPUTS = {
+    "CheckpointLoaderSimple": ("checkpoints", "ckpt_name"),
+    "LoraLoader": ("loras", "lora_name"),
+    "LoraLoaderModelOnly": ("loras", "lora_name"),
+    "VAELoader": ("vae", "vae_name"),
+    "UNETLoader": ("diffusion_models", "unet_name"),
+}
+
+# Prompt routes kept for sticky downloads (oldest dropped first)
+MAX_ROUTES = 4096
+
+
+def required_models(workflow: Dict[str, Any]) -> Dict[str, Set[str]]:
+    """Collect the models a workflow loads, by model list.
+
+    Args:
+        workflow: Workflow dictionary (API format)
+
+    Returns:
+        Dictionary like {"checkpoints": {"sd15.safetensors"}, "loras": {...}}
+    """
+    required: Dict[str, Set[str]] = {}
+    for node in workflow.values():
+        if not isinstance(node, dict):
+            continue
+        spec = MODEL_INPUTS.get(node.get("class_type", ""))
+        if spec is None:
+            continue
+        category, input_name = spec
+        value = node.get("inputs", {}).get(input_name)
+        # Linked inputs ([node_id, index]) are resolved at runtime; only literal names can be checked
+        if isinstance(value, str) and value:
+            required.setdefault(category, set()).add(value)
+    return required
+
+
+class Backend:
+    """One ComfyUI server in a pool and its last polled state."""
+
+    def __init__(self, host: str, client: ComfyUIClient):
+        """Initialize backend state.
+
+        Args:
+            host: ComfyUI server URL
+            client: Client for the server
+        """
+        self.host = host
+        self.client = client
+        self.healthy = True
+        self.error: Optional[str] = None
+        self.queue_remaining = 0
+        self.vram_free = 0
+        self.models: Optional[Dict[str, List[str]]] = None
+        self.polled_at = 0.0
+        self.models_at = 0.0
+        self.dispatched = 0
+
+    def has_models(self, required: Dict[str, Set[str]]) -> bool:
+        """Check that every required model is installed (unknown lists pass, as in generate.py).
+
+        A backend whose /object_info could not be read yet is not ruled out;
+        the server itself rejects the prompt if a model is missing.
+        """
+        if not required or self.models is None:
+            return True
+        for category, names in required.items():
+            available = self.models.get(category)
+            if available is not None and not names.issubset(available):
+                return False
+        return True
+
+    def missing_models(self, required: Dict[str, Set[str]]) -> List[str]:
+        """Names of required models this backend lacks."""
+        missing = []
+        for category, names in required.items():
+            available = set((self.models or {}).get(category) or [])
+            missing.extend(sorted(names - available))
+        return missing
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Snapshot for status output."""
+        return {
+            "host": self.host,
+            "healthy": self.healthy,
+            "error": self.error,
+            "queue_remaining": self.queue_remaining,
+            "vram_free": self.vram_free,
+            "dispatched": self.dispatched,
+        }
+
+
+class ComfyUIPool:
+    """Dispatch workflows to the least-loaded compatible ComfyUI backend."""
+
+    def __init__(
+        self,
+        hosts: List[str],
+        poll_interval: float = POLL_INTERVAL,
+        models_ttl: float = MODELS_TTL,
+        client_factory: Optional[Callable[[str], ComfyUIClient]] = None,
+    ):
+        """Initialize the pool.
+
+        Args:
+            hosts: ComfyUI server URLs
+            poll_interval: Seconds a /queue and /system_stats snapshot is reused
+            models_ttl: Seconds /object_info model lists are reused
+            client_factory: Builds the client for a host (default: ComfyUIClient)
+        """
+        if not hosts:
+            raise ValueError("ComfyUIPool needs at least one backend")
+
+        factory = client_factory or (lambda host: ComfyUIClient(host=host))
+        self.backends = [Backend(host.rstrip("/"), factory(host.rstrip("/"))) for host in hosts]
+        self.poll_interval = poll_interval
+        self.models_ttl = models_ttl
+
+        self._lock = threading.Lock()
+        # Serializes polling so concurrent dispatchers don't poll the same backends twice
+        self._refresh_lock = threading.Lock()
+        self._routes: Dict[str, Backend] = {}
+
+    @classmethod
+    def from_config(cls, **kwargs) -> "ComfyUIPool":
+        """Create a pool from COMFYUI_HOSTS, presets.yaml ``comfyui.backends`` or the single host.
+
+        Args:
+            **kwargs: Passed to ComfyUIPool
+
+        Returns:
+            Configured ComfyUIPool
+        """
+        from clients.comfyui_transport import comfyui_settings, resolve_comfyui_host
+
+        hosts = [h.strip() for h in os.getenv("COMFYUI_HOSTS", "").split(",") if h.strip()]
+        if not hosts:
+            settings = comfyui_settings()
+            hosts = list(settings.get("backends") or []) or [resolve_comfyui_host(settings)]
+        return cls(hosts, **kwargs)
+
+    # ----------------------------------------------------------------- polling
+
+    def _poll(self, backend: Backend, now: float, with_models: bool) -> None:
+        stats = backend.client.get_system_stats()
+        if stats is None:
+            backend.healthy = False
+            backend.error = "unreachable"
+            backend.polled_at = now
+            return
+
+        queue = backend.client.get_queue() or {}
+        backend.queue_remaining = len(queue.get("queue_running", [])) + len(queue.get("queue_pending", []))
+        backend.vram_free = sum(device.get("vram_free", 0) for device in stats.get("devices", []))
+        if with_models:
+            object_info = backend.client.get_object_info()
+            if object_info:
+                backend.models = parse_available_models(object_info)
+                backend.models_at = now
+        backend.healthy = True
+        backend.error = None
+        backend.polled_at = now
+
+    def refresh(self, force: bool = False) -> None:
+        """Poll backends whose snapshot is older than poll_interval (all of them if force).
+
+        Args:
+            force: Poll every backend and reload model lists
+        """
+        with self._refresh_lock:
+            now = time.monotonic()
+            due = [b for b in self.backends if force or now - b.polled_at >= self.poll_interval]
+            if not due:
+                return
+
+            def poll(backend):
+                with_models = force or backend.models is None or now - backend.models_at >= self.models_ttl
+                self._poll(backend, now, with_models)
+
+            if len(due) == 1:
+                poll(due[0])
+            else:
+                with ThreadPoolExecutor(max_workers=len(due)) as executor:
+                    list(executor.map(poll, due))
+
+    def select_backend(self, workflow: Dict[str, Any], exclude: Optional[Set[str]] = None) -> Optional[Backend]:
+        """Pick the least-loaded healthy backend that has the workflow's models.
+
+        Args:
+            workflow: Workflow to run
+            exclude: Hosts to skip (e.g. ones that just failed)
+
+        Returns:
+            Chosen backend or None if no backend qualifies
+        """
+        self.refresh()
+        required = required_models(workflow)
+        with self._lock:
+            candidates = [
+                b for b in self.backends if b.healthy and b.host not in (exclude or set()) and b.has_models(required)
+            ]
+            if not candidates:
+                return None
+            # Fewest queued prompts first, then the most free VRAM, then pool order
+            return min(candidates, key=lambda b: (b.queue_remaining, -b.vram_free))
+
+    # ---------------------------------------------------------------- dispatch
+
+    def queue_prompt(self, workflow: Dict[str, Any]) -> Optional[str]:
+        """Queue a workflow on the best backend, failing over if it cannot be reached.
+
+        Args:
+            workflow: Workflow dictionary to queue
+
+        Returns:
+            Prompt ID on success, None if no backend accepted it
+        """
+        tried: Set[str] = set()
+        while True:
+            backend = self.select_backend(workflow, exclude=tried)
+            if backend is None:
+                if not tried:
+                    self._report_unavailable(workflow)
+                return None
+            tried.add(backend.host)
+
+            prompt_id = backend.client.queue_prompt(workflow)
+            if prompt_id:
+                with self._lock:
+                    # Count it until the next poll so back-to-back dispatches spread out
+                    backend.queue_remaining += 1
+                    backend.dispatched += 1
+                    self._routes[prompt_id] = backend
+                    if len(self._routes) > MAX_ROUTES:
+                        self._routes.pop(next(iter(self._routes)))
+                return prompt_id
+
+            if backend.client.check_availability():
+                # The server answered but rejected the workflow; another backend would too
+                print(f"[ERROR] {backend.host} rejected the workflow")
+                return None
+
+            with self._lock:
+                backend.healthy = False
+                backend.error = "unreachable"
+                backend.polled_at = time.monotonic()
+            print(f"[WARN] ComfyUI backend {backend.host} is unreachable, trying another")
+
+    def _report_unavailable(self, workflow: Dict[str, Any]) -> None:
+        required = required_models(workflow)
+        for backend in self.backends:
+            if not backend.healthy:
+                print(f"[WARN] {backend.host}: {backend.error}")
+            elif not backend.has_models(required):
+                print(f"[WARN] {backend.host}: missing {', '.join(backend.missing_models(required))}")
+        print("[ERROR] No ComfyUI backend can run this workflow")
+
+    def backend_for(self, prompt_id: str) -> Optional[Backend]:
+        """Backend a prompt was dispatched to (None if unknown)."""
+        with self._lock:
+            return self._routes.get(prompt_id)
+
+    def client_for(self, prompt_id: str) -> ComfyUIClient:
+        """Client for the backend that ran a prompt.
+
+        Args:
+            prompt_id: Prompt ID returned by queue_prompt
+
+        Returns:
+            ComfyUIClient of that backend
+
+        Raises:
+            KeyError: If the prompt was not dispatched by this pool
+        """
+        backend = self.backend_for(prompt_id)
+        if backend is None:
+            raise KeyError(f"Prompt {prompt_id} was not dispatched by this pool")
+        return backend.client
+
+    def wait_for_completion(self, prompt_id: str, **kwargs) -> Optional[Dict[str, Any]]:
+        """Wait for a prompt on the backend that runs it (see ComfyUIClient.wait_for_completion)."""
+        return self.client_for(prompt_id).wait_for_completion(prompt_id, **kwargs)
+
+    def get_history(self, prompt_id: str) -> Optional[Dict[str, Any]]:
+        """Get a prompt's history from the backend that ran it."""
+        return self.client_for(prompt_id).get_history(prompt_id)
+
+    def get_image(self, prompt_id: str, image_info: Dict[str, Any]) -> Optional[bytes]:
+        """Download an output from the backend that produced it.
+
+        Args:
+            prompt_id: Prompt ID returned by queue_prompt
+            image_info: Output entry from history (filename, subfolder, type)
+
+        Returns:
+            File bytes or None on failure
+        """
+        return self.client_for(prompt_id).get_image(
+            image_info["filename"], image_info.get("subfolder", ""), image_info.get("type", "output")
+        )
+
+    def cancel_prompt(self, prompt_id: str) -> bool:
+        """Remove a queued prompt from the backend it was sent to."""
+        return self.client_for(prompt_id).cancel_prompt(prompt_id)
+
+    def status(self) -> List[Dict[str, Any]]:
+        """Current state of every backend.
+
+        Returns:
+            One dict per backend (host, healthy, queue_remaining, vram_free, dispatched)
+        """
+        self.refresh()
+        with self._lock:
+            return [backend.to_dict() for backend in self.backends]
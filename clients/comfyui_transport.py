@@ -0,0 +1,258 @@
+"""Pooled HTTP transport for synchronous ComfyUI calls.
+
+generate.py and the metadata helpers used to call ``requests.get/post``
+directly, opening a new TCP connection to the GPU box for every availability
+check, model query, queue request, /history poll, download and upload. A
+ComfyUITransport wraps one ``requests.Session`` with a keep-alive connection
+pool and default (connect, read) timeouts, and counts requests and new
+connections so a run can report them.
+
+The host comes from the ``COMFYUI_HOST`` environment variable, then the
+``comfyui:`` section of presets.yaml, then the default server.
+
+Usage:
+    transport = get_transport()
+    response = transport.get("/object_info", timeout=10)
+    print(transport.stats())  # {"requests": 1, "connections": 1}
+"""
+
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_COMFYUI_HOST = "http://192.168.1.215:8188"  # ComfyUI running on moira
+
+# Seconds to establish a TCP connection; slightly above a TCP retransmit window
+DEFAULT_CONNECT_TIMEOUT = 3.05
+
+# Default seconds to wait for a response once connected
+DEFAULT_READ_TIMEOUT = 30.0
+
+# Keep-alive connections kept per host (parallel downloads/uploads each need one)
+DEFAULT_POOL_SIZE = 8
+
+# /system_stats responses younger than this are reused (availability check, metadata)
+SYSTEM_STATS_MAX_AGE = 30.0
+
+
+def comfyui_settings() -> Dict[str, Any]:
+    """Read the ``comfyui:`` section of presets.yaml.
+
+    Returns:
+        Settings dict (host, connect_timeout, read_timeout, pool_size), empty if unset
+    """
+    try:
+        from clients.config import get_config_loader
+
+        return get_config_loader().get_comfyui_settings()
+    except Exception:
+        return {}
+
+
+def resolve_comfyui_host(settings: Optional[Dict[str, Any]] = None) -> str:
+    """Resolve the ComfyUI URL from the environment, then config, then the default.
+
+    Args:
+        settings: ``comfyui:`` config section (read from presets.yaml if None)
+
+    Returns:
+        ComfyUI base URL without a trailing slash
+    """
+    host = os.getenv("COMFYUI_HOST")
+    if not host:
+        if settings is None:
+            settings = comfyui_settings()
+        host = settings.get("host") or DEFAULT_COMFYUI_HOST
+    return host.rstrip("/")
+
+
+class ComfyUITransport:
+    """Keep-alive requests session for one ComfyUI server."""
+
+    def __init__(
+        self,
+        host: str,
+        connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+        read_timeout: float = DEFAULT_READ_TIMEOUT,
+        pool_size: int = DEFAULT_POOL_SIZE,
+    ):
+        """Initialize the transport.
+
+        Args:
+            host: ComfyUI server URL
+            connect_timeout: Seconds to establish a connection
+            read_timeout: Default seconds to wait for a response
+            pool_size: Maximum keep-alive connections to the server
+        """
+        self.host = host.rstrip("/")
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+
+        self.session = requests.Session()
+        # No urllib3-level retries: callers such as queue_workflow retry with backoff themselves
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._adapter = adapter
+
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._closed_connections = 0
+        self._baseline = {"requests": 0, "connections": 0}
+        self._system_stats = None
+        self._system_stats_at = 0.0
+
+    def url(self, path: str) -> str:
+        """Absolute URL for a server path (absolute URLs pass through)."""
+        if path.startswith(("http://", "https://")):
+            return path
+        return f"{self.host}{path}"
+
+    def _timeout(self, timeout):
+        if timeout is None:
+            return (self.connect_timeout, self.read_timeout)
+        if isinstance(timeout, (int, float)):
+            return (min(self.connect_timeout, timeout), timeout)
+        return timeout
+
+    def _count(self) -> None:
+        with self._lock:
+            self._requests += 1
+
+    def get(self, path: str, timeout=None, **kwargs) -> requests.Response:
+        """GET a server path over the pooled session.
+
+        Args:
+            path: Server path (e.g. "/history/<id>") or absolute URL
+            timeout: Read timeout in seconds, a (connect, read) tuple, or None for the default
+            **kwargs: Passed to ``requests.Session.get``
+
+        Returns:
+            The response
+        """
+        self._count()
+        return self.session.get(self.url(path), timeout=self._timeout(timeout), **kwargs)
+
+    def post(self, path: str, timeout=None, **kwargs) -> requests.Response:
+        """POST to a server path over the pooled session.
+
+        Args:
+            path: Server path (e.g. "/prompt") or absolute URL
+            timeout: Read timeout in seconds, a (connect, read) tuple, or None for the default
+            **kwargs: Passed to ``requests.Session.post``
+
+        Returns:
+            The response
+        """
+        self._count()
+        return self.session.post(self.url(path), timeout=self._timeout(timeout), **kwargs)
+
+    def fetch_system_stats(self, timeout: float = 5) -> requests.Response:
+        """GET /system_stats and remember the payload for ``system_stats``.
+
+        Args:
+            timeout: Read timeout in seconds
+
+        Returns:
+            The response (exceptions propagate, as with ``get``)
+        """
+        response = self.get("/system_stats", timeout=timeout)
+        if response.status_code == 200:
+            try:
+                stats = response.json()
+            except ValueError:
+                stats = None
+            if isinstance(stats, dict):
+                self._system_stats = stats
+                self._system_stats_at = time.monotonic()
+        return response
+
+    def system_stats(self, max_age: float = SYSTEM_STATS_MAX_AGE) -> Optional[Dict[str, Any]]:
+        """Return /system_stats, reusing a recent response instead of another round trip.
+
+        Args:
+            max_age: Seconds a cached response stays valid
+
+        Returns:
+            Parsed /system_stats or None if the server cannot be reached
+        """
+        if self._system_stats is not None and time.monotonic() - self._system_stats_at < max_age:
+            return self._system_stats
+        try:
+            self.fetch_system_stats()
+        except requests.RequestException:
+            return None
+        return self._system_stats
+
+    def _connections(self) -> int:
+        """Connections opened so far (urllib3 counts them per pool)."""
+        total = self._closed_connections
+        pools = self._adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is not None:
+                total += pool.num_connections
+        return total
+
+    def stats(self) -> Dict[str, int]:
+        """Requests sent and TCP connections opened since the last ``reset_stats``.
+
+        Returns:
+            {"requests": int, "connections": int}
+        """
+        with self._lock:
+            return {
+                "requests": self._requests - self._baseline["requests"],
+                "connections": self._connections() - self._baseline["connections"],
+            }
+
+    def reset_stats(self) -> None:
+        """Start a new per-run count (pooled connections stay open)."""
+        with self._lock:
+            self._baseline = {"requests": self._requests, "connections": self._connections()}
+
+    def close(self) -> None:
+        """Close pooled connections."""
+        with self._lock:
+            self._closed_connections = self._connections()
+        self.session.close()
+
+
+# Transports shared per host so every call in a process reuses one pool
+_transports: Dict[str, ComfyUITransport] = {}
+_transports_lock = threading.Lock()
+
+
+def get_transport(host: Optional[str] = None) -> ComfyUITransport:
+    """Get the process-wide transport for a ComfyUI host.
+
+    Args:
+        host: ComfyUI server URL (resolved from env/config if None)
+
+    Returns:
+        Shared ComfyUITransport for the host
+    """
+    settings = None
+    if host is None:
+        settings = comfyui_settings()
+        host = resolve_comfyui_host(settings)
+    key = host.rstrip("/")
+    transport = _transports.get(key)
+    if transport is None:
+        with _transports_lock:
+            transport = _transports.get(key)
+            if transport is None:
+                if settings is None:
+                    settings = comfyui_settings()
+                transport = ComfyUITransport(
+                    key,
+                    connect_timeout=settings.get("connect_timeout", DEFAULT_CONNECT_TIMEOUT),
+                    read_timeout=settings.get("read_timeout", DEFAULT_READ_TIMEOUT),
+                    pool_size=settings.get("pool_size", DEFAULT_POOL_SIZE),
+                )
+                _transports[key] = transport
+    return transport
@@ -0,0 +1,287 @@
+"""Parsed-once workflow templates with precomputed patch points.
+
+Every workflow modifier (generate.py's ``modify_*`` helpers,
+``WorkflowManager.set_*``) used to scan the whole workflow for its node class
+on each call, ``find_prompt_nodes`` ran a regex over every node title, and
+each job (or MCP call) re-read and re-parsed the workflow JSON. A
+CompiledWorkflow parses a workflow file once (re-read when its mtime or size
+changes) and indexes its nodes by class_type, normalized title and role
+(positive/negative prompt).
+
+``CompiledWorkflow.instantiate()`` returns a WorkflowInstance: a plain
+workflow dict (JSON-serializable, usable by every existing helper) holding
+its own per-node copies of the template, plus a reference to the template's
+indexes. ``find_nodes(workflow, "KSampler")`` then answers from the index in
+O(1) instead of scanning. The index stays valid while nodes are only
+patched; once nodes are added or removed (LoRA or SAM injection), lookups on
+that instance fall back to a scan.
+
+Usage:
+    template = load_compiled_workflow("workflows/flux-dev.json")
+    workflow = template.instantiate()
+    workflow.set_inputs("KSampler", steps=30, seed=42)
+    positive, negative = template.prompt_nodes
+"""
+
+import json
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+# Title fragments (lowercase alphanumerics only) that mark prompt nodes
+POSITIVE_TITLE_PATTERNS = ("positive", "motionprompt")
+NEGATIVE_TITLE_PATTERN = "negative"
+
+
+def normalize_title(title: str) -> str:
+    """Normalize a node title for matching: lowercase and drop non-alphanumerics."""
+    return re.sub(r"[^a-z0-9]", "", title.lower())
+
+
+def detect_prompt_nodes(workflow: Dict[str, Any]) -> Tuple[Optional[str], Optional[str]]:
+    """Find the positive and negative CLIPTextEncode nodes by title.
+
+    - Positive: title contains "positive" or "motion prompt", else the first CLIPTextEncode
+    - Negative: title contains "negative"
+
+    Args:
+        workflow: Workflow dictionary
+
+    Returns:
+        (positive_node_id, negative_node_id), either may be None
+    """
+    positive_node = None
+    negative_node = None
+    first_clip_node = None
+
+    for node_id, node in workflow.items():
+        if node.get("class_type") != "CLIPTextEncode":
+            continue
+
+        # Track first CLIP node as fallback
+        if first_clip_node is None:
+            first_clip_node = node_id
+
+        title = normalize_title(node.get("_meta", {}).get("title", ""))
+        if any(pattern in title for pattern in POSITIVE_TITLE_PATTERNS):
+            positive_node = node_id
+        elif NEGATIVE_TITLE_PATTERN in title:
+            negative_node = node_id
+
+    # Fallback: use first CLIP node if no positive found
+    if positive_node is None:
+        positive_node = first_clip_node
+
+    return positive_node, negative_node
+
+
+def _copy_node(node: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy a node deep enough that patching its inputs never touches the template.
+
+    Input values are scalars or [node_id, output] links; links are copied too.
+    """
+    copied = dict(node)
+    inputs = node.get("inputs")
+    if isinstance(inputs, dict):
+        copied["inputs"] = {key: list(value) if isinstance(value, list) else value for key, value in inputs.items()}
+    return copied
+
+
+class CompiledWorkflow:
+    """A workflow parsed once, with its nodes indexed by class, title and role."""
+
+    def __init__(self, workflow: Dict[str, Any], path: Optional[str] = None):
+        """Index a parsed workflow.
+
+        Args:
+            workflow: Workflow dictionary (kept as the template; do not modify it)
+            path: File the workflow was read from, if any
+        """
+        self.path = path
+        self.template = workflow
+
+        self.position = {node_id: index for index, node_id in enumerate(workflow)}
+        self.by_class: Dict[str, List[str]] = {}
+        self.by_title: Dict[str, List[str]] = {}
+        for node_id, node in workflow.items():
+            if not isinstance(node, dict):
+                continue
+            self.by_class.setdefault(node.get("class_type", ""), []).append(node_id)
+            title = normalize_title(node.get("_meta", {}).get("title", ""))
+            if title:
+                self.by_title.setdefault(title, []).append(node_id)
+
+        self.prompt_nodes = detect_prompt_nodes(workflow)
+
+    @classmethod
+    def from_file(cls, path: str) -> "CompiledWorkflow":
+        """Parse and index a workflow JSON file.
+
+        Raises:
+            FileNotFoundError: If the file does not exist
+            json.JSONDecodeError: If the file is not valid JSON
+        """
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f), path=str(path))
+
+    def nodes(self, *class_types: str) -> List[str]:
+        """IDs of the template's nodes of the given classes, in workflow order."""
+        if len(class_types) == 1:
+            return list(self.by_class.get(class_types[0], []))
+        node_ids = [node_id for class_type in set(class_types) for node_id in self.by_class.get(class_type, [])]
+        return sorted(node_ids, key=self.position.__getitem__)
+
+    def nodes_titled(self, title: str) -> List[str]:
+        """IDs of the template's nodes whose normalized title equals ``normalize_title(title)``."""
+        return list(self.by_title.get(normalize_title(title), []))
+
+    def role(self, name: str) -> Optional[str]:
+        """Node ID for a role: "positive_prompt" or "negative_prompt"."""
+        roles = {"positive_prompt": self.prompt_nodes[0], "negative_prompt": self.prompt_nodes[1]}
+        if name not in roles:
+            raise KeyError(f"Unknown workflow role: {name}")
+        return roles[name]
+
+    def instantiate(self) -> "WorkflowInstance":
+        """Create a per-job workflow to patch: per-node copies, no JSON re-parse."""
+        instance = WorkflowInstance((node_id, _copy_node(node)) for node_id, node in self.template.items())
+        instance.compiled = self
+        return instance
+
+
+class WorkflowInstance(dict):
+    """A job's copy of a compiled workflow: a plain workflow dict that keeps its template's indexes.
+
+    Adding or removing nodes detaches the index (lookups then scan); patching
+    node inputs does not.
+    """
+
+    compiled: Optional[CompiledWorkflow] = None
+
+    def indexed(self) -> Optional[CompiledWorkflow]:
+        """The template index if this workflow still has the template's nodes, else None."""
+        return self.compiled
+
+    def __setitem__(self, node_id: str, node: Any) -> None:
+        if node_id not in self:
+            self.compiled = None
+        super().__setitem__(node_id, node)
+
+    def __delitem__(self, node_id: str) -> None:
+        self.compiled = None
+        super().__delitem__(node_id)
+
+    def pop(self, *args: Any) -> Any:
+        self.compiled = None
+        return super().pop(*args)
+
+    def popitem(self) -> Any:
+        self.compiled = None
+        return super().popitem()
+
+    def clear(self) -> None:
+        self.compiled = None
+        super().clear()
+
+    def update(self, *args: Any, **kwargs: Any) -> None:
+        self.compiled = None
+        super().update(*args, **kwargs)
+
+    def setdefault(self, node_id: str, default: Any = None) -> Any:
+        if node_id not in self:
+            self.compiled = None
+        return super().setdefault(node_id, default)
+
+    def set_inputs(self, class_type: str, **values: Any) -> List[str]:
+        """Set inputs on every node of a class that has an inputs dict.
+
+        Args:
+            class_type: Node class, e.g. "KSampler"
+            **values: Input names and values; None values are skipped
+
+        Returns:
+            IDs of the nodes that were patched
+        """
+        patched = []
+        for node_id in find_nodes(self, class_type):
+            inputs = self[node_id].get("inputs")
+            if isinstance(inputs, dict):
+                inputs.update({key: value for key, value in values.items() if value is not None})
+                patched.append(node_id)
+        return patched
+
+    def __copy__(self) -> "WorkflowInstance":
+        copied = WorkflowInstance(self)
+        copied.compiled = self.compiled
+        return copied
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> "WorkflowInstance":
+        # The template is immutable and shared; only the nodes are copied
+        copied = WorkflowInstance((node_id, _copy_node(node)) for node_id, node in self.items())
+        copied.compiled = self.compiled
+        return copied
+
+
+def find_nodes(workflow: Dict[str, Any], *class_types: str) -> List[str]:
+    """IDs of the workflow's nodes of the given classes, in workflow order.
+
+    Uses the compiled index for an unchanged WorkflowInstance; scans otherwise.
+
+    Args:
+        workflow: Workflow dictionary (plain dict or WorkflowInstance)
+        *class_types: Node classes to match
+
+    Returns:
+        Matching node IDs
+    """
+    compiled = workflow.indexed() if isinstance(workflow, WorkflowInstance) else None
+    if compiled is not None:
+        return compiled.nodes(*class_types)
+    return [node_id for node_id, node in workflow.items() if node.get("class_type") in class_types]
+
+
+def find_prompt_node_ids(workflow: Dict[str, Any]) -> Tuple[Optional[str], Optional[str]]:
+    """Positive and negative prompt node IDs, from the compiled index when available."""
+    compiled = workflow.indexed() if isinstance(workflow, WorkflowInstance) else None
+    if compiled is not None:
+        return compiled.prompt_nodes
+    return detect_prompt_nodes(workflow)
+
+
+# Compiled workflows by resolved path: (mtime_ns, size, CompiledWorkflow)
+_compiled_cache: Dict[str, Tuple[int, int, CompiledWorkflow]] = {}
+_cache_lock = threading.Lock()
+
+
+def load_compiled_workflow(path: str) -> CompiledWorkflow:
+    """Get the compiled workflow for a file, parsing it only when new or changed on disk.
+
+    Args:
+        path: Workflow JSON path
+
+    Returns:
+        CompiledWorkflow (shared; call instantiate() for a copy to patch)
+
+    Raises:
+        FileNotFoundError: If the file does not exist
+        json.JSONDecodeError: If the file is not valid JSON
+    """
+    resolved = str(Path(path).resolve())
+    stat = os.stat(resolved)
+    with _cache_lock:
+        cached = _compiled_cache.get(resolved)
+        if cached is not None and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+            return cached[2]
+
+    compiled = CompiledWorkflow.from_file(resolved)
+    with _cache_lock:
+        _compiled_cache[resolved] = (stat.st_mtime_ns, stat.st_size, compiled)
+    return compiled
+
+
+def clear_compiled_workflows() -> None:
+    """Forget every compiled workflow (the next load re-parses from disk)."""
+    with _cache_lock:
+        _compiled_cache.clear()
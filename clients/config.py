@@ -41,6 +41,7 @@ class ConfigLoader:
             - validation: Validation settings
             - negative_prompts: Subject-specific negative prompts
             - positive_emphasis: Positive prompt helpers
+            - comfyui: ComfyUI connection settings
         """
         if self._presets_cache is not None and not force_reload:
             return self._presets_cache
@@ -52,6 +53,7 @@ class ConfigLoader:
                 "validation": {},
                 "negative_prompts": {},
                 "positive_emphasis": {},
+                "comfyui": {},
             }
             return self._presets_cache
 
@@ -65,6 +67,7 @@ class ConfigLoader:
                 "validation": data.get("validation", {}),
                 "negative_prompts": data.get("negative_prompts", {}),
                 "positive_emphasis": data.get("positive_emphasis", {}),
+                "comfyui": data.get("comfyui") or {},
             }
             return self._presets_cache
 
@@ -76,6 +79,7 @@ class ConfigLoader:
                 "validation": {},
                 "negative_prompts": {},
                 "positive_emphasis": {},
+                "comfyui": {},
             }
             return self._presets_cache
 
@@ -109,6 +113,15 @@ class ConfigLoader:
         presets_data = self.load_presets()
         return presets_data.get("validation", {})
 
+    def get_comfyui_settings(self) -> Dict[str, Any]:
+        """Get ComfyUI connection settings.
+
+        Returns:
+            Connection configuration dict (host, backends, connect_timeout, read_timeout, pool_size)
+        """
+        presets_data = self.load_presets()
+        return presets_data.get("comfyui", {})
+
     def load_lora_catalog(self, force_reload: bool = False) -> Dict[str, Any]:
         """Load LoRA catalog from lora_catalog.yaml.
 
@@ -0,0 +1,260 @@
+"""Disk-backed cache of the model lists in ComfyUI's /object_info.
+
+/object_info describes every node class on the server and runs to several MB
+on a node-heavy install, yet generate.py, the MCP model tools and workflow
+validation only read a handful of model-name lists from it (checkpoints,
+LoRAs, VAEs, ...). It was downloaded on every run. This cache stores just
+those lists (see ``parse_available_models``), per backend, for ``ttl``
+seconds:
+- An in-memory copy serves repeated lookups within a process
+- A small JSON file per backend shares the lists across processes and runs
+
+A queued prompt rejected because a model is not on the server (ComfyUI's
+``value_not_in_list`` error on a model input) means the lists are stale;
+callers then drop the entry with ``invalidate`` so the next lookup refetches.
+
+Storage layout (default ~/.cache/comfy-gen/object_info, override with
+COMFYGEN_OBJECT_INFO_CACHE_DIR; set COMFYGEN_OBJECT_INFO_CACHE=0 for memory
+only, and COMFYGEN_OBJECT_INFO_CACHE_TTL to change the TTL in seconds).
+The COMFYGEN_OBJECT_INFO_CACHE prefix keeps these apart from
+COMFYGEN_MODEL_CACHE_MB, the RAM budget of the in-process validator model
+cache (utils/model_cache.py):
+    <cache_dir>/<host and port>.json   {"host": ..., "fetched_at": epoch, "models": {"checkpoints": [...], ...}}
+
+Usage:
+    cache = get_model_list_cache()
+    models = cache.get_or_fetch(host, fetch_models)          # fetch_models() -> dict or None
+    models = cache.get_or_fetch(host, fetch_models, refresh=True)
+    cache.invalidate(host)
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "comfy-gen" / "object_info"
+
+# Seconds cached model lists are used before /object_info is fetched again
+DEFAULT_TTL = 900.0
+
+# Node inputs that name a model file; a value_not_in_list error on one means a missing model
+MODEL_INPUT_NAMES = {
+    "ckpt_name",
+    "lora_name",
+    "vae_name",
+    "unet_name",
+    "clip_name",
+    "clip_name1",
+    "clip_name2",
+    "clip_name3",
+    "control_net_name",
+    "model_name",
+}
+
+
+def _default_cache_dir() -> Optional[Path]:
+    """Resolve the on-disk cache directory from the environment (None disables persistence)."""
+    if os.getenv("COMFYGEN_OBJECT_INFO_CACHE", "1").lower() in ("0", "false", "off", "no"):
+        return None
+    return Path(os.getenv("COMFYGEN_OBJECT_INFO_CACHE_DIR", str(DEFAULT_CACHE_DIR)))
+
+
+def _default_ttl() -> float:
+    try:
+        return float(os.getenv("COMFYGEN_OBJECT_INFO_CACHE_TTL", DEFAULT_TTL))
+    except ValueError:
+        return DEFAULT_TTL
+
+
+def _host_key(host: str) -> str:
+    """File-name-safe key for a backend URL ("http://192.168.1.215:8188" -> "192.168.1.215_8188")."""
+    host = re.sub(r"^[a-z]+://", "", host.rstrip("/"))
+    return re.sub(r"[^A-Za-z0-9.-]+", "_", host)
+
+
+def is_missing_model_error(response_body: Any) -> bool:
+    """Check whether a rejected /prompt response names a model the server does not have.
+
+    ComfyUI rejects such prompts with HTTP 400 and a ``value_not_in_list``
+    node error on the model input (e.g. ``ckpt_name: 'x.safetensors' not in [...]``).
+
+    Args:
+        response_body: Parsed JSON body of the /prompt response
+
+    Returns:
+        True if any node error is a missing-model error
+    """
+    if not isinstance(response_body, dict):
+        return False
+
+    errors: List[Dict[str, Any]] = []
+    top_level = response_body.get("error")
+    if isinstance(top_level, dict):
+        errors.append(top_level)
+    for node_error in (response_body.get("node_errors") or {}).values():
+        if isinstance(node_error, dict):
+            errors.extend(e for e in node_error.get("errors", []) if isinstance(e, dict))
+
+    for error in errors:
+        if error.get("type") != "value_not_in_list":
+            continue
+        input_name = (error.get("extra_info") or {}).get("input_name")
+        if not input_name:
+            input_name = str(error.get("details", "")).split(":", 1)[0].strip()
+        if input_name in MODEL_INPUT_NAMES:
+            return True
+    return False
+
+
+class ModelListCache:
+    """Per-backend model lists with a TTL, in memory and on disk."""
+
+    def __init__(self, cache_dir: Optional[str] = None, ttl: Optional[float] = None):
+        """Initialize the cache.
+
+        Args:
+            cache_dir: On-disk directory (None reads COMFYGEN_OBJECT_INFO_CACHE_DIR / default,
+                or disables persistence when COMFYGEN_OBJECT_INFO_CACHE=0)
+            ttl: Seconds entries stay fresh (None reads COMFYGEN_OBJECT_INFO_CACHE_TTL / DEFAULT_TTL)
+        """
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else _default_cache_dir()
+        self.ttl = ttl if ttl is not None else _default_ttl()
+        self._memory: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, host: str) -> Optional[Path]:
+        if self.cache_dir is None:
+            return None
+        return self.cache_dir / f"{_host_key(host)}.json"
+
+    def _read(self, host: str) -> Optional[Dict[str, Any]]:
+        entry = self._memory.get(host)
+        if entry is not None:
+            return entry
+
+        path = self._path(host)
+        if path is None or not path.exists():
+            return None
+        try:
+            entry = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if entry.get("host") != host or not isinstance(entry.get("models"), dict):
+            return None
+        self._memory[host] = entry
+        return entry
+
+    def get(self, host: str) -> Optional[Dict[str, List[str]]]:
+        """Return the backend's model lists if cached and younger than the TTL.
+
+        Args:
+            host: ComfyUI base URL
+
+        Returns:
+            Model lists by type, or None if missing or expired
+        """
+        with self._lock:
+            entry = self._read(host)
+        if entry is None or time.time() - entry.get("fetched_at", 0) > self.ttl:
+            return None
+        return entry["models"]
+
+    def age(self, host: str) -> Optional[float]:
+        """Seconds since the backend's model lists were fetched (None if not cached)."""
+        with self._lock:
+            entry = self._read(host)
+        return time.time() - entry["fetched_at"] if entry else None
+
+    def put(self, host: str, models: Dict[str, List[str]]) -> None:
+        """Store freshly fetched model lists for a backend.
+
+        Args:
+            host: ComfyUI base URL
+            models: Model lists by type (the output of parse_available_models)
+        """
+        entry = {"host": host, "fetched_at": time.time(), "models": models}
+        with self._lock:
+            self._memory[host] = entry
+            path = self._path(host)
+            if path is None:
+                return
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                # Write then rename so concurrent readers never see a partial file
+                tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+                tmp_path.write_text(json.dumps(entry), encoding="utf-8")
+                os.replace(tmp_path, path)
+            except OSError:
+                pass
+
+    def invalidate(self, host: str) -> None:
+        """Drop a backend's cached model lists so the next lookup refetches them.
+
+        Args:
+            host: ComfyUI base URL
+        """
+        with self._lock:
+            self._memory.pop(host, None)
+            path = self._path(host)
+            if path is not None:
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+
+    def get_or_fetch(
+        self,
+        host: str,
+        fetch: Callable[[], Optional[Dict[str, List[str]]]],
+        refresh: bool = False,
+    ) -> Optional[Dict[str, List[str]]]:
+        """Return cached model lists, fetching and storing them when missing or expired.
+
+        Args:
+            host: ComfyUI base URL
+            fetch: Returns the backend's model lists, or None on failure (not cached)
+            refresh: Ignore the cached entry and fetch
+
+        Returns:
+            Model lists by type, or None if they could not be fetched
+        """
+        if not refresh:
+            models = self.get(host)
+            if models is not None:
+                return models
+
+        models = fetch()
+        if models is not None:
+            self.put(host, models)
+        return models
+
+
+# Global instance shared by every client in this process
+_global_model_list_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_model_list_cache() -> ModelListCache:
+    """Get or create the process-wide ModelListCache (thread-safe).
+
+    Returns:
+        Global ModelListCache instance
+    """
+    global _global_model_list_cache
+    if _global_model_list_cache is None:
+        with _cache_lock:
+            # Double-check locking pattern
+            if _global_model_list_cache is None:
+                _global_model_list_cache = ModelListCache()
+    return _global_model_list_cache
+
+
+def reset_model_list_cache() -> None:
+    """Forget the process-wide cache so the next get_model_list_cache() re-reads the environment."""
+    global _global_model_list_cache
+    with _cache_lock:
+        _global_model_list_cache = None
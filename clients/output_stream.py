@@ -0,0 +1,201 @@
+"""Single-pass streaming of generated outputs to disk, MinIO and memory.
+
+Publishing an output used to copy it several times: the whole ``/view``
+response was loaded into memory, written to the local file, read back from
+disk by ``fput_object`` for the MinIO upload, and read again by the
+validators (the MCP tools even downloaded it twice more). For 4K upscales and
+Wan 2.2 videos that is a lot of redundant I/O.
+
+``stream_output`` reads the response in chunks once and tees every chunk to:
+- the local output file
+- a MinIO ``put_object`` stream (single PUT for small outputs, multipart
+  in MULTIPART_PART_SIZE parts for large ones)
+- an in-memory buffer, when the caller wants the bytes for validators
+
+If the upload fails part-way, the rest of the response is still written to
+the file and buffer, so the caller can retry the upload from disk.
+
+Usage:
+    with session.get(view_url, stream=True) as response:
+        streamed = stream_output(
+            response.iter_content(DEFAULT_CHUNK_SIZE),
+            "output.png",
+            length=response_length(response.headers),
+            minio_client=client,
+            bucket="comfy-gen",
+            object_name="20250101_120000_output.png",
+            keep_bytes=True,
+        )
+    ImageContext.from_bytes(streamed.data, path=streamed.path)
+"""
+
+import io
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Mapping, Optional
+
+# Bytes read from the HTTP response per chunk
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+# MinIO part size; outputs up to this size go up in one PUT, larger ones in parts
+MULTIPART_PART_SIZE = 16 * 1024 * 1024
+
+CONTENT_TYPES = {
+    ".png": "image/png",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".gif": "image/gif",
+    ".webp": "image/webp",
+    ".mp4": "video/mp4",
+    ".webm": "video/webm",
+    ".json": "application/json",
+}
+
+
+def content_type_for(path: str) -> str:
+    """MIME type for an output file, by extension, so browsers display it instead of downloading."""
+    return CONTENT_TYPES.get(Path(path).suffix.lower(), "application/octet-stream")
+
+
+def response_length(headers: Mapping[str, str]) -> Optional[int]:
+    """Body length from response headers, or None if unknown.
+
+    A Content-Encoding (ComfyUI's optional response compression) means the
+    decoded body differs from Content-Length, so the length is unknown.
+    """
+    if headers.get("Content-Encoding"):
+        return None
+    try:
+        return int(headers["Content-Length"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+class StreamedOutput:
+    """Result of streaming one output."""
+
+    def __init__(self, path: Optional[str], object_name: Optional[str]):
+        self.path = path
+        self.object_name = object_name
+        self.size = 0
+        self.data: Optional[bytes] = None
+        self.uploaded = False
+        self.upload_error: Optional[str] = None
+        # History entry the output came from ({"node_id", "kind", "filename", ...}), and its public URL once published
+        self.source: Optional[Dict[str, Any]] = None
+        self.url: Optional[str] = None
+
+    def __repr__(self) -> str:
+        return f"StreamedOutput(path={self.path!r}, size={self.size}, uploaded={self.uploaded})"
+
+
+class TeeReader(io.RawIOBase):
+    """Readable stream over response chunks that copies every chunk to a file and buffer as it is read."""
+
+    def __init__(self, chunks: Iterable[bytes], file: Optional[Any] = None, buffer: Optional[io.BytesIO] = None):
+        """Initialize the reader.
+
+        Args:
+            chunks: Response body chunks
+            file: Open binary file to copy chunks to
+            buffer: In-memory buffer to copy chunks to
+        """
+        self._chunks: Iterator[bytes] = iter(chunks)
+        self._file = file
+        self._buffer = buffer
+        # Chunks read past the last read(size); a bytearray so filling a multipart part is not quadratic
+        self._pending = bytearray()
+        self.size = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def _next_chunk(self) -> bytes:
+        for chunk in self._chunks:
+            if not chunk:
+                continue
+            if self._file is not None:
+                self._file.write(chunk)
+            if self._buffer is not None:
+                self._buffer.write(chunk)
+            self.size += len(chunk)
+            return chunk
+        return b""
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            data = bytes(self._pending) + b"".join(iter(self._next_chunk, b""))
+            self._pending.clear()
+            return data
+        while len(self._pending) < size:
+            chunk = self._next_chunk()
+            if not chunk:
+                break
+            self._pending += chunk
+        data = bytes(self._pending[:size])
+        del self._pending[:size]
+        return data
+
+    def drain(self) -> None:
+        """Consume the rest of the response (copying it) without returning it."""
+        self._pending.clear()
+        while self._next_chunk():
+            pass
+
+
+def stream_output(
+    chunks: Iterable[bytes],
+    output_path: Optional[str] = None,
+    length: Optional[int] = None,
+    minio_client: Optional[Any] = None,
+    bucket: Optional[str] = None,
+    object_name: Optional[str] = None,
+    keep_bytes: bool = False,
+    part_size: int = MULTIPART_PART_SIZE,
+) -> StreamedOutput:
+    """Stream an output's bytes to a local file, MinIO and memory in one pass.
+
+    Args:
+        chunks: Response body chunks (e.g. ``response.iter_content(DEFAULT_CHUNK_SIZE)``)
+        output_path: Local file to write (None to skip)
+        length: Body length if known (see response_length)
+        minio_client: Minio client to upload with (None to skip the upload)
+        bucket: Destination bucket (must exist)
+        object_name: Destination object name (required with minio_client)
+        keep_bytes: Keep the bytes in ``StreamedOutput.data`` for validators
+        part_size: Multipart part size for the upload
+
+    Returns:
+        StreamedOutput; on upload failure ``uploaded`` is False, ``upload_error``
+        is set and the local file and bytes are still complete
+
+    Raises:
+        OSError: If the local file cannot be written
+    """
+    result = StreamedOutput(str(output_path) if output_path is not None else None, object_name)
+    buffer = io.BytesIO() if keep_bytes else None
+
+    file = open(output_path, "wb") if output_path is not None else None
+    try:
+        reader = TeeReader(chunks, file=file, buffer=buffer)
+        if minio_client is not None and object_name:
+            try:
+                minio_client.put_object(
+                    bucket,
+                    object_name,
+                    reader,
+                    length=length if length is not None else -1,
+                    content_type=content_type_for(object_name),
+                    part_size=part_size,
+                )
+                result.uploaded = True
+            except Exception as e:
+                result.upload_error = str(e)
+        reader.drain()
+    finally:
+        if file is not None:
+            file.close()
+
+    result.size = reader.size
+    if buffer is not None:
+        result.data = buffer.getvalue()
+    return result
@@ -11,9 +11,9 @@ def _get_comfyui():
     """Get or create ComfyUI client."""
     global _comfyui
     if _comfyui is None:
-        from clients.comfyui_client import ComfyUIClient
+        from clients.async_comfyui_client import get_async_comfyui_client
 
-        _comfyui = ComfyUIClient(host=os.getenv("COMFYUI_HOST", "http://192.168.1.215:8188"))
+        _comfyui = get_async_comfyui_client(os.getenv("COMFYUI_HOST", "http://192.168.1.215:8188"))
     return _comfyui
 
 
@@ -28,7 +28,7 @@ async def get_progress(prompt_id: Optional[str] = None) -> Dict[str, Any]:
     """
     try:
         # Get queue status
-        queue = _get_comfyui().get_queue()
+        queue = await _get_comfyui().get_queue()
         if not queue:
             return {"status": "error", "error": "Failed to get queue status"}
 
@@ -58,7 +58,7 @@ async def get_progress(prompt_id: Optional[str] = None) -> Dict[str, Any]:
                     }
 
             # Not in queue - check history
-            history = _get_comfyui().get_history(prompt_id)
+            history = await _get_comfyui().get_history(prompt_id)
             if history and prompt_id in history:
                 return {"status": "completed", "prompt_id": prompt_id}
 
@@ -94,14 +94,14 @@ async def cancel(prompt_id: Optional[str] = None) -> Dict[str, Any]:
     try:
         if prompt_id:
             # Cancel specific prompt
-            success = _get_comfyui().cancel_prompt(prompt_id)
+            success = await _get_comfyui().cancel_prompt(prompt_id)
             if success:
                 return {"status": "success", "message": f"Cancelled prompt {prompt_id}"}
             else:
                 return {"status": "error", "error": f"Failed to cancel prompt {prompt_id}"}
         else:
             # Interrupt current generation
-            success = _get_comfyui().interrupt()
+            success = await _get_comfyui().interrupt()
             if success:
                 return {"status": "success", "message": "Interrupted current generation"}
             else:
@@ -117,7 +117,7 @@ async def get_queue() -> Dict[str, Any]:
         Dictionary with queue information
     """
     try:
-        queue = _get_comfyui().get_queue()
+        queue = await _get_comfyui().get_queue()
         if not queue:
             return {"status": "error", "error": "Failed to get queue status"}
 
@@ -155,11 +155,11 @@ async def get_system_status() -> Dict[str, Any]:
     """
     try:
         # Check if server is available
-        if not _get_comfyui().check_availability():
+        if not await _get_comfyui().check_availability():
             return {"status": "offline", "message": "ComfyUI server is not available"}
 
         # Get system stats
-        stats = _get_comfyui().get_system_stats()
+        stats = await _get_comfyui().get_system_stats()
         if not stats:
             return {"status": "error", "error": "Failed to get system stats"}
 
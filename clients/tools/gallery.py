@@ -12,9 +12,9 @@ def _get_comfyui():
     """Get or create ComfyUI client."""
     global _comfyui
     if _comfyui is None:
-        from clients.comfyui_client import ComfyUIClient
+        from clients.async_comfyui_client import get_async_comfyui_client
 
-        _comfyui = ComfyUIClient(host=os.getenv("COMFYUI_HOST", "http://192.168.1.215:8188"))
+        _comfyui = get_async_comfyui_client(os.getenv("COMFYUI_HOST", "http://192.168.1.215:8188"))
     return _comfyui
 
 
@@ -88,7 +88,7 @@ async def get_image_info(image_name: str) -> Dict[str, Any]:
 
         # Try to get generation parameters from ComfyUI history
         # This is a best-effort attempt - may not always have the data
-        history = _get_comfyui().get_history()
+        history = await _get_comfyui().get_history()
 
         generation_params = None
         if history:
@@ -149,7 +149,7 @@ async def get_history(limit: int = 10) -> Dict[str, Any]:
         Dictionary with generation history
     """
     try:
-        history = _get_comfyui().get_history()
+        history = await _get_comfyui().get_history()
         if not history:
             return {"status": "success", "history": [], "count": 0}
 
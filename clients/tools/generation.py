@@ -1,8 +1,10 @@
 """Image generation MCP tools."""
 
+import asyncio
+import functools
+import logging
 import os
 import re
-import tempfile
 from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict, List, Optional
@@ -29,9 +31,9 @@ def _get_comfyui():
     """Get or create ComfyUI client."""
     global _comfyui
     if _comfyui is None:
-        from clients.comfyui_client import ComfyUIClient
+        from clients.async_comfyui_client import get_async_comfyui_client
 
-        _comfyui = ComfyUIClient(host=os.getenv("COMFYUI_HOST", "http://192.168.1.215:8188"))
+        _comfyui = get_async_comfyui_client(os.getenv("COMFYUI_HOST", "http://192.168.1.215:8188"))
     return _comfyui
 
 
@@ -208,7 +210,7 @@ async def generate_image(
             workflow_mgr = _get_workflow_mgr()
 
             # Check server availability
-            if not comfyui.check_availability():
+            if not await comfyui.check_availability():
                 return {"status": "error", "error": "ComfyUI server is not available"}
 
             # Load appropriate workflow
@@ -233,18 +235,19 @@ async def generate_image(
 
             # Apply LoRAs if specified
             if loras:
-                for lora_spec in loras:
-                    lora_name = lora_spec.get("name")
-                    strength = lora_spec.get("strength", 1.0)
-                    if lora_name:
-                        workflow = workflow_mgr.inject_lora(workflow, lora_name, strength, strength)
+                lora_specs = [
+                    (spec["name"], spec.get("strength", 1.0), spec.get("strength", 1.0))
+                    for spec in loras
+                    if spec.get("name")
+                ]
+                workflow = workflow_mgr.inject_loras(workflow, lora_specs)
 
             # Apply transparency if requested
             if transparent:
                 workflow = workflow_mgr.enable_transparency(workflow)
 
             # Queue workflow
-            prompt_id = comfyui.queue_prompt(workflow)
+            prompt_id = await comfyui.queue_prompt(workflow)
             if not prompt_id:
                 last_error = "Failed to queue workflow"
                 if attempt >= max_attempts:
@@ -252,7 +255,7 @@ async def generate_image(
                 continue
 
             # Wait for completion with progress callback
-            result = comfyui.wait_for_completion(prompt_id, timeout=300, progress_callback=progress_callback)
+            result = await comfyui.wait_for_completion(prompt_id, timeout=300, progress_callback=progress_callback)
             if not result:
                 last_error = "Generation timed out or failed"
                 if attempt >= max_attempts:
@@ -289,62 +292,79 @@ async def generate_image(
                     return {"status": "error", "error": last_error, "prompt_id": prompt_id}
                 continue
 
-            # Download to local path if requested
+            # Stream the image from ComfyUI once; the local copy and validation share the bytes
             local_path = None
-            if output_path:
+            image_bytes = None
+            if output_path or validate:
                 try:
-                    import logging
-
-                    import requests
-
-                    response = requests.get(image_url, timeout=30)
-                    if response.status_code == 200:
-                        # Ensure parent directory exists
-                        output_dir = Path(output_path).parent
-                        output_dir.mkdir(parents=True, exist_ok=True)
-
-                        # Write file
-                        with open(output_path, "wb") as f:
-                            f.write(response.content)
-                        local_path = str(output_path)
-                    else:
+                    if output_path:
+                        Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+                    image_bytes = await comfyui.download_output(img_info, output_path)
+                    if image_bytes is None:
                         # Log warning but continue - local save is optional
-                        logging.warning(f"Failed to download image for local save: HTTP {response.status_code}")
+                        logging.warning("Failed to download image from ComfyUI")
+                    elif output_path:
+                        local_path = str(output_path)
                 except Exception as e:
                     # Log warning but continue - local save is optional
-                    import logging
-
                     logging.warning(f"Failed to save image locally: {str(e)}")
 
             # Run validation if requested
             if validate:
                 try:
-                    # Download image to temporary location for validation
-                    import requests
-
+                    from utils.image_context import ImageContext
                     from utils.validation import validate_image as validate_image_fn
 
-                    response = requests.get(image_url, timeout=30)
-                    if response.status_code == 200:
-                        with tempfile.NamedTemporaryFile(delete=False, suffix=".png") as tmp_file:
-                            tmp_file.write(response.content)
-                            tmp_path = tmp_file.name
+                    if image_bytes is not None:
+                        image_ctx = ImageContext.from_bytes(image_bytes, path=image_filename)
 
-                        try:
-                            # Run validation
-                            validation_result = validate_image_fn(
-                                tmp_path,
+                        # Run validation off the event loop so other tool calls keep running
+                        validation_result = await asyncio.get_running_loop().run_in_executor(
+                            None,
+                            functools.partial(
+                                validate_image_fn,
+                                image_ctx,
                                 original_prompt,  # Use original prompt for validation
                                 original_negative if original_negative else None,
                                 positive_threshold=positive_threshold,
-                            )
-
-                            # Clean up temp file
-                            os.unlink(tmp_path)
-
-                            # Check if validation passed
-                            if validation_result.get("passed"):
-                                # Success! Return result
+                            ),
+                        )
+
+                        # Check if validation passed
+                        if validation_result.get("passed"):
+                            # Success! Return result
+                            return {
+                                "status": "success",
+                                "url": image_url,
+                                "local_path": local_path,
+                                "prompt_id": prompt_id,
+                                "attempt": attempt,
+                                "validation": {
+                                    "passed": True,
+                                    "positive_score": validation_result.get("positive_score", 0.0),
+                                    "negative_score": validation_result.get("negative_score"),
+                                    "score_delta": validation_result.get("score_delta"),
+                                    "reason": validation_result.get("reason", ""),
+                                },
+                                "metadata": {
+                                    "prompt": current_prompt,
+                                    "original_prompt": original_prompt,
+                                    "negative_prompt": current_negative,
+                                    "model": model,
+                                    "width": width,
+                                    "height": height,
+                                    "steps": steps,
+                                    "cfg": cfg,
+                                    "sampler": sampler,
+                                    "scheduler": scheduler,
+                                    "seed": seed if seed != -1 else "random",
+                                    "loras": loras,
+                                },
+                            }
+                        else:
+                            # Validation failed
+                            if attempt >= max_attempts:
+                                # Max retries reached, return with validation failure
                                 return {
                                     "status": "success",
                                     "url": image_url,
@@ -352,11 +372,12 @@ async def generate_image(
                                     "prompt_id": prompt_id,
                                     "attempt": attempt,
                                     "validation": {
-                                        "passed": True,
+                                        "passed": False,
                                         "positive_score": validation_result.get("positive_score", 0.0),
                                         "negative_score": validation_result.get("negative_score"),
                                         "score_delta": validation_result.get("score_delta"),
                                         "reason": validation_result.get("reason", ""),
+                                        "warning": f"Max retries ({retry_limit}) reached",
                                     },
                                     "metadata": {
                                         "prompt": current_prompt,
@@ -373,49 +394,11 @@ async def generate_image(
                                         "loras": loras,
                                     },
                                 }
-                            else:
-                                # Validation failed
-                                if attempt >= max_attempts:
-                                    # Max retries reached, return with validation failure
-                                    return {
-                                        "status": "success",
-                                        "url": image_url,
-                                        "local_path": local_path,
-                                        "prompt_id": prompt_id,
-                                        "attempt": attempt,
-                                        "validation": {
-                                            "passed": False,
-                                            "positive_score": validation_result.get("positive_score", 0.0),
-                                            "negative_score": validation_result.get("negative_score"),
-                                            "score_delta": validation_result.get("score_delta"),
-                                            "reason": validation_result.get("reason", ""),
-                                            "warning": f"Max retries ({retry_limit}) reached",
-                                        },
-                                        "metadata": {
-                                            "prompt": current_prompt,
-                                            "original_prompt": original_prompt,
-                                            "negative_prompt": current_negative,
-                                            "model": model,
-                                            "width": width,
-                                            "height": height,
-                                            "steps": steps,
-                                            "cfg": cfg,
-                                            "sampler": sampler,
-                                            "scheduler": scheduler,
-                                            "seed": seed if seed != -1 else "random",
-                                            "loras": loras,
-                                        },
-                                    }
-                                # Continue to next retry
-                                continue
-                        except Exception as e:
-                            # Validation error, clean up and continue
-                            if os.path.exists(tmp_path):
-                                os.unlink(tmp_path)
-                            raise e
+                            # Continue to next retry
+                            continue
                     else:
                         # Failed to download image for validation
-                        last_error = f"Failed to download image for validation: HTTP {response.status_code}"
+                        last_error = "Failed to download image for validation"
                         if attempt >= max_attempts:
                             return {"status": "error", "error": last_error, "url": image_url, "prompt_id": prompt_id}
                         continue
@@ -507,7 +490,7 @@ async def img2img(
         workflow_mgr = _get_workflow_mgr()
 
         # Check server availability
-        if not comfyui.check_availability():
+        if not await comfyui.check_availability():
             return {"status": "error", "error": "ComfyUI server is not available"}
 
         # Load img2img workflow
@@ -525,19 +508,20 @@ async def img2img(
 
         # Apply LoRAs if specified
         if loras:
-            for lora_spec in loras:
-                lora_name = lora_spec.get("name")
-                strength = lora_spec.get("strength", 1.0)
-                if lora_name:
-                    workflow = workflow_mgr.inject_lora(workflow, lora_name, strength, strength)
+            lora_specs = [
+                (spec["name"], spec.get("strength", 1.0), spec.get("strength", 1.0))
+                for spec in loras
+                if spec.get("name")
+            ]
+            workflow = workflow_mgr.inject_loras(workflow, lora_specs)
 
         # Queue workflow
-        prompt_id = comfyui.queue_prompt(workflow)
+        prompt_id = await comfyui.queue_prompt(workflow)
         if not prompt_id:
             return {"status": "error", "error": "Failed to queue workflow"}
 
         # Wait for completion
-        result = comfyui.wait_for_completion(prompt_id, timeout=300)
+        result = await comfyui.wait_for_completion(prompt_id, timeout=300)
         if not result:
             return {"status": "error", "error": "Generation timed out or failed", "prompt_id": prompt_id}
 
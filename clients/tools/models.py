@@ -13,9 +13,9 @@ def _get_comfyui():
     """Get or create ComfyUI client."""
     global _comfyui
     if _comfyui is None:
-        from clients.comfyui_client import ComfyUIClient
+        from clients.async_comfyui_client import get_async_comfyui_client
 
-        _comfyui = ComfyUIClient(host=os.getenv("COMFYUI_HOST", "http://192.168.1.215:8188"))
+        _comfyui = get_async_comfyui_client(os.getenv("COMFYUI_HOST", "http://192.168.1.215:8188"))
     return _comfyui
 
 
@@ -39,14 +39,17 @@ def _get_model_registry():
     return _model_registry
 
 
-async def list_models() -> Dict[str, Any]:
+async def list_models(refresh: bool = False) -> Dict[str, Any]:
     """List installed checkpoint models.
 
+    Args:
+        refresh: Re-download the model lists instead of using the cached copy
+
     Returns:
         Dictionary with list of installed models
     """
     try:
-        models = _get_comfyui().get_available_models()
+        models = await _get_comfyui().get_available_models(refresh=refresh)
         if not models:
             return {"status": "error", "error": "Failed to retrieve models from ComfyUI"}
 
@@ -61,14 +64,17 @@ async def list_models() -> Dict[str, Any]:
         return {"status": "error", "error": str(e)}
 
 
-async def list_loras() -> Dict[str, Any]:
+async def list_loras(refresh: bool = False) -> Dict[str, Any]:
     """List installed LoRAs with compatibility info.
 
+    Args:
+        refresh: Re-download the model lists instead of using the cached copy
+
     Returns:
         Dictionary with list of installed LoRAs
     """
     try:
-        models = _get_comfyui().get_available_models()
+        models = await _get_comfyui().get_available_models(refresh=refresh)
         if not models:
             return {"status": "error", "error": "Failed to retrieve LoRAs from ComfyUI"}
 
@@ -115,7 +121,7 @@ async def get_model_info(model_name: str) -> Dict[str, Any]:
         Dictionary with model metadata
     """
     try:
-        models = _get_comfyui().get_available_models()
+        models = await _get_comfyui().get_available_models()
         if not models:
             return {"status": "error", "error": "Failed to retrieve models from ComfyUI"}
 
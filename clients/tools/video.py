@@ -14,9 +14,9 @@ def _get_comfyui():
     """Get or create ComfyUI client."""
     global _comfyui
     if _comfyui is None:
-        from clients.comfyui_client import ComfyUIClient
+        from clients.async_comfyui_client import get_async_comfyui_client
 
-        _comfyui = ComfyUIClient(host=os.getenv("COMFYUI_HOST", "http://192.168.1.215:8188"))
+        _comfyui = get_async_comfyui_client(os.getenv("COMFYUI_HOST", "http://192.168.1.215:8188"))
     return _comfyui
 
 
@@ -83,7 +83,7 @@ async def generate_video(
     """
     try:
         # Check server availability
-        if not _get_comfyui().check_availability():
+        if not await _get_comfyui().check_availability():
             return {"status": "error", "error": "ComfyUI server is not available"}
 
         # Load Wan 2.2 T2V workflow
@@ -102,19 +102,20 @@ async def generate_video(
 
         # Apply LoRAs if specified
         if loras:
-            for lora_spec in loras:
-                lora_name = lora_spec.get("name")
-                strength = lora_spec.get("strength", 1.0)
-                if lora_name:
-                    workflow = _get_workflow_mgr().inject_lora(workflow, lora_name, strength, strength)
+            lora_specs = [
+                (spec["name"], spec.get("strength", 1.0), spec.get("strength", 1.0))
+                for spec in loras
+                if spec.get("name")
+            ]
+            workflow = _get_workflow_mgr().inject_loras(workflow, lora_specs)
 
         # Queue workflow
-        prompt_id = _get_comfyui().queue_prompt(workflow)
+        prompt_id = await _get_comfyui().queue_prompt(workflow)
         if not prompt_id:
             return {"status": "error", "error": "Failed to queue workflow"}
 
         # Wait for completion (videos take longer)
-        result = _get_comfyui().wait_for_completion(prompt_id, timeout=600)
+        result = await _get_comfyui().wait_for_completion(prompt_id, timeout=600)
         if not result:
             return {"status": "error", "error": "Generation timed out or failed", "prompt_id": prompt_id}
 
@@ -174,7 +175,7 @@ async def image_to_video(
     """
     try:
         # Check server availability
-        if not _get_comfyui().check_availability():
+        if not await _get_comfyui().check_availability():
             return {"status": "error", "error": "ComfyUI server is not available"}
 
         # Load Wan 2.2 I2V workflow
@@ -195,19 +196,20 @@ async def image_to_video(
 
         # Apply LoRAs if specified
         if loras:
-            for lora_spec in loras:
-                lora_name = lora_spec.get("name")
-                strength = lora_spec.get("strength", 1.0)
-                if lora_name:
-                    workflow = _get_workflow_mgr().inject_lora(workflow, lora_name, strength, strength)
+            lora_specs = [
+                (spec["name"], spec.get("strength", 1.0), spec.get("strength", 1.0))
+                for spec in loras
+                if spec.get("name")
+            ]
+            workflow = _get_workflow_mgr().inject_loras(workflow, lora_specs)
 
         # Queue workflow
-        prompt_id = _get_comfyui().queue_prompt(workflow)
+        prompt_id = await _get_comfyui().queue_prompt(workflow)
         if not prompt_id:
             return {"status": "error", "error": "Failed to queue workflow"}
 
         # Wait for completion
-        result = _get_comfyui().wait_for_completion(prompt_id, timeout=600)
+        result = await _get_comfyui().wait_for_completion(prompt_id, timeout=600)
         if not result:
             return {"status": "error", "error": "Generation timed out or failed", "prompt_id": prompt_id}
 
@@ -0,0 +1,204 @@
+"""Workflow graph with a reverse-edge index for node injection and rewiring.
+
+A ComfyUI workflow stores only forward links: each input that takes another
+node's output holds ``[source_node_id, output_index]``. Finding who consumes
+an output (to splice a LoRA in front of them) meant scanning every node's
+inputs, once for MODEL and again for CLIP, for every injected LoRA, and
+picking the next node ID meant another pass over all keys.
+
+WorkflowGraph indexes the links once: consumers per ``(node_id, output)``.
+The index is kept up to date as nodes are added and inputs are relinked, so
+a whole LoRA stack is spliced with one index build and one batch rewire.
+
+The graph edits the workflow dict it was built from in place; edit the
+workflow only through the graph while the graph is in use.
+
+Usage:
+    graph = WorkflowGraph(workflow)
+    graph.consumers("4", 0)                       # [("3", "model"), ...]
+    new_ids = graph.splice_lora_stack([("detail.safetensors", 0.8, 0.8), ("style.safetensors", 0.5, 0.5)])
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from clients.compiled_workflow import find_nodes
+
+# (lora_name, strength_model, strength_clip)
+LoraSpec = Tuple[str, float, float]
+
+# Node classes a LoRA stack is spliced after by default
+MODEL_LOADER_CLASSES = ("CheckpointLoaderSimple", "UNETLoader")
+
+
+def _link_source(value: Any) -> Optional[Tuple[Any, Any]]:
+    """The (node_id, output) an input value links to, or None for a plain value."""
+    if isinstance(value, list) and len(value) == 2 and isinstance(value[0], (str, int)):
+        if isinstance(value[1], (str, int)):
+            return value[0], value[1]
+    return None
+
+
+class WorkflowGraph:
+    """A workflow dict plus a maintained index of each output's consumers."""
+
+    def __init__(self, workflow: Dict[str, Any]):
+        """Index a workflow's links.
+
+        Args:
+            workflow: Workflow dictionary (edited in place by the graph)
+        """
+        self.workflow = workflow
+        self._consumers: Dict[Tuple[Any, Any], List[Tuple[str, str]]] = {}
+
+        numeric_ids = [int(node_id) for node_id in workflow if str(node_id).isdigit()]
+        self.next_id = max(numeric_ids) + 1 if numeric_ids else None
+
+        for node_id, node in workflow.items():
+            self._index_node(node_id, node)
+
+    def _index_node(self, node_id: str, node: Any) -> None:
+        inputs = node.get("inputs") if isinstance(node, dict) else None
+        if not isinstance(inputs, dict):
+            return
+        for input_key, value in inputs.items():
+            source = _link_source(value)
+            if source is not None:
+                self._consumers.setdefault(source, []).append((node_id, input_key))
+
+    def consumers(self, node_id: str, output: int = 0) -> List[Tuple[str, str]]:
+        """Inputs linked to a node's output.
+
+        Args:
+            node_id: Source node ID
+            output: Output index
+
+        Returns:
+            (target_node_id, input_key) pairs, in workflow order
+        """
+        return list(self._consumers.get((node_id, output), []))
+
+    def add_node(self, node: Dict[str, Any]) -> str:
+        """Add a node under the next free numeric ID and index its links.
+
+        Args:
+            node: Node dictionary ({"class_type": ..., "inputs": {...}})
+
+        Returns:
+            The new node's ID
+
+        Raises:
+            ValueError: If the workflow has no numeric node IDs to continue from
+        """
+        if self.next_id is None:
+            raise ValueError("No numeric node IDs found in workflow")
+        node_id = str(self.next_id)
+        self.next_id += 1
+        self.workflow[node_id] = node
+        self._index_node(node_id, node)
+        return node_id
+
+    def rewire(self, redirects: Dict[Tuple[Any, Any], List[Any]], exclude: Iterable[str] = ()) -> int:
+        """Move every consumer of some outputs onto other outputs in one pass.
+
+        Args:
+            redirects: Old (node_id, output) -> new [node_id, output] link
+            exclude: Node IDs whose inputs are left alone (e.g. the nodes being spliced in)
+
+        Returns:
+            Number of inputs relinked
+        """
+        excluded = set(exclude)
+        moved = 0
+        for old_source, new_link in redirects.items():
+            kept = []
+            moving = []
+            for target_id, input_key in self._consumers.get(old_source, []):
+                (kept if target_id in excluded else moving).append((target_id, input_key))
+            if not moving:
+                continue
+
+            for target_id, input_key in moving:
+                self.workflow[target_id]["inputs"][input_key] = list(new_link)
+            self._consumers[old_source] = kept
+            self._consumers.setdefault(tuple(new_link), []).extend(moving)
+            moved += len(moving)
+        return moved
+
+    def splice_lora_stack(self, lora_specs: Sequence[LoraSpec], insert_after: Optional[str] = None) -> List[str]:
+        """Chain LoraLoader nodes after a model source and move its consumers to the end of the chain.
+
+        Source outputs by node type:
+        - CheckpointLoaderSimple: MODEL [id, 0], CLIP [id, 1]
+        - UNETLoader: MODEL [id, 0]; CLIP from the first DualCLIPLoader (its
+          consumers are not rewired)
+        - LoraLoader: MODEL [id, 0], CLIP [id, 1] (extends an existing chain)
+
+        Args:
+            lora_specs: (lora_name, strength_model, strength_clip) per LoRA, in chain order
+            insert_after: Source node ID (default: first CheckpointLoaderSimple or UNETLoader)
+
+        Returns:
+            IDs of the new LoraLoader nodes in chain order, or [] if nothing could be injected
+        """
+        if not lora_specs:
+            return []
+
+        if self.next_id is None:
+            print("[ERROR] Cannot inject LoRA: No numeric node IDs found in workflow")
+            return []
+
+        if insert_after is None:
+            loaders = find_nodes(self.workflow, *MODEL_LOADER_CLASSES)
+            insert_after = loaders[0] if loaders else None
+        if insert_after is None:
+            print("[ERROR] Cannot inject LoRA: No checkpoint or UNET loader found in workflow")
+            return []
+
+        source_node = self.workflow.get(insert_after)
+        if not source_node:
+            print(f"[ERROR] Cannot inject LoRA: Source node {insert_after} not found")
+            return []
+
+        source_class = source_node.get("class_type", "")
+        model_output = [insert_after, 0]
+        rewire_clip = True
+        if source_class in ("CheckpointLoaderSimple", "LoraLoader"):
+            clip_output = [insert_after, 1]
+        elif source_class == "UNETLoader":
+            # For Wan 2.2, CLIP comes from DualCLIPLoader
+            rewire_clip = False
+            clip_loaders = find_nodes(self.workflow, "DualCLIPLoader")
+            if clip_loaders:
+                clip_output = [clip_loaders[0], 0]
+            else:
+                print("[WARN] No CLIP loader found for LoRA, using model connection only")
+                clip_output = model_output
+        else:
+            print(f"[ERROR] Cannot inject LoRA after node type: {source_class}")
+            return []
+
+        new_ids = []
+        previous_model, previous_clip = model_output, clip_output
+        for lora_name, strength_model, strength_clip in lora_specs:
+            node_id = self.add_node(
+                {
+                    "class_type": "LoraLoader",
+                    "inputs": {
+                        "model": list(previous_model),
+                        "clip": list(previous_clip),
+                        "lora_name": lora_name,
+                        "strength_model": strength_model,
+                        "strength_clip": strength_clip,
+                    },
+                    "_meta": {"title": f"LoRA: {lora_name}"},
+                }
+            )
+            new_ids.append(node_id)
+            previous_model, previous_clip = [node_id, 0], [node_id, 1]
+            print(f"[OK] Injected LoRA '{lora_name}' as node {node_id} (strength: {strength_model})")
+
+        redirects = {tuple(model_output): previous_model}
+        if rewire_clip:
+            redirects[tuple(clip_output)] = previous_clip
+        self.rewire(redirects, exclude=new_ids)
+        return new_ids
@@ -3,7 +3,10 @@
 import json
 import random
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
+
+from clients.compiled_workflow import find_nodes, load_compiled_workflow
+from clients.workflow_graph import WorkflowGraph
 
 
 class WorkflowManager:
@@ -24,6 +27,9 @@ class WorkflowManager:
     def load_workflow(self, workflow_path: str) -> Optional[Dict[str, Any]]:
         """Load a workflow from JSON file.
 
+        The file is parsed once per process (again only if it changes on
+        disk); each call returns a fresh copy to modify.
+
         Args:
             workflow_path: Path to workflow JSON file
 
@@ -35,8 +41,7 @@ class WorkflowManager:
             if not path.is_absolute():
                 path = self.workflows_dir / workflow_path
 
-            with open(path, encoding="utf-8") as f:
-                return json.load(f)
+            return load_compiled_workflow(str(path)).instantiate()
         except Exception:
             return None
 
@@ -68,23 +73,19 @@ class WorkflowManager:
         Returns:
             Modified workflow
         """
-        for _node_id, node in workflow.items():
-            class_type = node.get("class_type", "")
-
-            # Handle CLIPTextEncode nodes
-            if class_type == "CLIPTextEncode":
-                inputs = node.get("inputs", {})
-                # Identify positive vs negative by looking at connected nodes or text content
-                current_text = inputs.get("text", "")
+        for node_id in find_nodes(workflow, "CLIPTextEncode"):
+            inputs = workflow[node_id].get("inputs", {})
+            # Identify positive vs negative by looking at connected nodes or text content
+            current_text = inputs.get("text", "")
 
-                # Simple heuristic: if current text looks negative, use negative prompt
-                negative_keywords = ["bad", "blurry", "low quality", "worst", "ugly"]
-                is_negative = any(keyword in current_text.lower() for keyword in negative_keywords)
+            # Simple heuristic: if current text looks negative, use negative prompt
+            negative_keywords = ["bad", "blurry", "low quality", "worst", "ugly"]
+            is_negative = any(keyword in current_text.lower() for keyword in negative_keywords)
 
-                if is_negative and negative_prompt:
-                    inputs["text"] = negative_prompt
-                elif not is_negative and prompt:
-                    inputs["text"] = prompt
+            if is_negative and negative_prompt:
+                inputs["text"] = negative_prompt
+            elif not is_negative and prompt:
+                inputs["text"] = prompt
 
         return workflow
 
@@ -101,10 +102,10 @@ class WorkflowManager:
         if seed == -1:
             seed = random.randint(0, 2**32 - 1)
 
-        for _node_id, node in workflow.items():
-            if node.get("class_type") in ["KSampler", "KSamplerAdvanced", "SamplerCustom"]:
-                if "inputs" in node:
-                    node["inputs"]["seed"] = seed
+        for node_id in find_nodes(workflow, "KSampler", "KSamplerAdvanced", "SamplerCustom"):
+            node = workflow[node_id]
+            if "inputs" in node:
+                node["inputs"]["seed"] = seed
 
         return workflow
 
@@ -121,13 +122,13 @@ class WorkflowManager:
         Returns:
             Modified workflow
         """
-        for _node_id, node in workflow.items():
-            if node.get("class_type") == "EmptyLatentImage":
-                if "inputs" in node:
-                    if width is not None:
-                        node["inputs"]["width"] = width
-                    if height is not None:
-                        node["inputs"]["height"] = height
+        for node_id in find_nodes(workflow, "EmptyLatentImage"):
+            node = workflow[node_id]
+            if "inputs" in node:
+                if width is not None:
+                    node["inputs"]["width"] = width
+                if height is not None:
+                    node["inputs"]["height"] = height
 
         return workflow
 
@@ -149,15 +150,15 @@ class WorkflowManager:
         Returns:
             Modified workflow
         """
-        for _node_id, node in workflow.items():
-            if node.get("class_type") == "EmptyLatentVideo":
-                if "inputs" in node:
-                    if width is not None:
-                        node["inputs"]["width"] = width
-                    if height is not None:
-                        node["inputs"]["height"] = height
-                    if length is not None:
-                        node["inputs"]["length"] = length
+        for node_id in find_nodes(workflow, "EmptyLatentVideo"):
+            node = workflow[node_id]
+            if "inputs" in node:
+                if width is not None:
+                    node["inputs"]["width"] = width
+                if height is not None:
+                    node["inputs"]["height"] = height
+                if length is not None:
+                    node["inputs"]["length"] = length
 
         return workflow
 
@@ -171,11 +172,11 @@ class WorkflowManager:
         Returns:
             Modified workflow
         """
-        for _node_id, node in workflow.items():
-            if node.get("class_type") == "VHS_VideoCombine":
-                if "inputs" in node:
-                    if fps is not None:
-                        node["inputs"]["frame_rate"] = fps
+        for node_id in find_nodes(workflow, "VHS_VideoCombine"):
+            node = workflow[node_id]
+            if "inputs" in node:
+                if fps is not None:
+                    node["inputs"]["frame_rate"] = fps
 
         return workflow
 
@@ -201,19 +202,19 @@ class WorkflowManager:
         Returns:
             Modified workflow
         """
-        for _node_id, node in workflow.items():
-            if node.get("class_type") in ["KSampler", "KSamplerAdvanced"]:
-                if "inputs" in node:
-                    if steps is not None:
-                        node["inputs"]["steps"] = steps
-                    if cfg is not None:
-                        node["inputs"]["cfg"] = cfg
-                    if sampler_name is not None:
-                        node["inputs"]["sampler_name"] = sampler_name
-                    if scheduler is not None:
-                        node["inputs"]["scheduler"] = scheduler
-                    if denoise is not None:
-                        node["inputs"]["denoise"] = denoise
+        for node_id in find_nodes(workflow, "KSampler", "KSamplerAdvanced"):
+            node = workflow[node_id]
+            if "inputs" in node:
+                if steps is not None:
+                    node["inputs"]["steps"] = steps
+                if cfg is not None:
+                    node["inputs"]["cfg"] = cfg
+                if sampler_name is not None:
+                    node["inputs"]["sampler_name"] = sampler_name
+                if scheduler is not None:
+                    node["inputs"]["scheduler"] = scheduler
+                if denoise is not None:
+                    node["inputs"]["denoise"] = denoise
 
         return workflow
 
@@ -227,10 +228,10 @@ class WorkflowManager:
         Returns:
             Modified workflow
         """
-        for _node_id, node in workflow.items():
-            if node.get("class_type") == "CheckpointLoaderSimple":
-                if "inputs" in node:
-                    node["inputs"]["ckpt_name"] = checkpoint_name
+        for node_id in find_nodes(workflow, "CheckpointLoaderSimple"):
+            node = workflow[node_id]
+            if "inputs" in node:
+                node["inputs"]["ckpt_name"] = checkpoint_name
 
         return workflow
 
@@ -239,8 +240,8 @@ class WorkflowManager:
     ) -> Dict[str, Any]:
         """Inject a LoRA into workflow.
 
-        Note: This is a simplified implementation. For complex multi-LoRA injection,
-        see the inject_lora function in generate.py.
+        Updates the workflow's first LoraLoader if it has one; otherwise
+        splices a new LoraLoader after the model loader.
 
         Args:
             workflow: Workflow dictionary
@@ -251,17 +252,31 @@ class WorkflowManager:
         Returns:
             Modified workflow
         """
-        # Find existing LoraLoader nodes and update them
-        for _node_id, node in workflow.items():
-            if node.get("class_type") == "LoraLoader":
-                if "inputs" in node:
-                    node["inputs"]["lora_name"] = lora_name
-                    node["inputs"]["strength_model"] = strength_model
-                    node["inputs"]["strength_clip"] = strength_clip
-                    return workflow
-
-        # If no LoraLoader exists, this would require complex node insertion
-        # For now, just return workflow unchanged
+        return self.inject_loras(workflow, [(lora_name, strength_model, strength_clip)])
+
+    def inject_loras(self, workflow: Dict[str, Any], lora_specs: List[Tuple[str, float, float]]) -> Dict[str, Any]:
+        """Apply a LoRA stack to a workflow in one pass.
+
+        The workflow's existing LoraLoader nodes take the first specs, in
+        workflow order; the remaining LoRAs are chained after the last of them
+        (or after the model loader) with a single rewire of the downstream links.
+
+        Args:
+            workflow: Workflow dictionary
+            lora_specs: (lora_name, strength_model, strength_clip) per LoRA
+
+        Returns:
+            Modified workflow
+        """
+        existing = [node_id for node_id in find_nodes(workflow, "LoraLoader") if "inputs" in workflow[node_id]]
+        for node_id, (lora_name, strength_model, strength_clip) in zip(existing, lora_specs):
+            workflow[node_id]["inputs"]["lora_name"] = lora_name
+            workflow[node_id]["inputs"]["strength_model"] = strength_model
+            workflow[node_id]["inputs"]["strength_clip"] = strength_clip
+
+        remaining = lora_specs[len(existing) :]
+        if remaining:
+            WorkflowGraph(workflow).splice_lora_stack(remaining, insert_after=existing[-1] if existing else None)
         return workflow
 
     def list_available_workflows(self) -> List[str]:
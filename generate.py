@@ -6,6 +6,7 @@ Usage:
 """
 
 import argparse
+import copy
 import json
 import os
 import random
@@ -16,17 +17,28 @@ import tempfile
 import threading
 import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from urllib.parse import urlparse
 
 import requests
-import websocket
 import yaml
 from minio import Minio
 from minio.error import S3Error
 from PIL import Image
 
-COMFYUI_HOST = "http://192.168.1.215:8188"  # ComfyUI running on moira
+from clients.comfyui_client import parse_available_models
+from clients.comfyui_events import TERMINAL_EVENT_TYPES, get_event_stream
+from clients.comfyui_transport import get_transport, resolve_comfyui_host
+from clients.compiled_workflow import find_nodes, find_prompt_node_ids, load_compiled_workflow
+from clients.model_list_cache import get_model_list_cache, is_missing_model_error
+from clients.output_stream import DEFAULT_CHUNK_SIZE, content_type_for, response_length, stream_output
+from clients.workflow_graph import WorkflowGraph
+from utils.image_context import ImageContext
+from utils.prompts import DEFAULT_SD_NEGATIVE_PROMPT
+from utils.validation_runner import is_skipped, result_or_raise
+
+COMFYUI_HOST = resolve_comfyui_host()  # COMFYUI_HOST env var, then presets.yaml comfyui.host
 
 # MinIO configuration
 MINIO_ENDPOINT = "192.168.1.215:9000"
@@ -44,14 +56,19 @@ MAX_RETRIES = 3
 RETRY_DELAY = 2  # seconds
 RETRY_BACKOFF = 2  # exponential backoff multiplier
 
-# Default negative prompts
-DEFAULT_SD_NEGATIVE_PROMPT = "bad quality, blurry, low resolution, watermark, text, deformed, ugly, duplicate"
-
 # WebSocket configuration
-WS_CONNECT_DELAY = 0.5  # seconds to wait for WebSocket connection
-WS_POLL_INTERVAL = 2  # seconds between status polling
-WS_THREAD_JOIN_TIMEOUT = 2  # seconds to wait for thread to join
-WS_COMPLETION_CHECK_INTERVAL = 0.5  # seconds between completion checks
+WS_CONNECT_TIMEOUT = 0.5  # seconds to wait for the shared event stream's first connection
+WS_POLL_INTERVAL = 2  # seconds between /history polls while the event stream is down
+WS_FALLBACK_POLL_INTERVAL = 15  # seconds between safety /history polls while it is up
+HISTORY_RETRY_DELAY = 0.05  # first retry when /history lags the completion event
+
+# Batch mode (--batch-file)
+BATCH_MAX_INFLIGHT = 2  # prompts kept queued on ComfyUI unless configured
+
+
+def comfyui_transport():
+    """Pooled keep-alive HTTP transport for COMFYUI_HOST, shared by every call in the run."""
+    return get_transport(COMFYUI_HOST)
 
 
 class ProgressTracker:
@@ -68,13 +85,14 @@ class ProgressTracker:
         self.prompt_id = prompt_id
         self.quiet = quiet
         self.json_progress = json_progress
-        self.ws = None
         self.completed = False
         self.error = None
         self.start_time = None
         self.current_node = None
-        self.running = False
-        self.thread = None
+        self.stream = None
+        self.subscription = None
+        # Set on completion, error or interruption
+        self.finished = threading.Event()
 
     def _log(self, message, prefix="[INFO]"):
         """Log a message respecting quiet mode."""
@@ -99,9 +117,19 @@ class ProgressTracker:
                 print(f"[PROGRESS] {data['node']}")
 
     def _on_message(self, ws, message):
-        """Handle WebSocket message."""
+        """Handle a raw WebSocket message."""
         try:
             data = json.loads(message)
+        except json.JSONDecodeError as e:
+            # Log malformed JSON in non-quiet mode for debugging
+            if not self.quiet:
+                print(f"[WARN] Malformed WebSocket message: {e}")
+            return
+        self._on_event(data)
+
+    def _on_event(self, data):
+        """Handle an event for this prompt, already parsed by the shared event stream."""
+        try:
             msg_type = data.get("type")
 
             # Only process messages for our prompt_id
@@ -118,11 +146,19 @@ class ProgressTracker:
                     if node is None:
                         # Execution complete
                         self.completed = True
+                        self.finished.set()
                         elapsed = time.time() - self.start_time if self.start_time else 0
                         self._log(f"Generation complete in {elapsed:.1f}s", "[OK]")
                     else:
                         self.current_node = node
 
+            elif msg_type in ("execution_error", "execution_interrupted"):
+                error_data = data.get("data", {})
+                if error_data.get("prompt_id") == self.prompt_id:
+                    self.error = error_data.get("exception_message") or msg_type
+                    self.finished.set()
+                    self._log(f"Generation failed: {self.error}", "[ERROR]")
+
             elif msg_type == "progress":
                 prog_data = data.get("data", {})
                 if prog_data.get("prompt_id") == self.prompt_id:
@@ -155,60 +191,29 @@ class ProgressTracker:
                     if node:
                         self._log_progress({"node": f"Completed node {node}"})
 
-        except json.JSONDecodeError as e:
-            # Log malformed JSON in non-quiet mode for debugging
-            if not self.quiet:
-                print(f"[WARN] Malformed WebSocket message: {e}")
         except Exception as e:
             if not self.quiet:
                 print(f"[WARN] Error processing WebSocket message: {e}")
 
-    def _on_error(self, ws, error):
-        """Handle WebSocket error."""
-        if not isinstance(error, websocket.WebSocketConnectionClosedException):
-            self.error = str(error)
-            if not self.quiet:
-                print(f"[WARN] WebSocket error: {error}")
-
-    def _on_close(self, ws, close_status_code, close_msg):
-        """Handle WebSocket close."""
-        self.running = False
-
-    def _on_open(self, ws):
-        """Handle WebSocket open."""
-        self.running = True
-        self._log("Connected to progress stream")
-
     def start(self):
-        """Start tracking progress in background thread."""
-        ws_url = "ws://192.168.1.215:8188/ws"
-
-        # Create WebSocket with client ID
-        client_id = str(uuid.uuid4())
-        ws_url_with_id = f"{ws_url}?clientId={client_id}"
-
-        self.ws = websocket.WebSocketApp(
-            ws_url_with_id,
-            on_message=self._on_message,
-            on_error=self._on_error,
-            on_close=self._on_close,
-            on_open=self._on_open,
-        )
-
-        # Run in background thread
-        self.thread = threading.Thread(target=self.ws.run_forever)
-        self.thread.daemon = True
-        self.thread.start()
+        """Subscribe to this prompt's events on the shared WebSocket.
 
-        # Give WebSocket time to connect
-        time.sleep(WS_CONNECT_DELAY)
+        Events already received for the prompt (e.g. while it was being queued)
+        are replayed first, so no connection delay is needed.
+        """
+        self.stream = get_event_stream(COMFYUI_HOST)
+        if self.stream is None:
+            self._log("websocket-client not installed, progress disabled", "[WARN]")
+            return
+        if self.stream.connected:
+            self._log("Connected to progress stream")
+        self.subscription = self.stream.subscribe(self.prompt_id, self._on_event)
 
     def stop(self):
-        """Stop tracking progress."""
-        if self.ws:
-            self.ws.close()
-        if self.thread:
-            self.thread.join(timeout=WS_THREAD_JOIN_TIMEOUT)
+        """Stop tracking progress (the shared WebSocket stays open)."""
+        if self.subscription:
+            self.subscription.close()
+            self.subscription = None
 
     def wait_for_completion(self, timeout=None):
         """Wait for generation to complete.
@@ -219,14 +224,8 @@ class ProgressTracker:
         Returns:
             bool: True if completed, False if timed out or error
         """
-        start = time.time()
-        while not self.completed:
-            if self.error:
-                return False
-            if timeout and (time.time() - start) > timeout:
-                return False
-            time.sleep(WS_COMPLETION_CHECK_INTERVAL)
-        return True
+        self.finished.wait(timeout)
+        return self.completed and not self.error
 
 
 def check_server_availability():
@@ -236,7 +235,8 @@ def check_server_availability():
         bool: True if server is reachable, False otherwise
     """
     try:
-        response = requests.get(f"{COMFYUI_HOST}/system_stats", timeout=5)
+        # Cached by the transport, so metadata's version lookup needs no extra round trip
+        response = comfyui_transport().fetch_system_stats(timeout=5)
         if response.status_code == 200:
             print("[OK] ComfyUI server is available")
             return True
@@ -256,43 +256,17 @@ def check_server_availability():
         return False
 
 
-def get_available_models():
-    """Query available models from ComfyUI API.
+def fetch_available_models():
+    """Download /object_info and extract the model lists by type.
 
     Returns:
         dict: Dictionary of available models by type, or None on failure
     """
     try:
-        response = requests.get(f"{COMFYUI_HOST}/object_info", timeout=10)
+        response = comfyui_transport().get("/object_info", timeout=10)
         if response.status_code == 200:
-            object_info = response.json()
-
-            # Extract model information
-            models = {}
-
-            # Get checkpoints (CheckpointLoaderSimple)
-            if "CheckpointLoaderSimple" in object_info:
-                checkpoint_info = object_info["CheckpointLoaderSimple"]
-                if "input" in checkpoint_info and "required" in checkpoint_info["input"]:
-                    if "ckpt_name" in checkpoint_info["input"]["required"]:
-                        models["checkpoints"] = checkpoint_info["input"]["required"]["ckpt_name"][0]
-
-            # Get LoRAs (LoraLoader)
-            if "LoraLoader" in object_info:
-                lora_info = object_info["LoraLoader"]
-                if "input" in lora_info and "required" in lora_info["input"]:
-                    if "lora_name" in lora_info["input"]["required"]:
-                        models["loras"] = lora_info["input"]["required"]["lora_name"][0]
-
-            # Get VAE models (VAELoader)
-            if "VAELoader" in object_info:
-                vae_info = object_info["VAELoader"]
-                if "input" in vae_info and "required" in vae_info["input"]:
-                    if "vae_name" in vae_info["input"]["required"]:
-                        models["vae"] = vae_info["input"]["required"]["vae_name"][0]
-
             print("[OK] Retrieved available models from server")
-            return models
+            return parse_available_models(response.json())
         else:
             print(f"[ERROR] Failed to get model list: HTTP {response.status_code}")
             return None
@@ -301,6 +275,24 @@ def get_available_models():
         return None
 
 
+def get_available_models(refresh=False):
+    """Query available models from ComfyUI API.
+
+    The model lists are cached on disk per server for a few minutes (see
+    clients.model_list_cache), so most runs skip the /object_info download.
+
+    Args:
+        refresh: Ignore the cached lists and query the server (--refresh-models)
+
+    Returns:
+        dict: Dictionary of available models by type, or None on failure
+    """
+    cache = get_model_list_cache()
+    if not refresh and cache.get(COMFYUI_HOST) is not None:
+        print(f"[OK] Using cached model list ({cache.age(COMFYUI_HOST):.0f}s old, --refresh-models to update)")
+    return cache.get_or_fetch(COMFYUI_HOST, fetch_available_models, refresh=refresh)
+
+
 def find_model_fallbacks(requested_model, available_models, model_type="checkpoints"):
     """Suggest fallback models when requested model is not found.
 
@@ -459,23 +451,15 @@ def find_model_output_connections(workflow, node_id, output_index=0):
     Returns:
         list: List of tuples (target_node_id, input_key) that connect to this output
     """
-    connections = []
-    for target_id, target_node in workflow.items():
-        if "inputs" not in target_node:
-            continue
-
-        for input_key, input_value in target_node["inputs"].items():
-            # Input connections are [node_id, output_index]
-            if isinstance(input_value, list) and len(input_value) == 2:
-                if input_value[0] == node_id and input_value[1] == output_index:
-                    connections.append((target_id, input_key))
-
-    return connections
+    return WorkflowGraph(workflow).consumers(node_id, output_index)
 
 
 def inject_lora(workflow, lora_name, strength_model=1.0, strength_clip=1.0, insert_after=None):
     """Inject a LoRA loader node into the workflow.
 
+    Consumers of the source's MODEL output (and of its CLIP output for a
+    CheckpointLoaderSimple or LoraLoader source) are moved to the new node.
+
     Args:
         workflow: The workflow dictionary
         lora_name: The LoRA filename
@@ -486,104 +470,16 @@ def inject_lora(workflow, lora_name, strength_model=1.0, strength_clip=1.0, inse
     Returns:
         tuple: (modified_workflow, new_node_id) or (workflow, None) on failure
     """
-    # Find the highest node ID
-    numeric_keys = [int(k) for k in workflow.keys() if k.isdigit()]
-    if not numeric_keys:
-        print("[ERROR] Cannot inject LoRA: No numeric node IDs found in workflow")
-        return workflow, None
-
-    max_id = max(numeric_keys)
-    new_id = str(max_id + 1)
-
-    # Find the model loader node if not specified
-    if insert_after is None:
-        # Look for CheckpointLoaderSimple (SD 1.5) or UNETLoader (Wan 2.2)
-        for node_id, node in workflow.items():
-            class_type = node.get("class_type", "")
-            if class_type in ["CheckpointLoaderSimple", "UNETLoader"]:
-                insert_after = node_id
-                break
-
-    if insert_after is None:
-        print("[ERROR] Cannot inject LoRA: No checkpoint or UNET loader found in workflow")
-        return workflow, None
-
-    # Get the source node
-    source_node = workflow.get(insert_after)
-    if not source_node:
-        print(f"[ERROR] Cannot inject LoRA: Source node {insert_after} not found")
-        return workflow, None
-
-    source_class = source_node.get("class_type", "")
-
-    # Determine which outputs to use based on source node type
-    if source_class == "CheckpointLoaderSimple":
-        # CheckpointLoader outputs: [0]=MODEL, [1]=CLIP, [2]=VAE
-        model_output = [insert_after, 0]
-        clip_output = [insert_after, 1]
-    elif source_class == "UNETLoader":
-        # UNETLoader outputs: [0]=MODEL only
-        model_output = [insert_after, 0]
-        # For Wan 2.2, CLIP comes from DualCLIPLoader - find it
-        clip_output = None
-        for node_id, node in workflow.items():
-            if node.get("class_type") == "DualCLIPLoader":
-                clip_output = [node_id, 0]
-                break
-        if clip_output is None:
-            print("[WARN] No CLIP loader found for LoRA, using model connection only")
-            clip_output = model_output  # Fallback
-    elif source_class == "LoraLoader":
-        # Chaining LoRAs - connect to previous LoRA's outputs
-        model_output = [insert_after, 0]
-        clip_output = [insert_after, 1]
-    else:
-        print(f"[ERROR] Cannot inject LoRA after node type: {source_class}")
-        return workflow, None
-
-    # Create the LoRA loader node
-    lora_node = {
-        "class_type": "LoraLoader",
-        "inputs": {
-            "model": model_output,
-            "clip": clip_output,
-            "lora_name": lora_name,
-            "strength_model": strength_model,
-            "strength_clip": strength_clip,
-        },
-        "_meta": {"title": f"LoRA: {lora_name}"},
-    }
-
-    # Add the node to workflow
-    workflow[new_id] = lora_node
-
-    # Find all connections from the source node's model output (index 0)
-    # and redirect them to the new LoRA node
-    connections = find_model_output_connections(workflow, insert_after, 0)
-
-    for target_id, input_key in connections:
-        # Skip the LoRA node we just created
-        if target_id == new_id:
-            continue
-
-        # Redirect this connection to point to the LoRA node instead
-        workflow[target_id]["inputs"][input_key] = [new_id, 0]
-
-    # Also redirect CLIP connections if applicable
-    if source_class == "CheckpointLoaderSimple":
-        clip_connections = find_model_output_connections(workflow, insert_after, 1)
-        for target_id, input_key in clip_connections:
-            if target_id == new_id:
-                continue
-            workflow[target_id]["inputs"][input_key] = [new_id, 1]
-
-    print(f"[OK] Injected LoRA '{lora_name}' as node {new_id} (strength: {strength_model})")
-    return workflow, new_id
+    new_ids = WorkflowGraph(workflow).splice_lora_stack([(lora_name, strength_model, strength_clip)], insert_after)
+    return workflow, new_ids[0] if new_ids else None
 
 
 def inject_lora_chain(workflow, lora_specs, available_loras=None):
     """Inject multiple LoRAs in a chain.
 
+    The whole stack is spliced in one pass: the LoRAs are chained after the
+    model loader and the loader's consumers are moved to the last LoRA.
+
     Args:
         workflow: The workflow dictionary
         lora_specs: List of tuples (lora_name, strength_model, strength_clip)
@@ -605,27 +501,19 @@ def inject_lora_chain(workflow, lora_specs, available_loras=None):
             print(f"[ERROR] Available LoRAs: {', '.join(available_loras[:10])}...")
             return workflow
 
-    # Inject LoRAs in order, chaining them together
-    last_node_id = None
-    for lora_name, strength_model, strength_clip in lora_specs:
-        workflow, last_node_id = inject_lora(
-            workflow,
-            lora_name,
-            strength_model,
-            strength_clip,
-            insert_after=last_node_id,  # Chain to previous LoRA
-        )
-        if last_node_id is None:
-            print(f"[ERROR] Failed to inject LoRA: {lora_name}")
-            break
+    if not WorkflowGraph(workflow).splice_lora_stack(lora_specs):
+        print(f"[ERROR] Failed to inject LoRAs: {', '.join(name for name, _, _ in lora_specs)}")
 
     return workflow
 
 
 def load_workflow(workflow_path):
-    """Load workflow JSON."""
-    with open(workflow_path) as f:
-        return json.load(f)
+    """Load workflow JSON.
+
+    The file is parsed once per process (again only if it changes on disk);
+    each call returns a fresh copy to modify.
+    """
+    return load_compiled_workflow(workflow_path).instantiate()
 
 
 def download_image(url, temp_path):
@@ -735,11 +623,10 @@ def upload_image_to_comfyui(image_path):
         }
         mime_type = mime_types.get(ext, "image/png")
 
-        url = f"{COMFYUI_HOST}/upload/image"
         with open(image_path, "rb") as f:
             files = {"image": (filename, f, mime_type)}
             data = {"overwrite": "true"}
-            response = requests.post(url, files=files, data=data, timeout=30)
+            response = comfyui_transport().post("/upload/image", files=files, data=data, timeout=30)
 
         if response.status_code == 200:
             result = response.json()
@@ -765,35 +652,7 @@ def find_prompt_nodes(workflow):
     Returns:
         tuple: (positive_node_id, negative_node_id) where IDs can be None
     """
-    positive_node = None
-    negative_node = None
-    first_clip_node = None
-
-    for node_id, node in workflow.items():
-        if node.get("class_type") != "CLIPTextEncode":
-            continue
-
-        # Track first CLIP node as fallback
-        if first_clip_node is None:
-            first_clip_node = node_id
-
-        # Normalize title for matching: lowercase and remove special chars
-        title = node.get("_meta", {}).get("title", "")
-        title_normalized = re.sub(r"[^a-z0-9]", "", title.lower())
-
-        # Match positive prompt patterns (normalized)
-        positive_patterns = ["positive", "motionprompt"]
-        if any(pattern in title_normalized for pattern in positive_patterns):
-            positive_node = node_id
-        # Match negative prompt patterns (normalized)
-        elif "negative" in title_normalized:
-            negative_node = node_id
-
-    # Fallback: use first CLIP node if no positive found
-    if positive_node is None and first_clip_node is not None:
-        positive_node = first_clip_node
-
-    return positive_node, negative_node
+    return find_prompt_node_ids(workflow)
 
 
 def get_default_negative_prompt(workflow):
@@ -806,9 +665,9 @@ def get_default_negative_prompt(workflow):
         str: Default negative prompt or empty string
     """
     # Detect workflow type by examining nodes
-    has_unet_loader = any(node.get("class_type") == "UNETLoader" for node in workflow.values())
+    has_unet_loader = bool(find_nodes(workflow, "UNETLoader"))
 
-    has_video_combine = any(node.get("class_type") == "VHS_VideoCombine" for node in workflow.values())
+    has_video_combine = bool(find_nodes(workflow, "VHS_VideoCombine"))
 
     # Wan 2.2 video workflows (typically don't use negative prompts)
     if has_unet_loader or has_video_combine:
@@ -865,12 +724,12 @@ def modify_input_image(workflow, uploaded_filename):
     Searches for LoadImage nodes and updates the image filename.
     """
     found = False
-    for node_id, node in workflow.items():
-        if node.get("class_type") == "LoadImage":
-            if "inputs" in node:
-                node["inputs"]["image"] = uploaded_filename
-                print(f"Updated input image in node {node_id}: {uploaded_filename}")
-                found = True
+    for node_id in find_nodes(workflow, "LoadImage"):
+        node = workflow[node_id]
+        if "inputs" in node:
+            node["inputs"]["image"] = uploaded_filename
+            print(f"Updated input image in node {node_id}: {uploaded_filename}")
+            found = True
 
     if not found:
         print("[WARN] No LoadImage node found in workflow")
@@ -880,11 +739,11 @@ def modify_input_image(workflow, uploaded_filename):
 
 def modify_denoise(workflow, denoise_value):
     """Modify denoise strength in KSampler node."""
-    for node_id, node in workflow.items():
-        if node.get("class_type") == "KSampler":
-            if "inputs" in node:
-                node["inputs"]["denoise"] = denoise_value
-                print(f"Updated denoise strength in node {node_id}: {denoise_value}")
+    for node_id in find_nodes(workflow, "KSampler"):
+        node = workflow[node_id]
+        if "inputs" in node:
+            node["inputs"]["denoise"] = denoise_value
+            print(f"Updated denoise strength in node {node_id}: {denoise_value}")
     return workflow
 
 
@@ -902,29 +761,33 @@ def modify_sampler_params(workflow, steps=None, cfg=None, seed=None, sampler_nam
     Returns:
         dict: Modified workflow
     """
-    for node_id, node in workflow.items():
-        if node.get("class_type") == "KSampler":
-            if "inputs" in node:
-                if steps is not None:
-                    node["inputs"]["steps"] = steps
-                    print(f"[OK] Updated steps in node {node_id}: {steps}")
-                if cfg is not None:
-                    node["inputs"]["cfg"] = cfg
-                    print(f"[OK] Updated CFG in node {node_id}: {cfg}")
-                if seed is not None:
-                    node["inputs"]["seed"] = seed
-                    print(f"[OK] Updated seed in node {node_id}: {seed}")
-                if sampler_name is not None:
-                    node["inputs"]["sampler_name"] = sampler_name
-                    print(f"[OK] Updated sampler in node {node_id}: {sampler_name}")
-                if scheduler is not None:
-                    node["inputs"]["scheduler"] = scheduler
-                    print(f"[OK] Updated scheduler in node {node_id}: {scheduler}")
+    for node_id in find_nodes(workflow, "KSampler"):
+        node = workflow[node_id]
+        if "inputs" in node:
+            if steps is not None:
+                node["inputs"]["steps"] = steps
+                print(f"[OK] Updated steps in node {node_id}: {steps}")
+            if cfg is not None:
+                node["inputs"]["cfg"] = cfg
+                print(f"[OK] Updated CFG in node {node_id}: {cfg}")
+            if seed is not None:
+                node["inputs"]["seed"] = seed
+                print(f"[OK] Updated seed in node {node_id}: {seed}")
+            if sampler_name is not None:
+                node["inputs"]["sampler_name"] = sampler_name
+                print(f"[OK] Updated sampler in node {node_id}: {sampler_name}")
+            if scheduler is not None:
+                node["inputs"]["scheduler"] = scheduler
+                print(f"[OK] Updated scheduler in node {node_id}: {scheduler}")
     return workflow
 
 
+# Empty latent nodes that set image size and batch size (SD/SDXL, and SD3/Flux)
+LATENT_IMAGE_CLASSES = ("EmptyLatentImage", "EmptySD3LatentImage")
+
+
 def modify_dimensions(workflow, width=None, height=None):
-    """Modify output dimensions in EmptyLatentImage node.
+    """Modify output dimensions in the EmptyLatentImage / EmptySD3LatentImage node.
 
     Args:
         workflow: The workflow dictionary
@@ -934,15 +797,33 @@ def modify_dimensions(workflow, width=None, height=None):
     Returns:
         dict: Modified workflow
     """
-    for node_id, node in workflow.items():
-        if node.get("class_type") == "EmptyLatentImage":
-            if "inputs" in node:
-                if width is not None:
-                    node["inputs"]["width"] = width
-                    print(f"[OK] Updated width in node {node_id}: {width}")
-                if height is not None:
-                    node["inputs"]["height"] = height
-                    print(f"[OK] Updated height in node {node_id}: {height}")
+    for node_id in find_nodes(workflow, *LATENT_IMAGE_CLASSES):
+        node = workflow[node_id]
+        if "inputs" in node:
+            if width is not None:
+                node["inputs"]["width"] = width
+                print(f"[OK] Updated width in node {node_id}: {width}")
+            if height is not None:
+                node["inputs"]["height"] = height
+                print(f"[OK] Updated height in node {node_id}: {height}")
+    return workflow
+
+
+def modify_batch_size(workflow, batch_size):
+    """Set how many latents the empty latent image node creates (sampled in one pass).
+
+    Args:
+        workflow: The workflow dictionary
+        batch_size: Number of images per sampler pass
+
+    Returns:
+        dict: Modified workflow
+    """
+    for node_id in find_nodes(workflow, *LATENT_IMAGE_CLASSES):
+        node = workflow[node_id]
+        if "inputs" in node:
+            node["inputs"]["batch_size"] = batch_size
+            print(f"[OK] Updated batch size in node {node_id}: {batch_size}")
     return workflow
 
 
@@ -958,18 +839,18 @@ def modify_video_params(workflow, width=None, height=None, length=None):
     Returns:
         dict: Modified workflow
     """
-    for node_id, node in workflow.items():
-        if node.get("class_type") == "EmptyLatentVideo":
-            if "inputs" in node:
-                if width is not None:
-                    node["inputs"]["width"] = width
-                    print(f"[OK] Updated video width in node {node_id}: {width}")
-                if height is not None:
-                    node["inputs"]["height"] = height
-                    print(f"[OK] Updated video height in node {node_id}: {height}")
-                if length is not None:
-                    node["inputs"]["length"] = length
-                    print(f"[OK] Updated video length in node {node_id}: {length} frames")
+    for node_id in find_nodes(workflow, "EmptyLatentVideo"):
+        node = workflow[node_id]
+        if "inputs" in node:
+            if width is not None:
+                node["inputs"]["width"] = width
+                print(f"[OK] Updated video width in node {node_id}: {width}")
+            if height is not None:
+                node["inputs"]["height"] = height
+                print(f"[OK] Updated video height in node {node_id}: {height}")
+            if length is not None:
+                node["inputs"]["length"] = length
+                print(f"[OK] Updated video length in node {node_id}: {length} frames")
     return workflow
 
 
@@ -983,12 +864,12 @@ def modify_video_fps(workflow, fps=None):
     Returns:
         dict: Modified workflow
     """
-    for node_id, node in workflow.items():
-        if node.get("class_type") == "VHS_VideoCombine":
-            if "inputs" in node:
-                if fps is not None:
-                    node["inputs"]["frame_rate"] = fps
-                    print(f"[OK] Updated video FPS in node {node_id}: {fps}")
+    for node_id in find_nodes(workflow, "VHS_VideoCombine"):
+        node = workflow[node_id]
+        if "inputs" in node:
+            if fps is not None:
+                node["inputs"]["frame_rate"] = fps
+                print(f"[OK] Updated video FPS in node {node_id}: {fps}")
     return workflow
 
 
@@ -1142,11 +1023,11 @@ def load_config():
     """Load full configuration from presets.yaml including validation settings.
 
     Returns:
-        dict: Full config with keys: presets, default_negative_prompt, validation
+        dict: Full config with keys: presets, default_negative_prompt, validation, batch
     """
     presets_path = Path(__file__).parent / "presets.yaml"
     if not presets_path.exists():
-        return {"presets": {}, "default_negative_prompt": "", "validation": {}}
+        return {"presets": {}, "default_negative_prompt": "", "validation": {}, "batch": {}}
 
     try:
         with open(presets_path, encoding="utf-8") as f:
@@ -1155,10 +1036,11 @@ def load_config():
             "presets": data.get("presets", {}),
             "default_negative_prompt": data.get("default_negative_prompt", ""),
             "validation": data.get("validation", {}),
+            "batch": data.get("batch", {}),
         }
     except Exception as e:
         print(f"[ERROR] Failed to load presets.yaml: {e}")
-        return {"presets": {}, "default_negative_prompt": "", "validation": {}}
+        return {"presets": {}, "default_negative_prompt": "", "validation": {}, "batch": {}}
 
 
 def load_prompt_catalog():
@@ -1180,6 +1062,21 @@ def load_prompt_catalog():
         return {}
 
 
+def invalidate_models_on_missing(response):
+    """Drop the cached model lists when ComfyUI rejected a prompt for a missing model.
+
+    Args:
+        response: The rejected /prompt response
+    """
+    try:
+        body = response.json()
+    except Exception:
+        return
+    if is_missing_model_error(body):
+        get_model_list_cache().invalidate(COMFYUI_HOST)
+        print("[INFO] Model list cache cleared (server is missing a model); next run refetches it")
+
+
 def queue_workflow(workflow, retry=True):
     """Send workflow to ComfyUI server with retry logic.
 
@@ -1190,7 +1087,7 @@ def queue_workflow(workflow, retry=True):
     Returns:
         str: prompt_id on success, None on failure
     """
-    url = f"{COMFYUI_HOST}/prompt"
+    transport = comfyui_transport()
 
     # Filter out metadata keys (non-numeric) - ComfyUI only accepts node IDs
     filtered_workflow = {k: v for k, v in workflow.items() if k.isdigit()}
@@ -1198,9 +1095,15 @@ def queue_workflow(workflow, retry=True):
     max_attempts = MAX_RETRIES if retry else 1
     delay = RETRY_DELAY
 
+    payload = {"prompt": filtered_workflow}
+    stream = get_event_stream(COMFYUI_HOST)
+    if stream is not None and stream.wait_connected(WS_CONNECT_TIMEOUT):
+        # ComfyUI then sends this prompt's events only to our shared socket
+        payload["client_id"] = stream.client_id
+
     for attempt in range(1, max_attempts + 1):
         try:
-            response = requests.post(url, json={"prompt": filtered_workflow}, timeout=30)
+            response = transport.post("/prompt", json=payload, timeout=30)
             if response.status_code == 200:
                 result = response.json()
                 prompt_id = result["prompt_id"]
@@ -1212,6 +1115,7 @@ def queue_workflow(workflow, retry=True):
 
                 # Don't retry on client errors (4xx)
                 if 400 <= response.status_code < 500:
+                    invalidate_models_on_missing(response)
                     return None
 
                 # Retry on server errors (5xx)
@@ -1251,6 +1155,11 @@ def queue_workflow(workflow, retry=True):
 def wait_for_completion(prompt_id, quiet=False, json_progress=False):
     """Wait for workflow to complete with real-time progress tracking.
 
+    Completion is taken from the WebSocket (``executing`` with node=None);
+    /history is then fetched once to collect the outputs. While the event
+    stream is down, /history is polled every WS_POLL_INTERVAL instead, and a
+    slow safety poll covers events missed while connected.
+
     Args:
         prompt_id: The prompt ID to wait for
         quiet: Suppress progress output
@@ -1264,10 +1173,16 @@ def wait_for_completion(prompt_id, quiet=False, json_progress=False):
     tracker.start()
 
     try:
-        # Poll history endpoint to get final status
-        url = f"{COMFYUI_HOST}/history/{prompt_id}"
+        transport = comfyui_transport()
+        finished = False
+        retry_delay = HISTORY_RETRY_DELAY
         while True:
-            response = requests.get(url)
+            if not finished:
+                stream_up = tracker.stream is not None and tracker.stream.connected
+                tracker.wait_for_completion(timeout=WS_FALLBACK_POLL_INTERVAL if stream_up else WS_POLL_INTERVAL)
+                finished = tracker.finished.is_set()
+
+            response = transport.get(f"/history/{prompt_id}")
             if response.status_code == 200:
                 history = response.json()
                 if prompt_id in history:
@@ -1290,66 +1205,318 @@ def wait_for_completion(prompt_id, quiet=False, json_progress=False):
                 if not quiet:
                     print(f"[ERROR] Error checking status: {response.text}")
 
-            time.sleep(WS_POLL_INTERVAL)  # Poll less frequently since we have WebSocket updates
+            if finished:
+                # ComfyUI writes /history just after the final event; retry quickly
+                time.sleep(retry_delay)
+                retry_delay = min(retry_delay * 2, WS_POLL_INTERVAL)
     finally:
         tracker.stop()
 
     return None
 
 
-def download_output(status, output_path):
-    """Download the generated image."""
+def finished_status(prompt_id):
+    """History entry of a prompt if it has already finished, without waiting.
+
+    Args:
+        prompt_id: The prompt ID to check
+
+    Returns:
+        dict: History entry (as from wait_for_completion), or None if still queued or running
+    """
+    try:
+        response = comfyui_transport().get(f"/history/{prompt_id}")
+    except requests.RequestException:
+        return None
+    if response.status_code != 200:
+        return None
+    status = response.json().get(prompt_id)
+    if status and "outputs" in status:
+        return status
+    return None
+
+
+def completion_time(status):
+    """When a finished prompt stopped executing, from its history status messages.
+
+    Args:
+        status: History entry of the finished prompt
+
+    Returns:
+        float: Epoch seconds of its execution_success/error/interrupted message, or None if not recorded
+    """
+    for message in reversed((status or {}).get("status", {}).get("messages") or []):
+        if len(message) < 2 or message[0] not in TERMINAL_EVENT_TYPES or not isinstance(message[1], dict):
+            continue
+        if message[1].get("timestamp"):
+            # ComfyUI records epoch milliseconds
+            return message[1]["timestamp"] / 1000
+    return None
+
+
+# Output lists in a history entry harvested by harvest_outputs (SaveImage, VHS_VideoCombine)
+OUTPUT_KINDS = ("images", "gifs", "videos")
+
+# Concurrent /view downloads per harvested prompt
+HARVEST_WORKERS = 4
+
+# Shared MinIO client (created on first upload)
+_minio_client = None
+_minio_lock = threading.Lock()
+
+
+def minio_client():
+    """Get the shared MinIO client, creating the output bucket on first use.
+
+    Returns:
+        Minio client
+
+    Raises:
+        S3Error: If the bucket cannot be checked or created
+    """
+    global _minio_client
+    with _minio_lock:
+        if _minio_client is None:
+            client = Minio(
+                MINIO_ENDPOINT,
+                access_key=MINIO_ACCESS_KEY,
+                secret_key=MINIO_SECRET_KEY,
+                secure=False,  # HTTP, not HTTPS
+            )
+
+            # Make bucket if not exists
+            if not client.bucket_exists(BUCKET_NAME):
+                client.make_bucket(BUCKET_NAME)
+                print(f"[INFO] Created bucket {BUCKET_NAME}")
+            _minio_client = client
+    return _minio_client
+
+
+def minio_object_url(object_name):
+    """Browser URL of an object in the output bucket."""
+    return f"http://192.168.1.215:9000/{BUCKET_NAME}/{object_name}"
+
+
+def output_object_name(output_path, timestamp=None):
+    """Timestamped MinIO object name for an output file.
+
+    Args:
+        output_path: Local path of the output
+        timestamp: Timestamp prefix to share across a group of outputs (default: now)
+    """
+    import datetime
+
+    if timestamp is None:
+        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    return f"{timestamp}_{Path(output_path).name}"
+
+
+def fetch_view_output(file_info, output_path, object_name=None, keep_bytes=False):
+    """Stream one output from /view to disk and, in the same pass, to MinIO and memory.
+
+    Args:
+        file_info: Output entry from the history ({"filename", "subfolder", "type"})
+        output_path: Local path to write
+        object_name: MinIO object name to upload to while downloading (None to skip)
+        keep_bytes: Keep the bytes in the result (for validators)
+
+    Returns:
+        StreamedOutput, or None if the download failed
+    """
+    params = {
+        "filename": file_info["filename"],
+        "subfolder": file_info.get("subfolder", ""),
+        "type": file_info.get("type", "output"),
+    }
+    with comfyui_transport().get("/view", params=params, stream=True) as response:
+        if response.status_code != 200:
+            print(f"Error downloading image: {response.text}")
+            return None
+
+        client = None
+        upload_error = None
+        if object_name:
+            try:
+                client = minio_client()
+            except Exception as e:
+                upload_error = str(e)
+
+        streamed = stream_output(
+            response.iter_content(DEFAULT_CHUNK_SIZE),
+            output_path,
+            length=response_length(response.headers),
+            minio_client=client,
+            bucket=BUCKET_NAME,
+            object_name=object_name,
+            keep_bytes=keep_bytes,
+        )
+    streamed.upload_error = streamed.upload_error or upload_error
+    return streamed
+
+
+def download_output(status, output_path, object_name=None, keep_bytes=False):
+    """Download the generated image.
+
+    The /view response is streamed to output_path in chunks; with object_name
+    it is uploaded to MinIO from the same stream (see publish_streamed_output).
+
+    Args:
+        status: History entry of the finished prompt
+        output_path: Local path to write
+        object_name: MinIO object name to upload to while downloading (None to skip)
+        keep_bytes: Keep the bytes in the result (for validators)
+
+    Returns:
+        StreamedOutput for the downloaded image, or None if nothing was downloaded
+    """
     # Assume output is in outputs node
     outputs = status.get("outputs", {})
     for _node_id, node_outputs in outputs.items():
         if "images" in node_outputs:
             for image in node_outputs["images"]:
-                filename = image["filename"]
-                subfolder = image.get("subfolder", "")
-                url = f"{COMFYUI_HOST}/view?filename={filename}&subfolder={subfolder}&type=output"
-                response = requests.get(url)
-                if response.status_code == 200:
-                    with open(output_path, "wb") as f:
-                        f.write(response.content)
+                streamed = fetch_view_output(image, output_path, object_name=object_name, keep_bytes=keep_bytes)
+                if streamed is not None:
                     print(f"Saved image to {output_path}")
-                    return True
-                else:
-                    print(f"Error downloading image: {response.text}")
-    return False
+                    return streamed
+    return None
 
 
-def upload_to_minio(file_path, object_name):
-    """Upload file to MinIO with correct content type for browser viewing."""
-    try:
-        client = Minio(
-            MINIO_ENDPOINT,
-            access_key=MINIO_ACCESS_KEY,
-            secret_key=MINIO_SECRET_KEY,
-            secure=False,  # HTTP, not HTTPS
+def collect_outputs(status):
+    """List every saved output file in a finished prompt's history entry.
+
+    Covers SaveImage "images" (every image of a batch), and VHS_VideoCombine
+    "gifs" / "videos", across all output nodes. Previews (type "temp") are skipped.
+
+    Args:
+        status: History entry of the finished prompt
+
+    Returns:
+        list: Output entries ({"node_id", "kind", "batch_index", "filename", "subfolder", "type"})
+            in history order; batch_index is the output's position in its node's list
+    """
+    entries = []
+    for node_id, node_outputs in status.get("outputs", {}).items():
+        for kind in OUTPUT_KINDS:
+            for batch_index, file_info in enumerate(node_outputs.get(kind) or []):
+                if not isinstance(file_info, dict) or not file_info.get("filename"):
+                    continue
+                if file_info.get("type", "output") == "temp":
+                    continue
+                entries.append({**file_info, "node_id": node_id, "kind": kind, "batch_index": batch_index})
+    return entries
+
+
+def _primary_output_index(entries, output_path):
+    """Pick the output written to --output: same extension first, then the first image, then the first output."""
+    suffix = Path(output_path).suffix.lower()
+    for index, entry in enumerate(entries):
+        if Path(entry["filename"]).suffix.lower() == suffix:
+            return index
+    for index, entry in enumerate(entries):
+        if entry["kind"] == "images":
+            return index
+    return 0
+
+
+def harvest_outputs(status, output_path, upload=True, keep_bytes=False, max_workers=None):
+    """Download every output of a finished prompt concurrently.
+
+    The primary output (see _primary_output_index) is written to output_path;
+    the others go next to it as "<stem>_<node_id>_<n><ext>". Each download is
+    streamed to disk and, with upload, straight into MinIO under object names
+    sharing one timestamp prefix. Downloads share the pooled keep-alive
+    transport, at most max_workers at a time.
+
+    Args:
+        status: History entry of the finished prompt
+        output_path: Local path for the primary output
+        upload: Stream each output into MinIO while downloading
+        keep_bytes: Keep the primary output's bytes (for validators)
+        max_workers: Concurrent downloads (default HARVEST_WORKERS)
+
+    Returns:
+        list: StreamedOutput per downloaded output, primary first; [] if the primary could not be downloaded
+    """
+    import datetime
+
+    entries = collect_outputs(status)
+    if not entries:
+        return []
+
+    primary = entries.pop(_primary_output_index(entries, output_path))
+    entries.insert(0, primary)
+
+    output = Path(output_path)
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    jobs = [(primary, str(output))]
+    counts = {}
+    for entry in entries[1:]:
+        counts[entry["node_id"]] = counts.get(entry["node_id"], 0) + 1
+        name = f"{output.stem}_{entry['node_id']}_{counts[entry['node_id']]}{Path(entry['filename']).suffix}"
+        jobs.append((entry, str(output.with_name(name))))
+
+    def fetch(index):
+        entry, path = jobs[index]
+        object_name = output_object_name(path, timestamp) if upload else None
+        try:
+            streamed = fetch_view_output(entry, path, object_name=object_name, keep_bytes=keep_bytes and index == 0)
+        except (requests.RequestException, OSError) as e:
+            print(f"[WARN] Failed to download {entry['filename']}: {e}")
+            streamed = None
+        if streamed is not None:
+            streamed.source = entry
+        return streamed
+
+    workers = min(max_workers or HARVEST_WORKERS, len(jobs))
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="harvest") as pool:
+            results = list(pool.map(fetch, range(len(jobs))))
+    else:
+        results = [fetch(index) for index in range(len(jobs))]
+
+    if results[0] is None:
+        return []
+    print(f"Saved image to {output_path}")
+    extras = [streamed for streamed in results[1:] if streamed is not None]
+    if extras:
+        print(f"[OK] Saved {len(extras)} more output(s) next to {output_path}")
+    return [results[0], *extras]
+
+
+def output_records(outputs):
+    """Describe harvested outputs for the metadata sidecar.
+
+    Args:
+        outputs: StreamedOutput list from harvest_outputs (after publishing)
+
+    Returns:
+        list: One dict per output (node_id, kind, filename, path, minio_url, size_bytes)
+    """
+    records = []
+    for streamed in outputs:
+        source = streamed.source or {}
+        records.append(
+            {
+                "node_id": source.get("node_id"),
+                "kind": source.get("kind"),
+                "filename": source.get("filename"),
+                "path": streamed.path,
+                "minio_url": streamed.url,
+                "size_bytes": streamed.size,
+            }
         )
+    return records
 
-        # Make bucket if not exists
-        if not client.bucket_exists(BUCKET_NAME):
-            client.make_bucket(BUCKET_NAME)
-            print(f"[INFO] Created bucket {BUCKET_NAME}")
 
-        # Determine content type based on extension
-        ext = Path(file_path).suffix.lower()
-        content_types = {
-            ".png": "image/png",
-            ".jpg": "image/jpeg",
-            ".jpeg": "image/jpeg",
-            ".gif": "image/gif",
-            ".webp": "image/webp",
-            ".mp4": "video/mp4",
-            ".webm": "video/webm",
-        }
-        content_type = content_types.get(ext, "application/octet-stream")
+def upload_to_minio(file_path, object_name):
+    """Upload file to MinIO with correct content type for browser viewing."""
+    try:
+        client = minio_client()
 
         # Upload with correct content type so browser displays instead of downloads
-        client.fput_object(BUCKET_NAME, object_name, file_path, content_type=content_type)
+        client.fput_object(BUCKET_NAME, object_name, file_path, content_type=content_type_for(file_path))
         print(f"[OK] Uploaded {file_path} to MinIO as {object_name}")
-        return f"http://192.168.1.215:9000/{BUCKET_NAME}/{object_name}"
+        return minio_object_url(object_name)
     except S3Error as e:
         print(f"[ERROR] MinIO error: {e}")
         return None
@@ -1448,7 +1615,7 @@ def extract_resolution_from_workflow(workflow):
         list: [width, height] or None if not found
     """
     for _node_id, node in workflow.items():
-        if node.get("class_type") == "EmptyLatentImage":
+        if node.get("class_type") in LATENT_IMAGE_CLASSES:
             inputs = node.get("inputs", {})
             width = inputs.get("width")
             height = inputs.get("height")
@@ -1478,6 +1645,12 @@ def create_metadata_json(
     project=None,
     tags=None,
     batch_id=None,
+    validation_report=None,
+    outputs=None,
+    batch_index=None,
+    batch_size=None,
+    refinement_candidates=None,
+    speculation=None,
 ):
     """Create metadata JSON for experiment tracking.
 
@@ -1494,6 +1667,12 @@ def create_metadata_json(
         output_path: Optional output file path to calculate file size
         generation_time_seconds: Optional generation time in seconds
         quality_result: Optional quality scoring result from QualityScorer
+        validation_report: Optional validator timing report from run_validators()
+        outputs: Optional records of every harvested output (see output_records())
+        batch_index: Position of this output in its sampler batch (with batch_size, for --count)
+        batch_size: Number of images sampled together in one pass (for --count)
+        refinement_candidates: Every variant of a --parallel-refinement run (attempt, seed, score, status, ...)
+        speculation: SpeculativeRetry.report() of a --speculative-retry run
 
     Returns:
         dict: Metadata dictionary ready for JSON serialization
@@ -1560,14 +1739,28 @@ def create_metadata_json(
             "file_size_bytes": file_size_bytes,
             "format": file_format,
             "generation_time_seconds": generation_time_seconds,
+            "outputs": outputs,
         },
         "organization": {
             "project": project,
             "batch_id": batch_id,
             "tags": _parse_tags(tags) if tags else None,
         },
+        "validation": validation_report,
     }
 
+    if refinement_candidates is not None:
+        metadata["refinement"]["mode"] = "parallel"
+        metadata["refinement"]["candidates"] = refinement_candidates
+
+    if speculation is not None:
+        metadata["refinement"]["speculation"] = speculation
+
+    # An image of a batched pass is reproduced by the seed plus its position in the batch
+    if batch_size is not None:
+        metadata["parameters"]["batch_size"] = batch_size
+        metadata["parameters"]["batch_index"] = batch_index
+
     return metadata
 
 
@@ -1615,12 +1808,12 @@ def upload_metadata_to_minio(metadata, object_name):
             # Upload with .json extension
             json_object_name = f"{object_name}.json"
 
-            client = Minio(MINIO_ENDPOINT, access_key=MINIO_ACCESS_KEY, secret_key=MINIO_SECRET_KEY, secure=False)
+            client = minio_client()
 
             client.fput_object(BUCKET_NAME, json_object_name, temp_path, content_type="application/json")
 
             print(f"[OK] Uploaded metadata to MinIO as {json_object_name}")
-            return f"http://192.168.1.215:9000/{BUCKET_NAME}/{json_object_name}"
+            return minio_object_url(json_object_name)
         finally:
             # Clean up temp file
             if os.path.exists(temp_path):
@@ -1666,8 +1859,7 @@ def embed_metadata_in_output(output_path, metadata):
 def interrupt_generation():
     """Interrupt currently running generation."""
     try:
-        url = f"{COMFYUI_HOST}/interrupt"
-        response = requests.post(url, timeout=10)
+        response = comfyui_transport().post("/interrupt", timeout=10)
         if response.status_code == 200:
             print("[OK] Interrupted current generation")
             return True
@@ -1686,9 +1878,8 @@ def delete_from_queue(prompt_ids):
         prompt_ids: List of prompt IDs to delete
     """
     try:
-        url = f"{COMFYUI_HOST}/queue"
         payload = {"delete": prompt_ids}
-        response = requests.post(url, json=payload, timeout=10)
+        response = comfyui_transport().post("/queue", json=payload, timeout=10)
         if response.status_code == 200:
             print(f"[OK] Deleted {len(prompt_ids)} prompt(s) from queue")
             return True
@@ -1711,6 +1902,32 @@ def cancel_prompt(prompt_id):
     return False
 
 
+def cancel_prompts(prompt_ids):
+    """Cancel several of this run's prompts.
+
+    Queued prompts are deleted from the queue; the server is only interrupted
+    if one of them is the prompt running now, so other clients' work is left
+    alone (cancel_prompt always interrupts).
+
+    Args:
+        prompt_ids: Prompt IDs to cancel
+
+    Returns:
+        bool: True if the queue delete succeeded
+    """
+    prompt_ids = list(prompt_ids)
+    if not prompt_ids:
+        return True
+    try:
+        response = comfyui_transport().get("/queue", timeout=10)
+        running = {entry[1] for entry in response.json().get("queue_running", [])} if response.ok else set()
+    except (requests.RequestException, ValueError):
+        running = set()
+    if running & set(prompt_ids):
+        interrupt_generation()
+    return delete_from_queue(prompt_ids)
+
+
 def cleanup_partial_output(output_path):
     """Remove partial output file if it exists."""
     if os.path.exists(output_path):
@@ -1854,9 +2071,56 @@ def get_retry_params(
     return params
 
 
+def refinement_variants(
+    count: int,
+    strategy: str,
+    base_steps: int = None,
+    base_cfg: float = None,
+    base_seed: int = None,
+    base_prompt: str = "",
+    base_negative: str = "",
+) -> list:
+    """Parameters for attempts 1..count of a retry strategy, to queue side by side.
+
+    Variants identical to an earlier one are dropped (seed_search has three
+    distinct seed offsets, so it yields at most three variants).
+
+    Args:
+        count: Number of attempts (--max-attempts)
+        strategy: Retry strategy ('progressive', 'seed_search', 'prompt_enhance')
+        base_steps, base_cfg, base_seed, base_prompt, base_negative: As for get_retry_params
+
+    Returns:
+        list: (attempt, params) tuples, params as returned by get_retry_params
+    """
+    if base_seed is None:
+        base_seed = random.randint(0, 2**31 - 1)
+
+    variants = []
+    seen = set()
+    for attempt in range(1, count + 1):
+        params = get_retry_params(
+            attempt=attempt,
+            strategy=strategy,
+            base_steps=base_steps,
+            base_cfg=base_cfg,
+            base_seed=base_seed,
+            base_prompt=base_prompt,
+            base_negative=base_negative,
+        )
+        key = tuple(params[name] for name in ("steps", "cfg", "seed", "positive_prompt", "negative_prompt"))
+        if key in seen:
+            continue
+        seen.add(key)
+        variants.append((attempt, params))
+    return variants
+
+
 # Global variable to track current prompt for signal handler
 current_prompt_id = None
 current_output_path = None
+# Prompts queued by batch mode that have not finished yet
+inflight_prompt_ids = set()
 
 
 def signal_handler(signum, frame):
@@ -1864,380 +2128,839 @@ def signal_handler(signum, frame):
     print("\n[INFO] Cancellation requested...")
     if current_prompt_id:
         cancel_prompt(current_prompt_id)
+    for prompt_id in list(inflight_prompt_ids):
+        cancel_prompt(prompt_id)
     if current_output_path:
         cleanup_partial_output(current_output_path)
     print("[INFO] Cancelled. Exiting.")
     sys.exit(0)
 
 
-def run_generation(
-    workflow: dict,
-    output_path: str,
-    uploaded_image_filename: str = None,
-    quiet: bool = False,
-    json_progress: bool = False,
-) -> tuple:
-    """Run a single generation attempt.
+class SpeculativeRetry:
+    """Queues the next --auto-retry attempt while the current one is validated.
 
-    Args:
-        workflow: The workflow dict with prompts already set
-        output_path: Path to save the output
-        uploaded_image_filename: Optional uploaded input image filename
-        quiet: Suppress progress output
+    Without it the GPU idles while CLIP, YOLO, pose and BLIP check attempt k,
+    and attempt k+1 is only queued after a failure. Attempt k+1's prompts come
+    from adjust_prompt_for_retry and do not depend on the validation result, so
+    submit() queues it as soon as attempt k has sampled. take() hands it to
+    the retry if attempt k fails; cancel() removes it if k passes.
+
+    Usage:
+        speculative = SpeculativeRetry(args.prompt, negative_prompt)
+        run_generation(..., on_sampled=lambda status: speculative.submit(workflow, attempt + 1))
+        ...validate...
+        pending = speculative.take(attempt + 1)  # on failure: wait for pending["prompt_id"]
+        speculative.cancel()  # on success
+    """
+
+    def __init__(self, base_prompt, base_negative, quiet=False):
+        """Initialize the tracker.
+
+        Args:
+            base_prompt: Original positive prompt
+            base_negative: Original negative prompt
+            quiet: Suppress progress output
+        """
+        self.base_prompt = base_prompt
+        self.base_negative = base_negative
+        self.quiet = quiet
+        self.pending = None
+        self.submitted = 0
+        self.used = 0
+        self.wasted = 0
+        self.idle_seconds_saved = 0.0
+
+    def submit(self, workflow, attempt):
+        """Queue an attempt now, with its retry prompts applied to a copy of the workflow.
+
+        Args:
+            workflow: Workflow of the attempt that just sampled
+            attempt: Attempt number to queue (1-based)
+
+        Returns:
+            str: Prompt ID of the speculative attempt, or None if it could not be queued
+        """
+        positive, negative = adjust_prompt_for_retry(self.base_prompt, self.base_negative, attempt - 1)
+        attempt_workflow = modify_prompt(copy.deepcopy(workflow), positive, negative)
+        prompt_id = queue_workflow(attempt_workflow, retry=False)
+        if not prompt_id:
+            return None
+        inflight_prompt_ids.add(prompt_id)
+        self.pending = {
+            "attempt": attempt,
+            "prompt_id": prompt_id,
+            "queued_at": time.time(),
+            "workflow": attempt_workflow,
+            "positive_prompt": positive,
+            "negative_prompt": negative,
+        }
+        self.submitted += 1
+        if not self.quiet:
+            print(f"[INFO] Speculatively queued attempt {attempt} while validating")
+        return prompt_id
+
+    def take(self, attempt):
+        """Claim the speculative prompt once the retry is decided.
+
+        The GPU would otherwise have been idle from the speculative submit
+        until now, but only the part of that wait spent sampling the
+        speculative prompt counts: if it finished before validation did, the
+        GPU idled for the rest anyway. That overlap is added to
+        idle_seconds_saved.
+
+        Args:
+            attempt: Attempt number about to run
+
+        Returns:
+            dict: The queued attempt (prompt_id, workflow, positive_prompt, negative_prompt), or None
+        """
+        pending = self.pending
+        if pending is None or pending["attempt"] != attempt:
+            return None
+        self.pending = None
+        inflight_prompt_ids.discard(pending["prompt_id"])
+        self.used += 1
+
+        now = time.time()
+        status = finished_status(pending["prompt_id"])
+        if status is None:
+            # Still queued or sampling, so the GPU was busy with it for the whole wait
+            busy_until = now
+        else:
+            # Without a recorded completion time, claim nothing rather than overstate
+            busy_until = completion_time(status) or pending["queued_at"]
+        # Clamped to the wait itself, in case the server's clock runs ahead of ours
+        self.idle_seconds_saved += max(0.0, min(now, busy_until) - pending["queued_at"])
+        return pending
+
+    def cancel(self):
+        """Cancel the speculative attempt if the run no longer needs it (counted as wasted)."""
+        pending = self.pending
+        if pending is None:
+            return
+        self.pending = None
+        cancel_prompts([pending["prompt_id"]])
+        inflight_prompt_ids.discard(pending["prompt_id"])
+        self.wasted += 1
+        if not self.quiet:
+            print(f"[INFO] Cancelled speculative attempt {pending['attempt']}")
+
+    def report(self):
+        """Summary for the metadata sidecar (refinement.speculation)."""
+        return {
+            "submitted": self.submitted,
+            "used": self.used,
+            "wasted": self.wasted,
+            "waste_rate": round(self.wasted / self.submitted, 3) if self.submitted else None,
+            "gpu_idle_seconds_saved": round(self.idle_seconds_saved, 3),
+        }
+
+
+def run_generation(
+    workflow: dict,
+    output_path: str,
+    uploaded_image_filename: str = None,
+    quiet: bool = False,
+    json_progress: bool = False,
+    keep_bytes: bool = False,
+    prompt_id: str = None,
+    on_sampled=None,
+) -> tuple:
+    """Run a single generation attempt.
+
+    Every output of the prompt is harvested; each is streamed from ComfyUI to
+    disk and MinIO in one pass.
+
+    Args:
+        workflow: The workflow dict with prompts already set
+        output_path: Path to save the (primary) output
+        uploaded_image_filename: Optional uploaded input image filename
+        quiet: Suppress progress output
         json_progress: Output machine-readable JSON progress
+        keep_bytes: Keep the primary output's bytes (``outputs[0].data``, for validators)
+        prompt_id: Prompt already queued for this workflow (e.g. a speculative retry);
+            the generation time then counts from this call
+        on_sampled: Called with the history entry as soon as the prompt finishes,
+            before its outputs are downloaded
 
     Returns:
-        Tuple of (success: bool, minio_url: str or None, object_name: str or None, generation_time_seconds: float or None)
+        Tuple of (success: bool, minio_url: str or None, object_name: str or None,
+        generation_time_seconds: float or None, outputs: list of StreamedOutput, primary first)
     """
     global current_prompt_id
 
     # Track generation start time
     generation_start_time = time.time()
 
-    prompt_id = queue_workflow(workflow)
+    if prompt_id is None:
+        prompt_id = queue_workflow(workflow)
     if not prompt_id:
-        return False, None, None, None
+        return False, None, None, None, []
 
     # Track prompt ID for cancellation
     current_prompt_id = prompt_id
 
     status = wait_for_completion(prompt_id, quiet=quiet, json_progress=json_progress)
+    if on_sampled is not None:
+        on_sampled(status)
     if status:
-        if download_output(status, output_path):
+        outputs = harvest_outputs(status, output_path, keep_bytes=keep_bytes)
+        if outputs:
             # Calculate generation time
             generation_time_seconds = time.time() - generation_start_time
 
-            # Upload to MinIO
-            import datetime
-
-            timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-            object_name = f"{timestamp}_{Path(output_path).name}"
-            minio_url = upload_to_minio(output_path, object_name)
+            minio_url, object_name = publish_outputs(outputs, quiet=quiet)
             if minio_url:
-                if not quiet:
-                    print(f"[OK] Image available at: {minio_url}")
-                return True, minio_url, object_name, generation_time_seconds
-            else:
-                if not quiet:
-                    print("[ERROR] Failed to upload to MinIO")
-                return False, None, None, None
-
-    return False, None, None, None
+                return True, minio_url, object_name, generation_time_seconds, outputs
+            return False, None, None, None, []
 
+    return False, None, None, None, []
 
-def main():
-    global current_prompt_id, current_output_path
-
-    # Handle special metadata show command before argparse
-    # NOTE: This is intentionally handled before argparse to provide a simple,
-    # git-style subcommand interface (e.g., "git commit" vs "git --help").
-    # This pattern is user-friendly and avoids conflicts with existing flags.
-    # The command doesn't need argparse features like --help integration since
-    # it's a simple read-only operation with minimal arguments.
-    if len(sys.argv) >= 3 and sys.argv[1] == "metadata" and sys.argv[2] == "show":
-        if len(sys.argv) < 4:
-            print("Usage: python generate.py metadata show <image.png>")
-            sys.exit(EXIT_CONFIG_ERROR)
 
-        image_path = sys.argv[3]
+def publish_output(output_path, quiet=False):
+    """Upload a downloaded output to MinIO under a timestamped object name.
 
-        if not os.path.exists(image_path):
-            print(f"[ERROR] Image file not found: {image_path}")
-            sys.exit(EXIT_FAILURE)
+    Args:
+        output_path: Local path of the output
+        quiet: Suppress progress output
 
-        from utils.metadata import format_metadata_for_display, read_metadata_from_png
+    Returns:
+        tuple: (minio_url, object_name), or (None, None) if the upload failed
+    """
+    object_name = output_object_name(output_path)
+    minio_url = upload_to_minio(output_path, object_name)
+    if not minio_url:
+        if not quiet:
+            print("[ERROR] Failed to upload to MinIO")
+        return None, None
+    if not quiet:
+        print(f"[OK] Image available at: {minio_url}")
+    return minio_url, object_name
 
-        metadata = read_metadata_from_png(image_path)
 
-        if metadata:
-            print(format_metadata_for_display(metadata))
-            sys.exit(EXIT_SUCCESS)
-        else:
-            print(f"[ERROR] No embedded metadata found in {image_path}")
-            print(f"[INFO] Check for a sidecar JSON file: {image_path}.json")
-            sys.exit(EXIT_FAILURE)
+def publish_streamed_output(streamed, quiet=False):
+    """Finish publishing an output that download_output streamed to MinIO.
 
-    parser = argparse.ArgumentParser(description="Generate images with ComfyUI")
-    parser.add_argument("--workflow", help="Path to workflow JSON")
-    parser.add_argument("--prompt", help="Positive text prompt")
-    parser.add_argument(
-        "--negative-prompt",
-        "-n",
-        default="",
-        help=f"Negative text prompt (what to avoid). If not specified, SD workflows use default: '{DEFAULT_SD_NEGATIVE_PROMPT}'",
-    )
-    parser.add_argument("--output", default="output.png", help="Output image path")
-    parser.add_argument("--input-image", "-i", help="Input image path (local file or URL) for img2img/I2V")
-    parser.add_argument("--resize", help="Resize input image to WxH (e.g., 512x512)")
-    parser.add_argument("--crop", choices=["center", "cover", "contain"], help="Crop mode for resize")
-    parser.add_argument("--denoise", type=float, help="Denoise strength (0.0-1.0) for img2img")
-    parser.add_argument(
-        "--transparent", action="store_true", help="Generate image with transparent background (requires SAM model)"
-    )
-    parser.add_argument(
-        "--lora",
-        action="append",
-        metavar="NAME:STRENGTH",
-        help="Add LoRA with strength (e.g., 'style.safetensors:0.8'). Can be repeated for multiple LoRAs.",
-    )
-    parser.add_argument(
-        "--lora-preset", metavar="PRESET_NAME", help="Use a predefined LoRA preset from lora_catalog.yaml"
-    )
-    parser.add_argument("--list-loras", action="store_true", help="List available LoRAs and presets, then exit")
-    parser.add_argument(
-        "--prompt-preset",
-        metavar="PRESET_NAME",
-        help="Load a prompt preset from prompt_catalog.yaml (saved_prompts section)",
-    )
-    parser.add_argument(
-        "--list-presets", action="store_true", help="List available prompt presets from prompt_catalog.yaml, then exit"
-    )
-    parser.add_argument("--cancel", metavar="PROMPT_ID", help="Cancel a specific prompt by ID")
-    parser.add_argument("--dry-run", action="store_true", help="Validate workflow without generating")
-    parser.add_argument(
-        "--validate", action="store_true", help="Run validation after generation (default: from config)"
-    )
-    parser.add_argument("--no-validate", action="store_true", help="Disable validation even if config enables it")
-    parser.add_argument(
-        "--validate-person-count", action="store_true", help="Validate person count using YOLO (requires --validate)"
-    )
-    parser.add_argument(
-        "--validate-pose",
-        action="store_true",
-        help="Validate pose estimation (skeleton coherence) using MediaPipe (requires --validate)",
-    )
-    parser.add_argument(
-        "--validate-content",
-        action="store_true",
-        help="Validate image content against prompt using vision model (BLIP-2)",
-    )
-    parser.add_argument(
-        "--auto-retry", action="store_true", help="Automatically retry if validation fails (default: from config)"
-    )
-    parser.add_argument(
-        "--retry-limit", type=int, default=None, help="Maximum retry attempts (default: from config or 3)"
-    )
-    parser.add_argument(
-        "--positive-threshold",
-        type=float,
-        default=None,
-        help="Minimum CLIP score for positive prompt (default: from config or 0.25)",
-    )
-    parser.add_argument("--quiet", action="store_true", help="Suppress progress output")
-    parser.add_argument("--json-progress", action="store_true", help="Output machine-readable JSON progress")
-    parser.add_argument("--no-metadata", action="store_true", help="Disable JSON metadata sidecar upload")
-    parser.add_argument(
-        "--no-embed-metadata", action="store_true", help="Disable embedding metadata in PNG files (default: enabled)"
-    )
-    # Project and tagging for experiment organization
-    parser.add_argument(
-        "--project",
-        metavar="NAME",
-        help="Project name for organizing generations (e.g., 'youngboh', 'nsfw-handjob'). Added to metadata.",
-    )
-    parser.add_argument(
-        "--tags",
-        metavar="TAGS",
-        help="Comma-separated tags for filtering (e.g., 'batch:poses,character:protagonist,style:boondocks')",
-    )
-    parser.add_argument(
-        "--batch-id",
-        metavar="ID",
-        help="Batch identifier for grouping related generations (e.g., 'char-poses-001')",
-    )
-    parser.add_argument(
-        "--mlflow-log",
-        action="store_true",
-        help="Auto-log experiment to MLflow (http://192.168.1.162:5001). Captures ALL params automatically.",
-    )
-    parser.add_argument(
-        "--mlflow-experiment",
-        metavar="NAME",
-        default="comfy-gen-nsfw",
-        help="MLflow experiment name (default: comfy-gen-nsfw)",
-    )
-    parser.add_argument(
-        "--quality-score", action="store_true", help="Run multi-dimensional quality scoring after generation"
-    )
-    parser.add_argument(
-        "--enhance-prompt", action="store_true", help="Enhance prompt using small LLM before generation"
-    )
-    parser.add_argument(
-        "--enhance-style",
-        metavar="STYLE",
-        help="Style hint for prompt enhancement (photorealistic, artistic, game-asset, etc.)",
-    )
+    Falls back to uploading the local file when the streaming upload was
+    skipped or failed part-way.
 
-    # Quality-based iterative refinement
-    parser.add_argument(
-        "--quality-threshold", type=float, default=7.0, help="Minimum quality score to accept (0-10, default: 7.0)"
-    )
-    parser.add_argument(
-        "--max-attempts", type=int, default=3, help="Maximum generation attempts for quality refinement (default: 3)"
-    )
-    parser.add_argument(
-        "--retry-strategy",
-        choices=["progressive", "seed_search", "prompt_enhance"],
-        default="progressive",
-        help="Retry strategy: progressive (increase steps/cfg), seed_search (try different seeds), prompt_enhance (add quality boosters)",
-    )
+    Args:
+        streamed: StreamedOutput from download_output
+        quiet: Suppress progress output
 
-    # Advanced generation parameters
-    parser.add_argument("--steps", type=int, help="Number of sampling steps (1-150, default: 20)")
-    parser.add_argument("--cfg", type=float, help="Classifier-free guidance scale (1.0-20.0, default: 7.0)")
-    parser.add_argument("--seed", type=int, help="Random seed for reproducibility (-1 for random, default: random)")
-    parser.add_argument("--width", type=int, help="Output width in pixels (must be divisible by 8)")
-    parser.add_argument("--height", type=int, help="Output height in pixels (must be divisible by 8)")
-    parser.add_argument("--sampler", help="Sampler algorithm (e.g., euler, dpmpp_2m, dpmpp_2m_sde)")
-    parser.add_argument("--scheduler", help="Noise scheduler (e.g., normal, karras, exponential)")
-    parser.add_argument("--preset", help="Use a generation preset (draft, balanced, high-quality)")
+    Returns:
+        tuple: (minio_url, object_name), or (None, None) if the upload failed
+    """
+    if not streamed.uploaded:
+        if streamed.upload_error:
+            print(f"[WARN] Streaming upload failed ({streamed.upload_error}); uploading {streamed.path} from disk")
+        minio_url, object_name = publish_output(streamed.path, quiet=quiet)
+        if object_name:
+            streamed.object_name = object_name
+    else:
+        minio_url, object_name = minio_object_url(streamed.object_name), streamed.object_name
+        print(f"[OK] Uploaded {streamed.path} to MinIO as {object_name}")
+        if not quiet:
+            print(f"[OK] Image available at: {minio_url}")
+    streamed.url = minio_url
+    return minio_url, object_name
 
-    # Video-specific parameters
-    parser.add_argument(
-        "--length", "--frames", type=int, dest="length", help="Video length in frames (default: 81 = ~5s at 16fps)"
-    )
-    parser.add_argument("--fps", type=int, help="Video frame rate (default: 16)")
-    parser.add_argument("--video-resolution", help="Video resolution as WxH (e.g., 848x480, 1280x720)")
 
-    args = parser.parse_args()
+def publish_outputs(outputs, quiet=False):
+    """Publish a group of harvested outputs (see publish_streamed_output).
 
-    # Enforce --validate when --validate-person-count, --validate-pose, or --validate-content is used
-    if (args.validate_person_count or args.validate_pose or args.validate_content) and not args.validate:
-        # Automatically enable validation when specialized validation is requested
-        args.validate = True
-        if not args.quiet:
-            if args.validate_person_count:
-                flag_name = "--validate-person-count"
-            elif args.validate_pose:
-                flag_name = "--validate-pose"
-            else:
-                flag_name = "--validate-content"
-            print(f"[INFO] Auto-enabling --validate because {flag_name} was specified")
+    Args:
+        outputs: StreamedOutput list from harvest_outputs, primary first
+        quiet: Suppress progress output for the extra outputs' URLs
 
-    # Load configuration for defaults
-    config = load_config()
-    validation_config = config.get("validation", {})
+    Returns:
+        tuple: (minio_url, object_name) of the primary output, or (None, None) if its upload failed
+    """
+    minio_url, object_name = publish_streamed_output(outputs[0], quiet=quiet)
+    for streamed in outputs[1:]:
+        publish_streamed_output(streamed, quiet=True)
+    return minio_url, object_name
 
-    # Apply config defaults to args (CLI args override config)
-    # Validation: --validate forces on, --no-validate forces off, otherwise use config
-    if args.no_validate:
-        args.validate = False
-    elif not args.validate:
-        args.validate = validation_config.get("enabled", False)
 
-    # Auto-retry: CLI overrides config
-    if not args.auto_retry:
-        args.auto_retry = validation_config.get("auto_retry", False)
+# Exception text ComfyUI reports when a prompt runs out of GPU memory (torch.OutOfMemoryError)
+OUT_OF_MEMORY_MARKERS = ("outofmemory", "out of memory", "allocation on device")
 
-    # Retry limit: CLI overrides config
-    if args.retry_limit is None:
-        args.retry_limit = validation_config.get("retry_limit", 3)
 
-    # Positive threshold: CLI overrides config
-    if args.positive_threshold is None:
-        args.positive_threshold = validation_config.get("positive_threshold", 0.25)
+def is_out_of_memory(status):
+    """Check whether a finished prompt failed because the GPU ran out of memory.
 
-    # Default negative prompt from config (applied later if user didn't provide one)
-    config_negative_prompt = config.get("default_negative_prompt", "")
+    Args:
+        status: History entry of the finished prompt
 
-    # Handle list-presets mode
-    if args.list_presets:
-        print("[INFO] Loading prompt presets from prompt_catalog.yaml...")
+    Returns:
+        bool: True if its execution_error is an out-of-memory error
+    """
+    for message in (status or {}).get("status", {}).get("messages") or []:
+        if len(message) < 2 or message[0] != "execution_error":
+            continue
+        error = message[1] or {}
+        text = f"{error.get('exception_type', '')} {error.get('exception_message', '')}".lower()
+        if any(marker in text for marker in OUT_OF_MEMORY_MARKERS):
+            return True
+    return False
 
-        catalog = load_prompt_catalog()
-        if catalog and "saved_prompts" in catalog:
-            saved_prompts = catalog["saved_prompts"]
-            if saved_prompts:
-                print(f"\n[OK] Available prompt presets ({len(saved_prompts)}):")
-                for preset_name, preset_data in saved_prompts.items():
-                    category = preset_data.get("category", "general")
-                    subject = preset_data.get("subject", "N/A")
-                    print(f"  - {preset_name}")
-                    print(f"      Category: {category}")
-                    print(f"      Subject: {subject}")
-                    if "tested_with" in preset_data:
-                        print(f"      Tested with: {preset_data['tested_with']}")
-                    if "notes" in preset_data:
-                        print(f"      Notes: {preset_data['notes']}")
-                    print()
+
+def save_output_metadata(args, metadata, object_name, output_path):
+    """Upload an output's metadata sidecar and embed it in the PNG.
+
+    Returns:
+        str: URL of the metadata sidecar, or None if the upload failed
+    """
+    metadata_url = upload_metadata_to_minio(metadata, object_name)
+    if metadata_url and not args.quiet:
+        print(f"[OK] Metadata available at: {metadata_url}")
+    if not args.no_embed_metadata:
+        embed_metadata_in_output(output_path, metadata)
+    return metadata_url
+
+
+def run_multi_seed(args, job):
+    """Generate --count candidates of one job, in a single sampler pass where possible.
+
+    The empty latent's batch_size is set to the count, so one KSampler pass
+    denoises every candidate and the model is loaded once. ComfyUI draws a
+    batch's noise from one generator seeded with the job seed, so candidate i
+    is reproduced by the seed together with batch_index i. When the workflow
+    has no empty latent image node (img2img, video) or the batch runs out of
+    VRAM, count prompts are queued at once instead, with seeds seed, seed+1, ...
+
+    Every output is harvested and published, and gets its own metadata sidecar
+    recording the seed (and batch position) that reproduces it. The primary
+    output goes to --output; batched extras are saved as
+    "<stem>_<node_id>_<n><ext>", queued candidates as "<stem>_<n><ext>".
+
+    Args:
+        args: Parsed CLI arguments (args.count > 1)
+        job: Prepared job from prepare_job()
+
+    Returns:
+        int: EXIT_SUCCESS if all candidates were generated, else EXIT_FAILURE
+    """
+    global current_prompt_id
+
+    count = args.count
+    workflow = job["workflow"]
+    seed = job["seed"] if job["seed"] is not None else job["workflow_params"].get("seed")
+    if seed is None:
+        seed = random.randint(0, 2**31 - 1)
+        workflow = modify_sampler_params(workflow, seed=seed)
+
+    # (StreamedOutput, seed, batch_index or None, generation_time_seconds)
+    candidates = []
+    produced = 0
+    queue_each = True
+
+    if find_nodes(workflow, *LATENT_IMAGE_CLASSES):
+        if not args.quiet:
+            print(f"[INFO] Sampling {count} candidates in one pass (seed {seed}, batch_size {count})")
+        batch_workflow = modify_batch_size(copy.deepcopy(workflow), count)
+        start = time.time()
+        prompt_id = queue_workflow(batch_workflow)
+        if not prompt_id:
+            return EXIT_FAILURE
+        current_prompt_id = prompt_id
+        status = wait_for_completion(prompt_id, quiet=args.quiet, json_progress=args.json_progress)
+        queue_each = is_out_of_memory(status)
+        if queue_each:
+            print(f"[WARN] Batch of {count} ran out of VRAM; queueing {count} prompts instead")
+        elif status:
+            outputs = harvest_outputs(status, args.output)
+            if outputs:
+                generation_time_seconds = time.time() - start
+                publish_outputs(outputs, quiet=args.quiet)
+                candidates = [
+                    (streamed, seed, (streamed.source or {}).get("batch_index"), generation_time_seconds)
+                    for streamed in outputs
+                ]
+                produced = len({batch_index for _, _, batch_index, _ in candidates})
             else:
-                print("[WARN] No saved prompts found in prompt_catalog.yaml")
+                print("[ERROR] Batched generation produced no outputs")
         else:
-            print("[ERROR] Failed to load prompt_catalog.yaml or no saved_prompts section found")
-            sys.exit(EXIT_CONFIG_ERROR)
+            print("[ERROR] Batched generation failed")
+    else:
+        print("[INFO] Workflow has no empty latent image node; queueing one prompt per candidate")
+
+    if queue_each:
+        # Queue every candidate at once so ComfyUI runs them back to back
+        output = Path(args.output)
+        queued = []
+        for index in range(count):
+            candidate_workflow = modify_sampler_params(copy.deepcopy(workflow), seed=seed + index)
+            queued.append((index, seed + index, queue_workflow(candidate_workflow), time.time()))
+
+        previous_finish = None
+        for index, candidate_seed, prompt_id, queued_at in queued:
+            if not prompt_id:
+                continue
+            current_prompt_id = prompt_id
+            status = wait_for_completion(prompt_id, quiet=args.quiet, json_progress=args.json_progress)
+            finished_at = time.time()
+            generation_time_seconds = finished_at - max(queued_at, previous_finish or queued_at)
+            previous_finish = finished_at
+            path = str(output if index == 0 else output.with_name(f"{output.stem}_{index + 1}{output.suffix}"))
+            outputs = harvest_outputs(status, path) if status else []
+            if not outputs:
+                print(f"[ERROR] Candidate {index + 1}/{count} (seed {candidate_seed}) failed")
+                continue
+            publish_outputs(outputs, quiet=args.quiet)
+            candidates.extend((streamed, candidate_seed, None, generation_time_seconds) for streamed in outputs)
+            produced += 1
 
-        sys.exit(EXIT_SUCCESS)
+    if not args.no_metadata:
+        for streamed, candidate_seed, batch_index, generation_time_seconds in candidates:
+            if not streamed.url:
+                continue
+            metadata = create_metadata_json(
+                workflow_path=args.workflow,
+                prompt=args.prompt,
+                negative_prompt=job["negative_prompt"],
+                workflow_params={**job["workflow_params"], "seed": candidate_seed},
+                loras=job["loras"],
+                preset=args.preset,
+                validation_score=None,
+                minio_url=streamed.url,
+                workflow=workflow,
+                output_path=streamed.path,
+                generation_time_seconds=generation_time_seconds,
+                project=getattr(args, "project", None),
+                tags=getattr(args, "tags", None),
+                batch_id=getattr(args, "batch_id", None),
+                outputs=output_records([streamed]),
+                batch_index=batch_index,
+                batch_size=count if batch_index is not None else None,
+            )
+            save_output_metadata(args, metadata, streamed.object_name, streamed.path)
+
+    if args.json_progress:
+        print(json.dumps({"transport": {"host": COMFYUI_HOST, **comfyui_transport().stats()}}))
+    if not args.quiet:
+        print(f"\n[OK] Generated {produced}/{count} candidates")
+        for streamed, candidate_seed, batch_index, _ in candidates:
+            label = f"seed {candidate_seed}" + (f", batch_index {batch_index}" if batch_index is not None else "")
+            print(f"  {streamed.path} ({label}): {streamed.url}")
+    if produced < count:
+        print(f"[ERROR] Only {produced} of {count} candidates were generated")
+        return EXIT_FAILURE
+    return EXIT_SUCCESS
+
+
+def run_parallel_refinement(args, job):
+    """Best-of-N quality refinement with every strategy variant queued at once.
+
+    The sequential loop in main() samples one attempt, scores it and only then
+    queues the next, and overwrites --output each time. Here the --max-attempts
+    variants of --retry-strategy (see refinement_variants) are all queued up
+    front, so the GPU samples the next variant while the last one is scored.
+    Every variant that has finished by the time the scorer is free is scored
+    in the same round. Once one meets --quality-threshold, the variants still
+    queued are cancelled.
+
+    Each candidate is kept on disk as "<stem>_attempt<k><ext>". The best one is
+    copied to --output, and only it is uploaded to MinIO with a metadata
+    sidecar listing every candidate.
 
-    # Handle list-loras mode
-    if args.list_loras:
-        print("[INFO] Querying available LoRAs from ComfyUI server...")
+    Args:
+        args: Parsed CLI arguments (--quality-score, --quality-threshold, --max-attempts, --retry-strategy)
+        job: Prepared job from prepare_job()
 
-        # Check server availability
-        if not check_server_availability():
-            print("[ERROR] ComfyUI server is not available")
-            sys.exit(EXIT_CONFIG_ERROR)
+    Returns:
+        int: EXIT_SUCCESS if a candidate was promoted, else EXIT_FAILURE
+    """
+    import shutil
 
-        # Get available LoRAs
-        available_loras = list_available_loras()
-        if available_loras:
-            print(f"\n[OK] Available LoRAs ({len(available_loras)}):")
-            for lora in sorted(available_loras):
-                print(f"  - {lora}")
-        else:
-            print("[WARN] No LoRAs found")
+    global current_prompt_id
 
-        # Load and display presets
-        catalog = load_lora_presets()
-        if catalog and "model_suggestions" in catalog:
-            presets = {}
-            # Extract presets from model_suggestions
-            for scenario_name, scenario_data in catalog["model_suggestions"].items():
-                if "default_loras" in scenario_data and scenario_data["default_loras"]:
-                    presets[scenario_name] = scenario_data["default_loras"]
+    workflow = job["workflow"]
+    workflow_params = job["workflow_params"]
+    base_seed = job["seed"] if job["seed"] is not None else workflow_params.get("seed")
+    variants = refinement_variants(
+        args.max_attempts,
+        args.retry_strategy,
+        base_steps=job["steps"] if job["steps"] is not None else workflow_params.get("steps"),
+        base_cfg=job["cfg"] if job["cfg"] is not None else workflow_params.get("cfg"),
+        base_seed=base_seed,
+        base_prompt=args.prompt,
+        base_negative=job["negative_prompt"],
+    )
+    if len(variants) < args.max_attempts and not args.quiet:
+        print(f"[INFO] Strategy '{args.retry_strategy}' has {len(variants)} distinct variants")
+
+    # Queue every variant before scoring anything
+    output = Path(args.output)
+    candidates = []
+    for attempt, params in variants:
+        candidate_workflow = modify_sampler_params(
+            copy.deepcopy(workflow), steps=params["steps"], cfg=params["cfg"], seed=params["seed"]
+        )
+        if params["positive_prompt"] != args.prompt or params["negative_prompt"] != job["negative_prompt"]:
+            candidate_workflow = modify_prompt(candidate_workflow, params["positive_prompt"], params["negative_prompt"])
+        prompt_id = queue_workflow(candidate_workflow)
+        candidates.append(
+            {
+                "attempt": attempt,
+                "params": params,
+                "workflow": candidate_workflow,
+                "prompt_id": prompt_id,
+                "queued_at": time.time(),
+                "path": str(output.with_name(f"{output.stem}_attempt{attempt}{output.suffix}")),
+                "status": "queued" if prompt_id else "failed",
+                "score": None,
+                "quality": None,
+                "outputs": [],
+                "generation_time_seconds": None,
+            }
+        )
+        if prompt_id:
+            inflight_prompt_ids.add(prompt_id)
+    if not args.quiet:
+        queued = sum(1 for candidate in candidates if candidate["prompt_id"])
+        print(f"[INFO] Queued {queued} refinement variants ({args.retry_strategy}) in parallel")
+
+    def score(candidate):
+        image_ctx = ImageContext.from_bytes(candidate["outputs"][0].data, path=candidate["path"])
+        try:
+            result = _validator_task(
+                "quality",
+                image_ctx,
+                not getattr(args, "no_daemon", False),
+                prompt=candidate["params"]["positive_prompt"],
+            )
+        except ImportError:
+            print("[WARN] Quality module not available. Install dependencies: pip install pyiqa")
+            return None
+        except Exception as e:
+            print(f"[ERROR] Quality assessment failed: {e}")
+            return None
+        if "error" in result:
+            print(f"[WARN] Quality assessment failed: {result['error']}")
+            return None
+        return result
 
-            if presets:
-                print("\n[OK] Available LoRA presets:")
-                for preset_name, lora_list in presets.items():
-                    print(f"  - {preset_name}:")
-                    for lora_name in lora_list:
-                        # Find strength from catalog
-                        strength = 1.0
-                        if "loras" in catalog:
-                            for lora_entry in catalog["loras"]:
-                                if lora_entry.get("filename") == lora_name:
-                                    strength = lora_entry.get("recommended_strength", 1.0)
-                                    break
-                        print(f"      {lora_name} (strength: {strength})")
+    pending = [candidate for candidate in candidates if candidate["prompt_id"]]
+    threshold_met = False
+    try:
+        while pending and not threshold_met:
+            # Block for the next variant, then take every later one that has finished meanwhile
+            candidate = pending.pop(0)
+            current_prompt_id = candidate["prompt_id"]
+            ready = [(candidate, wait_for_completion(candidate["prompt_id"], quiet=args.quiet))]
+            while pending:
+                status = finished_status(pending[0]["prompt_id"])
+                if status is None:
+                    break
+                ready.append((pending.pop(0), status))
 
-        sys.exit(EXIT_SUCCESS)
+            for candidate, status in ready:
+                inflight_prompt_ids.discard(candidate["prompt_id"])
+                candidate["generation_time_seconds"] = time.time() - candidate["queued_at"]
+                candidate["outputs"] = (
+                    harvest_outputs(status, candidate["path"], upload=False, keep_bytes=True) if status else []
+                )
+                candidate["status"] = "generated" if candidate["outputs"] else "failed"
+
+            generated = [candidate for candidate, _ in ready if candidate["outputs"]]
+            if not args.quiet and generated:
+                attempts = ", ".join(f"#{candidate['attempt']}" for candidate in generated)
+                print(f"[INFO] Scoring attempt(s) {attempts}")
+            for candidate in generated:
+                quality = score(candidate)
+                if quality is None:
+                    continue
+                candidate["quality"] = quality
+                candidate["score"] = quality["composite_score"]
+                candidate["status"] = "scored"
+                if not args.quiet:
+                    print(
+                        f"[OK] Attempt #{candidate['attempt']}: Quality Grade {quality['grade']} "
+                        f"(Score: {candidate['score']:.2f}/10)"
+                    )
+                if candidate["score"] >= args.quality_threshold:
+                    threshold_met = True
 
-    # Handle cancel mode
-    if args.cancel:
-        if cancel_prompt(args.cancel):
-            sys.exit(EXIT_SUCCESS)
+        if threshold_met and pending and not args.quiet:
+            print(f"[OK] Quality threshold {args.quality_threshold:.1f} met; cancelling {len(pending)} variant(s)")
+    finally:
+        # Variants still queued are not needed, whether the threshold was met or scoring failed
+        if pending:
+            cancel_prompts([candidate["prompt_id"] for candidate in pending])
+            for candidate in pending:
+                candidate["status"] = "cancelled"
+                inflight_prompt_ids.discard(candidate["prompt_id"])
+
+    generated = [candidate for candidate in candidates if candidate["outputs"]]
+    if not generated:
+        print("[ERROR] No refinement variant was generated")
+        return EXIT_FAILURE
+
+    scored = [candidate for candidate in generated if candidate["score"] is not None]
+    if scored:
+        best = max(scored, key=lambda candidate: candidate["score"])
+        refinement_status = "success" if best["score"] >= args.quality_threshold else "best_effort"
+    else:
+        best = generated[0]
+        refinement_status = "failed"
+    if not args.quiet:
+        if best["score"] is not None:
+            print(f"[OK] Best attempt: #{best['attempt']} with score {best['score']:.2f}/10")
+        if refinement_status == "best_effort":
+            print(f"[WARN] Quality threshold {args.quality_threshold:.1f} not met by {len(scored)} variant(s)")
+
+    # Promote the best candidate; the others stay next to it on disk
+    shutil.copyfile(best["path"], args.output)
+    print(f"[OK] Promoted attempt #{best['attempt']} ({best['path']}) to {args.output}")
+    minio_url, object_name = publish_output(args.output, quiet=args.quiet)
+    if not minio_url:
+        return EXIT_FAILURE
+    primary = best["outputs"][0]
+    primary.path, primary.object_name, primary.url = args.output, object_name, minio_url
+
+    if not args.no_metadata:
+        params = best["params"]
+        metadata = create_metadata_json(
+            workflow_path=args.workflow,
+            prompt=params["positive_prompt"],
+            negative_prompt=params["negative_prompt"],
+            workflow_params=extract_workflow_params(best["workflow"]),
+            loras=job["loras"],
+            preset=args.preset,
+            validation_score=None,
+            minio_url=minio_url,
+            workflow=best["workflow"],
+            output_path=args.output,
+            generation_time_seconds=best["generation_time_seconds"],
+            quality_result=best["quality"],
+            refinement_attempt=best["attempt"],
+            refinement_max_attempts=args.max_attempts,
+            refinement_strategy=args.retry_strategy,
+            refinement_previous_scores=[candidate["score"] for candidate in scored] or None,
+            refinement_status=refinement_status,
+            project=getattr(args, "project", None),
+            tags=getattr(args, "tags", None),
+            batch_id=getattr(args, "batch_id", None),
+            outputs=output_records(best["outputs"]),
+            refinement_candidates=[
+                {
+                    "attempt": candidate["attempt"],
+                    "prompt_id": candidate["prompt_id"],
+                    "seed": candidate["params"]["seed"],
+                    "steps": candidate["params"]["steps"],
+                    "cfg": candidate["params"]["cfg"],
+                    "path": candidate["path"] if candidate["outputs"] else None,
+                    "score": candidate["score"],
+                    "status": candidate["status"],
+                }
+                for candidate in candidates
+            ],
+        )
+        save_output_metadata(args, metadata, object_name, args.output)
+
+    if args.json_progress:
+        print(json.dumps({"transport": {"host": COMFYUI_HOST, **comfyui_transport().stats()}}))
+    if not args.quiet:
+        print(f"\nImage available at: {minio_url}")
+    return EXIT_SUCCESS
+
+
+def _validator_task(name, image_ctx, use_daemon, **params):
+    """Run one validator on the warm validation daemon if it is running, else in-process."""
+    from utils.validation_daemon import run_validator_auto
+
+    return run_validator_auto(name, image_ctx, use_daemon=use_daemon, **params)
+
+
+def run_validators(args, image_ctx, positive_prompt, negative_prompt, final_attempt=True):
+    """Run the requested post-generation validators concurrently.
+
+    Quality scoring, CLIP validation, pose validation and content validation
+    are independent once the image is decoded, so they run side by side on
+    a thread pool (see utils.validation_runner) instead of one after another.
+
+    Under --auto-retry (and unless the cascade is disabled) they instead run
+    cheapest first (presets.yaml validation.cascade.order) and stop at the
+    first hard failure, so the next attempt is queued without waiting for
+    BLIP or pyiqa on an image that is already rejected. The last attempt
+    always runs everything, since there is no next attempt to hurry.
+
+    Args:
+        args: Parsed CLI arguments (validation flags, workers, timeouts and cascade settings)
+        image_ctx: Shared ImageContext of the downloaded output
+        positive_prompt: Prompt used for this attempt (quality prompt adherence)
+        negative_prompt: Negative prompt for CLIP validation (or None)
+        final_attempt: Whether no further attempt can follow this one
+
+    Returns:
+        tuple: (runs, report) - per-validator run records and the timing report
+            for the metadata "validation" section (None if nothing ran)
+    """
+    from utils.validation_runner import ValidationOrchestrator
+
+    cascade_config = getattr(args, "validation_cascade", None) or {}
+    early_exit = (
+        args.auto_retry
+        and not final_attempt
+        and cascade_config.get("early_exit", True)
+        and not getattr(args, "no_early_exit", False)
+    )
+
+    orchestrator = ValidationOrchestrator(
+        max_workers=getattr(args, "validation_workers", None),
+        timeouts=getattr(args, "validation_timeouts", None),
+        stages=cascade_config.get("order"),
+        early_exit=early_exit,
+        cost_estimates=cascade_config.get("cost_estimates"),
+    )
+
+    # Prefer the warm validation daemon (python -m utils.validation_daemon serve) when it is running
+    use_daemon = not getattr(args, "no_daemon", False)
+    daemon = None
+    if use_daemon:
+        from utils.validation_daemon import get_daemon_client
+
+        daemon = get_daemon_client()
+
+    def add(name, hard_failure=None, **params):
+        orchestrator.add(name, _validator_task, name, image_ctx, use_daemon, hard_failure=hard_failure, **params)
+
+    if args.quality_score:
+        add("quality", prompt=positive_prompt)
+    if args.validate:
+        add("file", hard_failure=lambda r: not r["passed"])
+        if args.validate_person_count:
+            add("yolo", hard_failure=lambda r: not r["passed"], prompt=args.prompt)
+        add(
+            "clip",
+            hard_failure=lambda r: not r["passed"],
+            prompt=args.prompt,
+            negative_prompt=negative_prompt if negative_prompt else None,
+            positive_threshold=args.positive_threshold,
+        )
+        if args.validate_pose:
+            add("pose", hard_failure=lambda r: not r.get("valid"), prompt=args.prompt)
+        if args.validate_content:
+            add("content", hard_failure=lambda r: not r.get("valid", True), prompt=args.prompt)
+
+    if not len(orchestrator):
+        return {}, None
+
+    if not args.quiet:
+        where = f"on validation daemon {daemon.url}" if daemon else "in-process"
+        print(f"[INFO] Running validators {where}: {', '.join(orchestrator.names)}...")
+
+    runs = orchestrator.run()
+    report = orchestrator.report(runs)
+    report["backend"] = daemon.url if daemon else "in-process"
+
+    if not args.quiet:
+        timings = ", ".join(f"{name} {run['seconds']:.1f}s" for name, run in runs.items() if run["status"] != "skipped")
+        print(
+            f"[INFO] Validators finished in {report['wall_seconds']:.1f}s "
+            f"(sequential: {report['sequential_seconds']:.1f}s; {timings})"
+        )
+        cascade = report.get("cascade")
+        if cascade and cascade["stopped_at"]:
+            not_run = ", ".join(cascade["skipped"] + cascade["abandoned"]) or "none"
+            print(
+                f"[INFO] Cascade stopped at {cascade['stopped_at']} (not run: {not_run}; "
+                f"~{cascade['time_saved_seconds']:.1f}s saved)"
+            )
+
+    return runs, report
+
+
+def build_validation_result(runs):
+    """Combine the file sanity, YOLO and CLIP runs into the base validation_result.
+
+    Produces the same dict validate_image(..., validate_person_count=True) did:
+    CLIP scores and reason, overridden by a person count mismatch, overridden
+    by a failed file sanity check. If the cascade stopped before CLIP ran, the
+    failing stage's reason is used.
+
+    Args:
+        runs: Validator runs from run_validators()
+
+    Returns:
+        dict: validation_result
+
+    Raises:
+        The CLIP validator's exception (or TimeoutError), like a direct call would
+    """
+    from utils.validation import apply_person_count
+
+    clip_run = runs["clip"]
+    if is_skipped(clip_run):
+        result = {"passed": False, "reason": "Validation stopped early"}
+    else:
+        result = result_or_raise(clip_run)
+
+    yolo_run = runs.get("yolo")
+    if yolo_run is not None and not is_skipped(yolo_run):
+        if yolo_run["status"] == "ok":
+            apply_person_count(result, yolo_run["result"])
         else:
-            sys.exit(EXIT_FAILURE)
+            result["person_count"] = None
+            result["person_count_error"] = yolo_run["error"]
 
-    # Validate required args for generation mode
-    # Note: --cancel, --list-loras, and --list-presets exit early and never reach these checks
-    if not args.workflow:
-        parser.error("--workflow is required")
+    file_run = runs.get("file")
+    if file_run is not None and file_run["status"] == "ok" and not file_run["result"]["passed"]:
+        result["passed"] = False
+        result["reason"] = f"Image sanity check failed: {file_run['result']['reason']}"
 
-    # Handle prompt preset loading
+    return result
+
+
+class JobError(Exception):
+    """A generation job cannot run as configured (bad option, missing file or preset)."""
+
+    def __init__(self, message, exit_code=EXIT_CONFIG_ERROR):
+        """Initialize the error.
+
+        Args:
+            message: What is wrong (may span several lines)
+            exit_code: Exit code for the CLI
+        """
+        super().__init__(message)
+        self.exit_code = exit_code
+
+
+def exit_on_job_error(error):
+    """Print a JobError the way the CLI always has and exit with its code."""
+    for line in str(error).splitlines():
+        print(f"[ERROR] {line}")
+    sys.exit(error.exit_code)
+
+
+def resolve_prompt_preset(args, catalog=None):
+    """Load --prompt-preset from prompt_catalog.yaml.
+
+    The preset's positive prompt becomes args.prompt when none was given.
+
+    Args:
+        args: Parsed CLI arguments (or a batch job's arguments)
+        catalog: Already loaded prompt catalog (read from disk if None)
+
+    Returns:
+        str: The preset's negative prompt (None without --prompt-preset)
+
+    Raises:
+        JobError: If the catalog or the preset cannot be found
+    """
     preset_positive = None
     preset_negative = None
     if args.prompt_preset:
-        catalog = load_prompt_catalog()
+        if catalog is None:
+            catalog = load_prompt_catalog()
         if not catalog or "saved_prompts" not in catalog:
-            print("[ERROR] Failed to load prompt_catalog.yaml or no saved_prompts section found")
-            sys.exit(EXIT_CONFIG_ERROR)
+            raise JobError("Failed to load prompt_catalog.yaml or no saved_prompts section found")
 
         saved_prompts = catalog["saved_prompts"]
         if args.prompt_preset not in saved_prompts:
-            print(f"[ERROR] Prompt preset not found: {args.prompt_preset}")
             available = ", ".join(saved_prompts.keys()) if saved_prompts else "none"
-            print(f"[ERROR] Available presets: {available}")
-            sys.exit(EXIT_CONFIG_ERROR)
+            raise JobError(f"Prompt preset not found: {args.prompt_preset}\nAvailable presets: {available}")
 
         preset_data = saved_prompts[args.prompt_preset]
         preset_positive = preset_data.get("positive", "")
@@ -2256,56 +2979,54 @@ def main():
             if not args.quiet:
                 print("[INFO] Using preset positive prompt")
 
-    if not args.dry_run and not args.prompt:
-        parser.error("--prompt is required unless using --dry-run or --prompt-preset")
+    return preset_negative
 
-    # Check server availability first
-    if not check_server_availability():
-        print("[ERROR] ComfyUI server is not available")
-        sys.exit(EXIT_CONFIG_ERROR)
 
-    # Load workflow
+def load_job_workflow(workflow_path):
+    """Load a job's workflow JSON.
+
+    Args:
+        workflow_path: Path to the workflow file
+
+    Returns:
+        dict: The workflow
+
+    Raises:
+        JobError: If the file is missing or not valid JSON
+    """
     try:
-        workflow = load_workflow(args.workflow)
+        return load_workflow(workflow_path)
     except FileNotFoundError:
-        print(f"[ERROR] Workflow file not found: {args.workflow}")
-        sys.exit(EXIT_CONFIG_ERROR)
+        raise JobError(f"Workflow file not found: {workflow_path}") from None
     except json.JSONDecodeError as e:
-        print(f"[ERROR] Invalid JSON in workflow file: {e}")
-        sys.exit(EXIT_CONFIG_ERROR)
+        raise JobError(f"Invalid JSON in workflow file: {e}") from None
     except Exception as e:
-        print(f"[ERROR] Failed to load workflow: {e}")
-        sys.exit(EXIT_CONFIG_ERROR)
+        raise JobError(f"Failed to load workflow: {e}") from None
 
-    # Get available models and validate workflow
-    available_models = get_available_models()
-    if available_models:
-        is_valid, missing_models, suggestions = validate_workflow_models(workflow, available_models)
 
-        if not is_valid:
-            print("[ERROR] Workflow validation failed - missing models:")
-            for model_type, model_name in missing_models:
-                print(f"  - {model_type}: {model_name}")
-                if model_name in suggestions:
-                    print("    Suggested fallbacks:")
-                    for suggestion in suggestions[model_name]:
-                        print(f"      * {suggestion}")
-            sys.exit(EXIT_CONFIG_ERROR)
-        else:
-            print("[OK] Workflow validation passed - all models available")
+def prepare_job(args, workflow, config, preset_negative=None, available_models=None, catalogs=None):
+    """Apply one job's options to a loaded workflow.
 
-    # Handle dry-run mode
-    if args.dry_run:
-        print("[OK] Dry-run mode - workflow is valid")
-        print(f"[OK] Workflow: {args.workflow}")
-        if args.prompt:
-            print(f"[OK] Prompt: {args.prompt}")
-        print("[OK] Validation complete - no generation performed")
-        sys.exit(EXIT_SUCCESS)
+    Enhances the prompt, merges negative prompts, uploads the input image and
+    applies the generation preset, LoRAs, sampler, dimension and video settings.
 
-    # Set up Ctrl+C handler
-    signal.signal(signal.SIGINT, signal_handler)
-    current_output_path = args.output
+    Args:
+        args: Parsed CLI arguments (or a batch job's arguments); args.prompt is
+            replaced by the enhanced prompt when --enhance-prompt is set
+        workflow: Workflow loaded from args.workflow
+        config: presets.yaml contents (default_negative_prompt)
+        preset_negative: Negative prompt from --prompt-preset, if any
+        available_models: Models from /object_info (fetched if LoRAs need them and None)
+        catalogs: Already loaded "presets" and "lora_catalog" (read from disk if None)
+
+    Returns:
+        dict: workflow, negative_prompt, uploaded_filename, steps, cfg, seed,
+            workflow_params and loras (metadata)
+
+    Raises:
+        JobError: If an option is invalid or the input image cannot be used
+    """
+    config_negative_prompt = config.get("default_negative_prompt", "")
 
     # Enhance prompt if requested
     original_prompt = args.prompt
@@ -2313,15 +3034,15 @@ def main():
         try:
             from utils.prompt_enhancer import enhance_prompt, is_available
         except ImportError as e:
-            print(f"[ERROR] Failed to import prompt_enhancer: {e}")
-            print("[ERROR] Install with: pip install transformers torch")
-            sys.exit(EXIT_CONFIG_ERROR)
+            raise JobError(
+                f"Failed to import prompt_enhancer: {e}\nInstall with: pip install transformers torch"
+            ) from None
 
         try:
             if not is_available():
-                print("[ERROR] Prompt enhancement requires transformers library")
-                print("[ERROR] Install with: pip install transformers torch")
-                sys.exit(EXIT_CONFIG_ERROR)
+                raise JobError(
+                    "Prompt enhancement requires transformers library\nInstall with: pip install transformers torch"
+                )
 
             if not args.quiet:
                 print("[INFO] Enhancing prompt...")
@@ -2334,6 +3055,8 @@ def main():
             if not args.quiet:
                 print(f"[OK] Enhanced: {enhanced}")
 
+        except JobError:
+            raise
         except Exception as e:
             print(f"[ERROR] Prompt enhancement failed: {e}")
             print("[INFO] Using original prompt")
@@ -2374,14 +3097,12 @@ def main():
                 temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".png")
                 temp_file.close()
                 if not download_image(args.input_image, temp_file.name):
-                    print("[ERROR] Failed to download input image")
-                    sys.exit(EXIT_FAILURE)
+                    raise JobError("Failed to download input image", EXIT_FAILURE)
                 image_path = temp_file.name
             else:
                 # Use local file
                 if not os.path.exists(args.input_image):
-                    print(f"[ERROR] Input image not found: {args.input_image}")
-                    sys.exit(EXIT_CONFIG_ERROR)
+                    raise JobError(f"Input image not found: {args.input_image}")
                 # Copy to temp file for preprocessing
                 temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=Path(args.input_image).suffix)
                 temp_file.close()
@@ -2400,185 +3121,1187 @@ def main():
                     w, h = parts
                     resize = (int(w), int(h))
                 except (ValueError, IndexError):
-                    print(f"[ERROR] Invalid resize format: {args.resize}. Use WxH (e.g., 512x512)")
-                    sys.exit(EXIT_CONFIG_ERROR)
+                    raise JobError(f"Invalid resize format: {args.resize}. Use WxH (e.g., 512x512)") from None
 
             image_path = preprocess_image(image_path, resize=resize, crop=args.crop)
 
             # Upload to ComfyUI
             uploaded_filename = upload_image_to_comfyui(image_path)
             if not uploaded_filename:
-                print("[ERROR] Failed to upload input image to ComfyUI")
-                sys.exit(EXIT_FAILURE)
+                raise JobError("Failed to upload input image to ComfyUI", EXIT_FAILURE)
+
+            # Modify workflow to use uploaded image
+            workflow = modify_input_image(workflow, uploaded_filename)
+
+        finally:
+            # Clean up temp file
+            if temp_file and os.path.exists(temp_file.name):
+                try:
+                    os.remove(temp_file.name)
+                except OSError:
+                    pass
+
+    # Apply denoise strength if specified
+    if args.denoise is not None:
+        workflow = modify_denoise(workflow, args.denoise)
+
+    # Handle generation preset (must be before LoRA processing to use preset LoRAs)
+    preset_params = {}
+    if args.preset:
+        presets = catalogs["presets"] if catalogs else load_presets()
+        if args.preset in presets:
+            preset_params = presets[args.preset]
+            print(f"[OK] Loaded preset '{args.preset}': {preset_params}")
+        else:
+            available_presets = ", ".join(presets.keys()) if presets else "none"
+            raise JobError(f"Preset not found: {args.preset}\nAvailable presets: {available_presets}")
+
+    # Process LoRA arguments
+    lora_specs = []
+
+    # First, load LoRAs from generation preset if specified
+    if preset_params and "loras" in preset_params:
+        print(f"[OK] Loading LoRAs from preset '{args.preset}'")
+        for lora_entry in preset_params["loras"]:
+            lora_name = lora_entry.get("name")
+            strength = lora_entry.get("strength", 1.0)
+            if lora_name:
+                lora_specs.append((lora_name, strength, strength))
+                print(f"  - {lora_name} (strength: {strength})")
+
+    # Handle --lora-preset
+    if args.lora_preset:
+        catalog = catalogs["lora_catalog"] if catalogs else load_lora_presets()
+        if catalog and "model_suggestions" in catalog:
+            preset_found = False
+            for scenario_name, scenario_data in catalog["model_suggestions"].items():
+                if scenario_name == args.lora_preset:
+                    preset_found = True
+                    if "default_loras" in scenario_data and scenario_data["default_loras"]:
+                        print(f"[OK] Loading LoRA preset '{args.lora_preset}'")
+                        for lora_name in scenario_data["default_loras"]:
+                            # Find recommended strength from catalog
+                            strength = 1.0
+                            if "loras" in catalog:
+                                for lora_entry in catalog["loras"]:
+                                    if lora_entry.get("filename") == lora_name:
+                                        strength = lora_entry.get("recommended_strength", 1.0)
+                                        break
+                            lora_specs.append((lora_name, strength, strength))
+                            print(f"  - {lora_name} (strength: {strength})")
+                    break
+
+            if not preset_found:
+                available_presets = ", ".join(catalog["model_suggestions"].keys())
+                raise JobError(f"LoRA preset not found: {args.lora_preset}\nAvailable presets: {available_presets}")
+        else:
+            raise JobError("Cannot load LoRA presets from lora_catalog.yaml")
+
+    # Handle --lora arguments
+    if args.lora:
+        for lora_spec in args.lora:
+            # Parse "name:strength" format
+            # Note: Using rsplit(':', 1) to split from right, which correctly handles
+            # paths with colons (e.g., "C:\\path\\lora.safetensors:0.8")
+            if ":" in lora_spec:
+                parts = lora_spec.rsplit(":", 1)
+                lora_name = parts[0]
+                try:
+                    strength = float(parts[1])
+                    if strength < 0:
+                        raise JobError(
+                            f"LoRA strength must be non-negative: {parts[1]}\nFormat: 'lora_name.safetensors:0.8'"
+                        )
+                except ValueError:
+                    raise JobError(f"Invalid LoRA strength: {parts[1]}\nFormat: 'lora_name.safetensors:0.8'") from None
+            else:
+                # No strength specified, use 1.0
+                lora_name = lora_spec
+                strength = 1.0
+
+            lora_specs.append((lora_name, strength, strength))
+            print(f"[OK] Adding LoRA: {lora_name} (strength: {strength})")
+
+    # Inject LoRAs into workflow
+    if lora_specs:
+        if available_models is None:
+            available_models = get_available_models()
+        available_loras = available_models.get("loras", []) if available_models else []
+        workflow = inject_lora_chain(workflow, lora_specs, available_loras)
+
+    # Merge preset with CLI args (CLI args override preset)
+    steps = args.steps if args.steps is not None else preset_params.get("steps")
+    cfg = args.cfg if args.cfg is not None else preset_params.get("cfg")
+    seed = args.seed if args.seed is not None else preset_params.get("seed")
+    width = args.width if args.width is not None else preset_params.get("width")
+    height = args.height if args.height is not None else preset_params.get("height")
+    sampler = args.sampler if args.sampler is not None else preset_params.get("sampler")
+    scheduler = args.scheduler if args.scheduler is not None else preset_params.get("scheduler")
+
+    # Merge video-specific parameters from preset
+    if args.length is None and "length" in preset_params:
+        args.length = preset_params.get("length")
+    if args.fps is None and "fps" in preset_params:
+        args.fps = preset_params.get("fps")
+
+    # Handle seed=-1 for random seed generation
+    if seed == -1:
+        seed = random.randint(0, 2**32 - 1)
+        print(f"[OK] Generated random seed: {seed}")
+
+    # Validate parameters
+    is_valid, error_msg = validate_generation_params(
+        steps=steps, cfg=cfg, denoise=args.denoise, width=width, height=height
+    )
+    if not is_valid:
+        raise JobError(f"Parameter validation failed: {error_msg}")
+
+    # Apply sampler parameters to workflow
+    if any(p is not None for p in [steps, cfg, seed, sampler, scheduler]):
+        workflow = modify_sampler_params(
+            workflow, steps=steps, cfg=cfg, seed=seed, sampler_name=sampler, scheduler=scheduler
+        )
+
+    # Apply dimension parameters to workflow
+    if width is not None or height is not None:
+        workflow = modify_dimensions(workflow, width=width, height=height)
+
+    # Apply video-specific parameters if provided
+    # Parse --video-resolution if provided (overrides --width/--height for video)
+    video_width = None
+    video_height = None
+    if args.video_resolution:
+        try:
+            video_width, video_height = map(int, args.video_resolution.split("x"))
+        except ValueError:
+            raise JobError(
+                f"Invalid video resolution format: {args.video_resolution}. Use WxH (e.g., 848x480)"
+            ) from None
+
+    # Apply video parameters to workflow if any video params are set
+    if args.length is not None or video_width is not None or video_height is not None:
+        workflow = modify_video_params(workflow, width=video_width, height=video_height, length=args.length)
+
+    # Apply video FPS if provided
+    if args.fps is not None:
+        workflow = modify_video_fps(workflow, fps=args.fps)
+
+    # Apply transparency if requested
+    if args.transparent:
+        workflow = enable_transparency(workflow)
+
+    # Extract workflow parameters and LoRAs for metadata
+    workflow_params = extract_workflow_params(workflow)
+    loras_metadata = extract_loras_from_workflow(workflow)
+
+    return {
+        "workflow": workflow,
+        "negative_prompt": effective_negative_prompt,
+        "uploaded_filename": uploaded_filename,
+        "steps": steps,
+        "cfg": cfg,
+        "seed": seed,
+        "workflow_params": workflow_params,
+        "loras": loras_metadata,
+    }
+
+
+# Options a --batch-file line may set (keys as in the flags, with "-" or "_")
+BATCH_JOB_FIELDS = {
+    "workflow",
+    "prompt",
+    "negative_prompt",
+    "output",
+    "input_image",
+    "resize",
+    "crop",
+    "denoise",
+    "transparent",
+    "lora",
+    "lora_preset",
+    "prompt_preset",
+    "enhance_prompt",
+    "enhance_style",
+    "steps",
+    "cfg",
+    "seed",
+    "width",
+    "height",
+    "sampler",
+    "scheduler",
+    "preset",
+    "length",
+    "fps",
+    "video_resolution",
+    "project",
+    "tags",
+    "batch_id",
+}
+
+# Alternative spellings accepted in batch-file lines
+BATCH_FIELD_ALIASES = {"loras": "lora", "negative": "negative_prompt", "frames": "length"}
+
+
+def load_batch_file(batch_path):
+    """Read a JSONL batch file.
+
+    Blank lines and lines starting with "#" are skipped.
+
+    Args:
+        batch_path: Path to the JSONL file
+
+    Returns:
+        list: (line_number, entry) tuples, one per job
+
+    Raises:
+        JobError: If a line is not a JSON object
+    """
+    entries = []
+    with open(batch_path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise JobError(f"{batch_path}:{line_number}: invalid JSON: {e}") from None
+            if not isinstance(entry, dict):
+                raise JobError(f"{batch_path}:{line_number}: expected a JSON object")
+            entries.append((line_number, entry))
+    return entries
+
+
+# Per-job stages timed by BatchRunner, in pipeline order
+BATCH_STAGES = ("prepare", "generate", "download", "upload", "validate", "metadata")
+
+
+class GenerationJob:
+    """One image to generate: the options that differ from the batch's defaults.
+
+    Options use the CLI flag names ("negative_prompt" or "negative-prompt"),
+    plus the aliases in BATCH_FIELD_ALIASES. LoRAs may be given as
+    "name:strength" strings or {"name": ..., "strength": ...} dicts, and
+    tags as a list.
+
+    Usage:
+        job = GenerationJob(id="beach", workflow="workflows/flux-dev.json", prompt="a dog", steps=30)
+    """
+
+    def __init__(self, id=None, line=None, **options):
+        """Initialize the job.
+
+        Args:
+            id: Free-form label copied into the job's result
+            line: Batch-file line number, copied into the result
+            **options: Generation options by flag name
+        """
+        self.id = id
+        self.line = line
+        self.options = options
+
+    @classmethod
+    def from_dict(cls, entry, line=None):
+        """Create a job from a batch-file JSON object (its "id" becomes the label)."""
+        options = dict(entry)
+        return cls(id=options.pop("id", None), line=line, **options)
+
+    def to_args(self, defaults, index):
+        """Build the job's arguments: the defaults overridden by this job's options.
+
+        Args:
+            defaults: Parsed CLI arguments shared by every job
+            index: 1-based job number, used for the default output name
+
+        Returns:
+            argparse.Namespace: Arguments for prepare_job()
+
+        Raises:
+            JobError: If an option is unknown or its value is invalid for its flag
+        """
+        actions = batch_field_actions()
+        job_args = argparse.Namespace(**vars(defaults))
+        if "output" not in self.options:
+            base = Path(defaults.output)
+            job_args.output = str(base.with_name(f"{base.stem}_{index:04d}{base.suffix}"))
+
+        for key, value in self.options.items():
+            field = key.replace("-", "_")
+            field = BATCH_FIELD_ALIASES.get(field, field)
+            if field not in BATCH_JOB_FIELDS:
+                raise JobError(f"Unknown batch field: {key}")
+
+            if field == "lora":
+                # "name:0.8", ["a:0.8", "b"] or [{"name": "a", "strength": 0.8}]
+                specs = value if isinstance(value, list) else [value]
+                value = []
+                for spec in specs:
+                    if isinstance(spec, dict):
+                        if not isinstance(spec.get("name"), str):
+                            raise JobError(f"LoRA entry has no name: {spec!r}")
+                        spec = f"{spec['name']}:{spec.get('strength', 1.0)}"
+                    elif not isinstance(spec, str):
+                        raise JobError(f"Invalid LoRA entry: {spec!r}\nFormat: 'lora_name.safetensors:0.8'")
+                    value.append(spec)
+            elif field == "tags" and isinstance(value, list):
+                value = ",".join(str(tag) for tag in value)
+            elif value is not None:
+                value = _convert_batch_value(actions[field], key, value)
+            setattr(job_args, field, value)
+
+        return job_args
+
+
+# Parser actions of the BATCH_JOB_FIELDS flags (built on first use)
+_batch_field_actions = None
+
+
+def batch_field_actions():
+    """Parser actions for the options a batch line may set, by field name."""
+    global _batch_field_actions
+    if _batch_field_actions is None:
+        _batch_field_actions = {
+            action.dest: action for action in build_parser()._actions if action.dest in BATCH_JOB_FIELDS
+        }
+    return _batch_field_actions
+
+
+def _convert_batch_value(action, key, value):
+    """Convert a batch-file value as argparse would convert the flag's string.
+
+    Raises:
+        JobError: If the value does not convert or is not one of the flag's choices
+    """
+    if action.type is not None:
+        try:
+            value = action.type(str(value))
+        except (TypeError, ValueError):
+            raise JobError(f"Invalid value for {key}: {value!r}") from None
+    if action.choices is not None and value not in action.choices:
+        choices = ", ".join(str(choice) for choice in action.choices)
+        raise JobError(f"Invalid value for {key}: {value!r} (choose from {choices})")
+    return value
+
+
+def default_args(config=None, **overrides):
+    """CLI defaults with presets.yaml applied, as if generate.py ran with no flags.
+
+    Args:
+        config: presets.yaml contents (loaded if None)
+        **overrides: Options to set by flag name (e.g. quality_score=True, output="/tmp/img.png")
+
+    Returns:
+        argparse.Namespace: Arguments usable as BatchRunner defaults
+
+    Raises:
+        JobError: If an override is not a generate.py option
+    """
+    args = build_parser().parse_args([])
+    for key, value in overrides.items():
+        field = key.replace("-", "_")
+        if not hasattr(args, field):
+            raise JobError(f"Unknown option: {key}")
+        setattr(args, field, value)
+    apply_config_defaults(args, config if config is not None else load_config())
+    return args
+
+
+def summarize_batch(results, wall_seconds):
+    """Summarize a batch: counts, throughput and per-stage timing.
+
+    Args:
+        results: Job results from BatchRunner
+        wall_seconds: Wall time of the whole batch
+
+    Returns:
+        dict: jobs, succeeded, failed, wall_seconds, images_per_minute and
+            stages ({stage: {"count", "total_seconds", "mean_seconds", "max_seconds"}})
+    """
+    succeeded = sum(1 for result in results if result["status"] == "ok")
+    stages = {}
+    for stage in BATCH_STAGES:
+        times = [result["timings"][stage] for result in results if stage in result.get("timings", {})]
+        if times:
+            stages[stage] = {
+                "count": len(times),
+                "total_seconds": round(sum(times), 3),
+                "mean_seconds": round(sum(times) / len(times), 3),
+                "max_seconds": round(max(times), 3),
+            }
+    return {
+        "jobs": len(results),
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "wall_seconds": round(wall_seconds, 3),
+        "images_per_minute": round(succeeded / wall_seconds * 60, 2) if wall_seconds > 0 else 0.0,
+        "stages": stages,
+    }
+
+
+def print_batch_summary(summary):
+    """Print a batch summary from summarize_batch()."""
+    print(
+        f"[OK] Batch finished: {summary['succeeded']}/{summary['jobs']} succeeded in "
+        f"{summary['wall_seconds']:.1f}s ({summary['images_per_minute']:.1f} images/min)"
+    )
+    for stage, timing in summary["stages"].items():
+        print(
+            f"[INFO]   {stage:<9} mean {timing['mean_seconds']:.2f}s, max {timing['max_seconds']:.2f}s "
+            f"(n={timing['count']})"
+        )
+
+
+class BatchRunner:
+    """Run GenerationJobs in-process, keeping up to max_inflight prompts queued on ComfyUI.
+
+    Jobs are prepared and queued on the calling thread. Each queued prompt gets
+    a worker thread that waits for its completion event and then downloads,
+    validates and uploads the output while the next prompts already run on the
+    GPU. Everything a subprocess-per-image loop repeats is done once per
+    runner: presets and catalogs are parsed once, /object_info is fetched once,
+    workflow files are read once, HTTP goes through the keep-alive
+    comfyui_transport() and validators keep their models loaded (or use the
+    warm validation daemon).
+
+    Usage:
+        runner = BatchRunner(max_inflight=2, workflow="workflows/flux-dev.json", output="/tmp/dog.png")
+        summary = runner.run([GenerationJob(prompt="a dog on a beach", seed=1), ...])
+        print_batch_summary(summary)
+    """
+
+    def __init__(self, max_inflight=None, config=None, args=None, on_result=None, **defaults):
+        """Initialize the runner.
+
+        Args:
+            max_inflight: Prompts kept queued on ComfyUI (default: config batch.max_inflight or 2)
+            config: presets.yaml contents (loaded if None)
+            args: Parsed CLI arguments to use as every job's defaults (built from **defaults if None)
+            on_result: Called with each job's result as it finishes, one at a time
+            **defaults: Options for every job by flag name when args is None (e.g. quality_score=True)
+        """
+        self.config = config if config is not None else load_config()
+        self.args = args if args is not None else default_args(self.config, **defaults)
+        self.max_inflight = max_inflight or self.config.get("batch", {}).get("max_inflight") or BATCH_MAX_INFLIGHT
+        self.on_result = on_result
+
+        self._available_models = None
+        self._catalogs = None
+        self._lock = threading.Lock()
+
+    def _load_shared(self):
+        """Fetch /object_info and parse the catalogs once for every job of this runner."""
+        if self._catalogs is None:
+            self._available_models = get_available_models(refresh=self.args.refresh_models)
+            self._catalogs = {"presets": load_presets(), "lora_catalog": load_lora_presets()}
+            self._catalogs["prompt_catalog"] = load_prompt_catalog()
+
+    def prepare(self, args):
+        """Load and prepare one job's workflow (see prepare_job).
+
+        Args:
+            args: The job's arguments from GenerationJob.to_args()
+
+        Returns:
+            dict: prepare_job() result
+
+        Raises:
+            JobError: If the job cannot run as configured
+        """
+        self._load_shared()
+        if not args.workflow:
+            raise JobError("workflow is required")
+        preset_negative = resolve_prompt_preset(args, self._catalogs["prompt_catalog"])
+        if not args.prompt:
+            raise JobError("prompt is required unless prompt_preset is set")
+
+        workflow = load_job_workflow(args.workflow)
+        if self._available_models:
+            is_valid, missing_models, _ = validate_workflow_models(workflow, self._available_models)
+            if not is_valid:
+                missing = ", ".join(f"{model_type}: {model_name}" for model_type, model_name in missing_models)
+                raise JobError(f"Workflow validation failed - missing models: {missing}")
+
+        return prepare_job(args, workflow, self.config, preset_negative, self._available_models, self._catalogs)
+
+    def run(self, jobs):
+        """Run jobs and wait for all of them.
+
+        Args:
+            jobs: GenerationJobs (or batch-file style dicts)
+
+        Returns:
+            dict: summarize_batch() summary plus "results", one per job in job order
+
+        Raises:
+            JobError: If the ComfyUI server is not available
+        """
+        jobs = [job if isinstance(job, GenerationJob) else GenerationJob.from_dict(job) for job in jobs]
+        if not check_server_availability():
+            raise JobError("ComfyUI server is not available")
+
+        slots = threading.BoundedSemaphore(self.max_inflight)
+        results = []
+        batch_start = time.time()
+
+        def record(result):
+            with self._lock:
+                results.append(result)
+                if result["status"] == "ok":
+                    print(f"[OK] Job {result['index']}/{len(jobs)}: {result['output']}")
+                else:
+                    print(f"[ERROR] Job {result['index']}/{len(jobs)}: {result['error']}")
+                if self.on_result:
+                    self.on_result(result)
+
+        def finish(*finish_args):
+            record(self._finish(*finish_args))
+
+        # Waiters hold up to max_inflight threads; the rest overlap download/upload/validation
+        with ThreadPoolExecutor(max_workers=self.max_inflight * 2, thread_name_prefix="batch") as executor:
+            for index, job in enumerate(jobs, 1):
+                result = {"index": index, "id": job.id, "line": job.line, "timings": {}}
+                started = time.time()
+                try:
+                    job_args = job.to_args(self.args, index)
+                    prepared = self.prepare(job_args)
+                except JobError as e:
+                    record({**result, "status": "error", "error": str(e).replace("\n", "; ")})
+                    continue
+                except Exception as e:
+                    # A malformed line fails its own job, not the whole batch
+                    record({**result, "status": "error", "error": f"{type(e).__name__}: {e}"})
+                    continue
+                result["timings"]["prepare"] = round(time.time() - started, 3)
+
+                slots.acquire()
+                queued_at = time.time()
+                prompt_id = queue_workflow(prepared["workflow"])
+                if not prompt_id:
+                    slots.release()
+                    record({**result, "status": "failed", "error": "Failed to queue workflow"})
+                    continue
+                inflight_prompt_ids.add(prompt_id)
+                executor.submit(finish, job_args, prepared, prompt_id, queued_at, slots, result)
+
+        results.sort(key=lambda result: result["index"])
+        return {**summarize_batch(results, time.time() - batch_start), "results": results}
+
+    def _finish(self, args, job, prompt_id, queued_at, slots, result):
+        """Wait for a queued prompt, then save, validate and publish its output.
+
+        The prompt's in-flight slot is released as soon as ComfyUI finishes it,
+        so the next prompt is queued while this output is downloaded and uploaded.
+        """
+        result["prompt_id"] = prompt_id
+        timings = result["timings"]
+
+        def lap(stage, since):
+            now = time.time()
+            timings[stage] = round(now - since, 3)
+            return now
+
+        try:
+            try:
+                status = wait_for_completion(prompt_id, quiet=True)
+            finally:
+                inflight_prompt_ids.discard(prompt_id)
+                slots.release()
+            now = lap("generate", queued_at)
+            generation_time_seconds = timings["generate"]
+            result["generation_time_seconds"] = generation_time_seconds
+
+            Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+            needs_bytes = bool(args.validate or args.quality_score)
+            outputs = harvest_outputs(status, args.output, keep_bytes=needs_bytes) if status else []
+            if not outputs:
+                return {**result, "status": "failed", "error": "No output downloaded"}
+            # The uploads stream alongside the downloads; "upload" only times fallback uploads from disk
+            now = lap("download", now)
+            result["output"] = args.output
+            if len(outputs) > 1:
+                result["extra_outputs"] = [streamed.path for streamed in outputs[1:]]
+
+            minio_url, object_name = publish_outputs(outputs, quiet=True)
+            if not minio_url:
+                return {**result, "status": "failed", "error": "Failed to upload to MinIO"}
+            now = lap("upload", now)
+            result["minio_url"] = minio_url
+
+            # Each job runs once: retries and quality refinement are not applied in batch mode
+            validation_result = None
+            quality_result = None
+            validation_report = None
+            if args.validate or args.quality_score:
+                image_ctx = ImageContext.from_bytes(outputs[0].data, path=args.output)
+                runs, validation_report = run_validators(args, image_ctx, args.prompt, job["negative_prompt"])
+                if args.quality_score:
+                    try:
+                        quality_result = result_or_raise(runs["quality"])
+                        result["quality_score"] = quality_result.get("composite_score")
+                    except Exception as e:
+                        result["quality_error"] = str(e)
+                if args.validate:
+                    try:
+                        validation_result = build_validation_result(runs)
+                        result["validation"] = {
+                            "passed": validation_result["passed"],
+                            "reason": validation_result.get("reason"),
+                            "positive_score": validation_result.get("positive_score"),
+                        }
+                    except Exception as e:
+                        result["validation_error"] = str(e)
+                now = lap("validate", now)
+
+            if not args.no_metadata:
+                metadata = create_metadata_json(
+                    workflow_path=args.workflow,
+                    prompt=args.prompt,
+                    negative_prompt=job["negative_prompt"],
+                    workflow_params=job["workflow_params"],
+                    loras=job["loras"],
+                    preset=args.preset,
+                    validation_score=validation_result.get("positive_score") if validation_result else None,
+                    minio_url=minio_url,
+                    workflow=job["workflow"],
+                    output_path=args.output,
+                    generation_time_seconds=generation_time_seconds,
+                    quality_result=quality_result,
+                    project=args.project,
+                    tags=args.tags,
+                    batch_id=args.batch_id,
+                    validation_report=validation_report,
+                    outputs=output_records(outputs),
+                )
+                result["metadata_url"] = upload_metadata_to_minio(metadata, object_name)
+                if not args.no_embed_metadata:
+                    embed_metadata_in_output(args.output, metadata)
+                lap("metadata", now)
+
+            result["total_seconds"] = round(time.time() - queued_at, 3)
+            return {**result, "status": "ok"}
+        except Exception as e:
+            return {**result, "status": "failed", "error": str(e)}
+
+
+def run_batch(args, config):
+    """Run --batch-file through a BatchRunner and write one JSON result per job.
+
+    Results are appended to --batch-results as jobs finish, so a long batch
+    can be followed (or resumed by hand) while it runs.
+
+    Args:
+        args: Parsed CLI arguments, with config defaults applied
+        config: presets.yaml contents (batch.max_inflight, default_negative_prompt)
+
+    Returns:
+        int: EXIT_SUCCESS if every job succeeded, EXIT_FAILURE if any failed,
+            EXIT_CONFIG_ERROR if the batch could not start
+    """
+    try:
+        entries = load_batch_file(args.batch_file)
+    except OSError as e:
+        print(f"[ERROR] Cannot read batch file: {e}")
+        return EXIT_CONFIG_ERROR
+    except JobError as e:
+        print(f"[ERROR] {e}")
+        return EXIT_CONFIG_ERROR
+
+    results_path = args.batch_results or str(Path(args.batch_file).with_suffix(".results.jsonl"))
+    jobs = [GenerationJob.from_dict(entry, line=line_number) for line_number, entry in entries]
+
+    comfyui_transport().reset_stats()
+    signal.signal(signal.SIGINT, signal_handler)
+
+    with open(results_path, "w", encoding="utf-8") as results_file:
+
+        def write_result(result):
+            results_file.write(json.dumps(result) + "\n")
+            results_file.flush()
+
+        runner = BatchRunner(max_inflight=args.max_inflight, config=config, args=args, on_result=write_result)
+        print(f"[INFO] Running {len(jobs)} job(s) from {args.batch_file} with up to {runner.max_inflight} in flight")
+        try:
+            summary = runner.run(jobs)
+        except JobError as e:
+            exit_on_job_error(e)
+
+    print_batch_summary(summary)
+    print(f"[OK] Results written to {results_path}")
+    if args.json_progress:
+        print(json.dumps({"transport": {"host": COMFYUI_HOST, **comfyui_transport().stats()}}))
+    return EXIT_SUCCESS if summary["failed"] == 0 else EXIT_FAILURE
+
+
+def apply_config_defaults(args, config):
+    """Fill validation options the user did not set from presets.yaml.
+
+    Args:
+        args: Parsed CLI arguments, updated in place
+        config: presets.yaml contents from load_config()
+    """
+    # Enforce --validate when --validate-person-count, --validate-pose, or --validate-content is used
+    if (args.validate_person_count or args.validate_pose or args.validate_content) and not args.validate:
+        # Automatically enable validation when specialized validation is requested
+        args.validate = True
+        if not args.quiet:
+            if args.validate_person_count:
+                flag_name = "--validate-person-count"
+            elif args.validate_pose:
+                flag_name = "--validate-pose"
+            else:
+                flag_name = "--validate-content"
+            print(f"[INFO] Auto-enabling --validate because {flag_name} was specified")
+
+    validation_config = config.get("validation", {})
+
+    # Apply config defaults to args (CLI args override config)
+    # Validation: --validate forces on, --no-validate forces off, otherwise use config
+    if args.no_validate:
+        args.validate = False
+    elif not args.validate:
+        args.validate = validation_config.get("enabled", False)
+
+    # Auto-retry: CLI overrides config
+    if not args.auto_retry:
+        args.auto_retry = validation_config.get("auto_retry", False)
+
+    # Retry limit: CLI overrides config
+    if args.retry_limit is None:
+        args.retry_limit = validation_config.get("retry_limit", 3)
+
+    # Positive threshold: CLI overrides config
+    if args.positive_threshold is None:
+        args.positive_threshold = validation_config.get("positive_threshold", 0.25)
+
+    # Concurrent validators: CLI overrides config
+    if args.validation_workers is None:
+        args.validation_workers = validation_config.get("workers")
+    args.validation_timeouts = dict(validation_config.get("timeouts") or {})
+    if args.validation_timeout is not None:
+        args.validation_timeouts = {
+            name: args.validation_timeout for name in ("file", "yolo", "clip", "pose", "content", "quality")
+        }
+    args.validation_cascade = validation_config.get("cascade") or {}
+
+
+def build_parser():
+    """Build the command-line parser (batch-file lines accept the same options)."""
+    parser = argparse.ArgumentParser(description="Generate images with ComfyUI")
+    parser.add_argument("--workflow", help="Path to workflow JSON")
+    parser.add_argument("--prompt", help="Positive text prompt")
+    parser.add_argument(
+        "--negative-prompt",
+        "-n",
+        default="",
+        help=f"Negative text prompt (what to avoid). If not specified, SD workflows use default: '{DEFAULT_SD_NEGATIVE_PROMPT}'",
+    )
+    parser.add_argument("--output", default="output.png", help="Output image path")
+    parser.add_argument("--input-image", "-i", help="Input image path (local file or URL) for img2img/I2V")
+    parser.add_argument("--resize", help="Resize input image to WxH (e.g., 512x512)")
+    parser.add_argument("--crop", choices=["center", "cover", "contain"], help="Crop mode for resize")
+    parser.add_argument("--denoise", type=float, help="Denoise strength (0.0-1.0) for img2img")
+    parser.add_argument(
+        "--transparent", action="store_true", help="Generate image with transparent background (requires SAM model)"
+    )
+    parser.add_argument(
+        "--lora",
+        action="append",
+        metavar="NAME:STRENGTH",
+        help="Add LoRA with strength (e.g., 'style.safetensors:0.8'). Can be repeated for multiple LoRAs.",
+    )
+    parser.add_argument(
+        "--lora-preset", metavar="PRESET_NAME", help="Use a predefined LoRA preset from lora_catalog.yaml"
+    )
+    parser.add_argument("--list-loras", action="store_true", help="List available LoRAs and presets, then exit")
+    parser.add_argument(
+        "--refresh-models",
+        action="store_true",
+        help="Re-download the server's model lists instead of using the cached copy",
+    )
+    parser.add_argument(
+        "--prompt-preset",
+        metavar="PRESET_NAME",
+        help="Load a prompt preset from prompt_catalog.yaml (saved_prompts section)",
+    )
+    parser.add_argument(
+        "--list-presets", action="store_true", help="List available prompt presets from prompt_catalog.yaml, then exit"
+    )
+    parser.add_argument("--cancel", metavar="PROMPT_ID", help="Cancel a specific prompt by ID")
+    parser.add_argument("--dry-run", action="store_true", help="Validate workflow without generating")
+    parser.add_argument(
+        "--validate", action="store_true", help="Run validation after generation (default: from config)"
+    )
+    parser.add_argument("--no-validate", action="store_true", help="Disable validation even if config enables it")
+    parser.add_argument(
+        "--validate-person-count", action="store_true", help="Validate person count using YOLO (requires --validate)"
+    )
+    parser.add_argument(
+        "--validate-pose",
+        action="store_true",
+        help="Validate pose estimation (skeleton coherence) using MediaPipe (requires --validate)",
+    )
+    parser.add_argument(
+        "--validate-content",
+        action="store_true",
+        help="Validate image content against prompt using vision model (BLIP-2)",
+    )
+    parser.add_argument(
+        "--auto-retry", action="store_true", help="Automatically retry if validation fails (default: from config)"
+    )
+    parser.add_argument(
+        "--retry-limit", type=int, default=None, help="Maximum retry attempts (default: from config or 3)"
+    )
+    parser.add_argument(
+        "--speculative-retry",
+        action="store_true",
+        help="With --auto-retry, queue the next attempt as soon as the current one has sampled, "
+        "and cancel it if the current one passes validation (keeps the GPU busy while validators run)",
+    )
+    parser.add_argument(
+        "--positive-threshold",
+        type=float,
+        default=None,
+        help="Minimum CLIP score for positive prompt (default: from config or 0.25)",
+    )
+    parser.add_argument("--quiet", action="store_true", help="Suppress progress output")
+    parser.add_argument(
+        "--validation-workers",
+        type=int,
+        default=None,
+        help="Threads for concurrent validators (default: from config or one per validator; 1 = sequential)",
+    )
+    parser.add_argument(
+        "--validation-timeout",
+        type=float,
+        default=None,
+        help="Timeout in seconds for each validator (default: from config or per-validator defaults)",
+    )
+    parser.add_argument(
+        "--no-daemon",
+        action="store_true",
+        help="Validate in-process even if the warm validation daemon is running",
+    )
+    parser.add_argument(
+        "--no-early-exit",
+        action="store_true",
+        help="Run every validator even after a hard failure (disables the cheap-first cascade under --auto-retry)",
+    )
+    parser.add_argument("--json-progress", action="store_true", help="Output machine-readable JSON progress")
+    parser.add_argument("--no-metadata", action="store_true", help="Disable JSON metadata sidecar upload")
+    parser.add_argument(
+        "--no-embed-metadata", action="store_true", help="Disable embedding metadata in PNG files (default: enabled)"
+    )
+    # Project and tagging for experiment organization
+    parser.add_argument(
+        "--project",
+        metavar="NAME",
+        help="Project name for organizing generations (e.g., 'youngboh', 'nsfw-handjob'). Added to metadata.",
+    )
+    parser.add_argument(
+        "--tags",
+        metavar="TAGS",
+        help="Comma-separated tags for filtering (e.g., 'batch:poses,character:protagonist,style:boondocks')",
+    )
+    parser.add_argument(
+        "--batch-id",
+        metavar="ID",
+        help="Batch identifier for grouping related generations (e.g., 'char-poses-001')",
+    )
+    parser.add_argument(
+        "--mlflow-log",
+        action="store_true",
+        help="Auto-log experiment to MLflow (http://192.168.1.162:5001). Captures ALL params automatically.",
+    )
+    parser.add_argument(
+        "--mlflow-experiment",
+        metavar="NAME",
+        default="comfy-gen-nsfw",
+        help="MLflow experiment name (default: comfy-gen-nsfw)",
+    )
+    parser.add_argument(
+        "--quality-score", action="store_true", help="Run multi-dimensional quality scoring after generation"
+    )
+    parser.add_argument(
+        "--enhance-prompt", action="store_true", help="Enhance prompt using small LLM before generation"
+    )
+    parser.add_argument(
+        "--enhance-style",
+        metavar="STYLE",
+        help="Style hint for prompt enhancement (photorealistic, artistic, game-asset, etc.)",
+    )
+
+    # Quality-based iterative refinement
+    parser.add_argument(
+        "--quality-threshold", type=float, default=7.0, help="Minimum quality score to accept (0-10, default: 7.0)"
+    )
+    parser.add_argument(
+        "--max-attempts", type=int, default=3, help="Maximum generation attempts for quality refinement (default: 3)"
+    )
+    parser.add_argument(
+        "--retry-strategy",
+        choices=["progressive", "seed_search", "prompt_enhance"],
+        default="progressive",
+        help="Retry strategy: progressive (increase steps/cfg), seed_search (try different seeds), prompt_enhance (add quality boosters)",
+    )
+    parser.add_argument(
+        "--parallel-refinement",
+        action="store_true",
+        help="Queue all --max-attempts strategy variants at once, score them as they finish, cancel the rest "
+        "once --quality-threshold is met, and promote the best to --output (candidates kept as <stem>_attempt<k>)",
+    )
+
+    # Advanced generation parameters
+    parser.add_argument("--steps", type=int, help="Number of sampling steps (1-150, default: 20)")
+    parser.add_argument("--cfg", type=float, help="Classifier-free guidance scale (1.0-20.0, default: 7.0)")
+    parser.add_argument("--seed", type=int, help="Random seed for reproducibility (-1 for random, default: random)")
+    parser.add_argument("--width", type=int, help="Output width in pixels (must be divisible by 8)")
+    parser.add_argument("--height", type=int, help="Output height in pixels (must be divisible by 8)")
+    parser.add_argument("--sampler", help="Sampler algorithm (e.g., euler, dpmpp_2m, dpmpp_2m_sde)")
+    parser.add_argument("--scheduler", help="Noise scheduler (e.g., normal, karras, exponential)")
+    parser.add_argument("--preset", help="Use a generation preset (draft, balanced, high-quality)")
+
+    # Video-specific parameters
+    parser.add_argument(
+        "--length", "--frames", type=int, dest="length", help="Video length in frames (default: 81 = ~5s at 16fps)"
+    )
+    parser.add_argument("--fps", type=int, help="Video frame rate (default: 16)")
+    parser.add_argument("--video-resolution", help="Video resolution as WxH (e.g., 848x480, 1280x720)")
+
+    parser.add_argument(
+        "--count",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Generate N candidates in one sampler pass (latent batch_size N; falls back to N queued prompts "
+        "if VRAM runs out). Each output gets a metadata sidecar with its seed (default: 1)",
+    )
+
+    # Pipelined batch mode
+    parser.add_argument(
+        "--batch-file",
+        metavar="JOBS.jsonl",
+        help="Run one job per JSONL line (same fields as the CLI flags, e.g. workflow, prompt, loras, seed, preset)",
+    )
+    parser.add_argument(
+        "--max-inflight",
+        type=int,
+        default=None,
+        help="Prompts kept queued on ComfyUI in batch mode (default: from config or 2)",
+    )
+    parser.add_argument(
+        "--batch-results",
+        metavar="RESULTS.jsonl",
+        help="Where to write one JSON result per job (default: <batch-file>.results.jsonl)",
+    )
+
+    return parser
+
+
+def main():
+    global current_prompt_id, current_output_path
+
+    # Handle special metadata show command before argparse
+    # NOTE: This is intentionally handled before argparse to provide a simple,
+    # git-style subcommand interface (e.g., "git commit" vs "git --help").
+    # This pattern is user-friendly and avoids conflicts with existing flags.
+    # The command doesn't need argparse features like --help integration since
+    # it's a simple read-only operation with minimal arguments.
+    if len(sys.argv) >= 3 and sys.argv[1] == "metadata" and sys.argv[2] == "show":
+        if len(sys.argv) < 4:
+            print("Usage: python generate.py metadata show <image.png>")
+            sys.exit(EXIT_CONFIG_ERROR)
+
+        image_path = sys.argv[3]
+
+        if not os.path.exists(image_path):
+            print(f"[ERROR] Image file not found: {image_path}")
+            sys.exit(EXIT_FAILURE)
+
+        from utils.metadata import format_metadata_for_display, read_metadata_from_png
+
+        metadata = read_metadata_from_png(image_path)
+
+        if metadata:
+            print(format_metadata_for_display(metadata))
+            sys.exit(EXIT_SUCCESS)
+        else:
+            print(f"[ERROR] No embedded metadata found in {image_path}")
+            print(f"[INFO] Check for a sidecar JSON file: {image_path}.json")
+            sys.exit(EXIT_FAILURE)
 
-            # Modify workflow to use uploaded image
-            workflow = modify_input_image(workflow, uploaded_filename)
+    parser = build_parser()
+    args = parser.parse_args()
 
-        finally:
-            # Clean up temp file
-            if temp_file and os.path.exists(temp_file.name):
-                try:
-                    os.remove(temp_file.name)
-                except OSError:
-                    pass
+    # Load configuration for defaults (CLI args override config)
+    config = load_config()
+    apply_config_defaults(args, config)
 
-    # Apply denoise strength if specified
-    if args.denoise is not None:
-        workflow = modify_denoise(workflow, args.denoise)
+    # Handle list-presets mode
+    if args.list_presets:
+        print("[INFO] Loading prompt presets from prompt_catalog.yaml...")
 
-    # Handle generation preset (must be before LoRA processing to use preset LoRAs)
-    preset_params = {}
-    if args.preset:
-        presets = load_presets()
-        if args.preset in presets:
-            preset_params = presets[args.preset]
-            print(f"[OK] Loaded preset '{args.preset}': {preset_params}")
+        catalog = load_prompt_catalog()
+        if catalog and "saved_prompts" in catalog:
+            saved_prompts = catalog["saved_prompts"]
+            if saved_prompts:
+                print(f"\n[OK] Available prompt presets ({len(saved_prompts)}):")
+                for preset_name, preset_data in saved_prompts.items():
+                    category = preset_data.get("category", "general")
+                    subject = preset_data.get("subject", "N/A")
+                    print(f"  - {preset_name}")
+                    print(f"      Category: {category}")
+                    print(f"      Subject: {subject}")
+                    if "tested_with" in preset_data:
+                        print(f"      Tested with: {preset_data['tested_with']}")
+                    if "notes" in preset_data:
+                        print(f"      Notes: {preset_data['notes']}")
+                    print()
+            else:
+                print("[WARN] No saved prompts found in prompt_catalog.yaml")
         else:
-            available_presets = ", ".join(presets.keys()) if presets else "none"
-            print(f"[ERROR] Preset not found: {args.preset}")
-            print(f"[ERROR] Available presets: {available_presets}")
+            print("[ERROR] Failed to load prompt_catalog.yaml or no saved_prompts section found")
             sys.exit(EXIT_CONFIG_ERROR)
 
-    # Process LoRA arguments
-    lora_specs = []
+        sys.exit(EXIT_SUCCESS)
 
-    # First, load LoRAs from generation preset if specified
-    if preset_params and "loras" in preset_params:
-        print(f"[OK] Loading LoRAs from preset '{args.preset}'")
-        for lora_entry in preset_params["loras"]:
-            lora_name = lora_entry.get("name")
-            strength = lora_entry.get("strength", 1.0)
-            if lora_name:
-                lora_specs.append((lora_name, strength, strength))
-                print(f"  - {lora_name} (strength: {strength})")
+    # Handle list-loras mode
+    if args.list_loras:
+        print("[INFO] Querying available LoRAs from ComfyUI server...")
 
-    # Handle --lora-preset
-    if args.lora_preset:
+        # Check server availability
+        if not check_server_availability():
+            print("[ERROR] ComfyUI server is not available")
+            sys.exit(EXIT_CONFIG_ERROR)
+
+        # Get available LoRAs
+        available_loras = list_available_loras(get_available_models(refresh=args.refresh_models))
+        if available_loras:
+            print(f"\n[OK] Available LoRAs ({len(available_loras)}):")
+            for lora in sorted(available_loras):
+                print(f"  - {lora}")
+        else:
+            print("[WARN] No LoRAs found")
+
+        # Load and display presets
         catalog = load_lora_presets()
         if catalog and "model_suggestions" in catalog:
-            preset_found = False
+            presets = {}
+            # Extract presets from model_suggestions
             for scenario_name, scenario_data in catalog["model_suggestions"].items():
-                if scenario_name == args.lora_preset:
-                    preset_found = True
-                    if "default_loras" in scenario_data and scenario_data["default_loras"]:
-                        print(f"[OK] Loading LoRA preset '{args.lora_preset}'")
-                        for lora_name in scenario_data["default_loras"]:
-                            # Find recommended strength from catalog
-                            strength = 1.0
-                            if "loras" in catalog:
-                                for lora_entry in catalog["loras"]:
-                                    if lora_entry.get("filename") == lora_name:
-                                        strength = lora_entry.get("recommended_strength", 1.0)
-                                        break
-                            lora_specs.append((lora_name, strength, strength))
-                            print(f"  - {lora_name} (strength: {strength})")
-                    break
+                if "default_loras" in scenario_data and scenario_data["default_loras"]:
+                    presets[scenario_name] = scenario_data["default_loras"]
 
-            if not preset_found:
-                print(f"[ERROR] LoRA preset not found: {args.lora_preset}")
-                print(f"[ERROR] Available presets: {', '.join(catalog['model_suggestions'].keys())}")
-                sys.exit(EXIT_CONFIG_ERROR)
+            if presets:
+                print("\n[OK] Available LoRA presets:")
+                for preset_name, lora_list in presets.items():
+                    print(f"  - {preset_name}:")
+                    for lora_name in lora_list:
+                        # Find strength from catalog
+                        strength = 1.0
+                        if "loras" in catalog:
+                            for lora_entry in catalog["loras"]:
+                                if lora_entry.get("filename") == lora_name:
+                                    strength = lora_entry.get("recommended_strength", 1.0)
+                                    break
+                        print(f"      {lora_name} (strength: {strength})")
+
+        sys.exit(EXIT_SUCCESS)
+
+    # Handle cancel mode
+    if args.cancel:
+        if cancel_prompt(args.cancel):
+            sys.exit(EXIT_SUCCESS)
         else:
-            print("[ERROR] Cannot load LoRA presets from lora_catalog.yaml")
-            sys.exit(EXIT_CONFIG_ERROR)
+            sys.exit(EXIT_FAILURE)
 
-    # Handle --lora arguments
-    if args.lora:
-        for lora_spec in args.lora:
-            # Parse "name:strength" format
-            # Note: Using rsplit(':', 1) to split from right, which correctly handles
-            # paths with colons (e.g., "C:\\path\\lora.safetensors:0.8")
-            if ":" in lora_spec:
-                parts = lora_spec.rsplit(":", 1)
-                lora_name = parts[0]
-                try:
-                    strength = float(parts[1])
-                    if strength < 0:
-                        print(f"[ERROR] LoRA strength must be non-negative: {parts[1]}")
-                        print("[ERROR] Format: 'lora_name.safetensors:0.8'")
-                        sys.exit(EXIT_CONFIG_ERROR)
-                except ValueError:
-                    print(f"[ERROR] Invalid LoRA strength: {parts[1]}")
-                    print("[ERROR] Format: 'lora_name.safetensors:0.8'")
-                    sys.exit(EXIT_CONFIG_ERROR)
-            else:
-                # No strength specified, use 1.0
-                lora_name = lora_spec
-                strength = 1.0
+    # Batch mode: one job per JSONL line, pipelined on ComfyUI
+    if args.batch_file:
+        sys.exit(run_batch(args, config))
 
-            lora_specs.append((lora_name, strength, strength))
-            print(f"[OK] Adding LoRA: {lora_name} (strength: {strength})")
+    # Validate required args for generation mode
+    # Note: --cancel, --list-loras, and --list-presets exit early and never reach these checks
+    if not args.workflow:
+        parser.error("--workflow is required")
 
-    # Inject LoRAs into workflow
-    if lora_specs:
-        available_models = get_available_models()
-        available_loras = available_models.get("loras", []) if available_models else []
-        workflow = inject_lora_chain(workflow, lora_specs, available_loras)
+    # Handle prompt preset loading
+    try:
+        preset_negative = resolve_prompt_preset(args)
+    except JobError as e:
+        exit_on_job_error(e)
 
-    # Merge preset with CLI args (CLI args override preset)
-    steps = args.steps if args.steps is not None else preset_params.get("steps")
-    cfg = args.cfg if args.cfg is not None else preset_params.get("cfg")
-    seed = args.seed if args.seed is not None else preset_params.get("seed")
-    width = args.width if args.width is not None else preset_params.get("width")
-    height = args.height if args.height is not None else preset_params.get("height")
-    sampler = args.sampler if args.sampler is not None else preset_params.get("sampler")
-    scheduler = args.scheduler if args.scheduler is not None else preset_params.get("scheduler")
+    if not args.dry_run and not args.prompt:
+        parser.error("--prompt is required unless using --dry-run or --prompt-preset")
 
-    # Merge video-specific parameters from preset
-    if args.length is None and "length" in preset_params:
-        args.length = preset_params.get("length")
-    if args.fps is None and "fps" in preset_params:
-        args.fps = preset_params.get("fps")
+    if args.parallel_refinement and not (args.quality_score and args.quality_threshold > 0):
+        parser.error("--parallel-refinement requires --quality-score and a --quality-threshold above 0")
+    if args.parallel_refinement and args.validate:
+        parser.error("--parallel-refinement scores quality only and cannot be combined with --validate")
+    if args.speculative_retry and not (args.auto_retry and args.validate):
+        parser.error("--speculative-retry requires --auto-retry and --validate")
+    if args.count < 1:
+        parser.error("--count must be at least 1")
+    if args.count > 1 and (args.auto_retry or args.validate or args.quality_score):
+        parser.error("--count cannot be combined with --validate, --quality-score or --auto-retry")
 
-    # Handle seed=-1 for random seed generation
-    if seed == -1:
-        seed = random.randint(0, 2**32 - 1)
-        print(f"[OK] Generated random seed: {seed}")
+    # Count this run's ComfyUI requests and connections from here
+    comfyui_transport().reset_stats()
 
-    # Validate parameters
-    is_valid, error_msg = validate_generation_params(
-        steps=steps, cfg=cfg, denoise=args.denoise, width=width, height=height
-    )
-    if not is_valid:
-        print(f"[ERROR] Parameter validation failed: {error_msg}")
+    # Check server availability first
+    if not check_server_availability():
+        print("[ERROR] ComfyUI server is not available")
         sys.exit(EXIT_CONFIG_ERROR)
 
-    # Apply sampler parameters to workflow
-    if any(p is not None for p in [steps, cfg, seed, sampler, scheduler]):
-        workflow = modify_sampler_params(
-            workflow, steps=steps, cfg=cfg, seed=seed, sampler_name=sampler, scheduler=scheduler
-        )
+    # Load workflow
+    try:
+        workflow = load_job_workflow(args.workflow)
+    except JobError as e:
+        exit_on_job_error(e)
 
-    # Apply dimension parameters to workflow
-    if width is not None or height is not None:
-        workflow = modify_dimensions(workflow, width=width, height=height)
+    # Get available models and validate workflow
+    available_models = get_available_models(refresh=args.refresh_models)
+    if available_models:
+        is_valid, missing_models, suggestions = validate_workflow_models(workflow, available_models)
 
-    # Apply video-specific parameters if provided
-    # Parse --video-resolution if provided (overrides --width/--height for video)
-    video_width = None
-    video_height = None
-    if args.video_resolution:
-        try:
-            video_width, video_height = map(int, args.video_resolution.split("x"))
-        except ValueError:
-            print(f"[ERROR] Invalid video resolution format: {args.video_resolution}. Use WxH (e.g., 848x480)")
+        if not is_valid:
+            print("[ERROR] Workflow validation failed - missing models:")
+            for model_type, model_name in missing_models:
+                print(f"  - {model_type}: {model_name}")
+                if model_name in suggestions:
+                    print("    Suggested fallbacks:")
+                    for suggestion in suggestions[model_name]:
+                        print(f"      * {suggestion}")
             sys.exit(EXIT_CONFIG_ERROR)
+        else:
+            print("[OK] Workflow validation passed - all models available")
 
-    # Apply video parameters to workflow if any video params are set
-    if args.length is not None or video_width is not None or video_height is not None:
-        workflow = modify_video_params(workflow, width=video_width, height=video_height, length=args.length)
-
-    # Apply video FPS if provided
-    if args.fps is not None:
-        workflow = modify_video_fps(workflow, fps=args.fps)
+    # Handle dry-run mode
+    if args.dry_run:
+        print("[OK] Dry-run mode - workflow is valid")
+        print(f"[OK] Workflow: {args.workflow}")
+        if args.prompt:
+            print(f"[OK] Prompt: {args.prompt}")
+        print("[OK] Validation complete - no generation performed")
+        sys.exit(EXIT_SUCCESS)
 
-    # Apply transparency if requested
-    if args.transparent:
-        workflow = enable_transparency(workflow)
+    # Set up Ctrl+C handler
+    signal.signal(signal.SIGINT, signal_handler)
+    current_output_path = args.output
 
-    # Extract workflow parameters and LoRAs for metadata
-    workflow_params = extract_workflow_params(workflow)
-    loras_metadata = extract_loras_from_workflow(workflow)
+    # Enhance prompt, apply negative prompts, input image, presets, LoRAs and sampler settings
+    try:
+        job = prepare_job(args, workflow, config, preset_negative, available_models)
+    except JobError as e:
+        exit_on_job_error(e)
+    workflow = job["workflow"]
+    effective_negative_prompt = job["negative_prompt"]
+    uploaded_filename = job["uploaded_filename"]
+    steps, cfg, seed = job["steps"], job["cfg"], job["seed"]
+    workflow_params = job["workflow_params"]
+    loras_metadata = job["loras"]
+
+    # --count: several candidates from one sampler pass (or one queued prompt each)
+    if args.count > 1:
+        sys.exit(run_multi_seed(args, job))
 
     # Quality-based refinement and validation retry loop
     # Determine max attempts based on quality threshold or validation retry
@@ -2595,10 +4318,16 @@ def main():
         max_attempts = 1
         use_quality_refinement = False
 
+    # Queue every refinement variant at once and keep the best
+    if use_quality_refinement and args.parallel_refinement:
+        sys.exit(run_parallel_refinement(args, job))
+
     attempt = 0
     minio_url = None
     validation_result = None
     quality_result = None
+    validation_report = None
+    validation_time_saved = 0.0
     generation_time_seconds = None
 
     # Track best attempt for quality-based refinement
@@ -2612,8 +4341,14 @@ def main():
     base_cfg = cfg
     base_seed = seed if seed is not None else random.randint(0, 2**31 - 1)
 
+    # --speculative-retry: queue attempt k+1 as soon as attempt k has sampled, while k is validated
+    speculative = None
+    if args.speculative_retry and args.validate and not use_quality_refinement and max_attempts > 1:
+        speculative = SpeculativeRetry(args.prompt, effective_negative_prompt, quiet=args.quiet)
+
     while attempt < max_attempts:
         attempt += 1
+        speculative_attempt = None
 
         if attempt > 1:
             if not args.quiet:
@@ -2660,13 +4395,20 @@ def main():
                 current_negative = retry_params["negative_prompt"]
             else:
                 # Legacy validation retry - adjust prompts
-                adjusted_positive, adjusted_negative = adjust_prompt_for_retry(
-                    args.prompt, effective_negative_prompt, attempt - 1
-                )
+                speculative_attempt = speculative.take(attempt) if speculative else None
+                if speculative_attempt:
+                    # Queued (and possibly already sampled) while the previous attempt was validated
+                    adjusted_positive = speculative_attempt["positive_prompt"]
+                    adjusted_negative = speculative_attempt["negative_prompt"]
+                    workflow = speculative_attempt["workflow"]
+                else:
+                    adjusted_positive, adjusted_negative = adjust_prompt_for_retry(
+                        args.prompt, effective_negative_prompt, attempt - 1
+                    )
+                    workflow = modify_prompt(workflow, adjusted_positive, adjusted_negative)
                 if not args.quiet:
                     print(f"[INFO] Adjusted positive prompt: {adjusted_positive}")
                     print(f"[INFO] Adjusted negative prompt: {adjusted_negative}")
-                workflow = modify_prompt(workflow, adjusted_positive, adjusted_negative)
                 current_positive = adjusted_positive
                 current_negative = adjusted_negative
         else:
@@ -2675,12 +4417,17 @@ def main():
             current_negative = effective_negative_prompt
 
         # Run generation
-        success, minio_url, object_name, generation_time_seconds = run_generation(
+        success, minio_url, object_name, generation_time_seconds, outputs = run_generation(
             workflow,
             args.output,
             uploaded_filename if args.input_image else None,
             quiet=args.quiet,
             json_progress=args.json_progress,
+            keep_bytes=bool(args.validate or args.quality_score),
+            prompt_id=speculative_attempt["prompt_id"] if speculative_attempt else None,
+            on_sampled=(lambda status, base=workflow, next_attempt=attempt + 1: speculative.submit(base, next_attempt))
+            if speculative and attempt < max_attempts
+            else None,
         )
 
         if not success:
@@ -2690,15 +4437,29 @@ def main():
                 sys.exit(EXIT_FAILURE)
             continue
 
-        # Run quality scoring if requested
-        if args.quality_score:
-            try:
-                from utils.quality import score_image
+        # Decode the output once, from the download buffer; quality scoring and every validator share it
+        if outputs[0].data is not None:
+            image_ctx = ImageContext.from_bytes(outputs[0].data, path=args.output)
+        else:
+            image_ctx = ImageContext.from_path(args.output)
 
-                if not args.quiet:
-                    print("[INFO] Running quality assessment...")
+        # Run the requested validators concurrently; results are merged below
+        validator_runs, attempt_validation_report = run_validators(
+            args, image_ctx, current_positive, effective_negative_prompt, final_attempt=attempt >= max_attempts
+        )
+        if attempt_validation_report:
+            validation_report = attempt_validation_report
+            validation_time_saved += attempt_validation_report.get("cascade", {}).get("time_saved_seconds", 0.0)
 
-                quality_result = score_image(args.output, current_positive)
+        # Run quality scoring if requested
+        if args.quality_score and is_skipped(validator_runs["quality"]):
+            # The cascade rejected the image before pyiqa ran
+            quality_result = None
+            if not args.quiet:
+                print("[INFO] Quality assessment skipped: image already failed validation")
+        elif args.quality_score:
+            try:
+                quality_result = result_or_raise(validator_runs["quality"])
 
                 if "error" not in quality_result:
                     composite_score = quality_result["composite_score"]
@@ -2746,17 +4507,7 @@ def main():
         # Run validation if requested
         if args.validate:
             try:
-                from utils.validation import validate_image
-
-                if not args.quiet:
-                    print("[INFO] Running validation...")
-                validation_result = validate_image(
-                    args.output,
-                    args.prompt,
-                    effective_negative_prompt if effective_negative_prompt else None,
-                    positive_threshold=args.positive_threshold,
-                    validate_person_count=args.validate_person_count,
-                )
+                validation_result = build_validation_result(validator_runs)
 
                 if not args.quiet:
                     print(f"[INFO] Validation result: {validation_result['reason']}")
@@ -2777,13 +4528,9 @@ def main():
 
                 # Run pose validation if requested
                 pose_result = None
-                if args.validate_pose:
+                if args.validate_pose and not is_skipped(validator_runs["pose"]):
                     try:
-                        from utils.pose_validation import validate_pose
-                        from utils.validation import extract_expected_person_count
-
-                        expected_persons = extract_expected_person_count(args.prompt)
-                        pose_result = validate_pose(args.output, expected_persons=expected_persons)
+                        pose_result = result_or_raise(validator_runs["pose"])
 
                         print(f"[INFO] Pose validation: {pose_result['reason']}")
                         print(f"[INFO] Persons detected: {pose_result.get('person_count', 0)}")
@@ -2806,13 +4553,14 @@ def main():
                     except ImportError as e:
                         print(f"[WARN] Pose validation unavailable: {e}")
                         print("[WARN] Install with: pip install mediapipe opencv-python")
+                    except TimeoutError as e:
+                        print(f"[WARN] Pose validation skipped: {e}")
+                        validation_result["pose_error"] = str(e)
 
                 # Run content validation if requested
-                if args.validate_content:
+                if args.validate_content and not is_skipped(validator_runs["content"]):
                     try:
-                        from utils.content_validator import validate_content
-
-                        content_result = validate_content(args.output, args.prompt)
+                        content_result = result_or_raise(validator_runs["content"])
 
                         print(f"[INFO] Content validation: {content_result['reason']}")
                         if content_result.get("caption"):
@@ -2836,6 +4584,9 @@ def main():
                     except ImportError as e:
                         print(f"[WARN] Content validation unavailable: {e}")
                         print("[WARN] Install with: pip install transformers torch")
+                    except TimeoutError as e:
+                        print(f"[WARN] Content validation skipped: {e}")
+                        validation_result["content_error"] = str(e)
 
                 if validation_result["passed"]:
                     if not args.quiet:
@@ -2874,6 +4625,10 @@ def main():
                 break
             # Otherwise continue to next quality refinement attempt
 
+    # The last attempt passed (or validation stopped the loop): its speculative successor is not needed
+    if speculative:
+        speculative.cancel()
+
     # After retry loop - determine final status if using quality refinement
     if use_quality_refinement and refinement_status == "in_progress":
         # We exited loop without meeting threshold
@@ -2909,6 +4664,10 @@ def main():
             refinement_previous_scores = None
             refinement_status = None
 
+        if validation_report is not None:
+            # Cascade savings summed over every attempt of this run
+            validation_report["time_saved_seconds_total"] = round(validation_time_saved, 3)
+
         metadata = create_metadata_json(
             workflow_path=args.workflow,
             prompt=current_positive,
@@ -2930,14 +4689,11 @@ def main():
             project=getattr(args, "project", None),
             tags=getattr(args, "tags", None),
             batch_id=getattr(args, "batch_id", None),
+            validation_report=validation_report,
+            outputs=output_records(outputs),
+            speculation=speculative.report() if speculative else None,
         )
-        metadata_url = upload_metadata_to_minio(metadata, object_name)
-        if metadata_url and not args.quiet:
-            print(f"[OK] Metadata available at: {metadata_url}")
-
-        # Embed metadata in PNG file
-        if not args.no_embed_metadata:
-            embed_metadata_in_output(args.output, metadata)
+        save_output_metadata(args, metadata, object_name, args.output)
 
         # Auto-log to MLflow if requested
         if args.mlflow_log and minio_url:
@@ -2956,6 +4712,8 @@ def main():
                     print(f"[WARN] MLflow logging failed: {e}")
 
     # Final output
+    if args.json_progress:
+        print(json.dumps({"transport": {"host": COMFYUI_HOST, **comfyui_transport().stats()}}))
     if minio_url:
         if not args.quiet:
             print(f"\nImage available at: {minio_url}")
@@ -677,23 +677,29 @@ async def image_to_video(
 
 
 @mcp.tool()
-async def list_models() -> dict:
+async def list_models(refresh: bool = False) -> dict:
     """List all installed checkpoint models.
 
+    Args:
+        refresh: Re-download the model lists from ComfyUI instead of using the cached copy
+
     Returns:
         Dictionary with list of available models
     """
-    return await models.list_models()
+    return await models.list_models(refresh=refresh)
 
 
 @mcp.tool()
-async def list_loras() -> dict:
+async def list_loras(refresh: bool = False) -> dict:
     """List all installed LoRAs with compatibility information.
 
+    Args:
+        refresh: Re-download the model lists from ComfyUI instead of using the cached copy
+
     Returns:
         Dictionary with list of LoRAs and their metadata
     """
-    return await models.list_loras()
+    return await models.list_loras(refresh=refresh)
 
 
 @mcp.tool()
@@ -1,10 +1,15 @@
 #!/usr/bin/env python3
 """Generate multiple golden retriever images with Flux Dev FP8."""
 
-import subprocess
 import json
+import sys
 from pathlib import Path
 
+REPO_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from generate import BatchRunner, GenerationJob, print_batch_summary  # noqa: E402
+
 # Varied prompts for golden retrievers
 PROMPTS = [
     ("flux_golden_puppy", "A fluffy golden retriever puppy sitting on a sunny lawn, photorealistic, 8k"),
@@ -19,42 +24,28 @@ PROMPTS = [
     ("flux_golden_bed", "A sleepy golden retriever curled up on a cozy bed, soft blankets, peaceful"),
 ]
 
-results = []
-
+jobs = []
 for name, prompt in PROMPTS:
-    print(f"\n[INFO] Generating: {name}")
+    print(f"[INFO] Queueing: {name}")
     print(f"[INFO] Prompt: {prompt[:60]}...")
-    
-    output_path = f"/tmp/{name}.png"
-    
-    result = subprocess.run([
-        "python3", "generate.py",
-        "--workflow", "workflows/flux-dev-proper.json",
-        "--prompt", prompt,
-        "--output", output_path
-    ], capture_output=True, text=True, cwd="/Users/jrjenkinsiv/Development/comfy-gen")
-    
-    # Parse output for score
-    score = None
-    url = None
-    for line in result.stdout.split("\n"):
-        if "Score:" in line:
-            try:
-                score = float(line.split(":")[1].strip())
-            except:
-                pass
-        if "Image available at:" in line:
-            url = line.split(": ")[1].strip()
-    
+    jobs.append(GenerationJob(id=name, prompt=prompt, output=f"/tmp/{name}.png"))
+
+runner = BatchRunner(workflow=str(REPO_ROOT / "workflows" / "flux-dev-proper.json"))
+summary = runner.run(jobs)
+
+results = []
+for (name, prompt), job_result in zip(PROMPTS, summary["results"]):
+    score = (job_result.get("validation") or {}).get("positive_score")
+    url = job_result.get("minio_url")
     results.append({
         "name": name,
         "prompt": prompt,
         "score": score,
         "url": url
     })
-    
-    print(f"[OK] Score: {score}")
-    print(f"[OK] URL: {url}")
+
+    print(f"[OK] {name} Score: {score}")
+    print(f"[OK] {name} URL: {url}")
 
 # Summary
 print("\n" + "="*60)
@@ -67,6 +58,7 @@ if scores:
     print(f"Average Score: {avg_score:.3f}")
     print(f"Best Score: {max(scores):.3f}")
     print(f"Worst Score: {min(scores):.3f}")
+print_batch_summary(summary)
 
 print("\nAll URLs:")
 for r in results:
@@ -1,11 +1,16 @@
 #!/usr/bin/env python3
 """Generate high-quality golden retriever images with various styles and resolutions."""
 
-import subprocess
-import time
 import json
+import sys
+import time
 from pathlib import Path
 
+REPO_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from generate import BatchRunner, GenerationJob, JobError, print_batch_summary  # noqa: E402
+
 # High-quality golden retriever prompts with varied styles
 GOLDEN_EXPERIMENTS = [
     # Photorealistic - High detail
@@ -100,58 +105,44 @@ GOLDEN_EXPERIMENTS = [
     },
 ]
 
-def run_generation(exp):
-    """Run a single generation experiment."""
+def build_job(exp):
+    """Build the job for a single generation experiment."""
     timestamp = int(time.time())
-    output = f"/tmp/{exp['name']}_{timestamp}.png"
-    
-    cmd = [
-        "python3", "generate.py",
-        "--workflow", f"workflows/{exp['workflow']}",
-        "--prompt", exp["prompt"],
-        "--negative-prompt", exp["negative"],
-        "--steps", str(exp["steps"]),
-        "--cfg", str(exp["cfg"]),
-        "--output", output,
-    ]
-    
-    print(f"\n{'='*60}")
-    print(f"Generating: {exp['name']}")
-    print(f"Workflow: {exp['workflow']}")
-    print(f"Steps: {exp['steps']}, CFG: {exp['cfg']}")
-    print(f"Prompt: {exp['prompt'][:60]}...")
-    print(f"{'='*60}")
-    
-    result = subprocess.run(cmd, capture_output=True, text=True)
-    
-    # Extract score from output
-    score = None
-    url = None
-    for line in result.stdout.split('\n'):
-        if 'Score:' in line:
-            try:
-                score = float(line.split(':')[-1].strip())
-            except:
-                pass
-        if 'Image available at:' in line:
-            url = line.split('at:')[-1].strip()
-    
+    return GenerationJob(
+        id=exp["name"],
+        workflow=str(REPO_ROOT / "workflows" / exp["workflow"]),
+        prompt=exp["prompt"],
+        negative_prompt=exp["negative"],
+        steps=exp["steps"],
+        cfg=exp["cfg"],
+        output=f"/tmp/{exp['name']}_{timestamp}.png",
+    )
+
+
+def to_result(job_result):
+    """Convert a BatchRunner result to this experiment's result record."""
     return {
-        "name": exp["name"],
-        "score": score,
-        "url": url,
-        "success": result.returncode == 0,
+        "name": job_result["id"],
+        "score": (job_result.get("validation") or {}).get("positive_score"),
+        "url": job_result.get("minio_url"),
+        "success": job_result["status"] == "ok",
     }
 
+
 def main():
-    results = []
-    
     for exp in GOLDEN_EXPERIMENTS:
-        result = run_generation(exp)
-        results.append(result)
-        print(f"\n[RESULT] {result['name']}: Score={result['score']}, URL={result['url']}")
-        time.sleep(2)  # Brief pause between generations
-    
+        print(f"[INFO] {exp['name']}: {exp['workflow']}, Steps: {exp['steps']}, CFG: {exp['cfg']}")
+
+    try:
+        summary = BatchRunner().run([build_job(exp) for exp in GOLDEN_EXPERIMENTS])
+    except JobError as e:
+        print(f"[ERROR] {e}")
+        return
+
+    results = [to_result(r) for r in summary["results"]]
+    for result in results:
+        print(f"[RESULT] {result['name']}: Score={result['score']}, URL={result['url']}")
+
     # Summary
     print("\n" + "="*60)
     print("SUMMARY - Golden Retriever High Quality Batch")
@@ -168,6 +159,7 @@ def main():
         print("\nAll Results (sorted by score):")
         for r in sorted(successful, key=lambda x: x['score'], reverse=True):
             print(f"  {r['score']:.3f} - {r['name']}: {r['url']}")
+    print_batch_summary(summary)
     
     # Save results
     with open('/tmp/golden_hires_results.json', 'w') as f:
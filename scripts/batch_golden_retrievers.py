@@ -7,11 +7,15 @@ Batch Golden Retriever Generation Experiment
 - Upscaled and non-upscaled
 """
 
-import subprocess
 import json
-import time
+import sys
 from datetime import datetime
-import random
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from generate import BatchRunner, GenerationJob, JobError, print_batch_summary  # noqa: E402
 
 # Golden retriever scenarios from around the world
 SCENARIOS = [
@@ -142,87 +146,39 @@ CONFIGS = [
 ]
 
 
-def generate_image(scenario: dict, config: dict, index: int) -> dict:
-    """Generate a single image with given scenario and config."""
-    
+def build_job(scenario: dict, config: dict, index: int) -> GenerationJob:
+    """Build the job for one image with given scenario and config."""
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     filename = f"golden_{scenario['name']}_{index}_{timestamp}"
-    output_path = f"/tmp/{filename}.png"
-    
-    cmd = [
-        "python3", "generate.py",
-        "--workflow", "workflows/flux-dev.json",
-        "--prompt", scenario["prompt"],
-        "--negative-prompt", scenario["negative"],
-        "--steps", str(config["steps"]),
-        "--cfg", str(config["cfg"]),
-        "--output", output_path,
-    ]
-    
-    # Add resolution if workflow supports it
+
     # Note: Flux-dev workflow may need modification for custom resolutions
-    
-    print(f"\n[{index}/20] {scenario['name']}")
-    print(f"  Steps: {config['steps']}, CFG: {config['cfg']}, Upscale: {config['upscale']}")
-    print(f"  Prompt: {scenario['prompt'][:60]}...")
-    
-    start = time.time()
-    
-    try:
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            timeout=300,  # 5 min timeout
-            cwd="/Users/jrjenkinsiv/Development/comfy-gen"
-        )
-        
-        elapsed = time.time() - start
-        
-        # Parse output for URL
-        url = None
-        for line in result.stdout.split("\n"):
-            if "Image available at:" in line:
-                url = line.split("Image available at:")[-1].strip()
-                break
-        
-        if result.returncode == 0 and url:
-            print(f"  [OK] Generated in {elapsed:.1f}s")
-            print(f"  URL: {url}")
-            return {
-                "success": True,
-                "scenario": scenario["name"],
-                "config": config,
-                "url": url,
-                "time_s": round(elapsed, 1)
-            }
-        else:
-            print(f"  [ERROR] Generation failed")
-            if result.stderr:
-                print(f"  {result.stderr[:200]}")
-            return {
-                "success": False,
-                "scenario": scenario["name"],
-                "config": config,
-                "error": result.stderr[:500] if result.stderr else "Unknown error"
-            }
-            
-    except subprocess.TimeoutExpired:
-        print(f"  [ERROR] Timeout after 5 minutes")
-        return {
-            "success": False,
-            "scenario": scenario["name"],
-            "config": config,
-            "error": "Timeout"
-        }
-    except Exception as e:
-        print(f"  [ERROR] {e}")
+    return GenerationJob(
+        id=scenario["name"],
+        workflow=str(REPO_ROOT / "workflows" / "flux-dev.json"),
+        prompt=scenario["prompt"],
+        negative_prompt=scenario["negative"],
+        steps=config["steps"],
+        cfg=config["cfg"],
+        output=f"/tmp/{filename}.png",
+    )
+
+
+def to_result(job_result: dict, config: dict) -> dict:
+    """Convert a BatchRunner result to this experiment's result record."""
+    if job_result["status"] == "ok":
         return {
-            "success": False,
-            "scenario": scenario["name"],
+            "success": True,
+            "scenario": job_result["id"],
             "config": config,
-            "error": str(e)
+            "url": job_result["minio_url"],
+            "time_s": round(job_result["generation_time_seconds"], 1),
         }
+    return {
+        "success": False,
+        "scenario": job_result["id"],
+        "config": config,
+        "error": job_result.get("error") or "Unknown error",
+    }
 
 
 def main():
@@ -233,19 +189,24 @@ def main():
     print(f"Scenarios available: {len(SCENARIOS)}")
     print(f"Config variations: {len(CONFIGS)}")
     
-    results = []
-    
     # Generate 20 images with varied scenarios and configs
+    jobs = []
+    configs = []
     for i in range(20):
         scenario = SCENARIOS[i % len(SCENARIOS)]  # Cycle through scenarios
         config = CONFIGS[i % len(CONFIGS)]  # Cycle through configs
-        
-        result = generate_image(scenario, config, i + 1)
-        results.append(result)
-        
-        # Small delay between generations
-        time.sleep(2)
-    
+        print(f"[{i + 1}/20] {scenario['name']}")
+        print(f"  Steps: {config['steps']}, CFG: {config['cfg']}, Upscale: {config['upscale']}")
+        jobs.append(build_job(scenario, config, i + 1))
+        configs.append(config)
+
+    try:
+        summary = BatchRunner().run(jobs)
+    except JobError as e:
+        print(f"[ERROR] {e}")
+        return
+    results = [to_result(r, configs[r["index"] - 1]) for r in summary["results"]]
+
     # Summary
     print("\n" + "=" * 70)
     print("SUMMARY")
@@ -259,6 +220,7 @@ def main():
     print(f"Failed: {failed}")
     print(f"Total generation time: {total_time:.1f}s")
     print(f"Average per image: {total_time/success:.1f}s" if success > 0 else "N/A")
+    print_batch_summary(summary)
     
     print("\n--- Generated Images ---")
     for r in results:
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""Benchmark batched CLIP scoring against the per-image path.
+
+Compares images/sec of ImageValidator.compute_clip_score (one image and one
+prompt per forward pass) with compute_clip_scores_batch (padded batches).
+Runs on CPU by default so results are comparable across machines.
+
+Usage:
+    python scripts/benchmark_clip_scoring.py                      # 64 synthetic images
+    python scripts/benchmark_clip_scoring.py --images /tmp/outputs
+    python scripts/benchmark_clip_scoring.py --count 128 --batch-size 32
+    python scripts/benchmark_clip_scoring.py --gpu                # allow CUDA
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+DEFAULT_PROMPT = "a golden retriever sitting in a sunny park, photorealistic, detailed fur, shallow depth of field"
+DEFAULT_NEGATIVE = "blurry, low quality, watermark, text, deformed, extra limbs, cartoon"
+
+
+def make_synthetic_images(directory: str, count: int, size: int = 512) -> list:
+    """Write random-noise PNGs so the benchmark needs no real outputs."""
+    import numpy as np
+    from PIL import Image
+
+    rng = np.random.default_rng(0)
+    paths = []
+    for i in range(count):
+        path = Path(directory) / f"bench_{i:04d}.png"
+        Image.fromarray(rng.integers(0, 255, (size, size, 3), dtype=np.uint8)).save(path)
+        paths.append(str(path))
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batched vs per-image CLIP scoring")
+    parser.add_argument("--images", help="Directory of images to score (default: synthetic images)")
+    parser.add_argument("--count", type=int, default=64, help="Number of synthetic images (default: 64)")
+    parser.add_argument("--batch-size", type=int, default=16, help="Images per forward pass (default: 16)")
+    parser.add_argument("--prompt", default=DEFAULT_PROMPT, help="Positive prompt")
+    parser.add_argument("--negative", default=DEFAULT_NEGATIVE, help="Negative prompt")
+    parser.add_argument("--gpu", action="store_true", help="Allow CUDA instead of forcing CPU")
+    args = parser.parse_args()
+
+    if not args.gpu:
+        # Must be set before torch initializes CUDA
+        os.environ["CUDA_VISIBLE_DEVICES"] = ""
+
+    from utils.validation import CLIP_AVAILABLE, IMAGE_EXTENSIONS, ImageValidator
+
+    if not CLIP_AVAILABLE:
+        print("[ERROR] CLIP dependencies not available. Install with: pip install torch transformers pillow")
+        return 1
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if args.images:
+            images = sorted(str(p) for p in Path(args.images).iterdir() if p.suffix.lower() in IMAGE_EXTENSIONS)
+        else:
+            images = make_synthetic_images(tmp_dir, args.count)
+
+        if not images:
+            print(f"[ERROR] No images found in {args.images}")
+            return 1
+
+        validator = ImageValidator()
+        print(f"[INFO] Device: {validator.device}, images: {len(images)}, batch size: {args.batch_size}")
+
+        # Warm up both paths so model load and first-call overhead are excluded
+        validator.compute_clip_score(images[0], args.prompt, args.negative)
+        validator.compute_clip_scores_batch(images[:2], [args.prompt], [args.negative], args.batch_size)
+
+        # Per-image path: clear caches so each image is encoded like a fresh validate_image() call
+        start = time.perf_counter()
+        for image in images:
+            validator.embedder.clear()
+            validator.compute_clip_score(image, args.prompt, args.negative)
+        per_image_seconds = time.perf_counter() - start
+
+        validator.embedder.clear()
+        start = time.perf_counter()
+        validator.compute_clip_scores_batch(images, [args.prompt], [args.negative], args.batch_size)
+        batch_seconds = time.perf_counter() - start
+
+    per_image_rate = len(images) / per_image_seconds
+    batch_rate = len(images) / batch_seconds
+
+    print(f"\n{'=' * 60}")
+    print("CLIP Scoring Benchmark")
+    print(f"{'=' * 60}")
+    print(f"  Per-image path: {per_image_seconds:8.2f}s  ({per_image_rate:6.1f} images/sec)")
+    print(f"  Batched path:   {batch_seconds:8.2f}s  ({batch_rate:6.1f} images/sec)")
+    print(f"  Speedup:        {batch_rate / per_image_rate:8.2f}x")
+    print(f"{'=' * 60}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
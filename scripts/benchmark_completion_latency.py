@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""Measure per-image end-to-end latency: /history polling vs WebSocket completion.
+
+"poll" reproduces the previous generate.wait_for_completion loop (GET
+/history/{id} every WS_POLL_INTERVAL seconds). "events" is the current
+generate.wait_for_completion, which returns on the ``executing`` node=None
+event and fetches /history once.
+
+By default it runs against an in-process fake ComfyUI (tests/fake_comfyui.py)
+that "executes" each prompt for --run-seconds, so the numbers isolate the
+completion-detection overhead. Point it at a real server with --host and a
+workflow to measure actual SD1.5 drafts.
+
+Usage:
+    python scripts/benchmark_completion_latency.py                          # fake server, 0.8s prompts
+    python scripts/benchmark_completion_latency.py --run-seconds 3 --count 10
+    python scripts/benchmark_completion_latency.py --host http://192.168.1.215:8188 \
+        --workflow workflows/sd15-draft.json --count 5
+"""
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import requests
+
+REPO_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+WORKFLOW = {"3": {"class_type": "KSampler", "inputs": {"seed": 0}}}
+
+
+def legacy_wait(host: str, prompt_id: str, interval: float) -> dict:
+    """The old completion loop: poll /history until outputs appear."""
+    url = f"{host}/history/{prompt_id}"
+    while True:
+        response = requests.get(url)
+        if response.status_code == 200:
+            history = response.json()
+            if prompt_id in history and "outputs" in history[prompt_id]:
+                return history[prompt_id]
+        time.sleep(interval)
+
+
+def randomize_seeds(workflow: dict) -> dict:
+    """Give every sampler a fresh seed so ComfyUI cannot serve cached results."""
+    workflow = json.loads(json.dumps(workflow))
+    for node in workflow.values():
+        inputs = node.get("inputs", {}) if isinstance(node, dict) else {}
+        for key in ("seed", "noise_seed"):
+            if key in inputs:
+                inputs[key] = random.randint(0, 2**32 - 1)
+    return workflow
+
+
+def run(mode: str, generate, workflow: dict, count: int) -> list:
+    """Queue count prompts one after another and time each queue-to-status."""
+    latencies = []
+    for _ in range(count):
+        start = time.perf_counter()
+        prompt_id = generate.queue_workflow(randomize_seeds(workflow), retry=False)
+        if not prompt_id:
+            raise RuntimeError("Failed to queue workflow")
+        if mode == "poll":
+            legacy_wait(generate.COMFYUI_HOST, prompt_id, generate.WS_POLL_INTERVAL)
+        else:
+            generate.wait_for_completion(prompt_id, quiet=True)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark /history polling vs WebSocket completion")
+    parser.add_argument("--host", help="Real ComfyUI URL (default: in-process fake server)")
+    parser.add_argument("--workflow", help="Workflow JSON to queue (required with --host)")
+    parser.add_argument("--count", type=int, default=5, help="Images per mode (default: 5)")
+    parser.add_argument("--run-seconds", type=float, default=0.8, help="Fake server execution time (default: 0.8)")
+    args = parser.parse_args()
+
+    import generate
+
+    server = None
+    if args.host:
+        if not args.workflow:
+            print("[ERROR] --workflow is required with --host")
+            return 1
+        generate.COMFYUI_HOST = args.host.rstrip("/")
+        with open(args.workflow) as f:
+            workflow = json.load(f)
+    else:
+        sys.path.insert(0, str(REPO_ROOT / "tests"))
+        from fake_comfyui import FakeComfyUI
+
+        server = FakeComfyUI(run_seconds=args.run_seconds)
+        generate.COMFYUI_HOST = server.url
+        workflow = WORKFLOW
+        print(f"[INFO] Fake ComfyUI at {server.url}, {args.run_seconds:.2f}s per prompt")
+
+    try:
+        results = {mode: run(mode, generate, workflow, args.count) for mode in ("poll", "events")}
+    finally:
+        if server is not None:
+            server.close()
+
+    print("\n" + "=" * 60)
+    print(f"End-to-end latency per image ({args.count} images each)")
+    print("=" * 60)
+    for mode, label in (("poll", "Before (/history poll)"), ("events", "After (WebSocket event)")):
+        values = results[mode]
+        print(f"  {label:<26} mean {statistics.mean(values):6.2f}s  median {statistics.median(values):6.2f}s")
+    saved = statistics.mean(results["poll"]) - statistics.mean(results["events"])
+    print(f"  Dead time removed per image: {saved:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
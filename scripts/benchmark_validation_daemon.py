@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""Benchmark single-image validation latency: warm daemon vs in-process.
+
+The in-process path is timed the way generate.py pays for it: a fresh Python
+process imports the validators, loads the models and scores one image. The
+daemon path sends the same validators to a running daemon (one is started on
+a free port if none is given) after it has warmed up.
+
+Usage:
+    python scripts/benchmark_validation_daemon.py                         # synthetic 512x512 image
+    python scripts/benchmark_validation_daemon.py --image /tmp/out.png --prompt "a cat"
+    python scripts/benchmark_validation_daemon.py --validators file,clip,quality --runs 5
+    python scripts/benchmark_validation_daemon.py --url http://127.0.0.1:8199   # existing daemon
+"""
+
+import argparse
+import json
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+DEFAULT_PROMPT = "a golden retriever sitting in a sunny park, photorealistic"
+DEFAULT_VALIDATORS = "file,yolo,clip,pose,content,quality"
+
+IN_PROCESS_SNIPPET = """
+import json, sys, time
+start = time.perf_counter()
+from utils.validation_runner import run_validator
+image, prompt, names = sys.argv[1], sys.argv[2], sys.argv[3].split(",")
+errors = {}
+for name in names:
+    params = {} if name == "file" else {"prompt": prompt}
+    try:
+        run_validator(name, image, **params)
+    except Exception as e:
+        errors[name] = f"{type(e).__name__}: {e}"
+print(json.dumps({"seconds": time.perf_counter() - start, "errors": errors}))
+"""
+
+
+def make_synthetic_image(directory: str, size: int = 512) -> str:
+    """Write a random-noise PNG so the benchmark needs no real output."""
+    import numpy as np
+    from PIL import Image
+
+    path = Path(directory) / "bench.png"
+    Image.fromarray(np.random.default_rng(0).integers(0, 255, (size, size, 3), dtype=np.uint8)).save(path)
+    return str(path)
+
+
+def free_port() -> int:
+    """Ask the OS for an unused local port."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def time_in_process(image: str, prompt: str, validators: list) -> dict:
+    """Validate one image in a fresh interpreter, as a CLI run would."""
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-c", IN_PROCESS_SNIPPET, image, prompt, ",".join(validators)],
+        capture_output=True,
+        text=True,
+        cwd=str(REPO_ROOT),
+    )
+    total = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "in-process run failed")
+    report = json.loads(proc.stdout.strip().splitlines()[-1])
+    report["total_seconds"] = total
+    return report
+
+
+def time_daemon(client, image: str, prompt: str, validators: list) -> float:
+    """Validate one image through the daemon and return the wall time."""
+    start = time.perf_counter()
+    for name in validators:
+        params = {} if name == "file" else {"prompt": prompt}
+        try:
+            client.run(name, image, **params)
+        except (ImportError, RuntimeError):
+            # Missing optional deps fail the same way in both modes
+            pass
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark validation daemon vs in-process latency")
+    parser.add_argument("--image", help="Image to validate (default: synthetic image)")
+    parser.add_argument("--prompt", default=DEFAULT_PROMPT, help="Prompt for CLIP/pose/content/quality")
+    parser.add_argument("--validators", default=DEFAULT_VALIDATORS, help=f"Comma list (default: {DEFAULT_VALIDATORS})")
+    parser.add_argument("--runs", type=int, default=3, help="Runs per mode (default: 3)")
+    parser.add_argument("--url", help="Use an already running daemon instead of starting one")
+    args = parser.parse_args()
+
+    from utils.validation_daemon import ValidationDaemonClient
+
+    validators = [name.strip() for name in args.validators.split(",") if name.strip()]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        image = str(Path(args.image).resolve()) if args.image else make_synthetic_image(tmp)
+        print(f"[INFO] Image: {image}")
+        print(f"[INFO] Validators: {', '.join(validators)}")
+
+        daemon_proc = None
+        url = args.url
+        if url is None:
+            url = f"http://127.0.0.1:{free_port()}"
+            print(f"[INFO] Starting daemon at {url} (warm-up included in startup)...")
+            daemon_proc = subprocess.Popen(
+                [sys.executable, "-m", "utils.validation_daemon", "serve", "--port", url.rsplit(":", 1)[1]],
+                cwd=str(REPO_ROOT),
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+
+        client = ValidationDaemonClient(url)
+        try:
+            startup = time.perf_counter()
+            while client.health(timeout=1.0) is None:
+                if daemon_proc is not None and daemon_proc.poll() is not None:
+                    print("[ERROR] Daemon exited during startup")
+                    return 1
+                if time.perf_counter() - startup > 900:
+                    print("[ERROR] Daemon did not become healthy within 15 minutes")
+                    return 1
+                time.sleep(0.5)
+            if daemon_proc is not None:
+                print(f"[OK] Daemon ready in {time.perf_counter() - startup:.1f}s")
+
+            in_process = []
+            for i in range(args.runs):
+                report = time_in_process(image, args.prompt, validators)
+                in_process.append(report["total_seconds"])
+                print(f"[INFO] In-process run {i + 1}: {report['total_seconds']:.2f}s")
+                for name, error in report["errors"].items():
+                    print(f"[WARN]   {name}: {error}")
+
+            # First daemon request loads anything warm-up skipped; report it separately
+            first = time_daemon(client, image, args.prompt, validators)
+            daemon_runs = [time_daemon(client, image, args.prompt, validators) for _ in range(args.runs)]
+        finally:
+            if daemon_proc is not None:
+                daemon_proc.terminate()
+                daemon_proc.wait(timeout=30)
+
+    in_median = statistics.median(in_process)
+    daemon_median = statistics.median(daemon_runs)
+    print("\n" + "=" * 60)
+    print("Single-image validation latency (median)")
+    print("=" * 60)
+    print(f"  In-process (fresh interpreter): {in_median:8.2f}s")
+    print(f"  Daemon (first request):         {first:8.2f}s")
+    print(f"  Daemon (warm):                  {daemon_median:8.2f}s")
+    if daemon_median > 0:
+        print(f"  Speedup:                        {in_median / daemon_median:8.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -10,10 +10,15 @@ Logs validation scores for analysis.
 import json
 import os
 import random
-import subprocess
+import sys
 from datetime import datetime
 from pathlib import Path
 
+REPO_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from generate import BatchRunner, GenerationJob, JobError, print_batch_summary  # noqa: E402
+
 # Test configuration
 NUM_TESTS = 20
 OUTPUT_DIR = "/tmp/prompt_tests"
@@ -64,62 +69,17 @@ def generate_test_prompt(subject, quality_booster):
     return subject
 
 
-def run_generation(prompt, negative, steps, cfg, seed, output_path):
-    """Run a single generation and capture validation score."""
-    cmd = [
-        "python3",
-        "generate.py",
-        "--workflow",
-        "workflows/flux-dev.json",
-        "--prompt",
-        prompt,
-        "--negative-prompt",
-        negative,
-        "--steps",
-        str(steps),
-        "--cfg",
-        str(cfg),
-        "--seed",
-        str(seed),
-        "--output",
-        output_path,
-    ]
-
-    try:
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            timeout=300,  # 5 minute timeout
-            cwd=str(Path(__file__).parent.parent),
-        )
-
-        # Parse validation score from output
-        score = None
-        for line in result.stdout.split("\n"):
-            if "Score:" in line:
-                try:
-                    score = float(line.split(":")[-1].strip())
-                except ValueError:
-                    pass
-            elif "Positive score:" in line:
-                try:
-                    score = float(line.split(":")[-1].strip())
-                except ValueError:
-                    pass
-
-        passed = "PASSED" in result.stdout
-        return {
-            "success": result.returncode == 0,
-            "validation_passed": passed,
-            "validation_score": score,
-            "stdout": result.stdout[-500:] if len(result.stdout) > 500 else result.stdout,
-            "stderr": result.stderr[-200:] if result.stderr else None,
-        }
-    except subprocess.TimeoutExpired:
-        return {"success": False, "error": "timeout"}
-    except Exception as e:
-        return {"success": False, "error": str(e)}
+def to_generation_result(job_result):
+    """Extract the validation outcome from a BatchRunner result."""
+    if job_result["status"] == "error":
+        return {"success": False, "error": job_result["error"]}
+    validation = job_result.get("validation") or {}
+    return {
+        "success": job_result["status"] == "ok",
+        "validation_passed": bool(validation.get("passed")),
+        "validation_score": validation.get("positive_score"),
+        "error": job_result.get("error"),
+    }
 
 
 def main():
@@ -130,7 +90,7 @@ def main():
     # Create output directory
     os.makedirs(OUTPUT_DIR, exist_ok=True)
 
-    results = []
+    tests = []
     start_time = datetime.now()
 
     for i in range(NUM_TESTS):
@@ -155,33 +115,52 @@ def main():
         print(f"  Negative: {negative_key}")
         print(f"  Steps: {steps}, CFG: {cfg}, Seed: {seed}")
 
-        # Run generation
-        gen_result = run_generation(prompt, negative, steps, cfg, seed, output_path)
-
-        # Record result
-        test_result = {
-            "test_id": test_id,
-            "timestamp": datetime.now().isoformat(),
-            "seed": seed,
-            "subject": subject,
-            "quality_booster": quality_booster,
-            "negative_preset": negative_key,
-            "steps": steps,
-            "cfg": cfg,
-            "full_prompt": prompt,
-            "negative_prompt": negative,
-            "output_path": output_path,
-            **gen_result,
-        }
-        results.append(test_result)
+        tests.append(
+            {
+                "test_id": test_id,
+                "seed": seed,
+                "subject": subject,
+                "quality_booster": quality_booster,
+                "negative_preset": negative_key,
+                "steps": steps,
+                "cfg": cfg,
+                "full_prompt": prompt,
+                "negative_prompt": negative,
+                "output_path": output_path,
+            }
+        )
+
+    jobs = [
+        GenerationJob(
+            id=test["test_id"],
+            prompt=test["full_prompt"],
+            negative_prompt=test["negative_prompt"],
+            steps=test["steps"],
+            cfg=test["cfg"],
+            seed=test["seed"],
+            output=test["output_path"],
+        )
+        for test in tests
+    ]
+    runner = BatchRunner(workflow=str(REPO_ROOT / "workflows" / "flux-dev.json"))
+    try:
+        summary = runner.run(jobs)
+    except JobError as e:
+        print(f"[ERROR] {e}")
+        return
+
+    results = []
+    for test, job_result in zip(tests, summary["results"]):
+        gen_result = to_generation_result(job_result)
+        results.append({**test, "timestamp": datetime.now().isoformat(), **gen_result})
 
         # Print result
         if gen_result.get("success"):
             score = gen_result.get("validation_score", "N/A")
             passed = "[PASS]" if gen_result.get("validation_passed") else "[FAIL]"
-            print(f"  Result: {passed} Score: {score}")
+            print(f"  [TEST {test['test_id']}] {passed} Score: {score}")
         else:
-            print(f"  Result: [ERROR] {gen_result.get('error', 'unknown')}")
+            print(f"  [TEST {test['test_id']}] [ERROR] {gen_result.get('error', 'unknown')}")
 
     # Save results
     results_path = f"{OUTPUT_DIR}/{RESULTS_FILE}"
@@ -205,6 +184,7 @@ def main():
         print(f"Min score: {min(scores):.3f}")
         print(f"Max score: {max(scores):.3f}")
     print(f"Elapsed time: {elapsed}")
+    print_batch_summary(summary)
     print(f"Results saved to: {results_path}")
 
     # Analyze by quality booster
@@ -0,0 +1,20 @@
+"""Shared pytest fixtures."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path to import clients
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from clients.model_list_cache import reset_model_list_cache
+
+
+@pytest.fixture(autouse=True)
+def isolated_model_list_cache(tmp_path, monkeypatch):
+    """Keep cached /object_info model lists out of ~/.cache and out of other tests."""
+    monkeypatch.setenv("COMFYGEN_OBJECT_INFO_CACHE_DIR", str(tmp_path / "object_info"))
+    reset_model_list_cache()
+    yield
+    reset_model_list_cache()
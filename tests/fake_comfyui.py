@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""In-process fake ComfyUI server for tests and benchmarks.
+
+Serves the HTTP endpoints and the /ws event stream on one port, like ComfyUI.
+Queued prompts "execute" for ``run_seconds`` on a single worker, emitting the
+usual events (execution_start, executing, progress, executed, executing with
+node=None) and writing /history a moment after the final event, the same
+order a real server uses. Outputs are tiny PNGs served from /view.
+
+Usage:
+    server = FakeComfyUI(run_seconds=0.2)
+    requests.post(f"{server.url}/prompt", json={"prompt": workflow})
+    ...
+    server.close()
+"""
+
+import asyncio
+import io
+import json
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from aiohttp import WSMsgType, web
+from PIL import Image
+
+
+def _png_bytes(color=(200, 120, 40), size=(8, 8)) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+class FakeComfyUI:
+    """A ComfyUI look-alike running on a background event loop."""
+
+    def __init__(
+        self,
+        run_seconds: float = 0.1,
+        steps: int = 4,
+        history_delay: float = 0.01,
+        models: Optional[Dict[str, List[str]]] = None,
+        vram_free: int = 20 << 30,
+    ):
+        """Start the server on a free local port.
+
+        Args:
+            run_seconds: Simulated execution time per prompt
+            steps: Number of progress events per prompt
+            history_delay: Delay between the final event and the /history write
+            models: Model lists for /object_info, e.g. {"checkpoints": ["sd15.safetensors"]}
+            vram_free: Free VRAM in bytes reported by /system_stats
+        """
+        self.run_seconds = run_seconds
+        self.steps = steps
+        self.history_delay = history_delay
+        self.models = models or {"checkpoints": ["sd15.safetensors"], "loras": []}
+        self.vram_free = vram_free
+        self.fail_prompts = False
+
+        self.history: Dict[str, Dict[str, Any]] = {}
+        self.prompts: List[Dict[str, Any]] = []
+        self.pending: List[str] = []
+        self.running: Optional[str] = None
+        self.deleted: List[str] = []
+        self.uploads: List[str] = []
+        self.client_ids: List[str] = []
+        self.request_counts: Dict[str, int] = {}
+        self.connections: set = set()
+        self.finished_at: Dict[str, float] = {}
+        self.image = _png_bytes()
+        # Extra history outputs per node (e.g. {"12": {"gifs": [...]}}) and /view bodies by filename
+        self.extra_outputs: Dict[str, Dict[str, Any]] = {}
+        self.files: Dict[str, bytes] = {}
+        self.view_delay = 0.0
+        self.active_views = 0
+        self.max_active_views = 0
+        # Largest latent batch_size that fits in "VRAM"; bigger batches fail with an OOM execution_error
+        self.max_batch_size: Optional[int] = None
+
+        self._sockets: Dict[str, web.WebSocketResponse] = {}
+        self._loop = asyncio.new_event_loop()
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+        if not self._ready.wait(10):
+            raise RuntimeError("Fake ComfyUI failed to start")
+
+    # ------------------------------------------------------------------ server
+
+    def _serve(self) -> None:
+        asyncio.set_event_loop(self._loop)
+        app = web.Application(middlewares=[self._count])
+        app.router.add_get("/ws", self._ws)
+        app.router.add_post("/prompt", self._prompt)
+        app.router.add_get("/history", self._history_all)
+        app.router.add_get("/history/{prompt_id}", self._history)
+        app.router.add_get("/queue", self._queue)
+        app.router.add_post("/queue", self._queue_delete)
+        app.router.add_post("/interrupt", self._interrupt)
+        app.router.add_get("/system_stats", self._system_stats)
+        app.router.add_get("/object_info", self._object_info)
+        app.router.add_get("/view", self._view)
+        app.router.add_post("/upload/image", self._upload)
+
+        self._runner = web.AppRunner(app)
+        self._loop.run_until_complete(self._runner.setup())
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        self._loop.run_until_complete(site.start())
+        self.port = site._server.sockets[0].getsockname()[1]
+        self._queue_event = asyncio.Event()
+        self._worker = self._loop.create_task(self._work())
+        self._ready.set()
+        self._loop.run_forever()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def close(self) -> None:
+        """Stop the server and its worker."""
+
+        async def shutdown():
+            self._worker.cancel()
+            for ws in list(self._sockets.values()):
+                await ws.close()
+            await self._runner.cleanup()
+
+        asyncio.run_coroutine_threadsafe(shutdown(), self._loop).result(10)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+
+    def drop_sockets(self) -> None:
+        """Abort every WebSocket connection without a closing handshake."""
+
+        def abort():
+            for ws in list(self._sockets.values()):
+                transport = ws._req.transport if ws._req is not None else None
+                if transport is not None:
+                    transport.abort()
+
+        self._loop.call_soon_threadsafe(abort)
+
+    @property
+    def connected_clients(self) -> int:
+        return len(self._sockets)
+
+    # ---------------------------------------------------------------- handlers
+
+    @web.middleware
+    async def _count(self, request, handler):
+        key = f"{request.method} {request.path}"
+        self.request_counts[key] = self.request_counts.get(key, 0) + 1
+        if request.transport is not None and request.path != "/ws":
+            # One peer address per TCP connection, to check keep-alive reuse
+            self.connections.add(request.transport.get_extra_info("peername"))
+        return await handler(request)
+
+    async def _ws(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        client_id = request.query.get("clientId") or uuid.uuid4().hex
+        self.client_ids.append(client_id)
+        self._sockets[client_id] = ws
+        await ws.send_json({"type": "status", "data": {"status": self._status()}, "sid": client_id})
+        try:
+            async for msg in ws:
+                if msg.type == WSMsgType.ERROR:
+                    break
+        finally:
+            if self._sockets.get(client_id) is ws:
+                del self._sockets[client_id]
+        return ws
+
+    async def _prompt(self, request):
+        body = await request.json()
+        if self.fail_prompts:
+            return web.json_response({"error": "Prompt outputs failed validation"}, status=400)
+        prompt_id = uuid.uuid4().hex
+        self.prompts.append({"prompt_id": prompt_id, "prompt": body.get("prompt"), "client_id": body.get("client_id")})
+        self.pending.append(prompt_id)
+        self._queue_event.set()
+        await self._broadcast({"type": "status", "data": {"status": self._status()}})
+        return web.json_response({"prompt_id": prompt_id, "number": len(self.prompts), "node_errors": {}})
+
+    async def _history_all(self, request):
+        return web.json_response(self.history)
+
+    async def _history(self, request):
+        prompt_id = request.match_info["prompt_id"]
+        entry = self.history.get(prompt_id)
+        return web.json_response({prompt_id: entry} if entry else {})
+
+    async def _queue(self, request):
+        running = [[0, self.running, {}, {}, []]] if self.running else []
+        pending = [[i + 1, pid, {}, {}, []] for i, pid in enumerate(self.pending)]
+        return web.json_response({"queue_running": running, "queue_pending": pending})
+
+    async def _queue_delete(self, request):
+        body = await request.json()
+        for prompt_id in body.get("delete", []):
+            if prompt_id in self.pending:
+                self.pending.remove(prompt_id)
+                self.deleted.append(prompt_id)
+        return web.json_response({})
+
+    async def _interrupt(self, request):
+        self._interrupted = True
+        return web.json_response({})
+
+    async def _system_stats(self, request):
+        return web.json_response(
+            {
+                "system": {"os": "posix", "comfyui_version": "0.3.0-fake", "python_version": "3.11"},
+                "devices": [
+                    {"name": "cuda:0 Fake GPU", "type": "cuda", "vram_total": 24 << 30, "vram_free": self.vram_free}
+                ],
+            }
+        )
+
+    async def _object_info(self, request):
+        return web.json_response(
+            {
+                "CheckpointLoaderSimple": {"input": {"required": {"ckpt_name": [self.models.get("checkpoints", [])]}}},
+                "LoraLoader": {"input": {"required": {"lora_name": [self.models.get("loras", [])]}}},
+            }
+        )
+
+    async def _view(self, request):
+        filename = request.query.get("filename")
+        if not filename:
+            return web.Response(status=404)
+        self.active_views += 1
+        self.max_active_views = max(self.max_active_views, self.active_views)
+        try:
+            await asyncio.sleep(self.view_delay)
+        finally:
+            self.active_views -= 1
+        return web.Response(body=self.files.get(filename, self.image), content_type="image/png")
+
+    async def _upload(self, request):
+        reader = await request.post()
+        field = reader.get("image")
+        name = getattr(field, "filename", None) or "upload.png"
+        self.uploads.append(name)
+        return web.json_response({"name": name, "subfolder": reader.get("subfolder", ""), "type": "input"})
+
+    # ------------------------------------------------------------------ worker
+
+    def _status(self) -> Dict[str, Any]:
+        return {"exec_info": {"queue_remaining": len(self.pending) + (1 if self.running else 0)}}
+
+    async def _send(self, client_id: Optional[str], event: Dict[str, Any]) -> None:
+        """Send to the submitting client, or broadcast when the prompt had none (like ComfyUI)."""
+        if client_id is None:
+            await self._broadcast(event)
+            return
+        ws = self._sockets.get(client_id)
+        if ws is not None and not ws.closed:
+            try:
+                await ws.send_str(json.dumps(event))
+            except ConnectionError:
+                pass
+
+    async def _broadcast(self, event: Dict[str, Any]) -> None:
+        for ws in list(self._sockets.values()):
+            if not ws.closed:
+                try:
+                    await ws.send_str(json.dumps(event))
+                except ConnectionError:
+                    pass
+
+    async def _work(self) -> None:
+        while True:
+            while not self.pending:
+                self._queue_event.clear()
+                await self._queue_event.wait()
+            prompt_id = self.pending.pop(0)
+            self.running = prompt_id
+            entry = next(p for p in self.prompts if p["prompt_id"] == prompt_id)
+            client_id = entry["client_id"]
+            batch_size = self._batch_size(entry["prompt"])
+            # History status messages, with ComfyUI's epoch-millisecond timestamps
+            messages = [["execution_start", {"prompt_id": prompt_id, "timestamp": int(time.time() * 1000)}]]
+
+            await self._send(client_id, {"type": "execution_start", "data": {"prompt_id": prompt_id}})
+            await self._send(client_id, {"type": "executing", "data": {"node": "3", "prompt_id": prompt_id}})
+            for step in range(1, self.steps + 1):
+                await asyncio.sleep(self.run_seconds / max(1, self.steps))
+                await self._send(
+                    client_id,
+                    {
+                        "type": "progress",
+                        "data": {"value": step, "max": self.steps, "prompt_id": prompt_id, "node": "3"},
+                    },
+                )
+
+            if self.max_batch_size is not None and batch_size > self.max_batch_size:
+                await self._fail(client_id, prompt_id, "torch.OutOfMemoryError", "Allocation on device", messages)
+                continue
+
+            images = [
+                {"filename": f"{prompt_id}_{index:05d}_.png", "subfolder": "", "type": "output"}
+                for index in range(1, batch_size + 1)
+            ]
+            outputs = {"9": {"images": images}}
+            outputs.update(self.extra_outputs)
+            await self._send(
+                client_id, {"type": "executed", "data": {"node": "9", "output": outputs["9"], "prompt_id": prompt_id}}
+            )
+            await self._send(client_id, {"type": "executing", "data": {"node": None, "prompt_id": prompt_id}})
+            self.finished_at[prompt_id] = self._loop.time()
+            messages.append(["execution_success", {"prompt_id": prompt_id, "timestamp": int(time.time() * 1000)}])
+
+            # ComfyUI stores history after the final event is sent
+            await asyncio.sleep(self.history_delay)
+            self.history[prompt_id] = {
+                "prompt": [0, prompt_id, {}, {}, []],
+                "outputs": outputs,
+                "status": {"status_str": "success", "completed": True, "messages": messages},
+            }
+            self.running = None
+            await self._broadcast({"type": "status", "data": {"status": self._status()}})
+
+    @staticmethod
+    def _batch_size(prompt: Optional[Dict[str, Any]]) -> int:
+        """Latent batch size of a queued workflow (1 without an empty latent image node)."""
+        for node in (prompt or {}).values():
+            if isinstance(node, dict) and node.get("class_type") in ("EmptyLatentImage", "EmptySD3LatentImage"):
+                return int(node.get("inputs", {}).get("batch_size", 1))
+        return 1
+
+    async def _fail(
+        self, client_id: Optional[str], prompt_id: str, exception_type: str, message: str, messages: List[Any]
+    ) -> None:
+        """Finish the running prompt with an execution_error, stored in /history like ComfyUI."""
+        error = {
+            "prompt_id": prompt_id,
+            "node_id": "3",
+            "node_type": "KSampler",
+            "exception_type": exception_type,
+            "exception_message": message,
+            "timestamp": int(time.time() * 1000),
+        }
+        await self._send(client_id, {"type": "execution_error", "data": error})
+        self.finished_at[prompt_id] = self._loop.time()
+        await asyncio.sleep(self.history_delay)
+        self.history[prompt_id] = {
+            "prompt": [0, prompt_id, {}, {}, []],
+            "outputs": {},
+            "status": {"status_str": "error", "completed": False, "messages": [*messages, ["execution_error", error]]},
+        }
+        self.running = None
+        await self._broadcast({"type": "status", "data": {"status": self._status()}})
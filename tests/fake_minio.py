@@ -0,0 +1,58 @@
+"""In-memory stand-in for the MinIO client used by the output upload paths.
+
+Implements the calls generate.py makes (bucket checks, put_object with a
+stream, fput_object) and records every object, so tests can check uploads
+without a MinIO server.
+
+Usage:
+    minio = FakeMinio()
+    with patch("generate.minio_client", return_value=minio):
+        ...
+    minio.objects["comfy-gen"]["20250101_120000_image.png"]  # uploaded bytes
+"""
+
+from typing import Any, Dict, List, Optional
+
+
+class FakeMinio:
+    """Records uploaded objects by bucket and object name."""
+
+    def __init__(self, fail_after: Optional[int] = None):
+        """Initialize the fake.
+
+        Args:
+            fail_after: Raise from put_object after reading this many bytes (simulates a dropped upload)
+        """
+        self.objects: Dict[str, Dict[str, bytes]] = {}
+        self.content_types: Dict[str, str] = {}
+        self.puts: List[Dict[str, Any]] = []
+        self.fail_after = fail_after
+
+    def bucket_exists(self, bucket: str) -> bool:
+        return bucket in self.objects
+
+    def make_bucket(self, bucket: str) -> None:
+        self.objects.setdefault(bucket, {})
+
+    def put_object(self, bucket, object_name, data, length, content_type="application/octet-stream", part_size=0, **_):
+        chunks = []
+        read = 0
+        while True:
+            chunk = data.read(part_size or 64 * 1024)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            read += len(chunk)
+            if self.fail_after is not None and read >= self.fail_after:
+                raise ConnectionError("upload dropped")
+        body = b"".join(chunks)
+        if length != -1 and length != len(body):
+            raise ValueError(f"expected {length} bytes, read {len(body)}")
+        self.objects.setdefault(bucket, {})[object_name] = body
+        self.content_types[object_name] = content_type
+        self.puts.append({"object_name": object_name, "length": length, "parts": len(chunks)})
+
+    def fput_object(self, bucket, object_name, file_path, content_type="application/octet-stream", **_):
+        with open(file_path, "rb") as f:
+            self.objects.setdefault(bucket, {})[object_name] = f.read()
+        self.content_types[object_name] = content_type
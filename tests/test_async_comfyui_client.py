@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""Tests for the asyncio ComfyUI client and the MCP tools using it."""
+
+import asyncio
+import sys
+import threading
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+# Add parent directory to path to import clients
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from fake_comfyui import FakeComfyUI
+
+from clients.async_comfyui_client import AsyncComfyUIClient, get_async_comfyui_client
+from clients.tools import control, models
+
+WORKFLOW = {"3": {"class_type": "KSampler", "inputs": {"seed": 1}}}
+
+
+@pytest.fixture
+def server():
+    fake = FakeComfyUI(run_seconds=0.4)
+    yield fake
+    fake.close()
+
+
+@pytest.fixture
+def client(server):
+    return AsyncComfyUIClient(host=server.url)
+
+
+def test_wait_does_not_block_loop(client):
+    """Test that other coroutines keep running while a generation is awaited."""
+    ticks = []
+
+    async def heartbeat(stop):
+        while not stop.is_set():
+            ticks.append(time.monotonic())
+            await asyncio.sleep(0.01)
+
+    async def scenario():
+        stop = asyncio.Event()
+        beat = asyncio.ensure_future(heartbeat(stop))
+        prompt_id = await client.queue_prompt(WORKFLOW)
+        status = await client.wait_for_completion(prompt_id, timeout=10)
+        stop.set()
+        await beat
+        await client.aclose()
+        return status
+
+    status = asyncio.run(scenario())
+
+    assert "outputs" in status
+    # Blocking waits (time.sleep / requests) would leave one or two ticks
+    assert len(ticks) > 10
+    assert max(b - a for a, b in zip(ticks, ticks[1:])) < 0.2
+    print("[OK] Event loop stays responsive during generation")
+
+
+def test_concurrent_tool_calls_overlap(server, client):
+    """Test that tool calls complete while a generation is being awaited."""
+    server.run_seconds = 1.0
+
+    async def scenario():
+        prompt_id = await client.queue_prompt(WORKFLOW)
+        generation = asyncio.ensure_future(client.wait_for_completion(prompt_id, timeout=10))
+
+        start = time.monotonic()
+        status, queue, listing = await asyncio.gather(
+            control.get_system_status(), control.get_queue(), models.list_models()
+        )
+        tools_elapsed = time.monotonic() - start
+
+        result = await generation
+        await client.aclose()
+        return status, queue, listing, tools_elapsed, result
+
+    with patch.object(control, "_comfyui", client), patch.object(models, "_comfyui", client):
+        status, queue, listing, tools_elapsed, result = asyncio.run(scenario())
+
+    assert status["status"] == "online"
+    assert status["gpu"][0]["name"] == "cuda:0 Fake GPU"
+    assert queue["status"] == "success"
+    assert listing["checkpoints"] == ["sd15.safetensors"]
+    assert tools_elapsed < 0.5
+    assert "outputs" in result
+    print("[OK] Tool calls overlap a running generation")
+
+
+def test_requests_share_pooled_connections(server, client):
+    """Test that keep-alive reuses connections across many requests."""
+
+    async def scenario():
+        for _ in range(10):
+            assert await client.check_availability()
+        await asyncio.gather(*(client.get_queue() for _ in range(5)))
+        await client.aclose()
+
+    asyncio.run(scenario())
+
+    assert server.request_counts["GET /system_stats"] == 10
+    assert len(server.connections) <= 5
+    print(f"[OK] 15 requests over {len(server.connections)} connection(s)")
+
+
+def test_progress_callbacks_run_on_loop(client):
+    """Test that progress updates arrive on the event loop thread."""
+    updates = []
+    threads = set()
+
+    def on_progress(update):
+        threads.add(threading.get_ident())
+        updates.append(update)
+
+    async def scenario():
+        prompt_id = await client.queue_prompt(WORKFLOW)
+        status = await client.wait_for_completion(prompt_id, timeout=10, progress_callback=on_progress)
+        await asyncio.sleep(0.05)
+        await client.aclose()
+        return status
+
+    status = asyncio.run(scenario())
+
+    kinds = [update["type"] for update in updates]
+    assert "outputs" in status
+    assert "progress" in kinds and "complete" in kinds
+    assert threads == {threading.get_ident()}
+    print("[OK] Progress delivered on the event loop")
+
+
+def test_fallback_polling_without_stream(server, client):
+    """Test that /history polling still completes without an event stream."""
+
+    async def scenario():
+        prompt_id = await client.queue_prompt(WORKFLOW)
+        status = await client.wait_for_completion(prompt_id, timeout=10, poll_interval=0.05)
+        await client.aclose()
+        return prompt_id, status
+
+    with patch("clients.async_comfyui_client.get_event_stream", return_value=None):
+        prompt_id, status = asyncio.run(scenario())
+
+    assert "outputs" in status
+    assert server.prompts[0]["client_id"] is None
+    assert server.request_counts["GET /history/" + prompt_id] > 1
+    print("[OK] Fallback polling without WebSocket")
+
+
+def test_client_survives_new_event_loops(client):
+    """Test that one shared client works across separate asyncio.run calls."""
+    assert asyncio.run(client.check_availability())
+    assert asyncio.run(client.cancel_prompt("missing"))
+    assert asyncio.run(client.get_history("missing")) == {}
+    print("[OK] Pool rebinds to the running loop")
+
+
+def test_shared_client_per_host(server):
+    """Test that the tools modules share one client (and pool) per host."""
+    assert get_async_comfyui_client(server.url) is get_async_comfyui_client(server.url + "/")
+    print("[OK] One client per host")
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))
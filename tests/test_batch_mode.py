@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""Tests for pipelined batch mode (generate.py --batch-file)."""
+
+import json
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from PIL import Image
+
+# Add parent directory to path to import generate
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from fake_comfyui import FakeComfyUI
+from fake_minio import FakeMinio
+
+import generate
+
+WORKFLOW = {
+    "4": {"class_type": "CheckpointLoaderSimple", "inputs": {"ckpt_name": "sd15.safetensors"}},
+    "6": {"class_type": "CLIPTextEncode", "inputs": {"text": "", "clip": ["4", 1]}},
+    "7": {"class_type": "CLIPTextEncode", "inputs": {"text": "", "clip": ["4", 1]}},
+    "3": {
+        "class_type": "KSampler",
+        "inputs": {"seed": 1, "steps": 20, "cfg": 7.0, "positive": ["6", 0], "negative": ["7", 0]},
+    },
+}
+
+CONFIG = {"presets": {}, "default_negative_prompt": "", "validation": {}, "batch": {}}
+
+
+@pytest.fixture
+def server(monkeypatch):
+    fake = FakeComfyUI(run_seconds=0.2)
+    monkeypatch.setattr(generate, "COMFYUI_HOST", fake.url)
+    yield fake
+    fake.close()
+
+
+@pytest.fixture
+def no_minio():
+    with patch("generate.minio_client", return_value=FakeMinio()):
+        with patch("generate.upload_metadata_to_minio", side_effect=lambda metadata, name: f"http://minio/{name}.json"):
+            yield
+
+
+def _write_batch(tmp_path, entries):
+    workflow_path = tmp_path / "workflow.json"
+    workflow_path.write_text(json.dumps(WORKFLOW))
+    batch_path = tmp_path / "jobs.jsonl"
+    lines = [json.dumps({"workflow": str(workflow_path), **entry}) for entry in entries]
+    batch_path.write_text("\n".join(lines) + "\n")
+    return batch_path
+
+
+def _args(tmp_path, batch_path, *extra):
+    return generate.build_parser().parse_args(
+        ["--batch-file", str(batch_path), "--output", str(tmp_path / "out" / "image.png"), "--quiet", *extra]
+    )
+
+
+def _results(batch_path):
+    results_path = batch_path.with_suffix(".results.jsonl")
+    return [json.loads(line) for line in results_path.read_text().splitlines()]
+
+
+def test_batch_job_args():
+    """Test that line fields override the CLI flags, with aliases and list forms."""
+    args = generate.build_parser().parse_args(["--output", "out/run.png", "--steps", "20", "--lora", "a:0.5"])
+
+    job = generate.GenerationJob.from_dict(
+        {
+            "id": "cat",
+            "prompt": "a cat",
+            "negative-prompt": "blurry",
+            "loras": ["detail.safetensors:0.8", {"name": "style.safetensors", "strength": 0.6}],
+            "tags": ["batch:cats", "style:photo"],
+            "seed": 42,
+        }
+    )
+    job_args = job.to_args(args, 3)
+
+    assert job_args.prompt == "a cat"
+    assert job_args.negative_prompt == "blurry"
+    assert job_args.lora == ["detail.safetensors:0.8", "style.safetensors:0.6"]
+    assert job_args.tags == "batch:cats,style:photo"
+    assert job_args.seed == 42
+    assert job_args.steps == 20
+    assert job_args.output == str(Path("out/run_0003.png"))
+    assert args.lora == ["a:0.5"]
+    assert job.id == "cat"
+
+    with pytest.raises(generate.JobError):
+        generate.GenerationJob(promt="typo").to_args(args, 1)
+    print("[OK] Batch job arguments merged")
+
+
+def test_batch_runner_max_inflight_from_config():
+    """Test that BatchRunner() takes max_inflight from batch.max_inflight, then BATCH_MAX_INFLIGHT."""
+    assert generate.BatchRunner(config={**CONFIG, "batch": {"max_inflight": 5}}).max_inflight == 5
+    assert generate.BatchRunner(config=CONFIG).max_inflight == generate.BATCH_MAX_INFLIGHT
+    assert generate.BatchRunner(max_inflight=3, config={**CONFIG, "batch": {"max_inflight": 5}}).max_inflight == 3
+    print("[OK] BatchRunner max_inflight defaults to the config")
+
+
+def test_batch_job_values_are_typed():
+    """Test that line values go through the flag's type and malformed LoRAs are rejected."""
+    args = generate.build_parser().parse_args([])
+
+    job_args = generate.GenerationJob(seed="42", cfg=7, denoise="0.5").to_args(args, 1)
+    assert (job_args.seed, job_args.cfg, job_args.denoise) == (42, 7.0, 0.5)
+    assert isinstance(job_args.cfg, float)
+
+    for options, message in [
+        ({"seed": "abc"}, "Invalid value for seed"),
+        ({"crop": "stretch"}, "choose from"),
+        ({"lora": [{"strength": 1}]}, "no name"),
+        ({"lora": [5]}, "Invalid LoRA entry"),
+    ]:
+        with pytest.raises(generate.JobError, match=message):
+            generate.GenerationJob(**options).to_args(args, 1)
+    print("[OK] Batch values converted like their flags")
+
+
+def test_load_batch_file(tmp_path):
+    """Test that comments and blank lines are skipped and bad JSON is reported with its line."""
+    batch_path = tmp_path / "jobs.jsonl"
+    batch_path.write_text('# jobs\n{"prompt": "a"}\n\n{"prompt": "b"}\n')
+    assert generate.load_batch_file(batch_path) == [(2, {"prompt": "a"}), (4, {"prompt": "b"})]
+
+    batch_path.write_text('{"prompt": "a"}\n{"prompt": \n')
+    with pytest.raises(generate.JobError, match=":2:"):
+        generate.load_batch_file(batch_path)
+    print("[OK] Batch file parsed")
+
+
+def test_batch_runs_every_job(server, no_minio, tmp_path):
+    """Test that every job is generated, saved and reported in the results file."""
+    batch_path = _write_batch(tmp_path, [{"prompt": f"a cat {i}", "seed": i, "id": f"cat-{i}"} for i in range(4)])
+    args = _args(tmp_path, batch_path, "--max-inflight", "2")
+
+    assert generate.run_batch(args, CONFIG) == generate.EXIT_SUCCESS
+
+    results = _results(batch_path)
+    assert sorted(r["id"] for r in results) == ["cat-0", "cat-1", "cat-2", "cat-3"]
+    assert all(r["status"] == "ok" for r in results)
+    for result in results:
+        with Image.open(result["output"]) as image:
+            assert image.size == (8, 8)
+        assert result["metadata_url"].endswith(".png.json")
+        assert result["minio_url"].startswith(f"http://192.168.1.215:9000/{generate.BUCKET_NAME}/")
+
+    queued = [p["prompt"] for p in server.prompts]
+    assert [w["6"]["inputs"]["text"] for w in queued] == [f"a cat {i}" for i in range(4)]
+    assert [w["3"]["inputs"]["seed"] for w in queued] == [0, 1, 2, 3]
+    print("[OK] All batch jobs completed")
+
+
+def test_batch_limits_inflight(server, no_minio, tmp_path):
+    """Test that no more than --max-inflight prompts are queued on ComfyUI at once."""
+    batch_path = _write_batch(tmp_path, [{"prompt": f"dog {i}"} for i in range(5)])
+    args = _args(tmp_path, batch_path, "--max-inflight", "2")
+    peak = []
+    queue_workflow = generate.queue_workflow
+
+    def tracking_queue(workflow):
+        prompt_id = queue_workflow(workflow)
+        peak.append(len(server.pending) + (1 if server.running else 0))
+        return prompt_id
+
+    with patch("generate.queue_workflow", side_effect=tracking_queue):
+        assert generate.run_batch(args, CONFIG) == generate.EXIT_SUCCESS
+
+    assert max(peak) <= 2
+    assert len(server.prompts) == 5
+    print("[OK] In-flight prompts capped")
+
+
+def test_batch_bad_job_does_not_stop_others(server, no_minio, tmp_path):
+    """Test that an unusable line is recorded as an error and the rest still run."""
+    batch_path = _write_batch(
+        tmp_path, [{"prompt": "ok 1"}, {"prompt": "bad", "preset": "missing"}, {"prompt": "ok 2"}]
+    )
+    args = _args(tmp_path, batch_path)
+
+    assert generate.run_batch(args, CONFIG) == generate.EXIT_FAILURE
+
+    results = {r["index"]: r for r in _results(batch_path)}
+    assert results[1]["status"] == "ok"
+    assert results[2]["status"] == "error"
+    assert "Preset not found" in results[2]["error"]
+    assert results[3]["status"] == "ok"
+    assert len(server.prompts) == 2
+    print("[OK] Bad job reported, others completed")
+
+
+def test_batch_malformed_lines_are_job_errors(server, no_minio, tmp_path):
+    """Test that malformed values and unexpected per-job exceptions fail only their own line."""
+    batch_path = _write_batch(
+        tmp_path,
+        [
+            {"prompt": "ok 1"},
+            {"prompt": "bad", "lora": [{"strength": 1}]},
+            {"prompt": "bad", "seed": "abc"},
+            {"prompt": "ok 2"},
+        ],
+    )
+    args = _args(tmp_path, batch_path)
+
+    assert generate.run_batch(args, CONFIG) == generate.EXIT_FAILURE
+
+    results = {r["index"]: r for r in _results(batch_path)}
+    assert [results[i]["status"] for i in range(1, 5)] == ["ok", "error", "error", "ok"]
+    assert "no name" in results[2]["error"]
+    assert "Invalid value for seed" in results[3]["error"]
+    assert len(server.prompts) == 2
+
+    # Any other exception while preparing a job is recorded for that job
+    batch_path = _write_batch(tmp_path, [{"prompt": "boom"}, {"prompt": "fine"}])
+    prepare = generate.BatchRunner.prepare
+
+    def flaky_prepare(runner, job_args):
+        if job_args.prompt == "boom":
+            raise KeyError("name")
+        return prepare(runner, job_args)
+
+    with patch.object(generate.BatchRunner, "prepare", flaky_prepare):
+        assert generate.run_batch(_args(tmp_path, batch_path), CONFIG) == generate.EXIT_FAILURE
+    results = sorted(_results(batch_path), key=lambda r: r["index"])
+    assert [r["status"] for r in results] == ["error", "ok"]
+    assert results[0]["error"] == "KeyError: 'name'"
+    print("[OK] Malformed lines reported as job errors")
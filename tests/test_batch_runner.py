@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""Tests for the in-process batch runner (generate.BatchRunner)."""
+
+import json
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+# Add parent directory to path to import generate
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from fake_comfyui import FakeComfyUI
+from fake_minio import FakeMinio
+
+import generate
+from clients.compiled_workflow import CompiledWorkflow
+
+WORKFLOW = {
+    "4": {"class_type": "CheckpointLoaderSimple", "inputs": {"ckpt_name": "sd15.safetensors"}},
+    "6": {"class_type": "CLIPTextEncode", "inputs": {"text": "", "clip": ["4", 1]}},
+    "7": {"class_type": "CLIPTextEncode", "inputs": {"text": "", "clip": ["4", 1]}},
+    "3": {
+        "class_type": "KSampler",
+        "inputs": {"seed": 1, "steps": 20, "cfg": 7.0, "positive": ["6", 0], "negative": ["7", 0]},
+    },
+}
+
+CONFIG = {"presets": {}, "default_negative_prompt": "", "validation": {}, "batch": {}}
+
+
+@pytest.fixture
+def server(monkeypatch):
+    fake = FakeComfyUI(run_seconds=0.1)
+    monkeypatch.setattr(generate, "COMFYUI_HOST", fake.url)
+    yield fake
+    fake.close()
+
+
+@pytest.fixture
+def no_minio():
+    with patch("generate.minio_client", return_value=FakeMinio()):
+        with patch("generate.upload_metadata_to_minio", side_effect=lambda metadata, name: f"http://minio/{name}.json"):
+            yield
+
+
+@pytest.fixture
+def workflow_path(tmp_path):
+    path = tmp_path / "workflow.json"
+    path.write_text(json.dumps(WORKFLOW))
+    return str(path)
+
+
+def test_default_args_overrides():
+    """Test that runner defaults accept flag names and reject unknown options."""
+    args = generate.default_args(CONFIG, steps=12, **{"no-metadata": True})
+
+    assert args.steps == 12
+    assert args.no_metadata is True
+    assert args.batch_file is None
+    with pytest.raises(generate.JobError, match="Unknown option"):
+        generate.default_args(CONFIG, stesp=12)
+    print("[OK] Runner defaults built from options")
+
+
+def test_runner_summary_and_timings(server, no_minio, tmp_path, workflow_path):
+    """Test that the summary counts jobs and every stage is timed."""
+    seen = []
+    runner = generate.BatchRunner(
+        max_inflight=2,
+        config=CONFIG,
+        on_result=seen.append,
+        workflow=workflow_path,
+        output=str(tmp_path / "dog.png"),
+        quiet=True,
+    )
+
+    summary = runner.run([generate.GenerationJob(id=f"dog-{i}", prompt=f"a dog {i}", seed=i) for i in range(3)])
+
+    assert summary["jobs"] == 3
+    assert summary["succeeded"] == 3
+    assert summary["failed"] == 0
+    assert summary["images_per_minute"] > 0
+    assert [r["id"] for r in summary["results"]] == ["dog-0", "dog-1", "dog-2"]
+    assert [r["output"] for r in summary["results"]] == [str(tmp_path / f"dog_000{i}.png") for i in (1, 2, 3)]
+    assert set(summary["stages"]) == {"prepare", "generate", "download", "upload", "metadata"}
+    assert summary["stages"]["generate"]["count"] == 3
+    assert summary["stages"]["generate"]["mean_seconds"] >= 0.1
+    assert len(seen) == 3
+    print("[OK] Batch summary and stage timings reported")
+
+
+def test_runner_loads_shared_state_once(server, no_minio, tmp_path, workflow_path):
+    """Test that catalogs, /object_info and workflow files are read once per runner."""
+    runner = generate.BatchRunner(config=CONFIG, workflow=workflow_path, output=str(tmp_path / "cat.png"), quiet=True)
+    jobs = [{"prompt": f"a cat {i}"} for i in range(3)]
+
+    with patch("generate.load_presets", wraps=generate.load_presets) as load_presets:
+        with patch.object(CompiledWorkflow, "from_file", wraps=CompiledWorkflow.from_file) as parse_workflow:
+            runner.run(jobs)
+            runner.run(jobs)
+
+    assert load_presets.call_count == 1
+    assert parse_workflow.call_count == 1
+    assert server.request_counts.get("GET /object_info") == 1
+    # Each job patched its own copy of the workflow
+    assert [p["prompt"]["6"]["inputs"]["text"] for p in server.prompts] == [f"a cat {i}" for i in range(3)] * 2
+    print("[OK] Shared state loaded once per runner")
+
+
+def test_runner_requires_server(monkeypatch, tmp_path, workflow_path):
+    """Test that an unreachable server stops the batch before any job runs."""
+    monkeypatch.setattr(generate, "check_server_availability", lambda: False)
+    runner = generate.BatchRunner(config=CONFIG, workflow=workflow_path, quiet=True)
+
+    with pytest.raises(generate.JobError, match="not available"):
+        runner.run([generate.GenerationJob(prompt="a cat")])
+    print("[OK] Unavailable server reported")
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""Tests for the shared CLIP embedding service."""
+
+import gc
+import sys
+import weakref
+from pathlib import Path
+
+import numpy as np
+import pytest
+from PIL import Image
+
+# Add parent directory to path to import utils
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.clip_embedder import ClipEmbedder, chunk_prompt, quality_score, validation_score
+from utils.image_context import ImageContext
+
+
+class _FakeInputs(dict):
+    """Processor output that supports .to(device) like a BatchEncoding."""
+
+    def to(self, device):
+        return self
+
+
+class _FakeTokenizer:
+    """Character-level stand-in for the CLIP tokenizer (one token per character)."""
+
+    def __call__(self, words, add_special_tokens=True):
+        return {"input_ids": [[ord(c) for c in word] for word in words]}
+
+    def decode(self, ids):
+        return "".join(chr(i) for i in ids)
+
+
+class _FakeProcessor:
+    """Minimal stand-in for CLIPProcessor."""
+
+    def __init__(self, tokenizer=None):
+        if tokenizer is not None:
+            self.tokenizer = tokenizer
+
+    def __call__(self, text=None, images=None, **kwargs):
+        if images is not None:
+            images = images if isinstance(images, list) else [images]
+            return _FakeInputs(pixels=[image.getpixel((0, 0)) for image in images])
+        return _FakeInputs(text=text)
+
+
+class _FakeModel:
+    """Minimal stand-in for CLIPModel producing deterministic 3-d features."""
+
+    def __init__(self):
+        self.image_calls = 0
+        self.text_calls = 0
+        self.texts_seen = 0
+
+    def get_image_features(self, pixels):
+        self.image_calls += 1
+        # Red images point along x, anything else along z
+        return np.array([[1.0, 0.0, 0.0] if pixel[0] == 255 else [0.0, 0.0, 1.0] for pixel in pixels])
+
+    def get_text_features(self, text):
+        self.text_calls += 1
+        self.texts_seen += len(text)
+        return np.array([[1.0, 1.0, 0.0] if "sunset" in chunk else [0.0, 1.0, 0.0] for chunk in text])
+
+
+def _make_embedder():
+    model = _FakeModel()
+    return ClipEmbedder(model=model, processor=_FakeProcessor(), device="cpu"), model
+
+
+def _make_image(tmp_path, name="img.png"):
+    path = tmp_path / name
+    Image.new("RGB", (8, 8), color=(255, 0, 0)).save(path)
+    return str(path)
+
+
+def test_score_mappings():
+    """Test validation-style and quality-style remaps of cosine similarity."""
+    assert validation_score(1.0) == 1.0
+    assert validation_score(-1.0) == 0.0
+    assert validation_score(0.3) == pytest.approx(0.65)
+    assert quality_score(0.15) == 0.0
+    assert quality_score(0.40) == pytest.approx(1.0)
+    assert quality_score(0.275) == pytest.approx(0.5)
+    assert quality_score(0.9) == 1.0
+    print("[OK] Score mappings match validation.py and quality.py")
+
+
+def test_chunk_prompt_splits_long_prompts():
+    """Test that long prompts are split and short prompts are kept whole."""
+    assert chunk_prompt("a sunset") == ["a sunset"]
+    long_prompt = " ".join(["word"] * 200)
+    chunks = chunk_prompt(long_prompt)
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 250 for chunk in chunks)
+    print("[OK] Prompt chunking works")
+
+
+def test_chunk_prompt_by_token_count():
+    """Test greedy packing by real token counts, including oversized words."""
+    tokenizer = _FakeTokenizer()
+
+    assert chunk_prompt("aaaa bbbb cccc", tokenizer=tokenizer, max_tokens=10) == ["aaaa bbbb", "cccc"]
+    assert chunk_prompt("ab " + "x" * 25, tokenizer=tokenizer, max_tokens=10) == [
+        "ab",
+        "x" * 10,
+        "x" * 10,
+        "x" * 5,
+    ]
+
+    prompt = " ".join(f"word{i}" for i in range(100))
+    chunks = chunk_prompt(prompt, tokenizer=tokenizer, max_tokens=75)
+    assert all(sum(len(w) for w in chunk.split()) <= 75 for chunk in chunks)
+    assert " ".join(chunks) == prompt
+    print("[OK] Token-accurate chunking works")
+
+
+def test_long_prompt_and_negative_single_forward(tmp_path):
+    """Test that all chunks of a long prompt and its negative go through one forward pass."""
+    model = _FakeModel()
+    embedder = ClipEmbedder(model=model, processor=_FakeProcessor(_FakeTokenizer()), device="cpu")
+    positive = " ".join(f"sunset{i}" for i in range(60))
+    negative = " ".join(f"blurry{i}" for i in range(40))
+
+    embedder.score(_make_image(tmp_path), positive, negative)
+
+    assert model.text_calls == 1
+    assert model.texts_seen == len(embedder.chunk(positive)) + len(embedder.chunk(negative))
+    assert model.texts_seen > 2
+    print("[OK] Long prompt and negative encoded in one batch")
+
+
+def test_image_and_prompt_encoded_once(tmp_path):
+    """Test that repeated scoring reuses cached image and prompt embeddings."""
+    embedder, model = _make_embedder()
+    image_path = _make_image(tmp_path)
+
+    first = embedder.score(image_path, "a sunset", "blurry")
+    second = embedder.score(image_path, "a sunset", "blurry")
+
+    assert first == second
+    assert model.image_calls == 1
+    assert model.text_calls == 1  # positive + negative share one forward
+    assert model.texts_seen == 2
+    print("[OK] Image and prompt embeddings computed once")
+
+
+def test_score_returns_both_mappings(tmp_path):
+    """Test that one call yields validation-style and quality-style scores from the same cosine."""
+    embedder, _ = _make_embedder()
+    image_path = _make_image(tmp_path)
+
+    scores = embedder.score(image_path, "a sunset", "blurry")
+    cosine = 1.0 / np.sqrt(2.0)
+
+    assert scores["positive_cosine"] == pytest.approx(cosine, rel=1e-5)
+    assert scores["positive_score"] == pytest.approx(validation_score(cosine), rel=1e-5)
+    assert scores["quality_score"] == pytest.approx(quality_score(cosine), rel=1e-5)
+    assert scores["negative_score"] == pytest.approx(0.5)
+    assert scores["score_delta"] == pytest.approx(scores["positive_score"] - 0.5)
+    print("[OK] Both score mappings returned")
+
+
+def test_modified_image_is_reencoded(tmp_path):
+    """Test that overwriting an image invalidates its cached embedding."""
+    embedder, model = _make_embedder()
+    image_path = _make_image(tmp_path)
+    embedder.embed_image(image_path)
+
+    Image.new("RGB", (16, 16), color=(0, 255, 0)).save(image_path)
+    embedder.embed_image(image_path)
+
+    assert model.image_calls == 2
+    print("[OK] Modified image re-encoded")
+
+
+def test_score_batch_matrix(tmp_path):
+    """Test that batch scoring returns an (images x prompts) matrix matching single scoring."""
+    embedder, model = _make_embedder()
+    red = _make_image(tmp_path, "red.png")
+    green = str(tmp_path / "green.png")
+    Image.new("RGB", (8, 8), color=(0, 255, 0)).save(green)
+    images = [red, green, _make_image(tmp_path, "red2.png")]
+
+    scores = embedder.score_batch(images, ["a sunset", "a dog"], ["blurry", None], batch_size=2)
+
+    assert scores["positive_score"].shape == (3, 2)
+    assert model.image_calls == 2  # 3 images in batches of 2
+    assert model.text_calls == 1  # all prompt chunks in one padded batch
+    assert np.isnan(scores["negative_score"][0, 1])
+    assert scores["negative_score"][0, 0] == pytest.approx(0.5)
+
+    single = ClipEmbedder(model=_FakeModel(), processor=_FakeProcessor(), device="cpu").score(red, "a sunset", "blurry")
+    assert scores["positive_score"][0, 0] == pytest.approx(single["positive_score"], rel=1e-5)
+    assert scores["quality_score"][0, 0] == pytest.approx(single["quality_score"], rel=1e-5)
+    assert scores["positive_score"][1, 1] == pytest.approx(0.5)
+    print("[OK] Batch score matrix matches per-image scores")
+
+
+def test_score_batch_rejects_mismatched_negatives(tmp_path):
+    """Test that negatives must line up with prompts."""
+    embedder, _ = _make_embedder()
+    with pytest.raises(ValueError):
+        embedder.score_batch([_make_image(tmp_path)], ["a", "b"], ["c"])
+
+
+def test_embed_images_releases_contexts_per_batch(tmp_path, monkeypatch):
+    """Test that paths are opened one batch at a time rather than all up front."""
+    embedder, model = _make_embedder()
+    images = [_make_image(tmp_path, f"img{i}.png") for i in range(7)]
+    opened = weakref.WeakSet()
+    alive_per_pass = []
+    from_path = ImageContext.from_path.__func__
+
+    def tracked_from_path(cls, path):
+        ctx = from_path(cls, path)
+        opened.add(ctx)
+        return ctx
+
+    def get_image_features(pixels):
+        gc.collect()
+        alive_per_pass.append(len(opened))
+        return _FakeModel.get_image_features(model, pixels)
+
+    monkeypatch.setattr(ImageContext, "from_path", classmethod(tracked_from_path))
+    monkeypatch.setattr(model, "get_image_features", get_image_features)
+
+    assert embedder.embed_images(images, batch_size=3).shape == (7, 3)
+    assert len(alive_per_pass) == 3
+    assert max(alive_per_pass) <= 3
+    print("[OK] Image contexts held one batch at a time")
+
+
+def test_embed_images_skips_unreadable(tmp_path):
+    """Test that missing or corrupt images become NaN rows instead of failing the batch."""
+    embedder, model = _make_embedder()
+    corrupt = tmp_path / "corrupt.png"
+    corrupt.write_bytes(b"not a png")
+    images = [_make_image(tmp_path, "red.png"), str(tmp_path / "missing.png"), str(corrupt)]
+
+    embeddings = embedder.embed_images(images)
+    assert embeddings.shape == (3, 3)
+    assert not np.isnan(embeddings[0]).any()
+    assert np.isnan(embeddings[1]).all() and np.isnan(embeddings[2]).all()
+
+    scores = embedder.score_batch(images[1:], ["a sunset"])
+    assert np.isnan(scores["positive_score"]).all()
+
+    with pytest.raises(OSError):
+        embedder.embed_image(str(corrupt))
+    print("[OK] Unreadable images scored as NaN")
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))
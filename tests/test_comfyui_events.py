@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""Tests for the shared ComfyUI WebSocket event stream."""
+
+import asyncio
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+# Add parent directory to path to import clients
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from clients import comfyui_events
+from clients.comfyui_events import ComfyUIEventStream, is_terminal_event, ws_url_for
+
+
+def _event(msg_type, prompt_id, **data):
+    return {"type": msg_type, "data": {"prompt_id": prompt_id, **data}}
+
+
+def _wait_until(predicate, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+class FakeComfyUIWebSocket:
+    """Minimal ComfyUI /ws endpoint that records connections and pushes events."""
+
+    def __init__(self):
+        websockets = pytest.importorskip("websockets")
+        self._websockets = websockets
+        self.client_ids = []
+        self.connections = []
+        self.loop = asyncio.new_event_loop()
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+        assert self._ready.wait(5)
+
+    def _serve(self):
+        asyncio.set_event_loop(self.loop)
+
+        async def handler(ws, *args):
+            path = ws.request.path if hasattr(ws, "request") else ws.path
+            self.client_ids.append(path.split("clientId=")[-1])
+            self.connections.append(ws)
+            try:
+                await ws.wait_closed()
+            finally:
+                self.connections.remove(ws)
+
+        async def start():
+            self.server = await self._websockets.serve(handler, "127.0.0.1", 0)
+            self.port = self.server.sockets[0].getsockname()[1]
+            self._ready.set()
+
+        self.loop.run_until_complete(start())
+        self.loop.run_forever()
+
+    @property
+    def url(self):
+        return f"ws://127.0.0.1:{self.port}/ws"
+
+    def send(self, event):
+        # The client may see the handshake complete before the handler registers it
+        assert _wait_until(lambda: self.connections)
+        for ws in list(self.connections):
+            asyncio.run_coroutine_threadsafe(ws.send(json.dumps(event)), self.loop).result(5)
+
+    def drop_connections(self):
+        """Abort the TCP connections without a closing handshake, like a network drop."""
+        for ws in list(self.connections):
+            self.loop.call_soon_threadsafe(ws.transport.abort)
+        assert _wait_until(lambda: not self.connections)
+
+    def close(self):
+        async def shutdown():
+            self.server.close()
+            await self.server.wait_closed()
+
+        asyncio.run_coroutine_threadsafe(shutdown(), self.loop).result(5)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+
+@pytest.fixture
+def server():
+    fake = FakeComfyUIWebSocket()
+    yield fake
+    fake.close()
+
+
+@pytest.fixture
+def stream(server, monkeypatch):
+    monkeypatch.setattr(comfyui_events, "RECONNECT_DELAY", 0.05)
+    events = ComfyUIEventStream(server.url)
+    assert events.wait_connected(5)
+    yield events
+    events.stop()
+
+
+def test_ws_url_for():
+    """Test HTTP host to WebSocket URL conversion."""
+    assert ws_url_for("http://192.168.1.215:8188") == "ws://192.168.1.215:8188/ws"
+    assert ws_url_for("https://comfy.local/") == "wss://comfy.local/ws"
+    assert ws_url_for("ws://127.0.0.1:8188/ws") == "ws://127.0.0.1:8188/ws"
+    print("[OK] WebSocket URLs derived from hosts")
+
+
+def test_terminal_events():
+    """Test completion detection from executing(node=None) and error events."""
+    assert is_terminal_event(_event("executing", "p1", node=None))
+    assert not is_terminal_event(_event("executing", "p1", node="3"))
+    assert not is_terminal_event({"type": "executing", "data": {"node": None}})
+    assert is_terminal_event(_event("execution_error", "p1"))
+    assert not is_terminal_event(_event("progress", "p1", value=1, max=2))
+    print("[OK] Terminal events detected")
+
+
+def test_one_socket_demuxes_prompts(server, stream):
+    """Test that one connection delivers each prompt's events only to its subscribers."""
+    received = {"a": [], "b": [], "all": []}
+    stream.subscribe("a", received["a"].append)
+    stream.subscribe("b", received["b"].append)
+    stream.subscribe(None, received["all"].append)
+
+    server.send(_event("progress", "a", value=1, max=4))
+    server.send(_event("progress", "b", value=2, max=4))
+    server.send({"type": "status", "data": {"status": {"exec_info": {"queue_remaining": 1}}}})
+
+    assert _wait_until(lambda: len(received["all"]) == 3)
+    assert [e["data"]["prompt_id"] for e in received["a"]] == ["a"]
+    assert [e["data"]["prompt_id"] for e in received["b"]] == ["b"]
+    assert len(server.client_ids) == 1
+    assert stream.stats["messages"] == 3
+    print("[OK] One socket demultiplexed by prompt_id")
+
+
+def test_late_subscribers_get_replay(stream):
+    """Test that events received before subscribing are replayed in order."""
+    stream.dispatch(_event("execution_start", "p1"))
+    stream.dispatch(_event("progress", "p1", value=1, max=2))
+
+    subscription, events = stream.subscribe_queue("p1")
+    stream.dispatch(_event("executing", "p1", node=None))
+
+    types = [events.get(timeout=1)["type"] for _ in range(3)]
+    assert types == ["execution_start", "progress", "executing"]
+
+    subscription.close()
+    stream.dispatch(_event("progress", "p1", value=2, max=2))
+    assert events.empty()
+    assert stream.finished_event("p1")["type"] == "executing"
+    print("[OK] Late subscribers see replayed events")
+
+
+def test_completion_future(stream):
+    """Test asyncio futures resolved from another thread and for finished prompts."""
+
+    async def scenario():
+        pending = stream.completion_future("p2")
+        threading.Timer(0.05, stream.dispatch, args=(_event("executing", "p2", node=None),)).start()
+        event = await asyncio.wait_for(pending, 2)
+
+        stream.dispatch(_event("execution_error", "p3", exception_message="OOM"))
+        done = stream.completion_future("p3")
+        return event, done.done(), await done
+
+    event, already_done, error = asyncio.run(scenario())
+    assert event["data"]["prompt_id"] == "p2"
+    assert already_done
+    assert error["type"] == "execution_error"
+    print("[OK] Completion futures resolve")
+
+
+def test_reconnects_with_same_client_id(server, stream):
+    """Test that a dropped socket reconnects and keeps its clientId."""
+    received = []
+    stream.subscribe("p4", received.append)
+
+    server.drop_connections()
+    assert _wait_until(lambda: len(server.client_ids) == 2 and server.connections)
+    server.send(_event("progress", "p4", value=1, max=2))
+
+    assert _wait_until(lambda: len(received) == 1)
+    assert server.client_ids == [stream.client_id, stream.client_id]
+    print("[OK] Event stream reconnected with the same clientId")
+
+
+def test_progress_tracker_uses_shared_stream(server, stream):
+    """Test that generate.ProgressTracker subscribes instead of opening its own socket."""
+    import generate
+
+    with patch("generate.get_event_stream", return_value=stream):
+        trackers = [generate.ProgressTracker(f"t{i}", quiet=True) for i in range(3)]
+        for tracker in trackers:
+            tracker.start()
+
+        server.send(_event("executing", "t1", node=None))
+        assert _wait_until(lambda: trackers[1].completed)
+
+        for tracker in trackers:
+            tracker.stop()
+
+    assert not trackers[0].completed
+    assert len(server.client_ids) == 1
+    print("[OK] ProgressTrackers share one socket")
+
+
+def test_comfyui_client_progress_uses_shared_stream(server, stream):
+    """Test that ComfyUIClient progress callbacks come from the shared stream."""
+    from clients.comfyui_client import ComfyUIClient
+
+    updates = []
+    client = ComfyUIClient(host=server.url.replace("ws://", "http://")[: -len("/ws")])
+    with patch("clients.comfyui_client.get_event_stream", return_value=stream):
+        state = client._start_progress_tracker("c1", updates.append)
+        server.send(_event("progress", "c1", value=5, max=10))
+        server.send(_event("executing", "c1", node=None))
+        assert _wait_until(lambda: state["completed"])
+        client._stop_progress_tracker(state)
+
+    kinds = [update["type"] for update in updates]
+    assert kinds == ["connected", "progress", "complete"]
+    assert updates[1]["percent"] == 50
+    print("[OK] ComfyUIClient progress shares the event stream")
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))
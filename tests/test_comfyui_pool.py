@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""Tests for queue-aware dispatch across several ComfyUI backends."""
+
+import socket
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path to import clients
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from fake_comfyui import FakeComfyUI
+
+from clients.comfyui_pool import Backend, ComfyUIPool, required_models
+
+WORKFLOW = {
+    "4": {"class_type": "CheckpointLoaderSimple", "inputs": {"ckpt_name": "sd15.safetensors"}},
+    "3": {"class_type": "KSampler", "inputs": {"seed": 1}},
+}
+
+LORA_WORKFLOW = {
+    **WORKFLOW,
+    "10": {"class_type": "LoraLoader", "inputs": {"lora_name": "detail.safetensors", "model": ["4", 0]}},
+}
+
+
+@pytest.fixture
+def servers():
+    fakes = [FakeComfyUI(run_seconds=0.3) for _ in range(2)]
+    yield fakes
+    for fake in fakes:
+        fake.close()
+
+
+def _dead_url():
+    # A port nothing listens on: bind, read the port, close
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    return f"http://127.0.0.1:{port}"
+
+
+def test_required_models():
+    """Test that literal loader inputs are collected and linked inputs skipped."""
+    workflow = {
+        **LORA_WORKFLOW,
+        "11": {"class_type": "LoraLoader", "inputs": {"lora_name": ["20", 0]}},
+    }
+    assert required_models(workflow) == {
+        "checkpoints": {"sd15.safetensors"},
+        "loras": {"detail.safetensors"},
+    }
+    assert required_models({"3": {"class_type": "KSampler", "inputs": {}}}) == {}
+    print("[OK] Required models extracted")
+
+
+def test_dispatch_spreads_across_backends(servers):
+    """Test that back-to-back prompts go to the least-loaded backend."""
+    pool = ComfyUIPool([s.url for s in servers], poll_interval=60)
+
+    prompt_ids = [pool.queue_prompt(WORKFLOW) for _ in range(4)]
+
+    assert all(prompt_ids)
+    assert [len(s.prompts) for s in servers] == [2, 2]
+    print("[OK] Prompts spread evenly across backends")
+
+
+def test_dispatch_prefers_shorter_queue(servers):
+    """Test that a backend with queued work is skipped for an idle one."""
+    busy, idle = servers
+    for _ in range(3):
+        ComfyUIPool([busy.url]).queue_prompt(WORKFLOW)
+
+    pool = ComfyUIPool([busy.url, idle.url])
+    prompt_id = pool.queue_prompt(WORKFLOW)
+
+    assert pool.backend_for(prompt_id).host == idle.url
+    print("[OK] Idle backend chosen over busy one")
+
+
+def test_vram_breaks_ties():
+    """Test that free VRAM decides between equally loaded backends."""
+    small = FakeComfyUI(vram_free=4 << 30)
+    large = FakeComfyUI(vram_free=22 << 30)
+    try:
+        pool = ComfyUIPool([small.url, large.url])
+        prompt_id = pool.queue_prompt(WORKFLOW)
+        assert pool.backend_for(prompt_id).host == large.url
+    finally:
+        small.close()
+        large.close()
+    print("[OK] More free VRAM wins ties")
+
+
+def test_routes_to_backend_with_models():
+    """Test that workflows only go to backends that have their checkpoint and LoRA."""
+    plain = FakeComfyUI(models={"checkpoints": ["sd15.safetensors"], "loras": []})
+    loras = FakeComfyUI(models={"checkpoints": ["sd15.safetensors"], "loras": ["detail.safetensors"]})
+    try:
+        pool = ComfyUIPool([plain.url, loras.url])
+        for _ in range(3):
+            pool.queue_prompt(LORA_WORKFLOW)
+
+        assert len(plain.prompts) == 0
+        assert len(loras.prompts) == 3
+        missing = {"4": {"class_type": "CheckpointLoaderSimple", "inputs": {"ckpt_name": "xl.safetensors"}}}
+        assert pool.queue_prompt(missing) is None
+    finally:
+        plain.close()
+        loras.close()
+    print("[OK] Model-incompatible backends skipped")
+
+
+def test_unknown_model_lists_pass():
+    """Test that a backend whose model lists are unknown is not ruled out."""
+    backend = Backend("http://a:8188", client=None)
+    required = required_models(LORA_WORKFLOW)
+
+    assert backend.has_models(required)
+    backend.models = {"checkpoints": ["sd15.safetensors"], "loras": []}
+    assert not backend.has_models(required)
+    assert backend.missing_models(required) == ["detail.safetensors"]
+    print("[OK] Unknown model lists pass, known ones are checked")
+
+
+def test_client_reuses_connections(servers):
+    """Test that polling, dispatch and download on one backend share a keep-alive connection."""
+    pool = ComfyUIPool([servers[0].url], poll_interval=0)
+    prompt_ids = [pool.queue_prompt(WORKFLOW) for _ in range(2)]
+    status = pool.wait_for_completion(prompt_ids[-1], timeout=10)
+    pool.get_image(prompt_ids[-1], status["outputs"]["9"]["images"][0])
+
+    stats = pool.backends[0].client.transport.stats()
+    assert stats["requests"] >= 8
+    assert stats["connections"] == 1
+    print(f"[OK] {stats['requests']} requests over {stats['connections']} connection")
+
+
+def test_fails_over_from_dead_backend(servers):
+    """Test that a backend going down after polling is skipped on dispatch."""
+    dying = FakeComfyUI()
+    alive = servers[0]
+    pool = ComfyUIPool([dying.url, alive.url], poll_interval=60)
+    pool.refresh(force=True)
+    # Make the dying backend look best, then take it down
+    pool.backends[1].queue_remaining = 5
+    dying.close()
+
+    prompt_id = pool.queue_prompt(WORKFLOW)
+
+    assert pool.backend_for(prompt_id).host == alive.url
+    assert not pool.backends[0].healthy
+    print("[OK] Failed over to the live backend")
+
+
+def test_unreachable_backend_skipped(servers):
+    """Test that an unreachable host is marked down during polling."""
+    pool = ComfyUIPool([_dead_url(), servers[0].url])
+
+    prompt_id = pool.queue_prompt(WORKFLOW)
+
+    assert pool.backend_for(prompt_id).host == servers[0].url
+    assert [b["healthy"] for b in pool.status()] == [False, True]
+    print("[OK] Unreachable backend skipped")
+
+
+def test_rejected_workflow_not_retried(servers):
+    """Test that a server-side rejection is not retried on other backends."""
+    for server in servers:
+        server.fail_prompts = True
+    pool = ComfyUIPool([s.url for s in servers])
+
+    assert pool.queue_prompt(WORKFLOW) is None
+    assert sum(s.request_counts.get("POST /prompt", 0) for s in servers) == 1
+    print("[OK] Rejected workflow not re-dispatched")
+
+
+def test_sticky_completion_and_download(servers):
+    """Test that waiting and downloads go to the backend that ran the prompt."""
+    pool = ComfyUIPool([s.url for s in servers], poll_interval=60)
+    prompt_ids = [pool.queue_prompt(WORKFLOW) for _ in range(2)]
+
+    for prompt_id in prompt_ids:
+        owner = next(s for s in servers if prompt_id in {p["prompt_id"] for p in s.prompts})
+        status = pool.wait_for_completion(prompt_id, timeout=10)
+        image_info = status["outputs"]["9"]["images"][0]
+
+        assert pool.get_image(prompt_id, image_info) == owner.image
+        assert owner.request_counts.get("GET /view", 0) == 1
+
+    with pytest.raises(KeyError):
+        pool.get_history("unknown")
+    print("[OK] Outputs fetched from the producing backend")
+
+
+def test_from_config_env(monkeypatch):
+    """Test that COMFYUI_HOSTS lists the pool's backends."""
+    monkeypatch.setenv("COMFYUI_HOSTS", "http://a:8188, http://b:8188/")
+
+    pool = ComfyUIPool.from_config()
+
+    assert [b.host for b in pool.backends] == ["http://a:8188", "http://b:8188"]
+    with pytest.raises(ValueError):
+        ComfyUIPool([])
+    print("[OK] Backends read from COMFYUI_HOSTS")
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""Tests for the pooled ComfyUI HTTP transport used by generate.py."""
+
+import sys
+from pathlib import Path
+
+import pytest
+from PIL import Image
+
+# Add parent directory to path to import generate
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from fake_comfyui import FakeComfyUI
+
+import generate
+from clients.comfyui_transport import DEFAULT_COMFYUI_HOST, ComfyUITransport, get_transport, resolve_comfyui_host
+from utils.metadata import get_comfyui_version
+
+WORKFLOW = {"3": {"class_type": "KSampler", "inputs": {"seed": 1}}}
+
+
+@pytest.fixture
+def server():
+    fake = FakeComfyUI(run_seconds=0.1)
+    yield fake
+    fake.close()
+
+
+def _http_requests(server):
+    return sum(count for key, count in server.request_counts.items() if key != "GET /ws")
+
+
+def test_resolve_host(monkeypatch):
+    """Test host resolution: environment, then config, then default."""
+    monkeypatch.setenv("COMFYUI_HOST", "http://gpu-box:8188/")
+    assert resolve_comfyui_host({"host": "http://other:8188"}) == "http://gpu-box:8188"
+
+    monkeypatch.delenv("COMFYUI_HOST")
+    assert resolve_comfyui_host({"host": "http://other:8188"}) == "http://other:8188"
+    assert resolve_comfyui_host({}) == DEFAULT_COMFYUI_HOST
+    print("[OK] Host resolved from env, config, default")
+
+
+def test_timeouts():
+    """Test that every request gets a (connect, read) timeout."""
+    transport = ComfyUITransport("http://127.0.0.1:1", connect_timeout=2, read_timeout=40)
+    assert transport._timeout(None) == (2, 40)
+    assert transport._timeout(10) == (2, 10)
+    assert transport._timeout(1) == (1, 1)
+    assert transport._timeout((5, 6)) == (5, 6)
+    print("[OK] Connect and read timeouts applied")
+
+
+def test_requests_reuse_one_connection(server):
+    """Test keep-alive: sequential requests share one TCP connection."""
+    transport = ComfyUITransport(server.url)
+    for _ in range(5):
+        assert transport.get("/queue").status_code == 200
+    assert transport.post("/interrupt").status_code == 200
+
+    assert transport.stats() == {"requests": 6, "connections": 1}
+    assert len(server.connections) == 1
+
+    transport.reset_stats()
+    transport.get("/queue")
+    assert transport.stats() == {"requests": 1, "connections": 0}
+    transport.close()
+    print("[OK] Six requests over one connection")
+
+
+def test_generate_run_uses_pooled_transport(server, monkeypatch, tmp_path):
+    """Test that one generate.py run goes through a single keep-alive connection."""
+    monkeypatch.setattr(generate, "COMFYUI_HOST", server.url)
+    transport = generate.comfyui_transport()
+    transport.reset_stats()
+
+    input_path = tmp_path / "input.png"
+    Image.new("RGB", (8, 8)).save(input_path)
+    output_path = tmp_path / "output.png"
+
+    assert generate.check_server_availability()
+    assert generate.get_available_models()["checkpoints"] == ["sd15.safetensors"]
+    assert generate.upload_image_to_comfyui(str(input_path)).startswith("input_")
+    prompt_id = generate.queue_workflow(WORKFLOW, retry=False)
+    status = generate.wait_for_completion(prompt_id, quiet=True)
+    assert generate.download_output(status, str(output_path))
+    assert generate.delete_from_queue([prompt_id])
+
+    stats = transport.stats()
+    assert stats["requests"] == _http_requests(server)
+    assert stats["connections"] == 1
+    assert len(server.connections) == 1
+    assert output_path.read_bytes() == server.image
+    print(f"[OK] {stats['requests']} requests over one connection")
+
+
+def test_version_reuses_availability_check(server, monkeypatch):
+    """Test that metadata's version lookup reuses the cached /system_stats."""
+    monkeypatch.setenv("COMFYUI_HOST", server.url)
+    monkeypatch.setattr(generate, "COMFYUI_HOST", server.url)
+
+    assert generate.check_server_availability()
+    assert get_comfyui_version() == "0.3.0-fake"
+    assert get_transport() is generate.comfyui_transport()
+    assert server.request_counts["GET /system_stats"] == 1
+    print("[OK] ComfyUI version without an extra round trip")
+
+
+def test_unreachable_server_counts_no_connection():
+    """Test that failures surface as requests exceptions, as before."""
+    import requests
+
+    transport = ComfyUITransport("http://127.0.0.1:1", connect_timeout=0.5)
+    with pytest.raises(requests.ConnectionError):
+        transport.get("/system_stats")
+    assert transport.system_stats() is None
+    assert transport.stats()["requests"] == 2
+    print("[OK] Connection errors propagate")
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))
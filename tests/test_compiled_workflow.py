@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""Tests for compiled workflow templates (clients.compiled_workflow)."""
+
+import copy
+import json
+import os
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+# Add parent directory to path to import clients and generate
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import generate
+from clients.compiled_workflow import CompiledWorkflow, find_nodes, load_compiled_workflow
+from clients.workflows import WorkflowManager
+
+WORKFLOW = {
+    "4": {"class_type": "CheckpointLoaderSimple", "inputs": {"ckpt_name": "sd15.safetensors"}},
+    "5": {"class_type": "EmptyLatentImage", "inputs": {"width": 512, "height": 512, "batch_size": 1}},
+    "6": {"class_type": "CLIPTextEncode", "inputs": {"text": "", "clip": ["4", 1]}, "_meta": {"title": "Positive"}},
+    "7": {
+        "class_type": "CLIPTextEncode",
+        "inputs": {"text": "", "clip": ["4", 1]},
+        "_meta": {"title": "Negative Prompt"},
+    },
+    "3": {
+        "class_type": "KSampler",
+        "inputs": {"seed": 1, "steps": 20, "cfg": 7.0, "model": ["4", 0], "positive": ["6", 0], "negative": ["7", 0]},
+    },
+}
+
+
+def _write(tmp_path, workflow, name="workflow.json"):
+    path = tmp_path / name
+    path.write_text(json.dumps(workflow))
+    return path
+
+
+def test_indexes():
+    """Test that nodes are indexed by class, title and prompt role."""
+    compiled = CompiledWorkflow(WORKFLOW)
+
+    assert compiled.nodes("KSampler") == ["3"]
+    assert compiled.nodes("CLIPTextEncode", "KSampler") == ["6", "7", "3"]
+    assert compiled.nodes_titled("negative prompt") == ["7"]
+    assert compiled.prompt_nodes == ("6", "7")
+    assert compiled.role("negative_prompt") == "7"
+    print("[OK] Nodes indexed by class, title and role")
+
+
+def test_instances_do_not_share_nodes():
+    """Test that patching an instance leaves the template and other instances untouched."""
+    compiled = CompiledWorkflow(copy.deepcopy(WORKFLOW))
+    first = compiled.instantiate()
+    second = compiled.instantiate()
+
+    assert first.set_inputs("KSampler", steps=40, seed=None) == ["3"]
+    first["6"]["inputs"]["clip"][1] = 0
+    generate.modify_prompt(first, "a cat", "blurry")
+
+    assert first["3"]["inputs"]["steps"] == 40
+    assert first["3"]["inputs"]["seed"] == 1
+    assert first["6"]["inputs"]["text"] == "a cat"
+    assert second == WORKFLOW
+    assert compiled.template == WORKFLOW
+    assert copy.deepcopy(first).indexed() is compiled
+    print("[OK] Instances are independent copies")
+
+
+def test_index_detaches_when_nodes_change():
+    """Test that adding a node makes lookups scan the instance instead."""
+    workflow = CompiledWorkflow(WORKFLOW).instantiate()
+    workflow["20"] = {"class_type": "KSampler", "inputs": {"steps": 10}}
+
+    assert workflow.indexed() is None
+    assert find_nodes(workflow, "KSampler") == ["3", "20"]
+    generate.modify_sampler_params(workflow, steps=30)
+    assert workflow["20"]["inputs"]["steps"] == 30
+    print("[OK] Changed node set falls back to scanning")
+
+
+def test_file_parsed_once_until_changed(tmp_path):
+    """Test that a workflow file is parsed once and re-parsed after it changes on disk."""
+    path = _write(tmp_path, WORKFLOW)
+
+    with patch.object(CompiledWorkflow, "from_file", wraps=CompiledWorkflow.from_file) as parse:
+        first = generate.load_workflow(str(path))
+        second = generate.load_workflow(str(path))
+        assert parse.call_count == 1
+        assert first == second and first is not second
+
+        changed = copy.deepcopy(WORKFLOW)
+        changed["3"]["inputs"]["steps"] = 99
+        _write(tmp_path, changed)
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+        assert generate.load_workflow(str(path))["3"]["inputs"]["steps"] == 99
+        assert parse.call_count == 2
+    print("[OK] Workflow re-parsed only after a change")
+
+
+def test_workflow_manager_uses_compiled(tmp_path):
+    """Test that WorkflowManager loads compiled instances and its setters patch them."""
+    _write(tmp_path, WORKFLOW)
+    manager = WorkflowManager(workflows_dir=str(tmp_path))
+
+    workflow = manager.load_workflow("workflow.json")
+    manager.set_seed(workflow, 7)
+    manager.set_dimensions(workflow, 768, 1024)
+
+    assert workflow.indexed() is load_compiled_workflow(str(tmp_path / "workflow.json"))
+    assert workflow["3"]["inputs"]["seed"] == 7
+    assert workflow["5"]["inputs"]["width"] == 768
+    assert manager.load_workflow("workflow.json")["3"]["inputs"]["seed"] == 1
+    assert manager.load_workflow("missing.json") is None
+    print("[OK] WorkflowManager patches compiled instances")
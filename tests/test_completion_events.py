@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""Tests for event-driven prompt completion (WebSocket instead of /history polling)."""
+
+import sys
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+# Add parent directory to path to import generate
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from fake_comfyui import FakeComfyUI
+
+import generate
+from clients.comfyui_client import ComfyUIClient
+
+WORKFLOW = {"3": {"class_type": "KSampler", "inputs": {"seed": 1}}}
+
+
+@pytest.fixture
+def server():
+    fake = FakeComfyUI(run_seconds=0.2)
+    yield fake
+    fake.close()
+
+
+def test_generate_completes_on_event(server, monkeypatch):
+    """Test that generate.wait_for_completion returns right after the final event."""
+    monkeypatch.setattr(generate, "COMFYUI_HOST", server.url)
+
+    prompt_id = generate.queue_workflow(WORKFLOW, retry=False)
+    status = generate.wait_for_completion(prompt_id, quiet=True)
+    returned_at = time.monotonic()
+
+    assert status["outputs"]["9"]["images"][0]["filename"].startswith(prompt_id)
+    # Previously up to WS_POLL_INTERVAL (2s) after the server finished
+    assert returned_at - server.finished_at[prompt_id] < 0.5
+    assert server.request_counts["GET /history/" + prompt_id] <= 3
+    assert server.prompts[0]["client_id"] is not None
+    print("[OK] Completion resolved from the WebSocket event")
+
+
+def test_generate_falls_back_to_polling(server, monkeypatch):
+    """Test that /history polling still works without an event stream."""
+    monkeypatch.setattr(generate, "COMFYUI_HOST", server.url)
+    monkeypatch.setattr(generate, "WS_POLL_INTERVAL", 0.05)
+
+    with patch("generate.get_event_stream", return_value=None):
+        prompt_id = generate.queue_workflow(WORKFLOW, retry=False)
+        status = generate.wait_for_completion(prompt_id, quiet=True)
+
+    assert "outputs" in status
+    assert server.request_counts["GET /history/" + prompt_id] > 1
+    print("[OK] Fallback polling completes without WebSocket")
+
+
+def test_tracker_stops_on_execution_error():
+    """Test that an execution_error ends ProgressTracker.wait_for_completion."""
+    tracker = generate.ProgressTracker("p1", quiet=True)
+    tracker._on_event({"type": "execution_error", "data": {"prompt_id": "p1", "exception_message": "CUDA OOM"}})
+
+    start = time.monotonic()
+    assert tracker.wait_for_completion(timeout=5) is False
+    assert time.monotonic() - start < 0.5
+    assert tracker.error == "CUDA OOM"
+    print("[OK] Execution errors end the wait")
+
+
+def test_client_completes_on_event(server):
+    """Test ComfyUIClient.wait_for_completion with progress callbacks."""
+    client = ComfyUIClient(host=server.url)
+    updates = []
+
+    prompt_id = client.queue_prompt(WORKFLOW)
+    status = client.wait_for_completion(prompt_id, timeout=10, progress_callback=updates.append)
+    returned_at = time.monotonic()
+
+    assert "outputs" in status
+    assert returned_at - server.finished_at[prompt_id] < 0.5
+    assert "complete" in [update["type"] for update in updates]
+    print("[OK] ComfyUIClient completion resolved from events")
+
+
+def test_client_timeout(server):
+    """Test that the timeout still applies while waiting on events."""
+    server.run_seconds = 5
+    client = ComfyUIClient(host=server.url)
+
+    prompt_id = client.queue_prompt(WORKFLOW)
+    start = time.monotonic()
+    assert client.wait_for_completion(prompt_id, timeout=0.3) is None
+    assert time.monotonic() - start < 1.5
+    print("[OK] Timeout honoured")
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""Tests for batched BLIP content validation."""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+from PIL import Image
+
+# Add parent directory to path to import utils
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils import content_validator
+from utils.content_validator import evaluate_answers, extract_key_elements, plan_questions, validate_content_batch
+
+
+@pytest.fixture
+def image_paths(tmp_path):
+    paths = []
+    for i in range(2):
+        path = tmp_path / f"out_{i}.png"
+        Image.fromarray(np.full((16, 16, 3), i * 100, dtype=np.uint8)).save(path)
+        paths.append(str(path))
+    return paths
+
+
+@pytest.fixture
+def fake_blip(monkeypatch):
+    """Record batched BLIP calls instead of running the models."""
+    calls = {"captions": [], "questions": []}
+
+    def fake_captions(images, batch_size=8):
+        calls["captions"].append(len(images))
+        return [f"caption {i}" for i in range(len(images))]
+
+    def fake_answers(images, questions, batch_size=8):
+        calls["questions"].append(questions)
+        answers = {
+            "How many people are in this image?": "2",
+            "Is there anything red in this image?": "yes",
+            "Is the subject smiling?": "no",
+        }
+        return [[answers.get(q, "yes") for q in qs] for qs in questions]
+
+    monkeypatch.setattr(content_validator, "BLIP_AVAILABLE", True)
+    monkeypatch.setattr(content_validator, "_generate_captions", fake_captions)
+    monkeypatch.setattr(content_validator, "_answer_questions", fake_answers)
+    return calls
+
+
+def test_plan_questions():
+    """Test that every check becomes one question in a single plan."""
+    expected = extract_key_elements("solo woman in a red dress, smiling")
+    plan = plan_questions(expected)
+
+    assert plan[0] == ("subject_count", None, "How many people are in this image?")
+    assert ("colors", "red", "Is there anything red in this image?") in plan
+    assert ("attributes", "smiling", "Is the subject smiling?") in plan
+    assert plan_questions(expected, check_subject_count=False, check_colors=False, check_attributes=False) == []
+    print("[OK] Questions planned for all checks")
+
+
+def test_evaluate_answers_matches_checks():
+    """Test that answers are scored the same way as the per-question checks were."""
+    expected = extract_key_elements("solo woman in a red dress, smiling")
+    plan = plan_questions(expected)
+    answers = [{"subject_count": "2", "colors": "yes", "attributes": "no"}[check] for check, _, _ in plan]
+
+    result = evaluate_answers(expected, plan, answers, "a woman")
+
+    assert result["valid"] is False
+    assert result["checks"]["subject_count"]["detected"] == 2
+    assert result["checks"]["colors"]["red"]["found"] is True
+    assert result["checks"]["attributes"]["smiling"]["found"] is False
+    assert result["reason"].startswith("Content validation failed: Subject count mismatch")
+    print("[OK] Answers evaluated into checks and issues")
+
+
+def test_failed_answers_are_skipped():
+    """Test that unanswered questions leave their checks out, as before."""
+    expected = extract_key_elements("solo woman in a red dress")
+    plan = plan_questions(expected)
+
+    result = evaluate_answers(expected, plan, [None] * len(plan), None)
+
+    assert result["valid"] is True
+    assert "subject_count" not in result["checks"]
+    assert result["checks"]["colors"] == {}
+    print("[OK] Failed VQA answers do not fail validation")
+
+
+def test_batch_asks_all_questions_at_once(fake_blip, image_paths, tmp_path):
+    """Test that a bulk audit captions and questions all images in one batch each."""
+    prompts = ["solo woman in a red dress, smiling", "a red car on a street"]
+    missing = str(tmp_path / "missing.png")
+
+    results = validate_content_batch(image_paths + [missing], prompts + ["a cat"])
+
+    assert fake_blip["captions"] == [2]
+    assert len(fake_blip["questions"]) == 1
+    assert len(fake_blip["questions"][0]) == 2
+    assert results[0]["caption"] == "caption 0"
+    assert results[0]["valid"] is False
+    assert results[1]["valid"] is True
+    assert results[1]["checks"]["colors"]["red"]["found"] is True
+    assert results[2]["error"] == "file_not_found"
+    print("[OK] Bulk audit batched captions and questions")
+
+
+def test_single_image_uses_batch_path(fake_blip, image_paths):
+    """Test that validate_content goes through the batched path."""
+    result = content_validator.validate_content(image_paths[0], "solo woman in a red dress, smiling")
+
+    assert fake_blip["captions"] == [1]
+    # Subject count, one color and two attributes (dress, smiling)
+    assert len(fake_blip["questions"][0][0]) == 4
+    assert result["checks"]["subject_count"]["passed"] is False
+    print("[OK] Single-image validation uses one VQA batch")
+
+
+def test_batch_length_mismatch(fake_blip, image_paths):
+    """Test that images and prompts must line up."""
+    with pytest.raises(ValueError):
+        validate_content_batch(image_paths, ["only one prompt"])
+    print("[OK] Mismatched batch rejected")
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""Tests for the persistent text-embedding cache."""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+import yaml
+
+# Add parent directory to path to import utils
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.clip_embedder import ClipEmbedder
+from utils.embedding_cache import EmbeddingCache, collect_catalog_texts, normalize_text
+from utils.prompts import DEFAULT_SD_NEGATIVE_PROMPT
+
+MODEL = "openai/clip-vit-base-patch32"
+
+
+class _FakeInputs(dict):
+    def to(self, device):
+        return self
+
+
+class _FakeProcessor:
+    def __call__(self, text=None, images=None, **kwargs):
+        return _FakeInputs(text=text)
+
+
+class _FakeModel:
+    """Text encoder stand-in that counts encoded chunks."""
+
+    def __init__(self):
+        self.chunks_encoded = 0
+
+    def get_text_features(self, text):
+        self.chunks_encoded += len(text)
+        return np.array([[float(len(chunk)), 1.0, 0.0] for chunk in text])
+
+
+def test_normalize_text():
+    """Test that case and whitespace differences normalize to the same key text."""
+    assert normalize_text("  Blurry,   LOW quality\n") == "blurry, low quality"
+    print("[OK] Text normalization works")
+
+
+def test_memory_roundtrip_without_disk():
+    """Test in-memory caching with persistence disabled."""
+    cache = EmbeddingCache(cache_dir="")
+    assert cache.get(MODEL, "blurry") is None
+
+    cache.put(MODEL, "blurry", np.array([1.0, 0.0], dtype=np.float32))
+    np.testing.assert_array_equal(cache.get(MODEL, "Blurry "), [1.0, 0.0])
+    assert cache.stats()["memory_hits"] == 1
+    assert cache.stats()["misses"] == 1
+    print("[OK] Memory-only cache works")
+
+
+def test_disk_store_shared_across_instances(tmp_path):
+    """Test that embeddings written by one cache are memory-mapped by another."""
+    writer = EmbeddingCache(cache_dir=str(tmp_path))
+    writer.put_many(MODEL, ["blurry", "watermark"], np.array([[1, 2, 3], [4, 5, 6]], dtype=np.float32))
+
+    reader = EmbeddingCache(cache_dir=str(tmp_path))
+    vectors = reader.get_many(MODEL, ["watermark", "BLURRY", "missing"])
+
+    np.testing.assert_array_equal(vectors[0], [4, 5, 6])
+    np.testing.assert_array_equal(vectors[1], [1, 2, 3])
+    assert vectors[2] is None
+    assert reader.stats()["disk_hits"] == 2
+    assert (tmp_path / "openai--clip-vit-base-patch32" / "vectors.f32").stat().st_size == 2 * 3 * 4
+    print("[OK] Disk store shared across cache instances")
+
+
+def test_duplicate_puts_are_not_appended(tmp_path):
+    """Test that re-storing a known chunk does not grow the store."""
+    cache = EmbeddingCache(cache_dir=str(tmp_path))
+    cache.put(MODEL, "blurry", np.ones(3))
+    cache.put(MODEL, "Blurry", np.ones(3))
+    EmbeddingCache(cache_dir=str(tmp_path)).put(MODEL, "blurry", np.ones(3))
+
+    assert (tmp_path / "openai--clip-vit-base-patch32" / "vectors.f32").stat().st_size == 3 * 4
+    print("[OK] Duplicate chunks stored once")
+
+
+def test_embedder_skips_cached_chunks(tmp_path):
+    """Test that a fresh embedder reuses chunk embeddings persisted by an earlier one."""
+    first_model = _FakeModel()
+    first = ClipEmbedder(
+        MODEL, model=first_model, processor=_FakeProcessor(), embedding_cache=EmbeddingCache(str(tmp_path))
+    )
+    expected = first.embed_texts(["blurry, low quality", "a sunset"])
+    assert first_model.chunks_encoded == 2
+
+    second_model = _FakeModel()
+    second = ClipEmbedder(
+        MODEL, model=second_model, processor=_FakeProcessor(), embedding_cache=EmbeddingCache(str(tmp_path))
+    )
+    result = second.embed_texts(["Blurry, low quality", "a sunset", "a dog"])
+
+    assert second_model.chunks_encoded == 1  # only "a dog" is new
+    np.testing.assert_allclose(result[:2], expected, rtol=1e-6)
+    print("[OK] Embedder reuses persisted chunk embeddings")
+
+
+def test_collect_catalog_texts():
+    """Test that warm texts are collected from the real prompt catalog."""
+    repo_root = Path(__file__).parent.parent
+    with open(repo_root / "prompt_catalog.yaml", encoding="utf-8") as f:
+        catalog = yaml.safe_load(f)
+    with open(repo_root / "presets.yaml", encoding="utf-8") as f:
+        presets = yaml.safe_load(f)
+
+    texts = collect_catalog_texts(catalog, presets)
+
+    # Booster keywords never form a chunk of their own in a real prompt
+    assert "8K resolution" not in texts
+    assert DEFAULT_SD_NEGATIVE_PROMPT in texts
+    assert catalog["negative_presets"]["universal"]["prompt"] in texts
+    assert catalog["nsfw_negative_template"] in texts
+    assert len({normalize_text(t) for t in texts}) == len(texts)
+    print(f"[OK] Collected {len(texts)} catalog texts")
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))
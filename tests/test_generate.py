@@ -16,7 +16,7 @@ import generate
 
 def test_check_server_availability_success():
     """Test server availability check when server is reachable."""
-    with patch("requests.get") as mock_get:
+    with patch("requests.Session.get") as mock_get:
         mock_response = Mock()
         mock_response.status_code = 200
         mock_get.return_value = mock_response
@@ -28,7 +28,7 @@ def test_check_server_availability_success():
 
 def test_check_server_availability_connection_error():
     """Test server availability check when server is unreachable."""
-    with patch("requests.get") as mock_get:
+    with patch("requests.Session.get") as mock_get:
         import requests
 
         mock_get.side_effect = requests.ConnectionError("Connection refused")
@@ -40,7 +40,7 @@ def test_check_server_availability_connection_error():
 
 def test_check_server_availability_timeout():
     """Test server availability check when request times out."""
-    with patch("requests.get") as mock_get:
+    with patch("requests.Session.get") as mock_get:
         import requests
 
         mock_get.side_effect = requests.Timeout("Timeout")
@@ -52,7 +52,7 @@ def test_check_server_availability_timeout():
 
 def test_get_available_models_success():
     """Test getting available models from API."""
-    with patch("requests.get") as mock_get:
+    with patch("requests.Session.get") as mock_get:
         mock_response = Mock()
         mock_response.status_code = 200
         mock_response.json.return_value = {
@@ -124,7 +124,7 @@ def test_queue_workflow_retry_on_server_error():
     """Test that queue_workflow retries on server errors."""
     workflow = {"test": "workflow"}
 
-    with patch("requests.post") as mock_post:
+    with patch("requests.Session.post") as mock_post:
         # First call fails with 503, second succeeds
         mock_response_fail = Mock()
         mock_response_fail.status_code = 503
@@ -148,7 +148,7 @@ def test_queue_workflow_no_retry_on_client_error():
     """Test that queue_workflow doesn't retry on client errors."""
     workflow = {"test": "workflow"}
 
-    with patch("requests.post") as mock_post:
+    with patch("requests.Session.post") as mock_post:
         mock_response = Mock()
         mock_response.status_code = 400
         mock_response.text = "Bad Request"
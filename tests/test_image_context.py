@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""Tests for the shared decoded-image context."""
+
+import hashlib
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+from PIL import Image
+
+# Add parent directory to path to import utils
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.image_context import ImageContext
+
+
+def _write_image(path, width=64, height=32):
+    """Write a PNG with a red left half and a blue right half."""
+    pixels = np.zeros((height, width, 3), dtype=np.uint8)
+    pixels[:, : width // 2] = (255, 0, 0)
+    pixels[:, width // 2 :] = (0, 0, 255)
+    Image.fromarray(pixels).save(path)
+    return str(path)
+
+
+class _FakeImageProcessor:
+    def __init__(self, size, do_resize=True):
+        self.size = size
+        self.do_resize = do_resize
+
+
+class _FakeProcessor:
+    def __init__(self, size):
+        self.image_processor = _FakeImageProcessor(size)
+
+
+def test_file_read_once(tmp_path, monkeypatch):
+    """Test that pixels, hash and derived views all come from one file read."""
+    path = _write_image(tmp_path / "out.png")
+    reads = []
+    original = Path.read_bytes
+
+    def counting_read(self):
+        reads.append(str(self))
+        return original(self)
+
+    monkeypatch.setattr(Path, "read_bytes", counting_read)
+
+    ctx = ImageContext.from_path(path)
+    assert ctx.rgb.shape == (32, 64, 3)
+    assert ctx.sha256 == hashlib.sha256(original(Path(path))).hexdigest()
+    assert ctx.bgr.shape == (32, 64, 3)
+    assert ctx.pil.size == (64, 32)
+    assert ctx.resized(16, 16).size == (16, 16)
+
+    assert len(reads) == 1
+    print("[OK] File read once for all representations")
+
+
+def test_rgb_is_read_only(tmp_path):
+    """Test that validators cannot mutate the shared pixels."""
+    ctx = ImageContext.from_path(_write_image(tmp_path / "out.png"))
+    with pytest.raises(ValueError):
+        ctx.rgb[0, 0, 0] = 1
+    with pytest.raises(ValueError):
+        ctx.bgr[0, 0, 0] = 1
+    print("[OK] Shared arrays are read-only")
+
+
+def test_bgr_conversion(tmp_path):
+    """Test that the BGR view swaps channels and is contiguous for OpenCV."""
+    ctx = ImageContext.from_path(_write_image(tmp_path / "out.png"))
+    assert tuple(ctx.rgb[0, 0]) == (255, 0, 0)
+    assert tuple(ctx.bgr[0, 0]) == (0, 0, 255)
+    assert ctx.bgr.flags["C_CONTIGUOUS"]
+    assert ctx.bgr is ctx.bgr
+    print("[OK] BGR view converted once")
+
+
+def test_resized_variants_cached(tmp_path):
+    """Test that resized variants are computed once per size."""
+    ctx = ImageContext.from_path(_write_image(tmp_path / "out.png"))
+    first = ctx.resized(16, 16)
+    assert first is ctx.resized(16, 16)
+    assert first.size == (16, 16)
+    assert ctx.resized(64, 32) is ctx.pil
+    assert ctx.resized_shortest(16).size == (32, 16)
+    print("[OK] Resized variants cached")
+
+
+def test_for_processor_sizes(tmp_path):
+    """Test pre-resizing for shortest-edge (CLIP) and fixed-size (BLIP) processors."""
+    ctx = ImageContext.from_path(_write_image(tmp_path / "out.png"))
+
+    assert ctx.for_processor(_FakeProcessor({"shortest_edge": 8})).size == (16, 8)
+    assert ctx.for_processor(_FakeProcessor({"height": 12, "width": 10})).size == (10, 12)
+    assert ctx.for_processor(_FakeImageProcessor({"shortest_edge": 8}, do_resize=False)) is ctx.pil
+    assert ctx.for_processor(object()) is ctx.pil
+    print("[OK] Processor target sizes respected")
+
+
+def test_coerce_and_memory_contexts(tmp_path):
+    """Test path coercion, in-memory contexts and cache keys."""
+    path = _write_image(tmp_path / "out.png")
+    ctx = ImageContext.coerce(path)
+    assert ImageContext.coerce(ctx) is ctx
+    assert ctx.cache_key[0] == str(Path(path).resolve())
+
+    from_bytes = ImageContext.from_bytes(Path(path).read_bytes())
+    assert from_bytes.exists
+    assert from_bytes.name == "<memory>"
+    assert from_bytes.cache_key == ("sha256", ctx.sha256)
+    np.testing.assert_array_equal(from_bytes.rgb, ctx.rgb)
+
+    assert not ImageContext.from_path(str(tmp_path / "missing.png")).exists
+    print("[OK] Coercion and in-memory contexts work")
+
+
+def test_validators_accept_context_for_missing_file(tmp_path):
+    """Test that validators report missing files through the context."""
+    from utils.validation import count_persons_yolo
+
+    ctx = ImageContext.from_path(str(tmp_path / "missing.png"))
+    result = count_persons_yolo(ctx)
+    assert result["person_count"] is None
+    assert "error" in result
+    print("[OK] Validators accept an ImageContext")
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))
@@ -7,7 +7,7 @@ This script tests the validation features added to the MCP server.
 import asyncio
 import sys
 from pathlib import Path
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 # Add parent directory to path to import modules
 sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -96,9 +96,11 @@ async def test_generate_with_validation_disabled():
 
     # Mock the clients to avoid needing actual ComfyUI server
     mock_comfyui = MagicMock()
-    mock_comfyui.check_availability.return_value = True
-    mock_comfyui.queue_prompt.return_value = "test_prompt_id"
-    mock_comfyui.wait_for_completion.return_value = {"outputs": {"1": {"images": [{"filename": "test_image.png"}]}}}
+    mock_comfyui.check_availability = AsyncMock(return_value=True)
+    mock_comfyui.queue_prompt = AsyncMock(return_value="test_prompt_id")
+    mock_comfyui.wait_for_completion = AsyncMock(
+        return_value={"outputs": {"1": {"images": [{"filename": "test_image.png"}]}}}
+    )
 
     mock_minio = MagicMock()
     mock_minio.endpoint = "192.168.1.215:9000"
@@ -130,9 +132,11 @@ async def test_validation_unavailable_handling():
 
     # Mock the clients
     mock_comfyui = MagicMock()
-    mock_comfyui.check_availability.return_value = True
-    mock_comfyui.queue_prompt.return_value = "test_prompt_id"
-    mock_comfyui.wait_for_completion.return_value = {"outputs": {"1": {"images": [{"filename": "test_image.png"}]}}}
+    mock_comfyui.check_availability = AsyncMock(return_value=True)
+    mock_comfyui.queue_prompt = AsyncMock(return_value="test_prompt_id")
+    mock_comfyui.wait_for_completion = AsyncMock(
+        return_value={"outputs": {"1": {"images": [{"filename": "test_image.png"}]}}}
+    )
 
     mock_minio = MagicMock()
     mock_minio.endpoint = "192.168.1.215:9000"
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""Tests for the process-wide model cache."""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Add parent directory to path to import utils
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.model_cache import ModelCache, estimate_model_size, get_model_cache
+
+
+def test_loads_once_and_counts_hits():
+    """Test that a model is loaded once and later lookups are hits."""
+    cache = ModelCache(ram_budget_mb=100)
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return object()
+
+    first = cache.get("clip:test", loader, size_bytes=10)
+    second = cache.get("clip:test", loader, size_bytes=10)
+
+    assert first is second
+    assert len(calls) == 1
+    stats = cache.stats()
+    assert stats["misses"] == 1
+    assert stats["hits"] == 1
+    assert stats["models"]["clip:test"]["loads"] == 1
+    assert stats["models"]["clip:test"]["load_seconds"] >= 0.0
+    print("[OK] Model loaded once, second lookup is a hit")
+
+
+def test_lru_eviction_under_budget():
+    """Test that least recently used models are evicted when over budget."""
+    mb = 1024 * 1024
+    cache = ModelCache(ram_budget_mb=2)
+
+    cache.get("a", lambda: "A", size_bytes=mb)
+    cache.get("b", lambda: "B", size_bytes=mb)
+    # Touch "a" so "b" becomes least recently used
+    cache.get("a", lambda: "A", size_bytes=mb)
+    cache.get("c", lambda: "C", size_bytes=mb)
+
+    assert cache.contains("a")
+    assert not cache.contains("b")
+    assert cache.contains("c")
+    assert cache.stats()["evictions"] == 1
+    print("[OK] LRU entry evicted when RAM budget exceeded")
+
+
+def test_oversized_model_stays_resident():
+    """Test that a single model larger than the budget is still kept."""
+    cache = ModelCache(ram_budget_mb=1)
+    cache.get("huge", lambda: "H", size_bytes=10 * 1024 * 1024)
+
+    assert cache.contains("huge")
+    print("[OK] Oversized model kept until something else is loaded")
+
+
+def test_failed_load_is_not_cached():
+    """Test that loader exceptions propagate and nothing is cached."""
+    cache = ModelCache(ram_budget_mb=10)
+
+    def broken():
+        raise OSError("download failed")
+
+    try:
+        cache.get("broken", broken)
+        raise AssertionError("Expected OSError")
+    except OSError:
+        pass
+
+    assert not cache.contains("broken")
+    assert cache.get("broken", lambda: "ok") == "ok"
+    print("[OK] Failed loads are retried on next lookup")
+
+
+def test_concurrent_get_loads_once():
+    """Test that concurrent lookups for the same key share one load."""
+    cache = ModelCache(ram_budget_mb=10)
+    calls = []
+
+    def slow_loader():
+        calls.append(1)
+        time.sleep(0.05)
+        return "model"
+
+    threads = [threading.Thread(target=cache.get, args=("slow", slow_loader)) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    print("[OK] Concurrent lookups loaded the model once")
+
+
+def test_set_budget_evicts_immediately():
+    """Test that shrinking the budget evicts resident models."""
+    mb = 1024 * 1024
+    cache = ModelCache(ram_budget_mb=10)
+    cache.get("a", lambda: "A", size_bytes=mb)
+    cache.get("b", lambda: "B", size_bytes=mb)
+
+    cache.set_budget_mb(1)
+
+    assert not cache.contains("a")
+    assert cache.contains("b")
+    print("[OK] Shrinking the budget evicts LRU models")
+
+
+def test_on_evict_releases_models():
+    """Test that on_evict hooks run for budget eviction, evict() and clear()."""
+    mb = 1024 * 1024
+    cache = ModelCache(ram_budget_mb=2)
+    released = []
+
+    cache.get("a", lambda: "A", size_bytes=mb, on_evict=released.append)
+    cache.get("b", lambda: "B", size_bytes=mb, on_evict=released.append)
+    cache.get("c", lambda: "C", size_bytes=mb, on_evict=released.append)
+    assert released == ["A"]
+
+    cache.evict("b")
+    assert released == ["A", "B"]
+
+    cache.clear()
+    assert released == ["A", "B", "C"]
+    print("[OK] on_evict hooks release evicted models")
+
+
+def test_on_evict_failure_only_warns():
+    """Test that a failing on_evict hook does not break eviction."""
+    cache = ModelCache(ram_budget_mb=10)
+
+    def broken(model):
+        raise RuntimeError("close failed")
+
+    cache.get("a", lambda: "A", on_evict=broken)
+    cache.evict("a")
+
+    assert not cache.contains("a")
+    print("[OK] Failing on_evict hook only warns")
+
+
+def test_estimate_model_size():
+    """Test size estimation for parameter-bearing objects and containers."""
+
+    class FakeParam:
+        def __init__(self, n):
+            self.n = n
+
+        def numel(self):
+            return self.n
+
+        def element_size(self):
+            return 4
+
+    class FakeModule:
+        def parameters(self):
+            return [FakeParam(10), FakeParam(5)]
+
+    class Wrapper:
+        model = FakeModule()
+
+    assert estimate_model_size(FakeModule()) == 60
+    assert estimate_model_size(Wrapper()) == 60
+    assert estimate_model_size((FakeModule(), "processor")) == 60
+    assert estimate_model_size("processor") == 0
+    print("[OK] Model size estimation works")
+
+
+def test_global_cache_singleton():
+    """Test that get_model_cache returns one shared instance."""
+    assert get_model_cache() is get_model_cache()
+    print("[OK] Global model cache is a singleton")
+
+
+if __name__ == "__main__":
+    test_loads_once_and_counts_hits()
+    test_lru_eviction_under_budget()
+    test_oversized_model_stays_resident()
+    test_failed_load_is_not_cached()
+    test_concurrent_get_loads_once()
+    test_set_budget_evicts_immediately()
+    test_on_evict_releases_models()
+    test_on_evict_failure_only_warns()
+    test_estimate_model_size()
+    test_global_cache_singleton()
+    print("\n[OK] All model cache tests passed")
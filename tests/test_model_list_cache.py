@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""Tests for the disk-backed /object_info model list cache."""
+
+import json
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path to import clients and generate
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from fake_comfyui import FakeComfyUI
+
+import generate
+from clients.comfyui_client import ComfyUIClient
+from clients.model_list_cache import ModelListCache, is_missing_model_error
+
+MODELS = {"checkpoints": ["sd15.safetensors"], "loras": ["detail.safetensors"]}
+
+MISSING_CHECKPOINT = {
+    "error": {"type": "prompt_outputs_failed_validation", "message": "Prompt outputs failed validation"},
+    "node_errors": {
+        "4": {
+            "errors": [
+                {
+                    "type": "value_not_in_list",
+                    "message": "Value not in list",
+                    "details": "ckpt_name: 'gone.safetensors' not in ['sd15.safetensors']",
+                    "extra_info": {"input_name": "ckpt_name"},
+                }
+            ],
+            "class_type": "CheckpointLoaderSimple",
+        }
+    },
+}
+
+
+@pytest.fixture
+def server(monkeypatch):
+    fake = FakeComfyUI(models=dict(MODELS))
+    monkeypatch.setattr(generate, "COMFYUI_HOST", fake.url)
+    yield fake
+    fake.close()
+
+
+def test_cache_persists_slim_index(tmp_path):
+    """Test that only the model lists are written and a new instance reads them back."""
+    cache = ModelListCache(cache_dir=tmp_path, ttl=60)
+    cache.put("http://192.168.1.215:8188", MODELS)
+
+    path = tmp_path / "192.168.1.215_8188.json"
+    assert json.loads(path.read_text())["models"] == MODELS
+    assert ModelListCache(cache_dir=tmp_path, ttl=60).get("http://192.168.1.215:8188") == MODELS
+    assert ModelListCache(cache_dir=tmp_path, ttl=60).get("http://other:8188") is None
+    print("[OK] Model lists persisted per backend")
+
+
+def test_cache_ttl_and_refresh(tmp_path):
+    """Test that expired entries and refresh=True fetch again."""
+    cache = ModelListCache(cache_dir=tmp_path, ttl=0.05)
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return MODELS
+
+    cache.get_or_fetch("http://a:8188", fetch)
+    cache.get_or_fetch("http://a:8188", fetch)
+    assert len(calls) == 1
+
+    cache.get_or_fetch("http://a:8188", fetch, refresh=True)
+    assert len(calls) == 2
+
+    time.sleep(0.1)
+    cache.get_or_fetch("http://a:8188", fetch)
+    assert len(calls) == 3
+
+    # Failed fetches are not cached
+    assert cache.get_or_fetch("http://b:8188", lambda: None) is None
+    assert not (tmp_path / "b_8188.json").exists()
+    print("[OK] TTL and refresh honored")
+
+
+def test_is_missing_model_error():
+    """Test that only missing-model validation errors are recognized."""
+    assert is_missing_model_error(MISSING_CHECKPOINT)
+
+    # Older servers without extra_info
+    legacy = json.loads(json.dumps(MISSING_CHECKPOINT))
+    del legacy["node_errors"]["4"]["errors"][0]["extra_info"]
+    assert is_missing_model_error(legacy)
+
+    sampler = json.loads(json.dumps(MISSING_CHECKPOINT))
+    sampler["node_errors"]["4"]["errors"][0]["extra_info"] = {"input_name": "sampler_name"}
+    assert not is_missing_model_error(sampler)
+    assert not is_missing_model_error({"error": "Prompt outputs failed validation"})
+    assert not is_missing_model_error(None)
+    print("[OK] Missing-model errors recognized")
+
+
+def test_generate_reuses_cached_models(server):
+    """Test that generate.py and ComfyUIClient share the cache and --refresh-models refetches."""
+    assert generate.get_available_models()["loras"] == ["detail.safetensors"]
+    assert generate.get_available_models()["checkpoints"] == ["sd15.safetensors"]
+    assert ComfyUIClient(server.url).get_available_models() == generate.get_available_models()
+    assert server.request_counts["GET /object_info"] == 1
+
+    generate.get_available_models(refresh=True)
+    assert server.request_counts["GET /object_info"] == 2
+    print("[OK] /object_info fetched once across callers")
+
+
+def test_missing_model_rejection_invalidates(server):
+    """Test that a prompt rejected for a missing model drops the cached lists."""
+    generate.get_available_models()
+    server.models["checkpoints"].append("new.safetensors")
+
+    class Rejected:
+        status_code = 400
+        text = json.dumps(MISSING_CHECKPOINT)
+
+        def json(self):
+            return MISSING_CHECKPOINT
+
+    generate.invalidate_models_on_missing(Rejected())
+
+    assert "new.safetensors" in generate.get_available_models()["checkpoints"]
+    assert server.request_counts["GET /object_info"] == 2
+    print("[OK] Cache invalidated on missing-model rejection")
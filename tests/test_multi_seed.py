@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""Tests for multi-seed generation in one sampler pass (--count N)."""
+
+import json
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+# Add parent directory to path to import generate
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from fake_comfyui import FakeComfyUI
+from fake_minio import FakeMinio
+
+import generate
+
+
+def _workflow(latent_class="EmptyLatentImage"):
+    return {
+        "3": {"class_type": "KSampler", "inputs": {"seed": 7, "steps": 20, "cfg": 7.0, "latent_image": ["5", 0]}},
+        "5": {"class_type": latent_class, "inputs": {"width": 512, "height": 512, "batch_size": 1}},
+        "9": {"class_type": "SaveImage", "inputs": {"images": ["8", 0]}},
+    }
+
+
+def _job(workflow, seed=42):
+    return {
+        "workflow": workflow,
+        "negative_prompt": "",
+        "uploaded_filename": None,
+        "steps": None,
+        "cfg": None,
+        "seed": seed,
+        "workflow_params": generate.extract_workflow_params(workflow),
+        "loras": [],
+    }
+
+
+@pytest.fixture
+def server(monkeypatch):
+    fake = FakeComfyUI(run_seconds=0.05)
+    monkeypatch.setattr(generate, "COMFYUI_HOST", fake.url)
+    yield fake
+    fake.close()
+
+
+def _sidecars(minio):
+    bucket = minio.objects[generate.BUCKET_NAME]
+    return [json.loads(body) for name, body in sorted(bucket.items()) if name.endswith(".json")]
+
+
+def test_modify_batch_size_and_sd3_latents():
+    """Test that batch size and dimensions are set on SD and SD3/Flux empty latents."""
+    workflow = generate.modify_batch_size(_workflow("EmptySD3LatentImage"), 4)
+    workflow = generate.modify_dimensions(workflow, width=1024, height=768)
+
+    assert workflow["5"]["inputs"] == {"width": 1024, "height": 768, "batch_size": 4}
+    assert generate.extract_resolution_from_workflow(workflow) == [1024, 768]
+    print("[OK] modify_batch_size and modify_dimensions cover EmptySD3LatentImage")
+
+
+def test_is_out_of_memory():
+    """Test that only out-of-memory execution errors are detected."""
+    oom = {"exception_type": "torch.OutOfMemoryError", "exception_message": "Allocation on device"}
+    other = {"exception_type": "RuntimeError", "exception_message": "mat1 and mat2 shapes cannot be multiplied"}
+
+    assert generate.is_out_of_memory({"outputs": {}, "status": {"messages": [["execution_error", oom]]}})
+    assert not generate.is_out_of_memory({"outputs": {}, "status": {"messages": [["execution_error", other]]}})
+    assert not generate.is_out_of_memory({"outputs": {}, "status": {"messages": []}})
+    assert not generate.is_out_of_memory(None)
+    print("[OK] is_out_of_memory")
+
+
+def test_count_samples_one_batch(server, tmp_path):
+    """Test that --count 3 queues one prompt with batch_size 3 and writes a sidecar per image."""
+    minio = FakeMinio()
+    output_path = tmp_path / "image.png"
+    args = generate.default_args(
+        workflow="workflow.json", prompt="a lighthouse", output=str(output_path), count=3, quiet=True
+    )
+
+    with patch("generate.minio_client", return_value=minio):
+        exit_code = generate.run_multi_seed(args, _job(_workflow()))
+
+    assert exit_code == generate.EXIT_SUCCESS
+    assert len(server.prompts) == 1
+    assert server.prompts[0]["prompt"]["5"]["inputs"]["batch_size"] == 3
+    assert output_path.exists()
+    assert (tmp_path / "image_9_1.png").exists() and (tmp_path / "image_9_2.png").exists()
+
+    sidecars = _sidecars(minio)
+    assert len(sidecars) == 3
+    assert {metadata["parameters"]["seed"] for metadata in sidecars} == {42}
+    assert sorted(metadata["parameters"]["batch_index"] for metadata in sidecars) == [0, 1, 2]
+    assert all(metadata["parameters"]["batch_size"] == 3 for metadata in sidecars)
+    print("[OK] --count 3 sampled one batch and wrote 3 sidecars")
+
+
+def test_count_falls_back_to_queued_prompts_on_oom(server, tmp_path):
+    """Test that a batch that runs out of VRAM is re-run as one queued prompt per seed."""
+    server.max_batch_size = 2
+    minio = FakeMinio()
+    output_path = tmp_path / "image.png"
+    args = generate.default_args(
+        workflow="workflow.json", prompt="a lighthouse", output=str(output_path), count=3, quiet=True
+    )
+
+    with patch("generate.minio_client", return_value=minio):
+        exit_code = generate.run_multi_seed(args, _job(_workflow()))
+
+    assert exit_code == generate.EXIT_SUCCESS
+    # The failed batch, then one prompt per candidate
+    assert len(server.prompts) == 4
+    assert [p["prompt"]["3"]["inputs"]["seed"] for p in server.prompts[1:]] == [42, 43, 44]
+    assert all(p["prompt"]["5"]["inputs"]["batch_size"] == 1 for p in server.prompts[1:])
+    assert output_path.exists()
+    assert (tmp_path / "image_2.png").exists() and (tmp_path / "image_3.png").exists()
+
+    sidecars = _sidecars(minio)
+    assert sorted(metadata["parameters"]["seed"] for metadata in sidecars) == [42, 43, 44]
+    assert all("batch_index" not in metadata["parameters"] for metadata in sidecars)
+    print("[OK] --count fell back to 3 queued prompts after an OOM batch")
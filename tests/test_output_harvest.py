@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""Tests for harvesting every output of multi-output and batched workflows."""
+
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+# Add parent directory to path to import generate
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from fake_comfyui import FakeComfyUI
+from fake_minio import FakeMinio
+
+import generate
+
+WORKFLOW = {"9": {"class_type": "SaveImage", "inputs": {"images": ["8", 0]}}}
+
+STATUS = {
+    "outputs": {
+        "9": {
+            "images": [
+                {"filename": "base_00001_.png", "subfolder": "", "type": "output"},
+                {"filename": "base_00002_.png", "subfolder": "", "type": "output"},
+            ]
+        },
+        "15": {"images": [{"filename": "preview.png", "subfolder": "", "type": "temp"}]},
+        "20": {"images": [{"filename": "hires_00001_.png", "subfolder": "", "type": "output"}]},
+        "30": {
+            "gifs": [{"filename": "wan_00001.mp4", "subfolder": "video", "type": "output", "format": "video/h264-mp4"}]
+        },
+    }
+}
+
+
+@pytest.fixture
+def server(monkeypatch):
+    fake = FakeComfyUI(run_seconds=0.05)
+    monkeypatch.setattr(generate, "COMFYUI_HOST", fake.url)
+    yield fake
+    fake.close()
+
+
+def test_collect_outputs():
+    """Test that every saved image, batch entry and video is listed and previews are skipped."""
+    entries = generate.collect_outputs(STATUS)
+
+    assert [(e["node_id"], e["kind"], e["filename"]) for e in entries] == [
+        ("9", "images", "base_00001_.png"),
+        ("9", "images", "base_00002_.png"),
+        ("20", "images", "hires_00001_.png"),
+        ("30", "gifs", "wan_00001.mp4"),
+    ]
+    assert entries[3]["subfolder"] == "video"
+    print("[OK] collect_outputs lists images, batches and videos")
+
+
+def test_primary_output_follows_extension():
+    """Test that --output picks the output with its extension, else the first image."""
+    entries = generate.collect_outputs(STATUS)
+
+    assert generate._primary_output_index(entries, "out/clip.mp4") == 3
+    assert generate._primary_output_index(entries, "out/image.png") == 0
+    assert generate._primary_output_index(entries, "out/image.webp") == 0
+    print("[OK] Primary output chosen by extension")
+
+
+def test_harvest_downloads_all_outputs_concurrently(server, tmp_path):
+    """Test that all outputs are downloaded in parallel, uploaded as a group and recorded."""
+    server.view_delay = 0.2
+    server.extra_outputs = {
+        "20": {
+            "images": [
+                {"filename": "hires_00001_.png", "subfolder": "", "type": "output"},
+                {"filename": "hires_00002_.png", "subfolder": "", "type": "output"},
+            ]
+        },
+        "30": {"gifs": [{"filename": "wan_00001.mp4", "subfolder": "", "type": "output"}]},
+    }
+    server.files = {"hires_00002_.png": b"second hires", "wan_00001.mp4": b"mp4 bytes"}
+    minio = FakeMinio()
+    output_path = tmp_path / "image.png"
+
+    prompt_id = generate.queue_workflow(WORKFLOW, retry=False)
+    status = generate.wait_for_completion(prompt_id, quiet=True)
+    with patch("generate.minio_client", return_value=minio):
+        outputs = generate.harvest_outputs(status, str(output_path), keep_bytes=True)
+        minio_url, object_name = generate.publish_outputs(outputs, quiet=True)
+
+    assert len(outputs) == 4
+    assert outputs[0].path == str(output_path)
+    assert outputs[0].data == server.image
+    assert all(streamed.data is None for streamed in outputs[1:])
+    assert (tmp_path / "image_20_2.png").read_bytes() == b"second hires"
+    assert (tmp_path / "image_30_1.mp4").read_bytes() == b"mp4 bytes"
+
+    # Four 0.2s downloads overlapped instead of running back to back
+    assert server.max_active_views > 1
+    assert server.max_active_views <= generate.HARVEST_WORKERS
+
+    uploaded = minio.objects[generate.BUCKET_NAME]
+    assert len(uploaded) == 4
+    assert len({name.split("_image")[0] for name in uploaded}) == 1
+    assert minio.content_types[outputs[3].object_name] == "video/mp4"
+    assert object_name == outputs[0].object_name
+    assert minio_url.endswith(object_name)
+
+    records = generate.output_records(outputs)
+    assert [(r["node_id"], r["kind"]) for r in records] == [
+        ("9", "images"),
+        ("20", "images"),
+        ("20", "images"),
+        ("30", "gifs"),
+    ]
+    assert all(r["minio_url"] for r in records)
+
+    metadata = generate.create_metadata_json(
+        "workflow.json", "a prompt", "", {}, [], None, None, minio_url, outputs=records
+    )
+    assert metadata["storage"]["outputs"][3]["size_bytes"] == len(b"mp4 bytes")
+    print(f"[OK] Harvested {len(outputs)} outputs with {server.max_active_views} concurrent downloads")
+
+
+def test_harvest_fails_without_outputs():
+    """Test that a history entry with only previews harvests nothing."""
+    status = {"outputs": {"15": {"images": [{"filename": "preview.png", "type": "temp"}]}}}
+
+    assert generate.harvest_outputs(status, "unused.png") == []
+    print("[OK] Nothing harvested without saved outputs")
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""Tests for single-pass output streaming to disk, MinIO and memory (clients.output_stream)."""
+
+import asyncio
+import io
+import sys
+import threading
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+# Add parent directory to path to import clients and generate
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from fake_comfyui import FakeComfyUI
+from fake_minio import FakeMinio
+
+import generate
+from clients.async_comfyui_client import AsyncComfyUIClient
+from clients.output_stream import TeeReader, response_length, stream_output
+
+WORKFLOW = {"9": {"class_type": "SaveImage", "inputs": {"images": ["8", 0]}}}
+
+
+@pytest.fixture
+def server(monkeypatch):
+    fake = FakeComfyUI(run_seconds=0.05)
+    monkeypatch.setattr(generate, "COMFYUI_HOST", fake.url)
+    yield fake
+    fake.close()
+
+
+def _chunks(data, size):
+    return [data[i : i + size] for i in range(0, len(data), size)]
+
+
+def test_stream_output_tees_every_sink(tmp_path):
+    """Test that one pass writes the file, uploads in parts and keeps the bytes."""
+    data = bytes(range(256)) * 40
+    minio = FakeMinio()
+    minio.make_bucket("comfy-gen")
+
+    streamed = stream_output(
+        _chunks(data, 1000),
+        str(tmp_path / "out.mp4"),
+        length=len(data),
+        minio_client=minio,
+        bucket="comfy-gen",
+        object_name="run_out.mp4",
+        keep_bytes=True,
+        part_size=4096,
+    )
+
+    assert streamed.uploaded and streamed.upload_error is None
+    assert streamed.size == len(data)
+    assert streamed.data == data
+    assert (tmp_path / "out.mp4").read_bytes() == data
+    assert minio.objects["comfy-gen"]["run_out.mp4"] == data
+    assert minio.content_types["run_out.mp4"] == "video/mp4"
+    # 10240 bytes read as 4096-byte parts
+    assert minio.puts[0]["parts"] == 3
+    print("[OK] stream_output tees to file, MinIO and memory in one pass")
+
+
+def test_tee_reader_reads_across_chunks():
+    """Test that sized reads split and join chunks exactly, and read() returns the rest."""
+    data = bytes(range(256)) * 64
+    copy = io.BytesIO()
+    reader = TeeReader(_chunks(data, 100), buffer=copy)
+
+    parts = [reader.read(4096), reader.read(1), reader.read(250)]
+    parts.append(reader.read())
+    assert [len(part) for part in parts[:3]] == [4096, 1, 250]
+    assert all(isinstance(part, bytes) for part in parts)
+    assert b"".join(parts) == data
+    assert reader.read(10) == b"" and reader.read() == b""
+    assert copy.getvalue() == data and reader.size == len(data)
+    print("[OK] TeeReader reads across chunk boundaries")
+
+
+def test_failed_upload_still_completes_file(tmp_path):
+    """Test that a dropped upload leaves a complete local file and buffer."""
+    data = b"x" * 10000
+    minio = FakeMinio(fail_after=2048)
+
+    streamed = stream_output(
+        _chunks(data, 512),
+        str(tmp_path / "out.png"),
+        minio_client=minio,
+        bucket="comfy-gen",
+        object_name="out.png",
+        keep_bytes=True,
+        part_size=1024,
+    )
+
+    assert not streamed.uploaded
+    assert "upload dropped" in streamed.upload_error
+    assert (tmp_path / "out.png").read_bytes() == data
+    assert streamed.data == data
+    print("[OK] Dropped upload still completes the local file")
+
+
+def test_response_length():
+    """Test that encoded or unsized responses report an unknown length."""
+    assert response_length({"Content-Length": "42"}) == 42
+    assert response_length({"Content-Length": "42", "Content-Encoding": "gzip"}) is None
+    assert response_length({}) is None
+    print("[OK] response_length")
+
+
+def test_generate_download_streams_into_minio(server, tmp_path):
+    """Test that generate.py uploads the /view stream while writing the output file."""
+    minio = FakeMinio()
+    output_path = tmp_path / "output.png"
+
+    prompt_id = generate.queue_workflow(WORKFLOW, retry=False)
+    status = generate.wait_for_completion(prompt_id, quiet=True)
+    with patch("generate.minio_client", return_value=minio):
+        streamed = generate.download_output(status, str(output_path), object_name="run_output.png", keep_bytes=True)
+        minio_url, object_name = generate.publish_streamed_output(streamed, quiet=True)
+
+    assert output_path.read_bytes() == server.image
+    assert streamed.data == server.image
+    assert minio.objects[generate.BUCKET_NAME]["run_output.png"] == server.image
+    assert minio.puts[0]["length"] == len(server.image)
+    assert object_name == "run_output.png"
+    assert minio_url.endswith(f"/{generate.BUCKET_NAME}/run_output.png")
+    print("[OK] download_output streams straight into MinIO")
+
+
+def test_publish_falls_back_to_file_upload(server, tmp_path):
+    """Test that a failed streaming upload is retried from the local file."""
+    output_path = tmp_path / "output.png"
+    prompt_id = generate.queue_workflow(WORKFLOW, retry=False)
+    status = generate.wait_for_completion(prompt_id, quiet=True)
+
+    minio = FakeMinio(fail_after=1)
+    with patch("generate.minio_client", return_value=minio):
+        streamed = generate.download_output(status, str(output_path), object_name="run_output.png")
+        minio_url, object_name = generate.publish_streamed_output(streamed, quiet=True)
+
+    assert not streamed.uploaded
+    assert minio_url is not None
+    assert minio.objects[generate.BUCKET_NAME][object_name] == server.image
+    print("[OK] Failed streaming upload falls back to the file upload")
+
+
+def test_async_client_download_output(server, tmp_path):
+    """Test that the async client saves and returns an output from one download."""
+    client = AsyncComfyUIClient(host=server.url)
+    output_path = tmp_path / "mcp.png"
+
+    async def scenario():
+        data = await client.download_output({"filename": "out.png", "type": "output"}, str(output_path))
+        await client.aclose()
+        return data
+
+    data = asyncio.run(scenario())
+
+    assert data == server.image
+    assert output_path.read_bytes() == server.image
+    assert server.request_counts["GET /view"] == 1
+    print("[OK] AsyncComfyUIClient.download_output saves and returns the bytes")
+
+
+class _ThreadRecordingFile:
+    """Wraps a binary file and records the thread each write runs on."""
+
+    def __init__(self, file):
+        self._file = file
+        self.write_threads = []
+
+    def write(self, data):
+        self.write_threads.append(threading.get_ident())
+        return self._file.write(data)
+
+    def __getattr__(self, name):
+        return getattr(self._file, name)
+
+
+@pytest.mark.parametrize("aiofiles_available", [True, False])
+def test_async_download_writes_off_event_loop(server, tmp_path, monkeypatch, aiofiles_available):
+    """Test that download_output's blocking file writes never run on the event loop thread."""
+    import clients.async_comfyui_client as async_client
+
+    if aiofiles_available and not async_client.AIOFILES_AVAILABLE:
+        pytest.skip("aiofiles not installed")
+    monkeypatch.setattr(async_client, "AIOFILES_AVAILABLE", aiofiles_available)
+    open_for_write = async_client._open_for_write
+    opened = []
+
+    async def recording_open(path):
+        # aiofiles and the executor fallback both keep the blocking file in ._file
+        file = await open_for_write(path)
+        file._file = _ThreadRecordingFile(file._file)
+        opened.append(file._file)
+        return file
+
+    monkeypatch.setattr(async_client, "_open_for_write", recording_open)
+    client = AsyncComfyUIClient(host=server.url)
+    output_path = tmp_path / "mcp.png"
+
+    async def scenario():
+        data = await client.download_output({"filename": "out.png", "type": "output"}, str(output_path))
+        await client.aclose()
+        return data, threading.get_ident()
+
+    data, loop_thread = asyncio.run(scenario())
+
+    assert data == server.image
+    assert output_path.read_bytes() == server.image
+    assert opened[0].write_threads and loop_thread not in opened[0].write_threads
+    print(f"[OK] download_output writes off the event loop (aiofiles={aiofiles_available})")
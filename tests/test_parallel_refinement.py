@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""Tests for parallel best-of-N quality refinement (--parallel-refinement)."""
+
+import json
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+# Add parent directory to path to import generate
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from fake_comfyui import FakeComfyUI
+from fake_minio import FakeMinio
+
+import generate
+
+WORKFLOW = {
+    "3": {"class_type": "KSampler", "inputs": {"seed": 7, "steps": 20, "cfg": 7.0}},
+    "6": {"class_type": "CLIPTextEncode", "inputs": {"text": "a lighthouse"}},
+    "9": {"class_type": "SaveImage", "inputs": {"images": ["8", 0]}},
+}
+
+
+@pytest.fixture
+def server(monkeypatch):
+    fake = FakeComfyUI(run_seconds=0.3)
+    monkeypatch.setattr(generate, "COMFYUI_HOST", fake.url)
+    yield fake
+    fake.close()
+
+
+def _job():
+    return {
+        "workflow": json.loads(json.dumps(WORKFLOW)),
+        "negative_prompt": "",
+        "uploaded_filename": None,
+        "steps": None,
+        "cfg": None,
+        "seed": 100,
+        "workflow_params": generate.extract_workflow_params(WORKFLOW),
+        "loras": [],
+    }
+
+
+def _args(output_path, threshold):
+    return generate.default_args(
+        workflow="workflow.json",
+        prompt="a lighthouse",
+        output=str(output_path),
+        quality_score=True,
+        quality_threshold=threshold,
+        max_attempts=4,
+        retry_strategy="progressive",
+        parallel_refinement=True,
+        no_daemon=True,
+        quiet=True,
+    )
+
+
+def _scores(*scores):
+    results = iter({"composite_score": score, "grade": "B"} for score in scores)
+    return patch("generate._validator_task", side_effect=lambda *args, **kwargs: next(results))
+
+
+def test_refinement_variants_are_distinct():
+    """Test that seed_search yields its three distinct seeds and progressive raises steps and CFG."""
+    variants = generate.refinement_variants(5, "seed_search", base_steps=20, base_cfg=7.0, base_seed=100)
+    assert [params["seed"] for _, params in variants] == [100, 1100, 5100]
+
+    variants = generate.refinement_variants(3, "progressive", base_steps=30, base_cfg=7.0, base_seed=100)
+    assert [(params["steps"], params["cfg"]) for _, params in variants] == [(30, 7.0), (50, 7.5), (80, 8.0)]
+    print("[OK] refinement_variants drops duplicates and follows the strategy")
+
+
+def test_threshold_cancels_queued_variants(server, tmp_path):
+    """Test that meeting the threshold cancels the rest and only the best is uploaded."""
+    minio = FakeMinio()
+    output_path = tmp_path / "image.png"
+
+    with patch("generate.minio_client", return_value=minio), _scores(5.0, 8.0):
+        exit_code = generate.run_parallel_refinement(_args(output_path, 7.0), _job())
+
+    assert exit_code == generate.EXIT_SUCCESS
+    # All four variants were queued up front, with progressive steps
+    assert [p["prompt"]["3"]["inputs"]["steps"] for p in server.prompts] == [20, 33, 53, 53]
+    # Attempt 3 was running (interrupted), attempt 4 still queued (deleted)
+    assert server.deleted == [server.prompts[3]["prompt_id"]]
+    assert server.request_counts.get("POST /interrupt") == 1
+
+    # The promoted copy carries the embedded metadata; the candidate file is left as downloaded
+    assert output_path.exists()
+    assert (tmp_path / "image_attempt2.png").read_bytes() == server.image
+    assert (tmp_path / "image_attempt1.png").exists()
+    assert not (tmp_path / "image_attempt4.png").exists()
+
+    uploaded = minio.objects[generate.BUCKET_NAME]
+    assert len([name for name in uploaded if name.endswith(".png")]) == 1
+    metadata = json.loads(next(body for name, body in uploaded.items() if name.endswith(".json")))
+    refinement = metadata["refinement"]
+    assert refinement["attempt"] == 2 and refinement["final_status"] == "success"
+    assert refinement["mode"] == "parallel"
+    assert [c["status"] for c in refinement["candidates"]] == ["scored", "scored", "cancelled", "cancelled"]
+    assert metadata["parameters"]["steps"] == 33
+    print("[OK] Threshold met on attempt 2; queued variants cancelled, best uploaded")
+
+
+def test_best_candidate_promoted_without_threshold(server, tmp_path):
+    """Test that the highest score is promoted when no variant meets the threshold."""
+    server.run_seconds = 0.05
+    minio = FakeMinio()
+    output_path = tmp_path / "image.png"
+
+    with patch("generate.minio_client", return_value=minio), _scores(5.0, 6.5, 6.0, 4.0):
+        exit_code = generate.run_parallel_refinement(_args(output_path, 9.0), _job())
+
+    assert exit_code == generate.EXIT_SUCCESS
+    assert server.deleted == []
+    assert all((tmp_path / f"image_attempt{attempt}.png").exists() for attempt in range(1, 5))
+
+    uploaded = minio.objects[generate.BUCKET_NAME]
+    assert len(uploaded) == 2
+    metadata = json.loads(next(body for name, body in uploaded.items() if name.endswith(".json")))
+    assert metadata["refinement"]["attempt"] == 2
+    assert metadata["refinement"]["final_status"] == "best_effort"
+    assert metadata["refinement"]["previous_scores"] == [5.0, 6.5, 6.0, 4.0]
+    assert metadata["quality"]["composite_score"] == 6.5
+    print("[OK] Best of 4 variants promoted to --output")
+
+
+def test_queued_variants_cancelled_on_abnormal_exit(server, tmp_path):
+    """Test that an interrupted refinement cancels the variants it left queued."""
+    output_path = tmp_path / "image.png"
+
+    with patch("generate.minio_client", return_value=FakeMinio()), pytest.raises(KeyboardInterrupt):
+        with patch("generate._validator_task", side_effect=KeyboardInterrupt):
+            generate.run_parallel_refinement(_args(output_path, 7.0), _job())
+
+    # Attempt 1 was scored when the run stopped; attempt 2 was running and attempts 3-4 queued
+    assert server.request_counts.get("POST /interrupt") == 1
+    assert server.deleted == [p["prompt_id"] for p in server.prompts[2:]]
+    assert not generate.inflight_prompt_ids
+    print("[OK] Queued variants cancelled when refinement stopped early")
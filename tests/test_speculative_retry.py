@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""Tests for speculative next-attempt submission under --auto-retry (--speculative-retry)."""
+
+import sys
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+# Add parent directory to path to import generate
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from fake_comfyui import FakeComfyUI
+from fake_minio import FakeMinio
+
+import generate
+
+
+def _workflow():
+    return {
+        "3": {"class_type": "KSampler", "inputs": {"seed": 7, "positive": ["6", 0], "negative": ["7", 0]}},
+        "6": {"class_type": "CLIPTextEncode", "inputs": {"text": "a red car"}, "_meta": {"title": "Positive Prompt"}},
+        "7": {"class_type": "CLIPTextEncode", "inputs": {"text": "blurry"}, "_meta": {"title": "Negative Prompt"}},
+        "9": {"class_type": "SaveImage", "inputs": {"images": ["8", 0]}},
+    }
+
+
+@pytest.fixture
+def server(monkeypatch):
+    fake = FakeComfyUI(run_seconds=0.2)
+    monkeypatch.setattr(generate, "COMFYUI_HOST", fake.url)
+    yield fake
+    fake.close()
+
+
+def test_speculative_attempt_used_after_failure(server, tmp_path):
+    """Test that attempt 2 is queued when attempt 1 samples and reused by the retry."""
+    speculative = generate.SpeculativeRetry("a red car", "blurry", quiet=True)
+    workflow = _workflow()
+
+    with patch("generate.minio_client", return_value=FakeMinio()):
+        success, *_ = generate.run_generation(
+            workflow,
+            str(tmp_path / "attempt1.png"),
+            quiet=True,
+            on_sampled=lambda status: speculative.submit(workflow, 2),
+        )
+        assert success
+        # Attempt 2 was queued before attempt 1's output was even downloaded
+        assert len(server.prompts) == 2
+        positive, negative = generate.adjust_prompt_for_retry("a red car", "blurry", 1)
+        assert server.prompts[1]["prompt"]["6"]["inputs"]["text"] == positive
+        assert server.prompts[1]["prompt"]["7"]["inputs"]["text"] == negative
+
+        # Validation of attempt 1 takes a while, then fails
+        time.sleep(0.1)
+        pending = speculative.take(2)
+        assert pending["prompt_id"] == server.prompts[1]["prompt_id"]
+
+        success, *_ = generate.run_generation(
+            pending["workflow"], str(tmp_path / "attempt2.png"), quiet=True, prompt_id=pending["prompt_id"]
+        )
+
+    assert success
+    assert len(server.prompts) == 2
+    report = speculative.report()
+    assert report["submitted"] == 1 and report["used"] == 1 and report["wasted"] == 0
+    assert report["waste_rate"] == 0.0
+    assert report["gpu_idle_seconds_saved"] >= 0.1
+    print(f"[OK] Speculative attempt reused; {report['gpu_idle_seconds_saved']:.2f}s of GPU idle time removed")
+
+
+def test_idle_time_saved_capped_at_sampling(server, tmp_path):
+    """Test that a slow validation only credits the time the speculative prompt was sampling."""
+    speculative = generate.SpeculativeRetry("a red car", "blurry", quiet=True)
+    workflow = _workflow()
+
+    with patch("generate.minio_client", return_value=FakeMinio()):
+        generate.run_generation(
+            workflow,
+            str(tmp_path / "attempt1.png"),
+            quiet=True,
+            on_sampled=lambda status: speculative.submit(workflow, 2),
+        )
+        # Validation outlasts attempt 2's sampling; the GPU idles for the remainder
+        time.sleep(0.6)
+        pending = speculative.take(2)
+        generate.run_generation(
+            pending["workflow"], str(tmp_path / "attempt2.png"), quiet=True, prompt_id=pending["prompt_id"]
+        )
+
+    saved = speculative.report()["gpu_idle_seconds_saved"]
+    assert 0.1 <= saved <= 0.45
+    print(f"[OK] Only {saved:.2f}s of a 0.6s validation credited as GPU idle time removed")
+
+
+def test_completion_time():
+    """Test that the terminal message's millisecond timestamp is read from a history entry."""
+    status = {
+        "status": {
+            "messages": [
+                ["execution_start", {"prompt_id": "p", "timestamp": 1700000000000}],
+                ["execution_success", {"prompt_id": "p", "timestamp": 1700000004500}],
+            ]
+        }
+    }
+    assert generate.completion_time(status) == 1700000004.5
+    assert generate.completion_time({"status": {"messages": []}}) is None
+    print("[OK] completion_time reads the terminal message timestamp")
+
+
+def test_speculative_attempt_cancelled_after_pass(server, tmp_path):
+    """Test that the speculative attempt is cancelled when the current one passes."""
+    speculative = generate.SpeculativeRetry("a red car", "blurry", quiet=True)
+    workflow = _workflow()
+
+    with patch("generate.minio_client", return_value=FakeMinio()):
+        generate.run_generation(
+            workflow,
+            str(tmp_path / "attempt1.png"),
+            quiet=True,
+            on_sampled=lambda status: speculative.submit(workflow, 2),
+        )
+    # Attempt 1 passed validation
+    assert speculative.take(3) is None
+    speculative.cancel()
+
+    # The speculative prompt was running, so it was interrupted as well as deleted
+    assert server.request_counts.get("POST /interrupt") == 1
+    assert server.request_counts.get("POST /queue") == 1
+    assert not generate.inflight_prompt_ids
+
+    report = speculative.report()
+    assert report == {"submitted": 1, "used": 0, "wasted": 1, "waste_rate": 1.0, "gpu_idle_seconds_saved": 0.0}
+
+    metadata = generate.create_metadata_json(
+        "workflow.json", "a red car", "", {}, [], None, None, None, speculation=report
+    )
+    assert metadata["refinement"]["speculation"]["wasted"] == 1
+    print("[OK] Unneeded speculative attempt cancelled and counted as wasted")
@@ -141,6 +141,84 @@ def test_count_persons_yolo_function():
         print(f"[OK] count_persons_yolo reports unavailability: {result['error']}")
 
 
+def test_check_image_sanity():
+    """Test that blank, missing and normal images are told apart without any model."""
+    import numpy as np
+    from PIL import Image
+
+    from utils.validation import check_image_sanity
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        blank_path = os.path.join(tmp_dir, "blank.png")
+        noise_path = os.path.join(tmp_dir, "noise.png")
+        Image.fromarray(np.zeros((64, 64, 3), dtype=np.uint8)).save(blank_path)
+        noise = np.random.default_rng(0).integers(0, 255, (64, 64, 3), dtype=np.uint8)
+        Image.fromarray(noise).save(noise_path)
+
+        assert check_image_sanity(noise_path)["passed"]
+        blank = check_image_sanity(blank_path)
+        assert not blank["passed"]
+        assert "Blank image" in blank["reason"]
+        assert not check_image_sanity(os.path.join(tmp_dir, "missing.png"))["passed"]
+    print("[OK] Image sanity check rejects blank and missing outputs")
+
+
+def test_apply_person_count():
+    """Test that a person count mismatch overrides the CLIP result like validate_image did."""
+    from utils.validation import apply_person_count
+
+    result = {"passed": True, "reason": "Image passed validation", "positive_score": 0.8}
+    check = {
+        "passed": False,
+        "person_count": 3,
+        "expected_person_count": 2,
+        "reason": "Person count mismatch: expected 2, detected 3",
+    }
+    apply_person_count(result, check)
+
+    assert result["passed"] is False
+    assert result["reason"].startswith("Person count mismatch")
+    assert result["person_count"] == 3
+    assert result["expected_person_count"] == 2
+    print("[OK] Person count merged into validation result")
+
+
+def test_minio_batches_streamed():
+    """Test that MinIO objects are downloaded one batch at a time and deleted after scoring."""
+    from unittest.mock import patch
+
+    from utils.validation import _iter_image_batches
+
+    class FakeMinIOClient:
+        def __init__(self, bucket):
+            self.downloads = []
+
+        def list_objects(self, prefix=""):
+            names = ["run/c.png", "run/a.png", "run/notes.txt", "run/b.jpg"]
+            return [{"name": name} for name in names if name.startswith(prefix)]
+
+        def download_file(self, object_name, file_path):
+            self.downloads.append(object_name)
+            Path(file_path).write_bytes(b"image")
+            return True
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        with patch("clients.minio_client.MinIOClient", FakeMinIOClient):
+            batches = _iter_image_batches("minio://comfy-gen/run", tmp_dir, batch_size=2)
+            first = next(batches)
+            assert [Path(p).name for p in first] == ["run_a.png", "run_b.jpg"]
+            assert all(os.path.exists(p) for p in first)
+            assert len(os.listdir(tmp_dir)) == 2
+
+            second = next(batches)
+            assert not any(os.path.exists(p) for p in first)
+            assert [Path(p).name for p in second] == ["run_c.png"]
+
+            assert list(batches) == []
+            assert os.listdir(tmp_dir) == []
+    print("[OK] MinIO prefix streamed batch by batch")
+
+
 if __name__ == "__main__":
     print("Running validation tests...\n")
 
@@ -153,6 +231,9 @@ if __name__ == "__main__":
         test_extract_expected_person_count,
         test_validator_class,
         test_count_persons_yolo_function,
+        test_check_image_sanity,
+        test_apply_person_count,
+        test_minio_batches_streamed,
     ]
 
     passed = 0
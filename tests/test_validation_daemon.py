@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""Tests for the warm validation daemon and its client."""
+
+import sys
+import threading
+from pathlib import Path
+
+import numpy as np
+import pytest
+from PIL import Image
+
+# Add parent directory to path to import utils
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils import validation_daemon
+from utils.validation_daemon import ValidationDaemonClient, create_server, get_daemon_client, run_validator_auto
+
+
+@pytest.fixture
+def daemon():
+    """Run a daemon on a free local port for the duration of a test."""
+    server = create_server("127.0.0.1", 0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server, f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def image_path(tmp_path):
+    path = tmp_path / "out.png"
+    Image.fromarray(np.random.default_rng(0).integers(0, 255, (32, 32, 3), dtype=np.uint8)).save(path)
+    return str(path)
+
+
+@pytest.fixture(autouse=True)
+def reset_client(monkeypatch):
+    """Forget the process-wide daemon probe between tests."""
+    monkeypatch.setattr(validation_daemon, "_client", None)
+    monkeypatch.setattr(validation_daemon, "_client_checked_at", None)
+
+
+def test_health(daemon):
+    """Test that the health endpoint reports the daemon."""
+    _, url = daemon
+    health = ValidationDaemonClient(url).health()
+    assert health["status"] == "ok"
+    assert "models" in health
+    print("[OK] Daemon health endpoint works")
+
+
+def test_file_validator_over_http(daemon, image_path, tmp_path):
+    """Test a real validator (file sanity needs no models) through the daemon."""
+    _, url = daemon
+    client = ValidationDaemonClient(url)
+
+    result = client.run("file", image_path)
+    assert result["passed"] is True
+    assert result["width"] == 32
+
+    missing = client.run("file", str(tmp_path / "missing.png"))
+    assert missing["passed"] is False
+    print("[OK] File sanity validated by daemon")
+
+
+def test_requests_share_decoded_image(daemon, image_path, monkeypatch):
+    """Test that concurrent validators of one output share a single ImageContext on the daemon."""
+    server, url = daemon
+    seen = []
+
+    def fake_run_validator(name, image, **params):
+        seen.append(image)
+        return {"passed": True, "score": np.float32(0.5), "prompt": params.get("prompt")}
+
+    monkeypatch.setattr(validation_daemon, "run_validator", fake_run_validator)
+    client = ValidationDaemonClient(url)
+
+    first = client.run("clip", image_path, prompt="a cat")
+    client.run("pose", image_path, prompt="a cat")
+
+    assert first == {"passed": True, "score": 0.5, "prompt": "a cat"}
+    assert seen[0] is seen[1]
+    assert server.service.requests == 2
+    print("[OK] Daemon decodes each output once")
+
+
+def test_errors_map_to_exceptions(daemon, image_path, monkeypatch):
+    """Test that daemon-side failures surface like in-process ones."""
+    _, url = daemon
+
+    def broken(name, image, **params):
+        if name == "pose":
+            raise ImportError("No module named 'mediapipe'")
+        raise ValueError("bad input")
+
+    monkeypatch.setattr(validation_daemon, "run_validator", broken)
+    client = ValidationDaemonClient(url)
+
+    with pytest.raises(ImportError):
+        client.run("pose", image_path)
+    with pytest.raises(RuntimeError):
+        client.run("clip", image_path)
+    print("[OK] Daemon errors mapped to exceptions")
+
+
+def test_allowed_dirs_restrict_path_reads(image_path, tmp_path):
+    """Test that a daemon with allowed directories refuses paths outside them."""
+    outputs = tmp_path / "outputs"
+    outputs.mkdir()
+    inside = outputs / "in.png"
+    Image.open(image_path).save(inside)
+
+    server = create_server("127.0.0.1", 0, allowed_dirs=[str(outputs)])
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        client = ValidationDaemonClient(f"http://127.0.0.1:{server.server_address[1]}")
+        assert client.run("file", str(inside))["passed"] is True
+        with pytest.raises(RuntimeError, match="allowed directories"):
+            client.run("file", image_path)
+        with pytest.raises(RuntimeError, match="allowed directories"):
+            client.run("file", str(outputs / ".." / "out.png"))
+
+        # Image bytes need no file read, so they are accepted from anywhere
+        client.local = False
+        assert client.run("file", image_path)["passed"] is True
+    finally:
+        server.shutdown()
+        server.server_close()
+    print("[OK] Daemon path reads limited to allowed directories")
+
+
+def test_serve_refuses_non_loopback_host(monkeypatch):
+    """Test that serving on a non-loopback address requires --allow-remote."""
+    monkeypatch.setattr(sys, "argv", ["validation_daemon", "serve", "--host", "0.0.0.0", "--no-warmup"])
+    with pytest.raises(SystemExit):
+        validation_daemon.main()
+
+    assert validation_daemon.is_loopback_host("127.0.0.1")
+    assert validation_daemon.is_loopback_host("localhost")
+    assert not validation_daemon.is_loopback_host("0.0.0.0")
+    assert not validation_daemon.is_loopback_host("192.168.1.215")
+    print("[OK] Non-loopback bind refused without --allow-remote")
+
+
+def test_auto_uses_daemon_when_running(daemon, image_path, monkeypatch):
+    """Test that run_validator_auto prefers a running daemon."""
+    server, url = daemon
+    monkeypatch.setenv("COMFYGEN_VALIDATION_DAEMON", url)
+
+    assert get_daemon_client() is not None
+    result = run_validator_auto("file", image_path)
+    assert result["passed"] is True
+    assert server.service.requests == 1
+    print("[OK] Running daemon used automatically")
+
+
+def test_auto_falls_back_in_process(image_path, monkeypatch):
+    """Test fallback to in-process validation when no daemon is listening."""
+    probe = create_server("127.0.0.1", 0)
+    free_port = probe.server_address[1]
+    probe.server_close()
+    monkeypatch.setenv("COMFYGEN_VALIDATION_DAEMON", f"http://127.0.0.1:{free_port}")
+
+    assert get_daemon_client() is None
+    result = run_validator_auto("file", image_path)
+    assert result["passed"] is True
+
+    monkeypatch.setenv("COMFYGEN_VALIDATION_DAEMON", "off")
+    assert get_daemon_client(refresh=True) is None
+    print("[OK] In-process fallback without a daemon")
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""Tests for the concurrent validation orchestrator."""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path to import utils
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils import validation_runner
+from utils.validation_runner import ValidationOrchestrator, is_skipped, result_or_raise
+
+
+def _sleepy(seconds, value):
+    time.sleep(seconds)
+    return value
+
+
+def test_validators_run_concurrently():
+    """Test that independent validators overlap instead of adding up."""
+    orchestrator = ValidationOrchestrator()
+    for name in ("clip", "pose", "content"):
+        orchestrator.add(name, _sleepy, 0.2, {"name": name})
+
+    start = time.perf_counter()
+    runs = orchestrator.run()
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < 0.5
+    assert {name: run["result"]["name"] for name, run in runs.items()} == {
+        "clip": "clip",
+        "pose": "pose",
+        "content": "content",
+    }
+    report = orchestrator.report(runs)
+    assert report["mode"] == "parallel"
+    assert report["sequential_seconds"] >= 0.6
+    assert report["wall_seconds"] < report["sequential_seconds"]
+    assert report["validators"]["pose"]["status"] == "ok"
+    print(f"[OK] 3 x 0.2s validators finished in {elapsed:.2f}s")
+
+
+def test_timeout_does_not_block_others():
+    """Test that a slow validator times out while the others still report."""
+    release = threading.Event()
+    orchestrator = ValidationOrchestrator(timeouts={"content": 0.1})
+    orchestrator.add("content", release.wait, 5)
+    orchestrator.add("clip", _sleepy, 0.01, {"passed": True})
+
+    start = time.perf_counter()
+    runs = orchestrator.run()
+    release.set()
+
+    assert time.perf_counter() - start < 1.0
+    assert runs["content"]["status"] == "timeout"
+    assert runs["clip"]["status"] == "ok"
+    with pytest.raises(TimeoutError):
+        result_or_raise(runs["content"])
+    print("[OK] Timed-out validator reported without blocking")
+
+
+def test_timeout_measured_from_validator_start():
+    """Test that a validator queued behind another is not charged for the wait."""
+    orchestrator = ValidationOrchestrator(max_workers=1, timeouts={"first": 1.0, "second": 0.15})
+    orchestrator.add("first", _sleepy, 0.2, "a")
+    orchestrator.add("second", _sleepy, 0.05, "b")
+
+    runs = orchestrator.run()
+
+    assert runs["second"]["status"] == "ok"
+    assert orchestrator.report(runs)["mode"] == "sequential"
+    print("[OK] Queued validator timeout starts when it runs")
+
+
+def test_errors_are_reraised():
+    """Test that validator exceptions surface unchanged through result_or_raise."""
+
+    def broken():
+        raise ImportError("No module named 'mediapipe'")
+
+    orchestrator = ValidationOrchestrator()
+    orchestrator.add("pose", broken)
+    runs = orchestrator.run()
+
+    assert runs["pose"]["status"] == "error"
+    assert "mediapipe" in runs["pose"]["error"]
+    with pytest.raises(ImportError):
+        result_or_raise(runs["pose"])
+    print("[OK] Validator errors re-raised for existing handlers")
+
+
+def test_cascade_stops_at_first_hard_failure(monkeypatch):
+    """Test that a cheap hard failure skips the expensive validators."""
+    # Forget durations observed by other tests so the configured estimates apply
+    monkeypatch.setattr(validation_runner, "_observed_seconds", {})
+    calls = []
+
+    def validator(name, passed):
+        calls.append(name)
+        return {"passed": passed}
+
+    orchestrator = ValidationOrchestrator(early_exit=True, cost_estimates={"content": 8.0, "quality": 6.0})
+    # Registered out of order; the cascade order decides execution
+    orchestrator.add("quality", validator, "quality", True)
+    orchestrator.add("content", validator, "content", True, hard_failure=lambda r: not r["passed"])
+    orchestrator.add("yolo", validator, "yolo", False, hard_failure=lambda r: not r["passed"])
+    orchestrator.add("file", validator, "file", True, hard_failure=lambda r: not r["passed"])
+
+    runs = orchestrator.run()
+    report = orchestrator.report(runs)
+
+    assert calls == ["file", "yolo"]
+    assert runs["content"]["status"] == "skipped"
+    assert is_skipped(runs["quality"])
+    assert report["mode"] == "cascade"
+    assert report["cascade"]["stopped_at"] == "yolo"
+    assert report["cascade"]["skipped"] == ["content", "quality"]
+    assert report["cascade"]["time_saved_seconds"] == pytest.approx(14.0)
+    print("[OK] Cascade stopped at YOLO and skipped BLIP and pyiqa")
+
+
+def test_cascade_without_failure_runs_everything():
+    """Test that a passing image goes through every stage."""
+    orchestrator = ValidationOrchestrator(early_exit=True, stages=["clip", ["pose", "content"]])
+    for name in ("content", "pose", "clip"):
+        orchestrator.add(name, _sleepy, 0.01, {"valid": True}, hard_failure=lambda r: not r["valid"])
+
+    runs = orchestrator.run()
+    report = orchestrator.report(runs)
+
+    assert all(run["status"] == "ok" for run in runs.values())
+    assert report["cascade"]["order"] == ["clip", ["pose", "content"]]
+    assert report["cascade"]["stopped_at"] is None
+    assert report["cascade"]["time_saved_seconds"] == 0.0
+    print("[OK] Passing image runs every cascade stage")
+
+
+def test_cascade_abandons_running_stage_members():
+    """Test that a hard failure stops waiting for slower validators in the same stage."""
+    release = threading.Event()
+    orchestrator = ValidationOrchestrator(early_exit=True, stages=[["pose", "content"]])
+    orchestrator.add("pose", lambda: {"valid": False}, hard_failure=lambda r: not r["valid"])
+    orchestrator.add("content", release.wait, 5)
+
+    start = time.perf_counter()
+    runs = orchestrator.run()
+    release.set()
+
+    assert time.perf_counter() - start < 1.0
+    assert runs["content"]["status"] == "abandoned"
+    assert orchestrator.report(runs)["cascade"]["abandoned"] == ["content"]
+    print("[OK] Same-stage validators abandoned after a hard failure")
+
+
+def test_build_validation_result_uses_failing_stage_reason():
+    """Test that a skipped CLIP run still yields a failed validation_result."""
+    from generate import build_validation_result
+
+    runs = {
+        "file": {"status": "ok", "result": {"passed": True, "reason": "Image file is sane"}, "seconds": 0.01},
+        "yolo": {
+            "status": "ok",
+            "result": {
+                "passed": False,
+                "person_count": 1,
+                "expected_person_count": 2,
+                "reason": "Person count mismatch: expected 2, detected 1",
+            },
+            "seconds": 0.3,
+        },
+        "clip": {"status": "skipped", "result": None, "seconds": 0.0},
+    }
+    result = build_validation_result(runs)
+
+    assert result["passed"] is False
+    assert result["reason"] == "Person count mismatch: expected 2, detected 1"
+    assert result["person_count"] == 1
+    print("[OK] Cascade failure reason carried into validation_result")
+
+
+def test_metadata_includes_validation_report():
+    """Test that the timing report lands in the metadata sidecar."""
+    from generate import create_metadata_json
+
+    report = {"mode": "parallel", "workers": 2, "wall_seconds": 1.0, "sequential_seconds": 1.8, "validators": {}}
+    metadata = create_metadata_json("workflows/flux-dev.json", "a cat", "", {}, [], None, None, None)
+    assert metadata["validation"] is None
+
+    metadata = create_metadata_json(
+        "workflows/flux-dev.json", "a cat", "", {}, [], None, None, None, validation_report=report
+    )
+    assert metadata["validation"]["sequential_seconds"] == 1.8
+    print("[OK] Validation timing recorded in metadata")
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))
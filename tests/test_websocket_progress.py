@@ -157,7 +157,7 @@ def test_wait_for_completion_with_websocket():
     mock_response.status_code = 200
     mock_response.json.return_value = {prompt_id: {"outputs": {"node1": {"images": []}}}}
 
-    with patch("generate.ProgressTracker") as MockTracker, patch("requests.get", return_value=mock_response):
+    with patch("generate.ProgressTracker") as MockTracker, patch("requests.Session.get", return_value=mock_response):
         MockTracker.return_value = mock_tracker
 
         result = generate.wait_for_completion(prompt_id, quiet=True)
@@ -179,7 +179,7 @@ def test_wait_for_completion_quiet_mode():
     mock_response.status_code = 200
     mock_response.json.return_value = {prompt_id: {"outputs": {}}}
 
-    with patch("generate.ProgressTracker") as MockTracker, patch("requests.get", return_value=mock_response):
+    with patch("generate.ProgressTracker") as MockTracker, patch("requests.Session.get", return_value=mock_response):
         mock_tracker = Mock()
         MockTracker.return_value = mock_tracker
 
@@ -200,7 +200,7 @@ def test_wait_for_completion_json_progress_mode():
     mock_response.status_code = 200
     mock_response.json.return_value = {prompt_id: {"outputs": {}}}
 
-    with patch("generate.ProgressTracker") as MockTracker, patch("requests.get", return_value=mock_response):
+    with patch("generate.ProgressTracker") as MockTracker, patch("requests.Session.get", return_value=mock_response):
         mock_tracker = Mock()
         MockTracker.return_value = mock_tracker
 
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""Tests for the workflow graph and LoRA stack splicing (clients.workflow_graph)."""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path to import clients and generate
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import generate
+from clients.compiled_workflow import load_compiled_workflow
+from clients.workflow_graph import WorkflowGraph
+from clients.workflows import WorkflowManager
+
+WORKFLOWS_DIR = Path(__file__).parent.parent / "workflows"
+
+
+def _sd15_workflow():
+    return {
+        "4": {"class_type": "CheckpointLoaderSimple", "inputs": {"ckpt_name": "sd15.safetensors"}},
+        "6": {"class_type": "CLIPTextEncode", "inputs": {"text": "", "clip": ["4", 1]}},
+        "7": {"class_type": "CLIPTextEncode", "inputs": {"text": "", "clip": ["4", 1]}},
+        "3": {
+            "class_type": "KSampler",
+            "inputs": {"model": ["4", 0], "positive": ["6", 0], "negative": ["7", 0]},
+        },
+        "8": {"class_type": "VAEDecode", "inputs": {"samples": ["3", 0], "vae": ["4", 2]}},
+    }
+
+
+def test_consumers_index():
+    """The reverse-edge index lists every input linked to an output."""
+    graph = WorkflowGraph(_sd15_workflow())
+
+    assert graph.consumers("4", 0) == [("3", "model")]
+    assert graph.consumers("4", 1) == [("6", "clip"), ("7", "clip")]
+    assert graph.consumers("4", 2) == [("8", "vae")]
+    assert graph.consumers("3", 1) == []
+    assert graph.next_id == 9
+    print("[OK] WorkflowGraph indexes consumers per (node, output)")
+
+
+def test_splice_lora_stack_one_pass():
+    """A whole stack is chained and the loader's MODEL and CLIP consumers move to its end."""
+    workflow = _sd15_workflow()
+    graph = WorkflowGraph(workflow)
+
+    new_ids = graph.splice_lora_stack([("a.safetensors", 0.8, 0.7), ("b.safetensors", 0.5, 0.5)])
+
+    assert new_ids == ["9", "10"]
+    assert workflow["9"]["inputs"]["model"] == ["4", 0]
+    assert workflow["9"]["inputs"]["clip"] == ["4", 1]
+    assert workflow["9"]["inputs"]["strength_clip"] == 0.7
+    assert workflow["10"]["inputs"]["model"] == ["9", 0]
+    assert workflow["10"]["inputs"]["clip"] == ["9", 1]
+    assert workflow["3"]["inputs"]["model"] == ["10", 0]
+    assert workflow["6"]["inputs"]["clip"] == ["10", 1]
+    assert workflow["7"]["inputs"]["clip"] == ["10", 1]
+    # VAE stays on the checkpoint
+    assert workflow["8"]["inputs"]["vae"] == ["4", 2]
+
+    # The index follows the rewiring
+    assert graph.consumers("4", 0) == [("9", "model")]
+    assert graph.consumers("10", 1) == [("6", "clip"), ("7", "clip")]
+    print("[OK] splice_lora_stack chains LoRAs and rewires consumers in one pass")
+
+
+def test_inject_lora_chain_rewires_clip_to_last_lora():
+    """generate.inject_lora_chain feeds the text encoders from the last LoRA's CLIP."""
+    workflow = _sd15_workflow()
+
+    generate.inject_lora_chain(
+        workflow, [("a.safetensors", 1.0, 1.0), ("b.safetensors", 1.0, 1.0)], ["a.safetensors", "b.safetensors"]
+    )
+
+    assert workflow["3"]["inputs"]["model"] == ["10", 0]
+    assert workflow["6"]["inputs"]["clip"] == ["10", 1]
+    print("[OK] inject_lora_chain rewires CLIP consumers to the last LoRA")
+
+
+def test_workflow_manager_inject_loras():
+    """WorkflowManager reuses existing LoraLoaders, then splices the rest after them."""
+    manager = WorkflowManager()
+    workflow = load_compiled_workflow(str(WORKFLOWS_DIR / "pornmaster-pony-multi-lora.json")).instantiate()
+
+    specs = [(f"l{index}.safetensors", 1.0, 1.0) for index in range(1, 5)]
+    workflow = manager.inject_loras(workflow, specs)
+
+    assert [workflow[node_id]["inputs"]["lora_name"] for node_id in ("8", "9", "10")] == [
+        "l1.safetensors",
+        "l2.safetensors",
+        "l3.safetensors",
+    ]
+    assert workflow["11"]["class_type"] == "LoraLoader"
+    assert workflow["11"]["inputs"]["model"] == ["10", 0]
+    assert workflow["5"]["inputs"]["model"] == ["11", 0]
+    assert workflow["2"]["inputs"]["clip"] == ["11", 1]
+
+    # Without a LoraLoader, a single LoRA is spliced in (previously a no-op)
+    workflow = manager.inject_lora(_sd15_workflow(), "x.safetensors", 0.5, 0.5)
+    assert workflow["9"]["inputs"]["lora_name"] == "x.safetensors"
+    assert workflow["3"]["inputs"]["model"] == ["9", 0]
+    print("[OK] WorkflowManager.inject_loras fills existing LoRA slots and splices the rest")
+
+
+def test_splice_failures():
+    """Workflows without numeric IDs or a model loader are left unchanged."""
+    lora = [("a.safetensors", 1.0, 1.0)]
+    assert WorkflowGraph({"abc": {"class_type": "CheckpointLoaderSimple", "inputs": {}}}).splice_lora_stack(lora) == []
+
+    workflow = {"1": {"class_type": "KSampler", "inputs": {}}}
+    assert WorkflowGraph(workflow).splice_lora_stack(lora) == []
+    assert list(workflow) == ["1"]
+    print("[OK] splice_lora_stack leaves unsupported workflows unchanged")
@@ -0,0 +1,594 @@
+#!/usr/bin/env python3
+"""Shared CLIP embedding service for validation and quality scoring.
+
+ImageValidator (utils/validation.py) and QualityScorer (utils/quality.py) both
+measure prompt adherence with openai/clip-vit-base-patch32. Instead of each
+holding its own copy of the model and its own chunking/encoding loop, both go
+through a single ClipEmbedder per model:
+- The CLIP model/processor come from the process-wide model cache
+- Image embeddings are computed once per image (keyed by path, mtime and size,
+  or content hash), reusing the pixels of a shared ImageContext
+- Long prompts are chunked by real CLIP token counts; all chunks of a prompt
+  and its negative are encoded in one batched forward pass
+- Prompt embeddings are computed once per prompt, and chunk embeddings are
+  persisted across runs in the embedding cache (utils/embedding_cache.py)
+- Both score mappings are derived from the same cosine similarity:
+    - validation-style: (cos + 1) / 2, clamped to [0, 1]
+    - quality-style: (cos - 0.15) / 0.25, clamped to [0, 1]
+
+Usage:
+    from utils.clip_embedder import get_clip_embedder
+
+    embedder = get_clip_embedder()
+    scores = embedder.score("image.png", "a sunset", "blurry")
+    print(scores["positive_score"], scores["quality_score"])
+"""
+
+import contextlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+
+from utils.embedding_cache import EmbeddingCache, get_embedding_cache
+from utils.image_context import ImageContext
+from utils.model_cache import get_device, get_model_cache
+
+try:
+    import torch
+    from transformers import CLIPModel, CLIPProcessor, CLIPTokenizerFast
+
+    CLIP_AVAILABLE = True
+except ImportError:
+    CLIP_AVAILABLE = False
+
+DEFAULT_CLIP_MODEL = "openai/clip-vit-base-patch32"
+
+# Images can be passed as a path or a shared, already decoded ImageContext
+ImageInput = Union[str, ImageContext]
+
+# CLIP context length and the tokens left for text once BOS/EOS are added
+CLIP_MAX_TOKENS = 77
+CHUNK_TOKEN_BUDGET = CLIP_MAX_TOKENS - 2
+
+# Score mapping constants
+# Quality-style mapping: [0.15, 0.40] cosine -> [0, 1]
+QUALITY_SIM_FLOOR = 0.15
+QUALITY_SIM_RANGE = 0.25
+
+# Bounds for the per-embedder embedding caches
+MAX_CACHED_IMAGES = 32
+MAX_CACHED_PROMPTS = 256
+
+# Default forward-pass batch sizes for batched scoring
+DEFAULT_IMAGE_BATCH_SIZE = 16
+DEFAULT_TEXT_BATCH_SIZE = 64
+
+
+def load_clip(model_name: str = DEFAULT_CLIP_MODEL) -> tuple:
+    """Get the process-wide CLIP model and processor from the model cache.
+
+    Args:
+        model_name: HuggingFace model identifier for CLIP
+
+    Returns:
+        Tuple of (model, processor, device)
+    """
+    device = get_device()
+
+    def _load():
+        print(f"[INFO] Loading CLIP model on {device}...")
+        model = CLIPModel.from_pretrained(model_name).to(device)
+        processor = CLIPProcessor.from_pretrained(model_name)
+        print("[OK] CLIP model loaded")
+        return model, processor
+
+    model, processor = get_model_cache().get(f"clip:{model_name}", _load)
+    return model, processor, device
+
+
+def validation_score(cosine: float) -> float:
+    """Map a CLIP cosine similarity to the validation-style score.
+
+    Transforms cosine similarity [-1, 1] to a probability-like score [0, 1].
+    Good matches typically have cosine sim of 0.2-0.35.
+    """
+    return float(min(1.0, max(0.0, (cosine + 1.0) / 2.0)))
+
+
+def quality_score(cosine: float) -> float:
+    """Map a CLIP cosine similarity to the quality-style score.
+
+    Raw CLIP scores tend to be modest, so [0.15, 0.40] is stretched to [0, 1]:
+    good matches ~0.25-0.35, excellent ~0.35+.
+    """
+    return float(min(1.0, max(0.0, (cosine - QUALITY_SIM_FLOOR) / QUALITY_SIM_RANGE)))
+
+
+def load_clip_tokenizer(model_name: str = DEFAULT_CLIP_MODEL) -> Any:
+    """Get the CLIP tokenizer from the model cache.
+
+    Loaded separately from the full model so prompts can be chunked (and
+    cached chunk embeddings reused) without loading CLIP weights.
+
+    Args:
+        model_name: HuggingFace model identifier for CLIP
+
+    Returns:
+        CLIP tokenizer
+    """
+    return get_model_cache().get(f"clip-tokenizer:{model_name}", lambda: CLIPTokenizerFast.from_pretrained(model_name))
+
+
+def chunk_prompt(
+    prompt: str, max_chars: int = 250, tokenizer: Any = None, max_tokens: int = CHUNK_TOKEN_BUDGET
+) -> list[str]:
+    """Split a long prompt into chunks that fit within CLIP's token limit.
+
+    CLIP has a 77-token limit. Long prompts are split into chunks that are
+    encoded separately and averaged (like AUTOMATIC1111/ComfyUI). With a
+    tokenizer, words are packed greedily by their real CLIP token counts so
+    no chunk is truncated; without one, a character-count estimate is used.
+
+    Args:
+        prompt: The full text prompt
+        max_chars: Maximum characters per chunk when no tokenizer is given
+        tokenizer: Optional CLIP tokenizer for token-accurate chunking
+        max_tokens: Maximum tokens per chunk, excluding BOS/EOS (default 75)
+
+    Returns:
+        List of prompt chunks
+    """
+    words = prompt.split()
+    if not words:
+        return [prompt]
+
+    if tokenizer is not None:
+        # CLIP's pre-tokenizer splits on whitespace, so per-word counts sum to the prompt's count
+        word_tokens = tokenizer(words, add_special_tokens=False)["input_ids"]
+    else:
+        word_tokens = None
+
+    chunks = []
+    current_chunk = []
+    current_length = 0
+
+    for i, word in enumerate(words):
+        if word_tokens is not None:
+            ids = word_tokens[i]
+            word_len, limit = len(ids), max_tokens
+            if word_len > limit:
+                # A single "word" longer than a chunk (e.g. comma-joined tags without spaces)
+                if current_chunk:
+                    chunks.append(" ".join(current_chunk))
+                    current_chunk, current_length = [], 0
+                for start in range(0, word_len, limit):
+                    chunks.append(tokenizer.decode(ids[start : start + limit]).strip())
+                continue
+        else:
+            word_len, limit = len(word) + 1, max_chars  # +1 for space
+
+        if current_length + word_len > limit and current_chunk:
+            chunks.append(" ".join(current_chunk))
+            current_chunk = [word]
+            current_length = word_len
+        else:
+            current_chunk.append(word)
+            current_length += word_len
+
+    if current_chunk:
+        chunks.append(" ".join(current_chunk))
+
+    return chunks if chunks else [prompt]
+
+
+def _normalize(vector: np.ndarray) -> np.ndarray:
+    """L2-normalize a vector (returns the input unchanged if it is all zeros)."""
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm > 0 else vector
+
+
+def _to_numpy(features: Any) -> np.ndarray:
+    """Convert model output features to a float32 numpy array."""
+    if hasattr(features, "detach"):
+        features = features.detach().cpu().numpy()
+    return np.asarray(features, dtype=np.float32)
+
+
+def _no_grad():
+    """torch.no_grad() when torch is available, otherwise a no-op context."""
+    if CLIP_AVAILABLE:
+        return torch.no_grad()
+    return contextlib.nullcontext()
+
+
+class ClipEmbedder:
+    """CLIP image/text embedding service with per-image and per-prompt caching."""
+
+    def __init__(
+        self,
+        model_name: str = DEFAULT_CLIP_MODEL,
+        model: Any = None,
+        processor: Any = None,
+        device: Optional[str] = None,
+        embedding_cache: Optional[EmbeddingCache] = None,
+    ):
+        """Initialize the embedder.
+
+        Args:
+            model_name: HuggingFace model identifier for CLIP
+            model: Optional preloaded CLIP model (defaults to the model cache)
+            processor: Optional preloaded CLIP processor (defaults to the model cache)
+            device: Torch device for an injected model (defaults to get_device())
+            embedding_cache: Optional persistent text-embedding cache (chunk level)
+        """
+        self.model_name = model_name
+        self._model = model
+        self._processor = processor
+        self._device = device or get_device()
+        self.embedding_cache = embedding_cache
+
+        self._lock = threading.Lock()
+        self._image_cache: OrderedDict[tuple, np.ndarray] = OrderedDict()
+        self._text_cache: OrderedDict[str, np.ndarray] = OrderedDict()
+
+        self.image_encodes = 0
+        self.text_encodes = 0
+
+    def _backbone(self) -> tuple:
+        """Return (model, processor, device), fetching CLIP from the model cache if not injected."""
+        if self._model is not None and self._processor is not None:
+            return self._model, self._processor, self._device
+        return load_clip(self.model_name)
+
+    def get_tokenizer(self) -> Any:
+        """Return the CLIP tokenizer (from an injected processor or the model cache), or None."""
+        if self._processor is not None:
+            return getattr(self._processor, "tokenizer", None)
+        if CLIP_AVAILABLE:
+            return load_clip_tokenizer(self.model_name)
+        return None
+
+    def chunk(self, prompt: str) -> list[str]:
+        """Split a prompt into token-accurate chunks (see chunk_prompt)."""
+        return chunk_prompt(prompt, tokenizer=self.get_tokenizer())
+
+    @staticmethod
+    def _cache_get(cache: OrderedDict, key: Any) -> Optional[np.ndarray]:
+        """Look up key in an LRU dict and mark it most recently used."""
+        value = cache.get(key)
+        if value is not None:
+            cache.move_to_end(key)
+        return value
+
+    @staticmethod
+    def _cache_put(cache: OrderedDict, key: Any, value: np.ndarray, limit: int) -> None:
+        """Insert into an LRU dict, dropping the oldest entries beyond limit."""
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > limit:
+            cache.popitem(last=False)
+
+    def embed_image(self, image: ImageInput) -> np.ndarray:
+        """Get the normalized CLIP embedding of an image (computed once per image).
+
+        Args:
+            image: Path to the image file or a shared ImageContext
+
+        Returns:
+            1-D normalized embedding vector
+
+        Raises:
+            OSError: If the image cannot be read or decoded
+        """
+        return self.embed_images([image], skip_errors=False)[0]
+
+    def embed_images(
+        self, images: List[ImageInput], batch_size: int = DEFAULT_IMAGE_BATCH_SIZE, skip_errors: bool = True
+    ) -> np.ndarray:
+        """Get normalized CLIP embeddings for many images.
+
+        Images not already cached are stacked into batches of ``batch_size``
+        and encoded with one forward pass per batch. Paths are opened one
+        batch at a time and their contexts released after the forward pass,
+        so a directory of thousands of images never holds more than one
+        batch of decoded pixels. ImageContext inputs reuse their decoded
+        pixels and cached resized variant.
+
+        Args:
+            images: Paths to the image files or ImageContext objects
+            batch_size: Maximum images per forward pass
+            skip_errors: Warn and return a NaN row for an image that cannot be
+                read or decoded, instead of raising
+
+        Returns:
+            Array of shape (len(images), dim) with one normalized row per image
+        """
+        step = max(1, batch_size)
+        embeddings: List[Optional[np.ndarray]] = [None] * len(images)
+        failed: List[int] = []
+        # (index, cache key, context) of uncached images awaiting the next forward pass
+        pending: List[tuple] = []
+
+        def fail(i: int, error: Exception) -> None:
+            if not skip_errors:
+                raise error
+            name = images[i].name if isinstance(images[i], ImageContext) else images[i]
+            print(f"[WARN] Skipping unreadable image {name}: {error}")
+            failed.append(i)
+
+        def encode() -> None:
+            model, processor, device = self._backbone()
+            batch, pixels = [], []
+            for i, key, ctx in pending:
+                try:
+                    pixels.append(ctx.for_processor(processor))
+                except Exception as e:
+                    fail(i, e)
+                    continue
+                batch.append((i, key))
+            pending.clear()
+            if not batch:
+                return
+
+            inputs = processor(images=pixels, return_tensors="pt").to(device)
+            with _no_grad():
+                features = _to_numpy(model.get_image_features(**inputs))
+
+            with self._lock:
+                for row, (i, key) in enumerate(batch):
+                    embeddings[i] = _normalize(features[row])
+                    self.image_encodes += 1
+                    self._cache_put(self._image_cache, key, embeddings[i], MAX_CACHED_IMAGES)
+
+        for i, image in enumerate(images):
+            try:
+                ctx = ImageContext.coerce(image)
+                key = ctx.cache_key
+            except Exception as e:
+                fail(i, e)
+                continue
+            with self._lock:
+                embeddings[i] = self._cache_get(self._image_cache, key)
+            if embeddings[i] is None:
+                pending.append((i, key, ctx))
+                if len(pending) >= step:
+                    encode()
+        if pending:
+            encode()
+
+        if failed:
+            dim = next((len(embedding) for embedding in embeddings if embedding is not None), 0)
+            for i in failed:
+                embeddings[i] = np.full(dim, np.nan)
+        return np.stack(embeddings)
+
+    def embed_text(self, prompt: str) -> np.ndarray:
+        """Get the averaged, normalized CLIP embedding of a prompt (computed once per prompt).
+
+        Long prompts are chunked; each chunk is encoded and the normalized
+        chunk embeddings are averaged and re-normalized.
+
+        Args:
+            prompt: Text prompt (can be longer than 77 tokens)
+
+        Returns:
+            1-D normalized embedding vector
+        """
+        return self.embed_texts([prompt])[0]
+
+    def embed_texts(self, prompts: List[str], batch_size: int = DEFAULT_TEXT_BATCH_SIZE) -> np.ndarray:
+        """Get averaged, normalized CLIP embeddings for many prompts.
+
+        The token-accurate chunks of all uncached prompts (e.g. a prompt and its
+        negative) are flattened and encoded as padded batches of ``batch_size``
+        chunks - a single forward pass in the common case - then averaged back
+        per prompt.
+
+        Args:
+            prompts: Text prompts (each can be longer than 77 tokens)
+            batch_size: Maximum text chunks per forward pass
+
+        Returns:
+            Array of shape (len(prompts), dim) with one normalized row per prompt
+        """
+        embeddings: List[Optional[np.ndarray]] = [None] * len(prompts)
+
+        with self._lock:
+            for i, prompt in enumerate(prompts):
+                embeddings[i] = self._cache_get(self._text_cache, prompt)
+
+        # Unique uncached prompts, each mapped to its range of rows in the flat chunk list
+        pending: Dict[str, tuple] = {}
+        flat_chunks: List[str] = []
+        for i, prompt in enumerate(prompts):
+            if embeddings[i] is None and prompt not in pending:
+                chunks = self.chunk(prompt)
+                if len(chunks) > 1:
+                    print(f"[INFO] Processing prompt in {len(chunks)} chunks (long prompt)")
+                pending[prompt] = (len(flat_chunks), len(flat_chunks) + len(chunks))
+                flat_chunks.extend(chunks)
+
+        if flat_chunks:
+            chunk_features = self._encode_chunks(flat_chunks, batch_size)
+
+            with self._lock:
+                for prompt, (begin, end) in pending.items():
+                    embedding = _normalize(chunk_features[begin:end].mean(axis=0))
+                    self.text_encodes += 1
+                    self._cache_put(self._text_cache, prompt, embedding, MAX_CACHED_PROMPTS)
+                    pending[prompt] = embedding
+
+            for i, prompt in enumerate(prompts):
+                if embeddings[i] is None:
+                    embeddings[i] = pending[prompt]
+
+        return np.stack(embeddings)
+
+    def _encode_chunks(self, chunks: List[str], batch_size: int) -> np.ndarray:
+        """Encode text chunks to normalized embeddings, consulting the persistent cache.
+
+        Only chunks missing from the embedding cache go through CLIP, as
+        padded batches of ``batch_size``; their embeddings are then stored.
+
+        Args:
+            chunks: Chunk texts (each within CLIP's 77-token limit)
+            batch_size: Maximum chunks per forward pass
+
+        Returns:
+            Array of shape (len(chunks), dim) with one normalized row per chunk
+        """
+        vectors: List[Optional[np.ndarray]] = [None] * len(chunks)
+        if self.embedding_cache is not None:
+            vectors = self.embedding_cache.get_many(self.model_name, chunks)
+
+        missing = list(dict.fromkeys(chunk for chunk, vector in zip(chunks, vectors) if vector is None))
+        if missing:
+            model, processor, device = self._backbone()
+            features = []
+            for start in range(0, len(missing), max(1, batch_size)):
+                batch = missing[start : start + max(1, batch_size)]
+                inputs = processor(
+                    text=batch, return_tensors="pt", padding=True, truncation=True, max_length=CLIP_MAX_TOKENS
+                ).to(device)
+                with _no_grad():
+                    features.append(_to_numpy(model.get_text_features(**inputs)))
+            features = np.concatenate(features, axis=0)
+            features = features / np.maximum(np.linalg.norm(features, axis=-1, keepdims=True), 1e-12)
+
+            if self.embedding_cache is not None:
+                self.embedding_cache.put_many(self.model_name, missing, features)
+
+            encoded = dict(zip(missing, features))
+            vectors = [vector if vector is not None else encoded[chunk] for chunk, vector in zip(chunks, vectors)]
+
+        return np.stack(vectors)
+
+    def similarity(self, image: ImageInput, prompt: str) -> float:
+        """Cosine similarity between an image and a prompt.
+
+        Args:
+            image: Path to the image file or ImageContext
+            prompt: Text prompt
+
+        Returns:
+            Cosine similarity in [-1, 1]
+        """
+        return float(np.dot(self.embed_image(image), self.embed_text(prompt)))
+
+    def score(self, image: ImageInput, positive_prompt: str, negative_prompt: Optional[str] = None) -> Dict[str, float]:
+        """Score an image against a prompt with both validation and quality mappings.
+
+        Args:
+            image: Path to the image file or ImageContext
+            positive_prompt: The positive text prompt
+            negative_prompt: Optional negative prompt
+
+        Returns:
+            Dictionary with:
+                - positive_cosine: Raw cosine similarity to the positive prompt
+                - positive_score: Validation-style score (0-1)
+                - quality_score: Quality-style score (0-1)
+                - negative_cosine / negative_score / score_delta: If negative prompt provided
+        """
+        image_embedding = self.embed_image(image)
+        text_embeddings = self.embed_texts([positive_prompt, negative_prompt] if negative_prompt else [positive_prompt])
+
+        positive_cosine = float(np.dot(image_embedding, text_embeddings[0]))
+        result = {
+            "positive_cosine": positive_cosine,
+            "positive_score": validation_score(positive_cosine),
+            "quality_score": quality_score(positive_cosine),
+        }
+
+        if negative_prompt:
+            negative_cosine = float(np.dot(image_embedding, text_embeddings[1]))
+            result["negative_cosine"] = negative_cosine
+            result["negative_score"] = validation_score(negative_cosine)
+            result["score_delta"] = result["positive_score"] - result["negative_score"]
+
+        return result
+
+    def score_batch(
+        self,
+        images: List[ImageInput],
+        prompts: List[str],
+        negatives: Optional[List[Optional[str]]] = None,
+        batch_size: int = DEFAULT_IMAGE_BATCH_SIZE,
+        text_batch_size: int = DEFAULT_TEXT_BATCH_SIZE,
+    ) -> Dict[str, np.ndarray]:
+        """Score every image against every prompt with batched forward passes.
+
+        Args:
+            images: Paths to the image files or ImageContext objects (N)
+            prompts: Positive prompts (M)
+            negatives: Optional negative prompts, one per positive prompt (None entries allowed)
+            batch_size: Maximum images per forward pass
+            text_batch_size: Maximum text chunks per forward pass
+
+        Returns:
+            Dictionary of (N, M) float arrays (NaN in rows of images that could not be read):
+                - positive_cosine, positive_score, quality_score
+                - negative_cosine, negative_score, score_delta: If any negative provided
+                  (NaN in columns whose negative is None)
+        """
+        if negatives is not None and len(negatives) != len(prompts):
+            raise ValueError(f"Expected {len(prompts)} negative prompts, got {len(negatives)}")
+
+        image_matrix = self.embed_images(images, batch_size=batch_size)
+
+        # Encode positives and negatives together so their chunks share padded batches
+        negative_columns = [j for j, negative in enumerate(negatives or []) if negative]
+        texts = list(prompts) + [negatives[j] for j in negative_columns]
+        text_matrix = self.embed_texts(texts, batch_size=text_batch_size)
+        if image_matrix.shape[1] != text_matrix.shape[1]:
+            # No image could be read, so there was no row to take the width from
+            image_matrix = np.full((len(images), text_matrix.shape[1]), np.nan)
+
+        positive_cosine = image_matrix @ text_matrix[: len(prompts)].T
+        result = {
+            "positive_cosine": positive_cosine,
+            "positive_score": np.clip((positive_cosine + 1.0) / 2.0, 0.0, 1.0),
+            "quality_score": np.clip((positive_cosine - QUALITY_SIM_FLOOR) / QUALITY_SIM_RANGE, 0.0, 1.0),
+        }
+
+        if negative_columns:
+            negative_cosine = np.full_like(positive_cosine, np.nan)
+            negative_cosine[:, negative_columns] = image_matrix @ text_matrix[len(prompts) :].T
+            result["negative_cosine"] = negative_cosine
+            result["negative_score"] = np.clip((negative_cosine + 1.0) / 2.0, 0.0, 1.0)
+            result["score_delta"] = result["positive_score"] - result["negative_score"]
+
+        return result
+
+    def clear(self) -> None:
+        """Drop all cached image and prompt embeddings."""
+        with self._lock:
+            self._image_cache.clear()
+            self._text_cache.clear()
+
+
+# One embedder per CLIP model, shared by every validator/scorer in this process
+_embedders: Dict[str, ClipEmbedder] = {}
+_embedders_lock = threading.Lock()
+
+
+def get_clip_embedder(model_name: str = DEFAULT_CLIP_MODEL) -> ClipEmbedder:
+    """Get or create the process-wide ClipEmbedder for a model (thread-safe).
+
+    Args:
+        model_name: HuggingFace model identifier for CLIP
+
+    Returns:
+        Shared ClipEmbedder instance
+    """
+    embedder = _embedders.get(model_name)
+    if embedder is None:
+        with _embedders_lock:
+            # Double-check locking pattern
+            embedder = _embedders.get(model_name)
+            if embedder is None:
+                embedder = ClipEmbedder(model_name, embedding_cache=get_embedding_cache())
+                _embedders[model_name] = embedder
+    return embedder
@@ -9,18 +9,24 @@ similarity to detect:
 - Style mismatches
 - Missing or extra elements
 
+Each image is encoded once by the BLIP vision tower and all of its questions
+are decoded together as one padded batch; validate_content_batch() extends this
+to many images for bulk audits.
+
 Uses BLIP-2 for image captioning and analysis. Can be upgraded to LLaVA
 or Qwen2-VL via model-manager for better quality (see model-manager#40).
 """
 
+import json
 import re
 import sys
-from pathlib import Path
-from typing import Any, Optional
+from typing import Any, Optional, Union
+
+from utils.image_context import ImageContext
+from utils.model_cache import get_device, get_model_cache
 
 try:
     import torch
-    from PIL import Image
     from transformers import BlipForConditionalGeneration, BlipForQuestionAnswering, BlipProcessor
 
     BLIP_AVAILABLE = True
@@ -31,121 +37,225 @@ except ImportError:
 BLIP_CAPTION_MODEL = "Salesforce/blip-image-captioning-base"
 BLIP_VQA_MODEL = "Salesforce/blip-vqa-base"
 
-# Module-level model cache
-_caption_model = None
-_caption_processor = None
-_vqa_model = None
-_vqa_processor = None
+# Images per BLIP vision forward pass (all their questions decode in one batch)
+BLIP_IMAGE_BATCH_SIZE = 8
 
 
 def _get_device():
     """Get best available device."""
-    if torch.cuda.is_available():
-        return "cuda"
     # Skip MPS due to compatibility issues with some models
-    return "cpu"
+    return get_device()
 
 
 def _load_caption_model():
-    """Load BLIP caption model (cached)."""
-    global _caption_model, _caption_processor
+    """Load BLIP caption model (cached in the process-wide model cache)."""
+    if not BLIP_AVAILABLE:
+        return None, None
 
-    if _caption_model is None and BLIP_AVAILABLE:
+    def _load():
         device = _get_device()
         print(f"[INFO] Loading BLIP caption model on {device}...")
 
-        _caption_processor = BlipProcessor.from_pretrained(BLIP_CAPTION_MODEL)
-        _caption_model = BlipForConditionalGeneration.from_pretrained(BLIP_CAPTION_MODEL)
-        _caption_model = _caption_model.to(device)
+        processor = BlipProcessor.from_pretrained(BLIP_CAPTION_MODEL)
+        model = BlipForConditionalGeneration.from_pretrained(BLIP_CAPTION_MODEL)
+        model = model.to(device)
 
         print("[OK] BLIP caption model loaded")
+        return model, processor
 
-    return _caption_model, _caption_processor
+    return get_model_cache().get(f"blip:{BLIP_CAPTION_MODEL}", _load)
 
 
 def _load_vqa_model():
-    """Load BLIP VQA model (cached)."""
-    global _vqa_model, _vqa_processor
+    """Load BLIP VQA model (cached in the process-wide model cache)."""
+    if not BLIP_AVAILABLE:
+        return None, None
 
-    if _vqa_model is None and BLIP_AVAILABLE:
+    def _load():
         device = _get_device()
         print(f"[INFO] Loading BLIP VQA model on {device}...")
 
-        _vqa_processor = BlipProcessor.from_pretrained(BLIP_VQA_MODEL)
-        _vqa_model = BlipForQuestionAnswering.from_pretrained(BLIP_VQA_MODEL)
-        _vqa_model = _vqa_model.to(device)
+        processor = BlipProcessor.from_pretrained(BLIP_VQA_MODEL)
+        model = BlipForQuestionAnswering.from_pretrained(BLIP_VQA_MODEL)
+        model = model.to(device)
 
         print("[OK] BLIP VQA model loaded")
+        return model, processor
 
-    return _vqa_model, _vqa_processor
+    return get_model_cache().get(f"blip:{BLIP_VQA_MODEL}", _load)
 
 
-def generate_caption(image_path: str) -> Optional[str]:
-    """Generate a descriptive caption for an image.
+def _pixel_values(image: ImageContext, processor) -> "torch.Tensor":
+    """Preprocessed BLIP pixel tensor for an image, computed once per processor config.
+
+    The caption and VQA processors share the same 384x384 preprocessing, so both
+    models normally reuse one tensor cached on the ImageContext.
+    """
+    image_processor = getattr(processor, "image_processor", processor)
+    key = ("blip_pixel_values", json.dumps(image_processor.to_dict(), sort_keys=True, default=str))
+    return image.derived(
+        key, lambda ctx: image_processor(ctx.for_processor(processor), return_tensors="pt")["pixel_values"]
+    )
+
+
+def _chunks(items: list, size: int):
+    """Yield consecutive slices of at most size items."""
+    for start in range(0, len(items), max(1, size)):
+        yield items[start : start + size]
+
+
+def _generate_captions(images: list[ImageContext], batch_size: int = BLIP_IMAGE_BATCH_SIZE) -> list[Optional[str]]:
+    """Caption several images with one batched BLIP forward pass per chunk.
 
     Args:
-        image_path: Path to image file
+        images: Decoded images (must exist)
+        batch_size: Images per forward pass
 
     Returns:
-        Generated caption string or None on error
+        One caption per image (None where captioning failed)
     """
-    if not BLIP_AVAILABLE:
-        return None
-
-    if not Path(image_path).exists():
-        return None
+    captions: list[Optional[str]] = [None] * len(images)
+    if not images:
+        return captions
 
     try:
         model, processor = _load_caption_model()
         if model is None:
-            return None
+            return captions
 
         device = _get_device()
-        image = Image.open(image_path).convert("RGB")
-        inputs = processor(image, return_tensors="pt").to(device)
+        for chunk in _chunks(list(range(len(images))), batch_size):
+            pixel_values = torch.cat([_pixel_values(images[i], processor) for i in chunk]).to(device)
+            with torch.no_grad():
+                generated_ids = model.generate(pixel_values=pixel_values, max_new_tokens=100)
+            for i, caption in zip(chunk, processor.batch_decode(generated_ids, skip_special_tokens=True)):
+                captions[i] = caption.strip()
+    except Exception as e:
+        print(f"[ERROR] Caption generation failed: {e}")
+
+    return captions
+
+
+def _decode_answers(model, processor, image_embeds, input_ids, attention_mask) -> list[str]:
+    """Answer a padded batch of questions against already-encoded images.
+
+    Mirrors BlipForQuestionAnswering.generate minus the vision pass, so each
+    image is encoded once no matter how many questions are asked about it.
+    """
+    image_attention_mask = torch.ones(image_embeds.shape[:-1], dtype=torch.long, device=image_embeds.device)
+    question_embeds = model.text_encoder(
+        input_ids=input_ids,
+        attention_mask=attention_mask,
+        encoder_hidden_states=image_embeds,
+        encoder_attention_mask=image_attention_mask,
+        return_dict=False,
+    )[0]
+
+    text_config = model.config.text_config
+    bos_ids = torch.full(
+        (question_embeds.size(0), 1),
+        fill_value=getattr(model, "decoder_start_token_id", text_config.bos_token_id),
+        device=question_embeds.device,
+    )
+    generated_ids = model.text_decoder.generate(
+        input_ids=bos_ids,
+        eos_token_id=text_config.sep_token_id,
+        pad_token_id=text_config.pad_token_id,
+        encoder_hidden_states=question_embeds,
+        # Padded question tokens must not be attended to
+        encoder_attention_mask=attention_mask,
+        max_new_tokens=50,
+    )
+    return [answer.strip() for answer in processor.batch_decode(generated_ids, skip_special_tokens=True)]
+
+
+def _answer_questions(
+    images: list[ImageContext], questions: list[list[str]], batch_size: int = BLIP_IMAGE_BATCH_SIZE
+) -> list[list[Optional[str]]]:
+    """Answer every question about every image with batched BLIP VQA.
+
+    Each chunk of images goes through the vision encoder once; all questions
+    about those images are then decoded together as one padded batch.
+
+    Args:
+        images: Decoded images (must exist)
+        questions: Questions per image, parallel to images
+        batch_size: Images per vision forward pass
+
+    Returns:
+        Answers per image, parallel to questions (None where VQA failed)
+    """
+    answers: list[list[Optional[str]]] = [[None] * len(qs) for qs in questions]
+    asked = [i for i, qs in enumerate(questions) if qs]
+    if not asked:
+        return answers
 
-        generated_ids = model.generate(**inputs, max_new_tokens=100)
-        caption = processor.batch_decode(generated_ids, skip_special_tokens=True)[0].strip()
+    try:
+        model, processor = _load_vqa_model()
+        if model is None:
+            return answers
 
-        return caption
+        device = _get_device()
+        for chunk in _chunks(asked, batch_size):
+            pixel_values = torch.cat([_pixel_values(images[i], processor) for i in chunk]).to(device)
+            pairs = [(row, i, j) for row, i in enumerate(chunk) for j in range(len(questions[i]))]
+            text = processor.tokenizer([questions[i][j] for _, i, j in pairs], padding=True, return_tensors="pt").to(
+                device
+            )
+
+            with torch.no_grad():
+                image_embeds = model.vision_model(pixel_values=pixel_values)[0]
+                rows = torch.tensor([row for row, _, _ in pairs], device=image_embeds.device)
+                decoded = _decode_answers(
+                    model, processor, image_embeds.index_select(0, rows), text.input_ids, text.attention_mask
+                )
+
+            for (_, i, j), answer in zip(pairs, decoded):
+                answers[i][j] = answer
     except Exception as e:
-        print(f"[ERROR] Caption generation failed: {e}")
-        return None
+        print(f"[ERROR] VQA failed: {e}")
 
+    return answers
 
-def ask_about_image(image_path: str, question: str) -> Optional[str]:
-    """Ask a question about an image using VQA.
+
+def generate_caption(image_path: Union[str, ImageContext]) -> Optional[str]:
+    """Generate a descriptive caption for an image.
 
     Args:
-        image_path: Path to image file
-        question: Question to ask about the image
+        image_path: Path to image file or a shared ImageContext
 
     Returns:
-        Answer string or None on error
+        Generated caption string or None on error
     """
     if not BLIP_AVAILABLE:
         return None
 
-    if not Path(image_path).exists():
+    image = ImageContext.coerce(image_path)
+    if not image.exists:
         return None
 
-    try:
-        model, processor = _load_vqa_model()
-        if model is None:
-            return None
+    return _generate_captions([image])[0]
 
-        device = _get_device()
-        image = Image.open(image_path).convert("RGB")
-        inputs = processor(image, question, return_tensors="pt").to(device)
 
-        generated_ids = model.generate(**inputs, max_new_tokens=50)
-        answer = processor.batch_decode(generated_ids, skip_special_tokens=True)[0].strip()
+def ask_about_image(image_path: Union[str, ImageContext], question: str) -> Optional[str]:
+    """Ask a question about an image using VQA.
 
-        return answer
-    except Exception as e:
-        print(f"[ERROR] VQA failed: {e}")
+    Args:
+        image_path: Path to image file or a shared ImageContext
+        question: Question to ask about the image
+
+    Returns:
+        Answer string or None on error
+    """
+    if not BLIP_AVAILABLE:
+        return None
+
+    image = ImageContext.coerce(image_path)
+    if not image.exists:
         return None
 
+    return _answer_questions([image], [[question]])[0][0]
+
 
 def extract_key_elements(prompt: str) -> dict[str, Any]:
     """Extract key validation elements from a prompt.
@@ -204,114 +314,110 @@ def extract_key_elements(prompt: str) -> dict[str, Any]:
     return {"subject_count": count, "colors": colors, "subject_type": subject_type, "attributes": list(set(attributes))}
 
 
-def validate_content(
-    image_path: str,
-    prompt: str,
+def plan_questions(
+    expected: dict[str, Any],
     check_subject_count: bool = True,
     check_colors: bool = True,
     check_attributes: bool = True,
-) -> dict[str, Any]:
-    """Validate image content against prompt requirements.
-
-    Uses BLIP-2 VQA to check if the generated image matches the prompt.
+) -> list[tuple[str, Optional[str], str]]:
+    """List the VQA questions needed to check a prompt's expected elements.
 
     Args:
-        image_path: Path to generated image
-        prompt: Original generation prompt
-        check_subject_count: Whether to validate subject count
-        check_colors: Whether to validate mentioned colors
-        check_attributes: Whether to validate key attributes
+        expected: Output of extract_key_elements()
+        check_subject_count: Whether to ask for the subject count
+        check_colors: Whether to ask about mentioned colors
+        check_attributes: Whether to ask about key attributes
 
     Returns:
-        Dictionary with validation results:
-        - valid: Overall validation passed
-        - caption: Generated image description
-        - checks: Individual check results
-        - issues: List of detected issues
-        - reason: Human-readable summary
+        (check, key, question) tuples; check is "subject_count", "colors" or "attributes"
     """
-    if not BLIP_AVAILABLE:
-        return {
-            "valid": True,  # Pass if VLM unavailable
-            "reason": "VLM unavailable - validation skipped",
-            "error": "BLIP-2 not available. Install with: pip install transformers torch",
-        }
+    plan = []
+    if check_subject_count and expected["subject_count"] > 0 and expected["subject_type"] == "person":
+        plan.append(("subject_count", None, "How many people are in this image?"))
+    if check_colors:
+        for color in expected["colors"][:3]:  # Check up to 3 colors
+            plan.append(("colors", color, f"Is there anything {color} in this image?"))
+    if check_attributes:
+        for attr in expected["attributes"][:3]:  # Check up to 3 attributes
+            plan.append(("attributes", attr, f"Is the subject {attr}?"))
+    return plan
 
-    if not Path(image_path).exists():
-        return {"valid": False, "reason": f"Image not found: {image_path}", "error": "file_not_found"}
 
-    # Extract expected elements from prompt
-    expected = extract_key_elements(prompt)
+def evaluate_answers(
+    expected: dict[str, Any],
+    plan: list[tuple[str, Optional[str], str]],
+    answers: list[Optional[str]],
+    caption: Optional[str],
+    check_colors: bool = True,
+    check_attributes: bool = True,
+) -> dict[str, Any]:
+    """Turn VQA answers into a content validation result.
 
-    # Generate caption for context
-    caption = generate_caption(image_path)
+    Args:
+        expected: Output of extract_key_elements()
+        plan: Questions from plan_questions()
+        answers: Answers parallel to plan (None where VQA failed)
+        caption: Generated caption for context
+        check_colors: Whether colors were checked
+        check_attributes: Whether attributes were checked
 
+    Returns:
+        Validation result dictionary (see validate_content)
+    """
     checks = {}
     issues = []
-
-    # Check subject count
-    if check_subject_count and expected["subject_count"] > 0:
-        if expected["subject_type"] == "person":
-            answer = ask_about_image(image_path, "How many people are in this image?")
-            if answer:
-                # Parse count from answer
-                detected_count = None
-                answer_lower = answer.lower()
-                if any(w in answer_lower for w in ["one", "1", "single", "a person", "one person"]):
-                    detected_count = 1
-                elif any(w in answer_lower for w in ["two", "2", "pair", "couple"]):
-                    detected_count = 2
-                elif any(w in answer_lower for w in ["three", "3"]):
-                    detected_count = 3
-                elif any(w in answer_lower for w in ["no", "none", "zero", "0"]):
-                    detected_count = 0
-                elif any(w in answer_lower for w in ["many", "several", "multiple", "group"]):
-                    detected_count = -1  # Multiple
-
-                checks["subject_count"] = {
-                    "expected": expected["subject_count"],
-                    "detected": detected_count,
-                    "answer": answer,
-                    "passed": detected_count is None
-                    or detected_count == expected["subject_count"]
-                    or (expected["subject_count"] == -1 and detected_count and detected_count > 1),
-                }
-
-                if not checks["subject_count"]["passed"]:
-                    issues.append(
-                        f"Subject count mismatch: expected {expected['subject_count']}, detected {detected_count}"
-                    )
-
-    # Check colors
     if check_colors and expected["colors"]:
-        color_checks = {}
-        for color in expected["colors"][:3]:  # Check up to 3 colors
-            answer = ask_about_image(image_path, f"Is there anything {color} in this image?")
-            if answer:
-                # Check for positive response
-                answer_lower = answer.lower()
-                found = any(w in answer_lower for w in ["yes", "there is", "the", color])
-                found = found and not any(w in answer_lower for w in ["no", "not", "isn't", "aren't"])
-                color_checks[color] = {"found": found, "answer": answer}
-                if not found:
-                    issues.append(f"Expected color '{color}' not clearly visible")
-
-        checks["colors"] = color_checks
-
-    # Check key attributes
+        checks["colors"] = {}
     if check_attributes and expected["attributes"]:
-        attr_checks = {}
-        for attr in expected["attributes"][:3]:  # Check up to 3 attributes
-            answer = ask_about_image(image_path, f"Is the subject {attr}?")
-            if answer:
-                answer_lower = answer.lower()
-                found = "yes" in answer_lower or attr in answer_lower
-                found = found and "no" not in answer_lower.split()[:2]  # Check first 2 words for "no"
-                attr_checks[attr] = {"found": found, "answer": answer}
-                if not found:
-                    issues.append(f"Expected attribute '{attr}' not detected")
-
-        checks["attributes"] = attr_checks
+        checks["attributes"] = {}
+
+    for (check, key, _question), answer in zip(plan, answers):
+        if not answer:
+            continue
+        answer_lower = answer.lower()
+
+        if check == "subject_count":
+            # Parse count from answer
+            detected_count = None
+            if any(w in answer_lower for w in ["one", "1", "single", "a person", "one person"]):
+                detected_count = 1
+            elif any(w in answer_lower for w in ["two", "2", "pair", "couple"]):
+                detected_count = 2
+            elif any(w in answer_lower for w in ["three", "3"]):
+                detected_count = 3
+            elif any(w in answer_lower for w in ["no", "none", "zero", "0"]):
+                detected_count = 0
+            elif any(w in answer_lower for w in ["many", "several", "multiple", "group"]):
+                detected_count = -1  # Multiple
+
+            checks["subject_count"] = {
+                "expected": expected["subject_count"],
+                "detected": detected_count,
+                "answer": answer,
+                "passed": detected_count is None
+                or detected_count == expected["subject_count"]
+                or (expected["subject_count"] == -1 and detected_count and detected_count > 1),
+            }
+
+            if not checks["subject_count"]["passed"]:
+                issues.append(
+                    f"Subject count mismatch: expected {expected['subject_count']}, detected {detected_count}"
+                )
+
+        elif check == "colors":
+            # Check for positive response
+            found = any(w in answer_lower for w in ["yes", "there is", "the", key])
+            found = found and not any(w in answer_lower for w in ["no", "not", "isn't", "aren't"])
+            checks["colors"][key] = {"found": found, "answer": answer}
+            if not found:
+                issues.append(f"Expected color '{key}' not clearly visible")
+
+        elif check == "attributes":
+            found = "yes" in answer_lower or key in answer_lower
+            found = found and "no" not in answer_lower.split()[:2]  # Check first 2 words for "no"
+            checks["attributes"][key] = {"found": found, "answer": answer}
+            if not found:
+                issues.append(f"Expected attribute '{key}' not detected")
 
     # Determine overall validity
     # Fail if subject count is wrong (critical), warn on colors/attributes
@@ -336,6 +442,107 @@ def validate_content(
     }
 
 
+def validate_content_batch(
+    images: list[Union[str, ImageContext]],
+    prompts: list[str],
+    check_subject_count: bool = True,
+    check_colors: bool = True,
+    check_attributes: bool = True,
+    batch_size: int = BLIP_IMAGE_BATCH_SIZE,
+) -> list[dict[str, Any]]:
+    """Validate many images against their prompts for bulk audits.
+
+    Each image is decoded and run through each BLIP vision encoder once; the
+    captions and all VQA questions are generated in padded batches.
+
+    Args:
+        images: Paths to generated images or shared ImageContexts
+        prompts: Generation prompt per image
+        check_subject_count: Whether to validate subject count
+        check_colors: Whether to validate mentioned colors
+        check_attributes: Whether to validate key attributes
+        batch_size: Images per BLIP forward pass
+
+    Returns:
+        One validation result per image, in input order (see validate_content)
+    """
+    if len(images) != len(prompts):
+        raise ValueError(f"Got {len(images)} images but {len(prompts)} prompts")
+
+    if not BLIP_AVAILABLE:
+        return [
+            {
+                "valid": True,  # Pass if VLM unavailable
+                "reason": "VLM unavailable - validation skipped",
+                "error": "BLIP-2 not available. Install with: pip install transformers torch",
+            }
+            for _ in images
+        ]
+
+    # Decode once; the caption and every VQA question reuse the same pixels
+    contexts = [ImageContext.coerce(image) for image in images]
+    results: list[Optional[dict[str, Any]]] = [None] * len(contexts)
+    present = []
+    for i, image in enumerate(contexts):
+        if image.exists:
+            present.append(i)
+        else:
+            results[i] = {"valid": False, "reason": f"Image not found: {image.name}", "error": "file_not_found"}
+
+    # Extract expected elements from each prompt and plan its questions
+    expected = {i: extract_key_elements(prompts[i]) for i in present}
+    plans = {i: plan_questions(expected[i], check_subject_count, check_colors, check_attributes) for i in present}
+
+    present_images = [contexts[i] for i in present]
+    captions = _generate_captions(present_images, batch_size)
+    answers = _answer_questions(
+        present_images, [[question for _, _, question in plans[i]] for i in present], batch_size
+    )
+
+    for row, i in enumerate(present):
+        results[i] = evaluate_answers(
+            expected[i], plans[i], answers[row], captions[row], check_colors, check_attributes
+        )
+
+    return results
+
+
+def validate_content(
+    image_path: Union[str, ImageContext],
+    prompt: str,
+    check_subject_count: bool = True,
+    check_colors: bool = True,
+    check_attributes: bool = True,
+) -> dict[str, Any]:
+    """Validate image content against prompt requirements.
+
+    Uses BLIP-2 VQA to check if the generated image matches the prompt. The
+    image is encoded once and all questions are answered in one padded batch.
+
+    Args:
+        image_path: Path to generated image or a shared ImageContext
+        prompt: Original generation prompt
+        check_subject_count: Whether to validate subject count
+        check_colors: Whether to validate mentioned colors
+        check_attributes: Whether to validate key attributes
+
+    Returns:
+        Dictionary with validation results:
+        - valid: Overall validation passed
+        - caption: Generated image description
+        - checks: Individual check results
+        - issues: List of detected issues
+        - reason: Human-readable summary
+    """
+    return validate_content_batch(
+        [image_path],
+        [prompt],
+        check_subject_count=check_subject_count,
+        check_colors=check_colors,
+        check_attributes=check_attributes,
+    )[0]
+
+
 # CLI for testing
 if __name__ == "__main__":
     if len(sys.argv) < 3:
@@ -0,0 +1,450 @@
+#!/usr/bin/env python3
+"""Persistent cache for CLIP text embeddings.
+
+The same negative prompts (DEFAULT_SD_NEGATIVE_PROMPT, presets.yaml
+default_negative_prompt, prompt_catalog.yaml nsfw_negative_template) are used
+for almost every generation, yet were re-encoded by CLIP for every image
+validated. This cache stores text-chunk embeddings keyed by
+(model id, normalized chunk text):
+- An in-memory LRU serves repeated lookups within a process
+- An on-disk store (one memory-mapped float32 matrix plus an append-only
+  index per model) shares embeddings across processes and runs
+
+Normalization collapses whitespace and lowercases, matching the CLIP
+tokenizer, so "Blurry,  low quality" and "blurry, low quality" share a row.
+
+Storage layout (default ~/.cache/comfy-gen/embeddings, override with
+COMFYGEN_EMBEDDING_CACHE_DIR; set COMFYGEN_EMBEDDING_CACHE=0 for memory only):
+    <cache_dir>/<model id with / replaced by -->/
+        meta.json      {"dim": 512, "dtype": "float32"}
+        vectors.f32    Row-major float32 matrix, one row per chunk
+        index.jsonl    One {"key": sha1(normalized text), "row": n} per line
+
+Usage:
+    # Warm the cache from prompt_catalog.yaml and presets.yaml
+    python -m utils.embedding_cache warm
+
+    # Show cache statistics
+    python -m utils.embedding_cache stats
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from utils.prompts import DEFAULT_SD_NEGATIVE_PROMPT
+
+try:
+    import fcntl
+except ImportError:  # Windows - cross-process appends are not locked
+    fcntl = None
+
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "comfy-gen" / "embeddings"
+DEFAULT_MEMORY_ENTRIES = 4096
+
+
+def normalize_text(text: str) -> str:
+    """Normalize chunk text for cache keys (collapse whitespace, lowercase).
+
+    CLIP's tokenizer lowercases and ignores repeated whitespace, so texts
+    differing only in case/spacing produce identical embeddings.
+    """
+    return " ".join(text.split()).lower()
+
+
+def _text_key(text: str) -> str:
+    """Stable on-disk key for a chunk of text."""
+    return hashlib.sha1(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+def _default_cache_dir() -> Optional[Path]:
+    """Resolve the on-disk cache directory from the environment (None disables persistence)."""
+    if os.getenv("COMFYGEN_EMBEDDING_CACHE", "1").lower() in ("0", "false", "off", "no"):
+        return None
+    return Path(os.getenv("COMFYGEN_EMBEDDING_CACHE_DIR", str(DEFAULT_CACHE_DIR)))
+
+
+class _DiskStore:
+    """Append-only memory-mapped embedding store for a single model."""
+
+    def __init__(self, model_dir: Path):
+        self.model_dir = model_dir
+        self.model_dir.mkdir(parents=True, exist_ok=True)
+
+        self.meta_path = model_dir / "meta.json"
+        self.vectors_path = model_dir / "vectors.f32"
+        self.index_path = model_dir / "index.jsonl"
+        self.lock_path = model_dir / ".lock"
+
+        self.dim: Optional[int] = None
+        self._index: Dict[str, int] = {}
+        self._index_offset = 0
+        self._memmap: Optional[np.memmap] = None
+
+        self._load_meta()
+        self._refresh_index()
+
+    def _load_meta(self) -> None:
+        if self.dim is None and self.meta_path.exists():
+            with open(self.meta_path) as f:
+                self.dim = int(json.load(f)["dim"])
+
+    def _refresh_index(self) -> None:
+        """Read index lines appended (possibly by other processes) since the last refresh."""
+        if not self.index_path.exists():
+            return
+        with open(self.index_path, "rb") as f:
+            f.seek(self._index_offset)
+            data = f.read()
+        # Only consume complete lines; a concurrent writer may be mid-append
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            try:
+                entry = json.loads(line)
+                self._index[entry["key"]] = int(entry["row"])
+            except (ValueError, KeyError):
+                continue
+        self._index_offset += end
+
+    def _rows_on_disk(self) -> int:
+        if self.dim is None or not self.vectors_path.exists():
+            return 0
+        return self.vectors_path.stat().st_size // (self.dim * 4)
+
+    def _vectors(self, row: int) -> Optional[np.memmap]:
+        """Return a memmap covering row, remapping if the file has grown."""
+        if self._memmap is None or row >= self._memmap.shape[0]:
+            rows = self._rows_on_disk()
+            if row >= rows:
+                return None
+            self._memmap = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(rows, self.dim))
+        return self._memmap
+
+    def lookup(self, key: str) -> Optional[np.ndarray]:
+        if key not in self._index:
+            self._load_meta()
+            self._refresh_index()
+            if key not in self._index:
+                return None
+        row = self._index[key]
+        vectors = self._vectors(row)
+        if vectors is None:
+            return None
+        return np.array(vectors[row])
+
+    def append(self, keys: List[str], vectors: np.ndarray) -> None:
+        """Append new rows, skipping keys another process already wrote."""
+        with open(self.lock_path, "w") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                self._load_meta()
+                if self.dim is None:
+                    self.dim = int(vectors.shape[1])
+                    with open(self.meta_path, "w") as f:
+                        json.dump({"dim": self.dim, "dtype": "float32"}, f)
+                elif vectors.shape[1] != self.dim:
+                    print(f"[WARN] Embedding dim {vectors.shape[1]} != cached dim {self.dim}, not persisting")
+                    return
+
+                self._refresh_index()
+                new = [(key, vector) for key, vector in zip(keys, vectors) if key not in self._index]
+                if not new:
+                    return
+
+                row = self._rows_on_disk()
+                with open(self.vectors_path, "ab") as f:
+                    # Truncated trailing bytes from an interrupted write are overwritten
+                    f.truncate(row * self.dim * 4)
+                    for _, vector in new:
+                        f.write(np.asarray(vector, dtype=np.float32).tobytes())
+
+                with open(self.index_path, "a") as f:
+                    for i, (key, _) in enumerate(new):
+                        f.write(json.dumps({"key": key, "row": row + i}) + "\n")
+
+                self._refresh_index()
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+
+class EmbeddingCache:
+    """Text-embedding cache: in-memory LRU backed by per-model memory-mapped stores."""
+
+    def __init__(self, cache_dir: Optional[str] = None, max_memory_entries: int = DEFAULT_MEMORY_ENTRIES):
+        """Initialize the cache.
+
+        Args:
+            cache_dir: On-disk directory (None reads COMFYGEN_EMBEDDING_CACHE_DIR / default,
+                "" disables persistence)
+            max_memory_entries: Maximum embeddings kept in the in-memory LRU
+        """
+        if cache_dir is None:
+            self.cache_dir = _default_cache_dir()
+        else:
+            self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.max_memory_entries = max_memory_entries
+
+        self._lock = threading.Lock()
+        self._memory: OrderedDict[tuple, np.ndarray] = OrderedDict()
+        self._stores: Dict[str, Optional[_DiskStore]] = {}
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _store(self, model_id: str) -> Optional[_DiskStore]:
+        """Get the disk store for a model, disabling persistence on I/O errors."""
+        if self.cache_dir is None:
+            return None
+        if model_id not in self._stores:
+            try:
+                self._stores[model_id] = _DiskStore(self.cache_dir / model_id.replace("/", "--"))
+            except (OSError, ValueError) as e:
+                print(f"[WARN] Embedding cache unavailable at {self.cache_dir}: {e}")
+                self._stores[model_id] = None
+        return self._stores[model_id]
+
+    def _remember(self, key: tuple, vector: np.ndarray) -> None:
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def get_many(self, model_id: str, texts: List[str]) -> List[Optional[np.ndarray]]:
+        """Look up embeddings for many chunks.
+
+        Args:
+            model_id: Model identifier (e.g. "openai/clip-vit-base-patch32")
+            texts: Chunk texts
+
+        Returns:
+            List aligned with texts; None where the embedding is not cached
+        """
+        results: List[Optional[np.ndarray]] = []
+        with self._lock:
+            store = self._store(model_id)
+            for text in texts:
+                key = (model_id, _text_key(text))
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                elif store is not None:
+                    try:
+                        vector = store.lookup(key[1])
+                    except (OSError, ValueError) as e:
+                        print(f"[WARN] Embedding cache read failed: {e}")
+                        vector = None
+                    if vector is not None:
+                        self.disk_hits += 1
+                        self._remember(key, vector)
+                if vector is None:
+                    self.misses += 1
+                results.append(vector)
+        return results
+
+    def get(self, model_id: str, text: str) -> Optional[np.ndarray]:
+        """Look up the embedding for a single chunk (None if not cached)."""
+        return self.get_many(model_id, [text])[0]
+
+    def put_many(self, model_id: str, texts: List[str], vectors: np.ndarray) -> None:
+        """Store embeddings for many chunks in memory and on disk.
+
+        Args:
+            model_id: Model identifier
+            texts: Chunk texts
+            vectors: Array of shape (len(texts), dim)
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        keys = [_text_key(text) for text in texts]
+        with self._lock:
+            for key, vector in zip(keys, vectors):
+                self._remember((model_id, key), vector)
+            store = self._store(model_id)
+            if store is not None:
+                try:
+                    store.append(keys, vectors)
+                except OSError as e:
+                    print(f"[WARN] Embedding cache write failed: {e}")
+
+    def put(self, model_id: str, text: str, vector: np.ndarray) -> None:
+        """Store the embedding for a single chunk."""
+        self.put_many(model_id, [text], np.asarray(vector).reshape(1, -1))
+
+    def clear_memory(self) -> None:
+        """Drop the in-memory LRU (the on-disk store is kept)."""
+        with self._lock:
+            self._memory.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Report cache statistics.
+
+        Returns:
+            Dictionary with memory_hits, disk_hits, misses, memory_entries,
+            cache_dir and per-model disk_entries
+        """
+        with self._lock:
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "memory_entries": len(self._memory),
+                "cache_dir": str(self.cache_dir) if self.cache_dir else None,
+                "disk_entries": {model_id: len(store) for model_id, store in self._stores.items() if store is not None},
+            }
+
+
+# Global instance shared by all embedders in this process
+_global_embedding_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """Get or create the process-wide EmbeddingCache (thread-safe).
+
+    Returns:
+        Global EmbeddingCache instance
+    """
+    global _global_embedding_cache
+    if _global_embedding_cache is None:
+        with _cache_lock:
+            # Double-check locking pattern
+            if _global_embedding_cache is None:
+                _global_embedding_cache = EmbeddingCache()
+    return _global_embedding_cache
+
+
+def collect_catalog_texts(catalog: Dict[str, Any], presets: Optional[Dict[str, Any]] = None) -> List[str]:
+    """Collect the texts worth precomputing from prompt_catalog.yaml / presets.yaml.
+
+    Only whole prompts are collected. Each is chunked by chunk_prompt when
+    encoded, which yields the same chunks a generation using it looks up.
+    quality_boosters keywords are left out: they are appended to user prompts
+    and land inside larger token windows, so a standalone keyword chunk would
+    almost never be hit.
+
+    Args:
+        catalog: Parsed prompt_catalog.yaml
+        presets: Parsed presets.yaml (optional)
+
+    Returns:
+        Deduplicated list of texts: negative_presets prompts, saved_prompts
+        positives/negatives, nsfw_negative_template, the presets
+        default_negative_prompt and DEFAULT_SD_NEGATIVE_PROMPT
+    """
+    texts = []
+
+    for preset in (catalog.get("negative_presets") or {}).values():
+        if isinstance(preset, dict) and preset.get("prompt"):
+            texts.append(preset["prompt"])
+
+    for saved in (catalog.get("saved_prompts") or {}).values():
+        if isinstance(saved, dict):
+            for field in ("positive", "negative"):
+                if saved.get(field):
+                    texts.append(saved[field].strip())
+
+    if catalog.get("nsfw_negative_template"):
+        texts.append(catalog["nsfw_negative_template"])
+
+    if presets and presets.get("default_negative_prompt"):
+        texts.append(presets["default_negative_prompt"])
+
+    texts.append(DEFAULT_SD_NEGATIVE_PROMPT)
+
+    seen = set()
+    unique = []
+    for text in texts:
+        if normalize_text(text) not in seen:
+            seen.add(normalize_text(text))
+            unique.append(text)
+    return unique
+
+
+def warm_cache(catalog_path: str, presets_path: Optional[str] = None, model_name: Optional[str] = None) -> int:
+    """Precompute embeddings for catalog texts into the persistent cache.
+
+    Args:
+        catalog_path: Path to prompt_catalog.yaml
+        presets_path: Optional path to presets.yaml
+        model_name: CLIP model to warm (defaults to the shared validation model)
+
+    Returns:
+        Number of texts encoded
+    """
+    import yaml
+
+    from utils.clip_embedder import DEFAULT_CLIP_MODEL, get_clip_embedder
+
+    with open(catalog_path, encoding="utf-8") as f:
+        catalog = yaml.safe_load(f) or {}
+
+    presets = None
+    if presets_path and Path(presets_path).exists():
+        with open(presets_path, encoding="utf-8") as f:
+            presets = yaml.safe_load(f) or {}
+
+    texts = collect_catalog_texts(catalog, presets)
+
+    embedder = get_clip_embedder(model_name or DEFAULT_CLIP_MODEL)
+    embedder.embed_texts(texts)
+    return len(texts)
+
+
+def main():
+    """CLI entry point for warming and inspecting the embedding cache."""
+    import argparse
+
+    repo_root = Path(__file__).parent.parent
+
+    parser = argparse.ArgumentParser(description="Persistent CLIP text-embedding cache")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    warm_parser = subparsers.add_parser("warm", help="Precompute embeddings from prompt_catalog.yaml")
+    warm_parser.add_argument("--catalog", default=str(repo_root / "prompt_catalog.yaml"), help="Prompt catalog path")
+    warm_parser.add_argument("--presets", default=str(repo_root / "presets.yaml"), help="Presets path")
+    warm_parser.add_argument("--model", default=None, help="CLIP model (default: openai/clip-vit-base-patch32)")
+
+    subparsers.add_parser("stats", help="Show cache location and size")
+
+    args = parser.parse_args()
+    cache = get_embedding_cache()
+
+    if args.command == "warm":
+        from utils.clip_embedder import CLIP_AVAILABLE
+
+        if not CLIP_AVAILABLE:
+            print("[ERROR] CLIP dependencies not available. Install with: pip install torch transformers pillow")
+            return 1
+        if cache.cache_dir is None:
+            print("[WARN] Persistent cache disabled (COMFYGEN_EMBEDDING_CACHE=0), warming memory only")
+
+        count = warm_cache(args.catalog, args.presets, args.model)
+        stats = cache.stats()
+        print(f"[OK] Warmed {count} texts ({stats['misses']} chunks encoded, {stats['disk_hits']} already on disk)")
+        print(f"[INFO] Cache directory: {stats['cache_dir']}")
+        return 0
+
+    if cache.cache_dir is None or not cache.cache_dir.exists():
+        print("[INFO] Embedding cache is empty")
+        return 0
+    print(f"[INFO] Cache directory: {cache.cache_dir}")
+    for model_dir in sorted(p for p in cache.cache_dir.iterdir() if p.is_dir()):
+        store = _DiskStore(model_dir)
+        print(f"  {model_dir.name}: {len(store)} embeddings (dim {store.dim})")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""Decoded image shared across all validators.
+
+A full validation run (--validate --validate-person-count --validate-pose
+--validate-content --quality-score) used to decode the same PNG many times:
+PIL in both CLIP paths, YOLO by path, cv2.imread in pose validation, and
+BLIP once per caption/question. An ImageContext is created once after
+download_output and passed to every validator instead of the path:
+- The file is read once; its SHA-256 hash and pixels come from the same bytes
+- The RGB array is decoded once and exposed read-only
+- BGR (OpenCV/YOLO) and PIL views are derived once and cached
+- Resized variants (e.g. CLIP 224 shortest edge, BLIP 384x384) are cached by size
+
+All validators still accept plain paths; ``ImageContext.coerce()`` wraps
+them so existing callers keep working.
+
+Usage:
+    from utils.image_context import ImageContext
+
+    ctx = ImageContext.from_path("output.png")
+    validate_image(ctx, prompt)
+    score_image(ctx, prompt)
+"""
+
+import hashlib
+import io
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Union
+
+import numpy as np
+
+try:
+    from PIL import Image
+
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+
+class ImageContext:
+    """Lazily decoded image with cached conversions, shared by validators."""
+
+    def __init__(self, path: Optional[str] = None, data: Optional[bytes] = None, rgb: Optional[np.ndarray] = None):
+        """Initialize a context from a file path, encoded bytes or an RGB array.
+
+        Prefer the ``from_path`` / ``from_bytes`` / ``from_array`` constructors.
+
+        Args:
+            path: Image file path (also used for display and error messages)
+            data: Encoded image bytes (PNG/JPEG/...)
+            rgb: Decoded HxWx3 uint8 RGB array
+        """
+        self.path = str(path) if path is not None else None
+        self._data = data
+        self._rgb = rgb
+        self._sha256: Optional[str] = None
+        self._file_key: Optional[tuple] = None
+        self._derived: Dict[Any, Any] = {}
+        self._lock = threading.RLock()
+
+        if rgb is not None:
+            self._rgb = self._freeze(rgb)
+
+    @classmethod
+    def from_path(cls, path: str) -> "ImageContext":
+        """Create a context for an image file (read and decoded on first use)."""
+        return cls(path=path)
+
+    @classmethod
+    def from_bytes(cls, data: bytes, path: Optional[str] = None) -> "ImageContext":
+        """Create a context from encoded image bytes (e.g. a download buffer)."""
+        return cls(path=path, data=data)
+
+    @classmethod
+    def from_array(cls, rgb: np.ndarray, path: Optional[str] = None) -> "ImageContext":
+        """Create a context from a decoded HxWx3 uint8 RGB array."""
+        return cls(path=path, rgb=rgb)
+
+    @classmethod
+    def coerce(cls, image: Union[str, Path, "ImageContext"]) -> "ImageContext":
+        """Return image unchanged if it is already a context, else wrap the path."""
+        if isinstance(image, ImageContext):
+            return image
+        return cls.from_path(str(image))
+
+    @staticmethod
+    def _freeze(array: np.ndarray) -> np.ndarray:
+        """Mark an array read-only so validators cannot mutate shared pixels."""
+        array = np.asarray(array)
+        array.flags.writeable = False
+        return array
+
+    @property
+    def name(self) -> str:
+        """Display name for messages (the path, or "<memory>")."""
+        return self.path or "<memory>"
+
+    @property
+    def exists(self) -> bool:
+        """Whether the image is available (in memory or as an existing file)."""
+        return self._rgb is not None or self._data is not None or (self.path is not None and Path(self.path).exists())
+
+    @property
+    def data(self) -> bytes:
+        """Encoded file bytes (read from disk once)."""
+        with self._lock:
+            if self._data is None:
+                if self.path is None:
+                    raise ValueError("ImageContext has no encoded bytes")
+                path = Path(self.path)
+                stat = path.stat()
+                self._file_key = (str(path.resolve()), stat.st_mtime_ns, stat.st_size)
+                self._data = path.read_bytes()
+            return self._data
+
+    @property
+    def sha256(self) -> str:
+        """SHA-256 hex digest of the encoded bytes (or raw pixels for array-only contexts)."""
+        with self._lock:
+            if self._sha256 is None:
+                if self._data is not None or self.path is not None:
+                    self._sha256 = hashlib.sha256(self.data).hexdigest()
+                else:
+                    self._sha256 = hashlib.sha256(self._rgb.tobytes()).hexdigest()
+            return self._sha256
+
+    @property
+    def cache_key(self) -> tuple:
+        """Key for per-image caches: (path, mtime, size) for files, else the content hash."""
+        with self._lock:
+            if self.path is not None and self._data is None and self._file_key is None:
+                path = Path(self.path)
+                stat = path.stat()
+                self._file_key = (str(path.resolve()), stat.st_mtime_ns, stat.st_size)
+            if self._file_key is not None:
+                return self._file_key
+            return ("sha256", self.sha256)
+
+    @property
+    def rgb(self) -> np.ndarray:
+        """Decoded HxWx3 uint8 RGB array (read-only, decoded once)."""
+        with self._lock:
+            if self._rgb is None:
+                with Image.open(io.BytesIO(self.data)) as image:
+                    self._rgb = self._freeze(np.asarray(image.convert("RGB")))
+            return self._rgb
+
+    @property
+    def width(self) -> int:
+        return int(self.rgb.shape[1])
+
+    @property
+    def height(self) -> int:
+        return int(self.rgb.shape[0])
+
+    def derived(self, key: Any, factory: Callable[["ImageContext"], Any]) -> Any:
+        """Return a cached derived representation, computing it once with factory(self).
+
+        Used for representations owned by a single validator (e.g. the torch
+        tensor pyiqa metrics share).
+        """
+        with self._lock:
+            if key not in self._derived:
+                self._derived[key] = factory(self)
+            return self._derived[key]
+
+    @property
+    def bgr(self) -> np.ndarray:
+        """Contiguous BGR array for OpenCV/YOLO (converted once)."""
+        return self.derived("bgr", lambda ctx: self._freeze(np.ascontiguousarray(ctx.rgb[..., ::-1])))
+
+    @property
+    def pil(self) -> "Image.Image":
+        """PIL RGB image view of the decoded pixels (created once)."""
+        return self.derived("pil", lambda ctx: Image.fromarray(ctx.rgb))
+
+    def resized(self, width: int, height: int) -> "Image.Image":
+        """PIL image resized to exactly width x height with bicubic resampling (cached)."""
+        if (width, height) == (self.width, self.height):
+            return self.pil
+        return self.derived(("resized", width, height), lambda ctx: ctx.pil.resize((width, height), Image.BICUBIC))
+
+    def resized_shortest(self, edge: int) -> "Image.Image":
+        """PIL image resized so its shortest side is edge, keeping aspect ratio (cached)."""
+        # Same rounding as transformers' get_resize_output_image_size, so the processor's resize is a no-op
+        if self.width <= self.height:
+            return self.resized(edge, max(1, int(edge * self.height / self.width)))
+        return self.resized(max(1, int(edge * self.width / self.height)), edge)
+
+    def for_processor(self, processor: Any) -> "Image.Image":
+        """PIL input pre-resized to what a HuggingFace image processor would resize to.
+
+        CLIP processors resize the shortest edge (e.g. 224) and BLIP processors
+        resize to a fixed height x width (384x384), both bicubic. Handing them
+        the cached variant makes their own resize a no-op, so the same variant
+        is reused across calls instead of being recomputed from full size.
+
+        Args:
+            processor: HuggingFace processor (or image processor)
+
+        Returns:
+            PIL image (the full-size view if the target size is unknown)
+        """
+        image_processor = getattr(processor, "image_processor", processor)
+        size = getattr(image_processor, "size", None)
+        if not isinstance(size, dict) or not getattr(image_processor, "do_resize", True):
+            return self.pil
+        if "shortest_edge" in size:
+            return self.resized_shortest(int(size["shortest_edge"]))
+        if "height" in size and "width" in size:
+            return self.resized(int(size["width"]), int(size["height"]))
+        return self.pil
+
+    def __repr__(self) -> str:
+        return f"ImageContext({self.name!r})"
@@ -210,28 +210,21 @@ def read_metadata_from_png(image_path: str) -> Optional[Dict[str, Any]]:
 def get_comfyui_version() -> Optional[str]:
     """Get ComfyUI server version.
 
-    Queries the ComfyUI API to get the server version information.
+    Uses the shared ComfyUI transport, which reuses the /system_stats response
+    from the availability check instead of making another round trip.
 
     Returns:
         str: Version string if available, None otherwise
     """
     try:
-        import os
+        from clients.comfyui_transport import get_transport
 
-        import requests
-
-        # ComfyUI host from environment or default
-        comfyui_host = os.getenv("COMFYUI_HOST", "http://192.168.1.215:8188")
-
-        response = requests.get(f"{comfyui_host}/system_stats", timeout=5)
-
-        if response.status_code == 200:
-            stats = response.json()
-            # ComfyUI doesn't always expose version in system_stats
-            # Try to get it from the response or return a placeholder
-            return stats.get("version", "unknown")
+        stats = get_transport().system_stats()
+        if stats is None:
+            return None
 
-        return None
+        # Newer servers report system.comfyui_version; older ones may not expose a version
+        return stats.get("system", {}).get("comfyui_version") or stats.get("version", "unknown")
 
     except Exception as e:
         print(f"[WARN] Failed to get ComfyUI version: {e}")
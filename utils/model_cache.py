@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""Process-wide registry for heavyweight validation and scoring models.
+
+CLIP, pyiqa metrics, YOLO, MediaPipe and BLIP each take seconds to load and
+hundreds of megabytes of RAM. Before this module existed, every call to
+``validate_image()`` or ``score_image()`` constructed a fresh validator and
+reloaded its models, so a 3-attempt refinement run loaded everything three
+times.
+
+All model handles used by validation.py, quality.py, content_validator.py and
+pose_validation.py are obtained through a single ``ModelCache``:
+- Models are loaded lazily, once per process, on first use
+- Resident models are tracked in LRU order and evicted when the configured
+  RAM budget is exceeded; an entry's optional ``on_evict`` hook then closes
+  or releases the model (e.g. MediaPipe landmarkers)
+- Load time and hit/miss statistics are recorded per model
+
+Validators look models up here on every use instead of keeping them as
+attributes, so dropping the cache's reference is what frees an evicted model.
+
+Usage:
+    from utils.model_cache import get_model_cache
+
+    cache = get_model_cache()
+    model = cache.get("clip:openai/clip-vit-base-patch32", lambda: CLIPModel.from_pretrained(...))
+    print(cache.stats())
+
+The RAM budget defaults to COMFYGEN_MODEL_CACHE_MB (or 8192 MB) and can be
+changed at runtime with ``set_budget_mb()``.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Default RAM budget for resident models (MB). Override with COMFYGEN_MODEL_CACHE_MB.
+DEFAULT_RAM_BUDGET_MB = 8192.0
+
+
+def _default_budget_mb() -> float:
+    """Read the RAM budget from the environment, falling back to the default."""
+    value = os.getenv("COMFYGEN_MODEL_CACHE_MB")
+    if value:
+        try:
+            return float(value)
+        except ValueError:
+            print(f"[WARN] Invalid COMFYGEN_MODEL_CACHE_MB value: {value!r}, using {DEFAULT_RAM_BUDGET_MB:.0f}")
+    return DEFAULT_RAM_BUDGET_MB
+
+
+def estimate_model_size(obj: Any) -> int:
+    """Estimate the memory footprint of a model handle in bytes.
+
+    Handles torch modules (parameters + buffers), objects that wrap a module
+    in a ``.model`` attribute (ultralytics YOLO), and tuples/lists/dicts of
+    either. Anything else (processors, tokenizers, MediaPipe tasks) counts as 0.
+
+    Args:
+        obj: Model handle returned by a loader
+
+    Returns:
+        Estimated size in bytes
+    """
+    if obj is None:
+        return 0
+
+    if isinstance(obj, (tuple, list)):
+        return sum(estimate_model_size(item) for item in obj)
+
+    if isinstance(obj, dict):
+        return sum(estimate_model_size(item) for item in obj.values())
+
+    if hasattr(obj, "parameters") and callable(obj.parameters):
+        try:
+            total = sum(p.numel() * p.element_size() for p in obj.parameters())
+            if hasattr(obj, "buffers") and callable(obj.buffers):
+                total += sum(b.numel() * b.element_size() for b in obj.buffers())
+            return int(total)
+        except Exception:
+            return 0
+
+    inner = getattr(obj, "model", None)
+    if inner is not None and inner is not obj:
+        return estimate_model_size(inner)
+
+    return 0
+
+
+class ModelCache:
+    """Thread-safe LRU registry of loaded models with a RAM budget."""
+
+    def __init__(self, ram_budget_mb: Optional[float] = None):
+        """Initialize an empty cache.
+
+        Args:
+            ram_budget_mb: Maximum resident model size in MB (None reads COMFYGEN_MODEL_CACHE_MB)
+        """
+        self.ram_budget_mb = ram_budget_mb if ram_budget_mb is not None else _default_budget_mb()
+
+        self._entries: OrderedDict[str, Dict[str, Any]] = OrderedDict()
+        self._lock = threading.RLock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self._inference_locks: Dict[str, threading.Lock] = {}
+
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._load_times: Dict[str, float] = {}
+        self._load_counts: Dict[str, int] = {}
+
+    def _key_lock(self, key: str) -> threading.Lock:
+        """Get the lock that serializes loading of a single key."""
+        with self._lock:
+            if key not in self._key_locks:
+                self._key_locks[key] = threading.Lock()
+            return self._key_locks[key]
+
+    def inference_lock(self, key: str) -> threading.Lock:
+        """Get the lock that serializes inference calls on a single model.
+
+        Ultralytics predictors and MediaPipe landmarkers keep per-call state,
+        so validators running concurrently (see utils.validation_runner) must
+        not call the same instance at once.
+
+        Args:
+            key: Model identifier (e.g. "yolo:yolov8n.pt")
+
+        Returns:
+            Lock shared by all users of that model
+        """
+        with self._lock:
+            if key not in self._inference_locks:
+                self._inference_locks[key] = threading.Lock()
+            return self._inference_locks[key]
+
+    def _lookup(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the entry for key and mark it most recently used."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+            return entry
+
+    def get(
+        self,
+        key: str,
+        loader: Callable[[], Any],
+        size_bytes: Optional[int] = None,
+        on_evict: Optional[Callable[[Any], None]] = None,
+    ) -> Any:
+        """Return the model for key, loading it on first use.
+
+        Concurrent callers asking for the same key wait for a single load
+        instead of loading the model twice.
+
+        Args:
+            key: Unique model identifier (e.g. "clip:openai/clip-vit-base-patch32")
+            loader: Zero-argument callable that loads the model
+            size_bytes: Optional explicit size; estimated from the handle if None
+            on_evict: Optional callable given the model when it leaves the cache
+                (budget eviction, ``evict`` or ``clear``), e.g. to close it
+
+        Returns:
+            The loaded model handle
+
+        Raises:
+            Any exception raised by the loader (nothing is cached on failure)
+        """
+        entry = self._lookup(key)
+        if entry is not None:
+            return entry["value"]
+
+        with self._key_lock(key):
+            # Another thread may have finished loading while we waited
+            entry = self._lookup(key)
+            if entry is not None:
+                return entry["value"]
+
+            with self._lock:
+                self._misses += 1
+
+            start = time.perf_counter()
+            value = loader()
+            elapsed = time.perf_counter() - start
+
+            if size_bytes is None:
+                size_bytes = estimate_model_size(value)
+
+            with self._lock:
+                self._entries[key] = {
+                    "value": value,
+                    "size_bytes": int(size_bytes),
+                    "loaded_at": time.time(),
+                    "on_evict": on_evict,
+                }
+                self._entries.move_to_end(key)
+                self._load_times[key] = self._load_times.get(key, 0.0) + elapsed
+                self._load_counts[key] = self._load_counts.get(key, 0) + 1
+                evicted = self._evict_over_budget(keep=key)
+            self._release(evicted)
+
+            return value
+
+    def _evict_over_budget(self, keep: Optional[str] = None) -> List[Tuple[str, Dict[str, Any]]]:
+        """Evict least recently used entries until the cache fits its budget.
+
+        The entry named by ``keep`` is never evicted, so a single model larger
+        than the budget still stays resident until something else is loaded.
+        Must be called with ``self._lock`` held; pass the result to ``_release``
+        once the lock is released.
+
+        Returns:
+            Evicted (key, entry) pairs
+        """
+        budget_bytes = self.ram_budget_mb * 1024 * 1024
+        evicted = []
+        for key in list(self._entries.keys()):
+            if self._resident_bytes() <= budget_bytes:
+                break
+            if key == keep:
+                continue
+            evicted.append((key, self._entries.pop(key)))
+            self._evictions += 1
+            print(f"[INFO] Evicted model '{key}' from cache (RAM budget {self.ram_budget_mb:.0f} MB)")
+        return evicted
+
+    @staticmethod
+    def _release(evicted: List[Tuple[str, Dict[str, Any]]]) -> None:
+        """Run the on_evict hooks of removed entries (outside the cache lock, as hooks may block)."""
+        for key, entry in evicted:
+            on_evict = entry.get("on_evict")
+            if on_evict is None:
+                continue
+            try:
+                on_evict(entry["value"])
+            except Exception as e:
+                print(f"[WARN] Failed to release evicted model '{key}': {e}")
+
+    def _resident_bytes(self) -> int:
+        """Total size of resident entries in bytes."""
+        return sum(entry["size_bytes"] for entry in self._entries.values())
+
+    def contains(self, key: str) -> bool:
+        """Check whether a model is resident without touching LRU order or stats."""
+        with self._lock:
+            return key in self._entries
+
+    def evict(self, key: str) -> bool:
+        """Explicitly drop a model from the cache.
+
+        Args:
+            key: Model identifier
+
+        Returns:
+            True if the model was resident, False otherwise
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._evictions += 1
+        if entry is None:
+            return False
+        self._release([(key, entry)])
+        return True
+
+    def clear(self) -> None:
+        """Drop all resident models (statistics are kept)."""
+        with self._lock:
+            evicted = list(self._entries.items())
+            self._entries.clear()
+        self._release(evicted)
+
+    def set_budget_mb(self, ram_budget_mb: float) -> None:
+        """Change the RAM budget, evicting immediately if now over budget.
+
+        Args:
+            ram_budget_mb: New budget in MB
+        """
+        with self._lock:
+            self.ram_budget_mb = float(ram_budget_mb)
+            evicted = self._evict_over_budget()
+        self._release(evicted)
+
+    def stats(self) -> Dict[str, Any]:
+        """Report cache statistics.
+
+        Returns:
+            Dictionary with:
+                - hits / misses / evictions: Counters since process start
+                - resident_mb: Size of currently loaded models
+                - budget_mb: Configured RAM budget
+                - models: Per-model dict with resident flag, size_mb, loads and load_seconds
+        """
+        with self._lock:
+            models = {}
+            for key in set(self._load_times) | set(self._entries):
+                entry = self._entries.get(key)
+                models[key] = {
+                    "resident": entry is not None,
+                    "size_mb": round(entry["size_bytes"] / (1024 * 1024), 1) if entry else 0.0,
+                    "loads": self._load_counts.get(key, 0),
+                    "load_seconds": round(self._load_times.get(key, 0.0), 3),
+                }
+
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "resident_mb": round(self._resident_bytes() / (1024 * 1024), 1),
+                "budget_mb": self.ram_budget_mb,
+                "models": models,
+            }
+
+
+# Global instance shared by all validators in this process
+_global_model_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_model_cache() -> ModelCache:
+    """Get or create the process-wide ModelCache (thread-safe).
+
+    Returns:
+        Global ModelCache instance
+    """
+    global _global_model_cache
+    if _global_model_cache is None:
+        with _cache_lock:
+            # Double-check locking pattern
+            if _global_model_cache is None:
+                _global_model_cache = ModelCache()
+    return _global_model_cache
+
+
+def get_device() -> str:
+    """Get the torch device used for all cached models ("cuda" or "cpu")."""
+    try:
+        import torch
+
+        if torch.cuda.is_available():
+            return "cuda"
+    except ImportError:
+        pass
+    return "cpu"
@@ -16,11 +16,14 @@ Multi-person support:
 import sys
 import urllib.request
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, Optional, Union
 
 import cv2
 import numpy as np
 
+from utils.image_context import ImageContext
+from utils.model_cache import get_model_cache
+
 try:
     import mediapipe as mp
     from mediapipe.tasks import python as mp_tasks
@@ -65,17 +68,15 @@ CROP_PADDING_RATIO = 0.1
 POSE_LANDMARKER_MODEL = "pose_landmarker_lite.task"
 POSE_LANDMARKER_URL = "https://storage.googleapis.com/mediapipe-models/pose_landmarker/pose_landmarker_lite/float16/1/pose_landmarker_lite.task"
 
-# Module-level model caches
-_yolo_model = None
-_pose_landmarker = None
+# YOLO weights (shared with validation.py through the model cache)
+YOLO_WEIGHTS = "yolov8n.pt"
 
 
 def _get_yolo_model():
-    """Get or create cached YOLO model instance."""
-    global _yolo_model
-    if _yolo_model is None and YOLO_AVAILABLE:
-        _yolo_model = YOLO("yolov8n.pt")
-    return _yolo_model
+    """Get the process-wide YOLO model instance from the model cache."""
+    if not YOLO_AVAILABLE:
+        return None
+    return get_model_cache().get(f"yolo:{YOLO_WEIGHTS}", lambda: YOLO(YOLO_WEIGHTS))
 
 
 def _download_pose_model():
@@ -94,9 +95,11 @@ def _download_pose_model():
 
 
 def _get_pose_landmarker():
-    """Get or create cached MediaPipe Pose Landmarker instance."""
-    global _pose_landmarker
-    if _pose_landmarker is None and MEDIAPIPE_AVAILABLE:
+    """Get the process-wide MediaPipe Pose Landmarker instance from the model cache."""
+    if not MEDIAPIPE_AVAILABLE:
+        return None
+
+    def _load():
         model_path = _download_pose_model()
         base_options = mp_tasks.BaseOptions(model_asset_path=model_path)
         options = vision.PoseLandmarkerOptions(
@@ -104,8 +107,16 @@ def _get_pose_landmarker():
             output_segmentation_masks=False,
             num_poses=1,  # We run on cropped single-person images
         )
-        _pose_landmarker = vision.PoseLandmarker.create_from_options(options)
-    return _pose_landmarker
+        return vision.PoseLandmarker.create_from_options(options)
+
+    key = f"mediapipe:{POSE_LANDMARKER_MODEL}"
+
+    def _close(landmarker):
+        # Wait for an in-flight detect() before freeing the native graph
+        with get_model_cache().inference_lock(key):
+            landmarker.close()
+
+    return get_model_cache().get(key, _load, on_evict=_close)
 
 
 def detect_persons_yolo(image: np.ndarray, confidence: float = DEFAULT_PERSON_CONFIDENCE) -> list[dict]:
@@ -126,7 +137,9 @@ def detect_persons_yolo(image: np.ndarray, confidence: float = DEFAULT_PERSON_CO
     if model is None:
         return []
 
-    results = model(image, verbose=False)
+    # Serialized: CLIP person counting may share the model concurrently
+    with get_model_cache().inference_lock(f"yolo:{YOLO_WEIGHTS}"):
+        results = model(image, verbose=False)
 
     persons = []
     for result in results:
@@ -197,18 +210,25 @@ def estimate_pose_single(
     if not MEDIAPIPE_AVAILABLE:
         return {"detected": False, "error": "MediaPipe not available. Install with: pip install mediapipe"}
 
+    # Convert BGR to RGB for MediaPipe
+    return _estimate_pose_rgb(cv2.cvtColor(image, cv2.COLOR_BGR2RGB), visibility_threshold)
+
+
+def _estimate_pose_rgb(image_rgb: np.ndarray, visibility_threshold: float) -> dict[str, Any]:
+    """Run pose estimation on an RGB single-person image (see estimate_pose_single)."""
+    if not MEDIAPIPE_AVAILABLE:
+        return {"detected": False, "error": "MediaPipe not available. Install with: pip install mediapipe"}
+
     landmarker = _get_pose_landmarker()
     if landmarker is None:
         return {"detected": False, "error": "Failed to initialize MediaPipe pose detector"}
 
-    # Convert BGR to RGB for MediaPipe
-    image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-
-    # Create MediaPipe Image from numpy array
-    mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=image_rgb)
+    # Create MediaPipe Image from numpy array (needs its own contiguous buffer)
+    mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=np.ascontiguousarray(image_rgb))
 
     # Run pose detection
-    results = landmarker.detect(mp_image)
+    with get_model_cache().inference_lock(f"mediapipe:{POSE_LANDMARKER_MODEL}"):
+        results = landmarker.detect(mp_image)
 
     if not results.pose_landmarks or len(results.pose_landmarks) == 0:
         return {
@@ -269,7 +289,7 @@ def estimate_pose_single(
 
 
 def validate_pose(
-    image_path: str,
+    image_path: Union[str, ImageContext],
     expected_persons: Optional[int] = None,
     visibility_threshold: float = DEFAULT_VISIBILITY_THRESHOLD,
     person_confidence: float = DEFAULT_PERSON_CONFIDENCE,
@@ -281,8 +301,11 @@ def validate_pose(
     2. Runs MediaPipe pose estimation on each person
     3. Validates coherence and person count
 
+    With an ImageContext, YOLO and MediaPipe work on its already decoded
+    pixels instead of re-reading the file with cv2.imread.
+
     Args:
-        image_path: Path to image file
+        image_path: Path to image file or a shared ImageContext
         expected_persons: Expected number of persons (None = no validation)
         visibility_threshold: Min visibility for landmarks
         person_confidence: YOLO confidence threshold for person detection
@@ -306,12 +329,14 @@ def validate_pose(
         }
 
     # Load image
-    if not Path(image_path).exists():
-        return {"valid": False, "error": f"Image file not found: {image_path}", "person_count": None}
+    context = ImageContext.coerce(image_path)
+    if not context.exists:
+        return {"valid": False, "error": f"Image file not found: {context.name}", "person_count": None}
 
-    image = cv2.imread(image_path)
-    if image is None:
-        return {"valid": False, "error": f"Failed to load image: {image_path}", "person_count": None}
+    try:
+        image = context.bgr
+    except Exception:
+        return {"valid": False, "error": f"Failed to load image: {context.name}", "person_count": None}
 
     # Step 1: Detect persons with YOLO
     if YOLO_AVAILABLE:
@@ -343,11 +368,11 @@ def validate_pose(
     for i, person in enumerate(persons_detected):
         bbox = person["bbox"]
 
-        # Crop person region
-        cropped, adjusted_bbox = crop_person_region(image, bbox)
+        # Crop person region from the RGB pixels (MediaPipe wants RGB, no conversion needed)
+        cropped, adjusted_bbox = crop_person_region(context.rgb, bbox)
 
         # Run pose estimation on crop
-        pose_result = estimate_pose_single(cropped, visibility_threshold)
+        pose_result = _estimate_pose_rgb(cropped, visibility_threshold)
 
         # Add metadata
         pose_result["person_index"] = i
@@ -391,12 +416,15 @@ def validate_pose(
 
 
 def visualize_pose(
-    image_path: str, output_path: Optional[str] = None, draw_landmarks: bool = True, draw_bboxes: bool = True
+    image_path: Union[str, ImageContext],
+    output_path: Optional[str] = None,
+    draw_landmarks: bool = True,
+    draw_bboxes: bool = True,
 ) -> Optional[np.ndarray]:
     """Visualize pose estimation results on image.
 
     Args:
-        image_path: Path to input image
+        image_path: Path to input image or a shared ImageContext
         output_path: Path to save visualization (None = don't save)
         draw_landmarks: Whether to draw pose landmarks
         draw_bboxes: Whether to draw person bounding boxes
@@ -408,13 +436,16 @@ def visualize_pose(
         print("[ERROR] MediaPipe not available for visualization")
         return None
 
-    image = cv2.imread(image_path)
-    if image is None:
-        print(f"[ERROR] Failed to load image: {image_path}")
+    context = ImageContext.coerce(image_path)
+    try:
+        # Writable copy for drawing; the shared pixels stay untouched
+        image = context.bgr.copy()
+    except Exception:
+        print(f"[ERROR] Failed to load image: {context.name}")
         return None
 
     # Get pose validation results
-    results = validate_pose(image_path)
+    results = validate_pose(context)
 
     if "error" in results:
         print(f"[ERROR] {results['error']}")
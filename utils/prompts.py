@@ -0,0 +1,8 @@
+"""Prompt defaults shared by generate.py and the validation utilities.
+
+Kept free of heavy imports so modules such as utils.embedding_cache can read
+them without loading the generate.py CLI.
+"""
+
+# Negative prompt SD workflows use when neither --negative-prompt nor a preset sets one
+DEFAULT_SD_NEGATIVE_PROMPT = "bad quality, blurry, low resolution, watermark, text, deformed, ugly, duplicate"
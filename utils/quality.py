@@ -18,73 +18,88 @@ Usage:
 """
 
 import sys
-from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Union
+
+import numpy as np
 
 try:
     import pyiqa
     import torch
-    from PIL import Image
 
     PYIQA_AVAILABLE = True
 except ImportError:
     PYIQA_AVAILABLE = False
 
+from utils.image_context import ImageContext
+from utils.model_cache import get_device, get_model_cache
+
 # Try to import CLIP for prompt adherence scoring
 try:
-    from transformers import CLIPModel, CLIPProcessor
-
-    CLIP_AVAILABLE = True
+    from utils.clip_embedder import CLIP_AVAILABLE, DEFAULT_CLIP_MODEL, chunk_prompt, get_clip_embedder, load_clip
 except ImportError:
     CLIP_AVAILABLE = False
+    DEFAULT_CLIP_MODEL = "openai/clip-vit-base-patch32"
+
+# Same CLIP model as utils.validation so both share one embedder
+CLIP_MODEL_NAME = DEFAULT_CLIP_MODEL
+
+
+def _load_metric(name: str, device: str):
+    """Get a pyiqa metric from the process-wide model cache.
+
+    Args:
+        name: pyiqa metric name (brisque, niqe, laion_aes, topiq_nr)
+        device: Torch device to create the metric on
+
+    Returns:
+        pyiqa metric instance
+    """
+    return get_model_cache().get(f"pyiqa:{name}:{device}", lambda: pyiqa.create_metric(name, device=device))
 
 
 class QualityScorer:
     """Multi-dimensional quality scorer for generated images."""
 
     def __init__(self):
-        """Initialize quality scorer with pyiqa metrics and CLIP."""
+        """Initialize quality scorer with pyiqa metrics and CLIP.
+
+        Metrics are taken from the process-wide model cache, so constructing
+        several scorers only loads each metric once. They are looked up again
+        on every use rather than kept on the scorer, so a metric evicted under
+        the cache's RAM budget is actually freed (and reloaded when needed).
+        """
         if not PYIQA_AVAILABLE:
             raise RuntimeError("pyiqa not available. Install with: pip install pyiqa")
 
-        self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        self.device = get_device()
+        # Optional metrics that failed to load; not retried on every image
+        self._unavailable = set()
         print(f"[INFO] Loading quality metrics on {self.device}...")
 
         # Technical quality metrics (no-reference)
         # BRISQUE: Blind/Referenceless Image Spatial Quality Evaluator
         # Lower scores = better quality (0-100 range)
-        self.brisque = pyiqa.create_metric("brisque", device=self.device)
-
         # NIQE: Natural Image Quality Evaluator
         # Lower scores = better quality (measures deviation from natural statistics)
-        self.niqe = pyiqa.create_metric("niqe", device=self.device)
+        _load_metric("brisque", self.device)
+        _load_metric("niqe", self.device)
 
         # Aesthetic quality metric
         # LAION Aesthetic Predictor: predicts human aesthetic preferences
         # Higher scores = better aesthetics (typically 1-10 scale)
-        try:
-            self.laion_aes = pyiqa.create_metric("laion_aes", device=self.device)
-        except Exception as e:
-            print(f"[WARN] Failed to load LAION aesthetic predictor: {e}")
-            self.laion_aes = None
-
         # Detail/perceptual quality metric
         # TOPIQ: Task-Oriented Perceptual Image Quality
         # Higher scores = better perceptual quality (0-1 range typically)
-        try:
-            self.topiq = pyiqa.create_metric("topiq_nr", device=self.device)
-        except Exception as e:
-            print(f"[WARN] Failed to load TOPIQ metric: {e}")
-            self.topiq = None
+        self._optional_metric("laion_aes", "LAION aesthetic predictor")
+        self._optional_metric("topiq_nr", "TOPIQ metric")
 
-        # CLIP for prompt adherence (optional)
-        self.clip_model = None
-        self.clip_processor = None
+        # CLIP for prompt adherence (optional, shared with ImageValidator)
+        self.clip_embedder = None
         if CLIP_AVAILABLE:
             try:
                 print("[INFO] Loading CLIP model for prompt adherence...")
-                self.clip_model = CLIPModel.from_pretrained("openai/clip-vit-base-patch32").to(self.device)
-                self.clip_processor = CLIPProcessor.from_pretrained("openai/clip-vit-base-patch32")
+                load_clip(CLIP_MODEL_NAME)
+                self.clip_embedder = get_clip_embedder(CLIP_MODEL_NAME)
                 print("[OK] CLIP model loaded for prompt adherence scoring")
             except OSError as e:
                 print(f"[WARN] Failed to download CLIP model (network/cache issue): {e}")
@@ -95,6 +110,47 @@ class QualityScorer:
 
         print("[OK] Quality metrics loaded")
 
+    def _optional_metric(self, name: str, label: str):
+        """Get an optional metric from the model cache, or None if it cannot be loaded."""
+        if name in self._unavailable:
+            return None
+        try:
+            return _load_metric(name, self.device)
+        except Exception as e:
+            print(f"[WARN] Failed to load {label}: {e}")
+            self._unavailable.add(name)
+            return None
+
+    @property
+    def brisque(self):
+        """BRISQUE metric from the model cache."""
+        return _load_metric("brisque", self.device)
+
+    @property
+    def niqe(self):
+        """NIQE metric from the model cache."""
+        return _load_metric("niqe", self.device)
+
+    @property
+    def laion_aes(self):
+        """LAION aesthetic metric from the model cache (None if unavailable)."""
+        return self._optional_metric("laion_aes", "LAION aesthetic predictor")
+
+    @property
+    def topiq(self):
+        """TOPIQ metric from the model cache (None if unavailable)."""
+        return self._optional_metric("topiq_nr", "TOPIQ metric")
+
+    @property
+    def clip_model(self):
+        """CLIP model from the model cache (None without prompt adherence scoring)."""
+        return load_clip(CLIP_MODEL_NAME)[0] if self.clip_embedder else None
+
+    @property
+    def clip_processor(self):
+        """CLIP processor from the model cache (None without prompt adherence scoring)."""
+        return load_clip(CLIP_MODEL_NAME)[1] if self.clip_embedder else None
+
     def _normalize_brisque(self, score: float) -> float:
         """Normalize BRISQUE score to 0-10 scale (inverted, higher is better).
 
@@ -160,103 +216,34 @@ class QualityScorer:
 
         Args:
             prompt: The full text prompt
-            max_tokens: Maximum tokens per chunk (default 77 for CLIP)
+            max_tokens: Maximum tokens per chunk including BOS/EOS (default 77 for CLIP)
 
         Returns:
-            List of prompt chunks
+            List of prompt chunks (see utils.clip_embedder.chunk_prompt)
         """
-        # Simple word-based chunking (CLIP tokenizer will handle actual tokenization)
-        # We use a conservative estimate: ~4 chars per token on average
-        # 77 tokens * 4 chars = ~308 chars, but we'll be more conservative
-        words = prompt.split()
-        chunks = []
-        current_chunk = []
-        current_length = 0
-
-        # Aim for ~60-65 tokens per chunk to leave room for special tokens
-        max_chars_per_chunk = 250  # Conservative estimate
-
-        for word in words:
-            word_len = len(word) + 1  # +1 for space
-            if current_length + word_len > max_chars_per_chunk and current_chunk:
-                chunks.append(" ".join(current_chunk))
-                current_chunk = [word]
-                current_length = word_len
-            else:
-                current_chunk.append(word)
-                current_length += word_len
+        tokenizer = self.clip_embedder.get_tokenizer() if self.clip_embedder else None
+        return chunk_prompt(prompt, tokenizer=tokenizer, max_tokens=max_tokens - 2)
 
-        if current_chunk:
-            chunks.append(" ".join(current_chunk))
-
-        return chunks if chunks else [prompt]
-
-    def _compute_clip_score(self, image_path: str, prompt: str) -> float:
+    def _compute_clip_score(self, image_path: Union[str, ImageContext], prompt: str) -> float:
         """Compute CLIP similarity score between image and prompt.
 
-        Handles long prompts by chunking them (like AUTOMATIC1111/ComfyUI):
-        - Prompts > 77 tokens are split into chunks
-        - Each chunk is encoded separately
-        - Image embedding is compared against averaged text embedding
+        Uses the shared ClipEmbedder, so an image/prompt pair already scored
+        by ImageValidator is not encoded again, and prompt chunks seen in
+        earlier runs come from the persistent embedding cache. Long prompts are chunked and
+        the chunk embeddings averaged (like AUTOMATIC1111/ComfyUI).
 
         Args:
-            image_path: Path to the image
+            image_path: Path to the image or a shared ImageContext
             prompt: Text prompt to compare against
 
         Returns:
-            CLIP similarity score (0-1 range)
+            CLIP similarity score (0-1 range), cosine [0.15, 0.40] mapped to [0, 1]
         """
-        if not self.clip_model or not self.clip_processor:
+        if not self.clip_embedder:
             return 0.0
 
         try:
-            image = Image.open(image_path).convert("RGB")
-
-            # Chunk long prompts to handle > 77 token inputs
-            prompt_chunks = self._chunk_prompt(prompt)
-
-            if len(prompt_chunks) > 1:
-                print(f"[INFO] Long prompt detected, processing in {len(prompt_chunks)} chunks")
-
-            # Get image features (only need to do this once)
-            image_inputs = self.clip_processor(images=image, return_tensors="pt").to(self.device)
-
-            with torch.no_grad():
-                image_features = self.clip_model.get_image_features(**image_inputs)
-                image_features = image_features / image_features.norm(dim=-1, keepdim=True)
-
-                # Process each text chunk and average embeddings
-                text_embeddings = []
-                for chunk in prompt_chunks:
-                    text_inputs = self.clip_processor(
-                        text=[chunk],
-                        return_tensors="pt",
-                        padding=True,
-                        truncation=True,
-                        max_length=77,  # CLIP's limit
-                    ).to(self.device)
-
-                    text_features = self.clip_model.get_text_features(**text_inputs)
-                    text_features = text_features / text_features.norm(dim=-1, keepdim=True)
-                    text_embeddings.append(text_features)
-
-                # Average text embeddings across chunks
-                if len(text_embeddings) > 1:
-                    avg_text_features = torch.stack(text_embeddings).mean(dim=0)
-                    avg_text_features = avg_text_features / avg_text_features.norm(dim=-1, keepdim=True)
-                else:
-                    avg_text_features = text_embeddings[0]
-
-                # Compute cosine similarity
-                similarity = (image_features @ avg_text_features.T).squeeze()
-
-                # CLIP cosine similarity is in [-1, 1], but typically positive for relevant pairs
-                # Transform to [0, 1] range: good matches ~0.25-0.35, excellent ~0.35+
-                # We scale up since raw CLIP scores tend to be modest
-                # Map [0.15, 0.40] -> [0.0, 1.0] approximately
-                normalized_score = torch.clamp((similarity - 0.15) / 0.25, 0.0, 1.0)
-
-            return float(normalized_score)
+            return self.clip_embedder.score(image_path, prompt)["quality_score"]
         except Exception as e:
             print(f"[ERROR] Failed to compute CLIP score: {e}")
             import traceback
@@ -284,11 +271,24 @@ class QualityScorer:
         else:
             return "F"
 
-    def score_image(self, image_path: str, prompt: Optional[str] = None) -> Dict[str, Any]:
+    def _metric_input(self, image: ImageContext) -> "torch.Tensor":
+        """Convert the decoded image to the (1, 3, H, W) [0, 1] tensor pyiqa metrics take.
+
+        Built once per image and shared by BRISQUE, NIQE, LAION and TOPIQ,
+        instead of each metric re-reading the file from its path.
+        """
+
+        def _to_tensor(ctx: ImageContext):
+            array = ctx.rgb.astype(np.float32) / 255.0
+            return torch.from_numpy(array).permute(2, 0, 1).unsqueeze(0).to(self.device)
+
+        return image.derived(("pyiqa_tensor", self.device), _to_tensor)
+
+    def score_image(self, image_path: Union[str, ImageContext], prompt: Optional[str] = None) -> Dict[str, Any]:
         """Score image quality across multiple dimensions.
 
         Args:
-            image_path: Path to the image file
+            image_path: Path to the image file or a shared ImageContext
             prompt: Optional text prompt for prompt adherence scoring
 
         Returns:
@@ -308,16 +308,17 @@ class QualityScorer:
             }
         """
         # Validate image path
-        if not Path(image_path).exists():
-            return {"error": f"Image file not found: {image_path}", "composite_score": 0.0, "grade": "F"}
+        image = ImageContext.coerce(image_path)
+        if not image.exists:
+            return {"error": f"Image file not found: {image.name}", "composite_score": 0.0, "grade": "F"}
 
         try:
             # Load image
-            Image.open(image_path).convert("RGB")
+            metric_input = self._metric_input(image)
 
             # Compute technical quality
-            brisque_raw = float(self.brisque(image_path))
-            niqe_raw = float(self.niqe(image_path))
+            brisque_raw = float(self.brisque(metric_input))
+            niqe_raw = float(self.niqe(metric_input))
 
             brisque_norm = self._normalize_brisque(brisque_raw)
             niqe_norm = self._normalize_niqe(niqe_raw)
@@ -328,7 +329,7 @@ class QualityScorer:
             aesthetic_score = 5.0  # Default if metric not available
             if self.laion_aes:
                 try:
-                    laion_raw = float(self.laion_aes(image_path))
+                    laion_raw = float(self.laion_aes(metric_input))
                     aesthetic_score = self._normalize_laion_aes(laion_raw)
                 except Exception as e:
                     print(f"[WARN] LAION aesthetic scoring failed: {e}")
@@ -337,15 +338,15 @@ class QualityScorer:
             detail_score = 5.0  # Default if metric not available
             if self.topiq:
                 try:
-                    topiq_raw = float(self.topiq(image_path))
+                    topiq_raw = float(self.topiq(metric_input))
                     detail_score = self._normalize_topiq(topiq_raw)
                 except Exception as e:
                     print(f"[WARN] TOPIQ scoring failed: {e}")
 
             # Compute prompt adherence (if prompt provided)
             prompt_adherence_score = None
-            if prompt and self.clip_model:
-                clip_raw = self._compute_clip_score(image_path, prompt)
+            if prompt and self.clip_embedder:
+                clip_raw = self._compute_clip_score(image, prompt)
                 prompt_adherence_score = self._normalize_clip(clip_raw)
 
             # Compute composite score
@@ -403,14 +404,14 @@ class QualityScorer:
             return {"error": str(e), "composite_score": 0.0, "grade": "F"}
 
 
-def score_image(image_path: str, prompt: Optional[str] = None) -> Dict[str, Any]:
+def score_image(image_path: Union[str, ImageContext], prompt: Optional[str] = None) -> Dict[str, Any]:
     """Convenience function to score an image without creating a scorer instance.
 
-    This creates a new scorer for each call, which is less efficient for batch
-    scoring but simpler for single-use cases.
+    The pyiqa metrics and CLIP come from the process-wide model cache, so repeated
+    calls (e.g. inside a refinement loop) only load them once.
 
     Args:
-        image_path: Path to the image file
+        image_path: Path to the image file or a shared ImageContext
         prompt: Optional text prompt for prompt adherence scoring
 
     Returns:
@@ -13,25 +13,30 @@ to compute similarity scores between the image and text prompts.
 Person count validation uses YOLO for object detection to count people in images.
 """
 
+import math
 import re
 import sys
+import time
 from pathlib import Path
-from typing import TYPE_CHECKING, Any, Dict, Optional
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional
+
+from utils.clip_embedder import (
+    CLIP_AVAILABLE,
+    DEFAULT_CLIP_MODEL,
+    DEFAULT_IMAGE_BATCH_SIZE,
+    ImageInput,
+    chunk_prompt,
+    get_clip_embedder,
+    load_clip,
+)
+from utils.image_context import ImageContext
+from utils.model_cache import get_model_cache
 
 if TYPE_CHECKING:
     import torch as torch_type
 else:
     torch_type = None  # type: ignore
 
-try:
-    import torch
-    from PIL import Image
-    from transformers import CLIPModel, CLIPProcessor
-
-    CLIP_AVAILABLE = True
-except ImportError:
-    CLIP_AVAILABLE = False
-
 try:
     from ultralytics import YOLO
 
@@ -54,68 +59,69 @@ NUMBER_WORDS = {
     "ten": 10,
 }
 
-# Module-level YOLO model cache
-_yolo_model = None
+# File extensions scored by the batch CLI
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".webp"}
+
+# YOLO weights (shared with pose_validation.py through the model cache)
+YOLO_WEIGHTS = "yolov8n.pt"
+
+# Below this pixel standard deviation (0-255) an output is treated as blank
+MIN_PIXEL_STD = 2.0
 
 
 def _get_yolo_model():
-    """Get or create cached YOLO model instance."""
-    global _yolo_model
-    if _yolo_model is None and YOLO_AVAILABLE:
-        _yolo_model = YOLO("yolov8n.pt")
-    return _yolo_model
+    """Get the process-wide YOLO model instance from the model cache."""
+    if not YOLO_AVAILABLE:
+        return None
+    return get_model_cache().get(f"yolo:{YOLO_WEIGHTS}", lambda: YOLO(YOLO_WEIGHTS))
 
 
 class ImageValidator:
     """Validates generated images using CLIP semantic similarity."""
 
-    def __init__(self, model_name: str = "openai/clip-vit-base-patch32"):
+    def __init__(self, model_name: str = DEFAULT_CLIP_MODEL):
         """Initialize the validator with a CLIP model.
 
+        The model is taken from the process-wide model cache and embeddings go
+        through the shared ClipEmbedder, so constructing several validators (or
+        a QualityScorer alongside) only loads CLIP once and encodes each image
+        and prompt once.
+
         Args:
             model_name: HuggingFace model identifier for CLIP
         """
         if not CLIP_AVAILABLE:
             raise RuntimeError("CLIP dependencies not available. Install with: pip install torch transformers pillow")
 
-        self.device = "cuda" if torch.cuda.is_available() else "cpu"
-        print(f"[INFO] Loading CLIP model on {self.device}...")
-        self.model = CLIPModel.from_pretrained(model_name).to(self.device)
-        self.processor = CLIPProcessor.from_pretrained(model_name)
-        print("[OK] CLIP model loaded")
+        self.model_name = model_name
+        # Load now so a missing model fails here; later uses look it up again
+        _, _, self.device = load_clip(model_name)
+        self.embedder = get_clip_embedder(model_name)
+
+    @property
+    def model(self):
+        """CLIP model from the model cache (not kept on the validator, so eviction frees it)."""
+        return load_clip(self.model_name)[0]
+
+    @property
+    def processor(self):
+        """CLIP processor from the model cache."""
+        return load_clip(self.model_name)[1]
 
     def _chunk_prompt(self, prompt: str, max_chars: int = 250) -> list[str]:
         """Split a long prompt into chunks that fit within CLIP's token limit.
 
-        CLIP has a 77-token limit. This function splits long prompts into
-        manageable chunks that are processed separately and averaged.
+        Chunk boundaries come from the CLIP tokenizer's real token counts;
+        max_chars is only used if no tokenizer is available.
 
         Args:
             prompt: The full text prompt
-            max_chars: Maximum characters per chunk (conservative token estimate)
+            max_chars: Maximum characters per chunk (fallback estimate)
 
         Returns:
-            List of prompt chunks
+            List of prompt chunks (see utils.clip_embedder.chunk_prompt)
         """
-        words = prompt.split()
-        chunks = []
-        current_chunk = []
-        current_length = 0
-
-        for word in words:
-            word_len = len(word) + 1  # +1 for space
-            if current_length + word_len > max_chars and current_chunk:
-                chunks.append(" ".join(current_chunk))
-                current_chunk = [word]
-                current_length = word_len
-            else:
-                current_chunk.append(word)
-                current_length += word_len
-
-        if current_chunk:
-            chunks.append(" ".join(current_chunk))
-
-        return chunks if chunks else [prompt]
+        return chunk_prompt(prompt, max_chars, tokenizer=self.embedder.get_tokenizer())
 
     def _get_text_embedding(self, prompt: str):
         """Get averaged text embedding for a prompt, handling long prompts via chunking.
@@ -123,43 +129,25 @@ class ImageValidator:
         Args:
             prompt: Text prompt (can be longer than 77 tokens)
 
+        Chunk embeddings come from the persistent embedding cache when the
+        same text (e.g. a default negative prompt) was encoded before.
+
         Returns:
-            Normalized text embedding tensor
+            Normalized 1-D text embedding (numpy array, cached per prompt)
         """
-        chunks = self._chunk_prompt(prompt)
-
-        if len(chunks) > 1:
-            print(f"[INFO] Processing prompt in {len(chunks)} chunks (long prompt)")
-
-        embeddings = []
-        for chunk in chunks:
-            inputs = self.processor(text=[chunk], return_tensors="pt", padding=True, truncation=True, max_length=77).to(
-                self.device
-            )
-
-            with torch.no_grad():
-                text_features = self.model.get_text_features(**inputs)
-                text_features = text_features / text_features.norm(dim=-1, keepdim=True)
-                embeddings.append(text_features)
-
-        # Average embeddings if multiple chunks
-        if len(embeddings) > 1:
-            avg_embedding = torch.stack(embeddings).mean(dim=0)
-            avg_embedding = avg_embedding / avg_embedding.norm(dim=-1, keepdim=True)
-            return avg_embedding
-        else:
-            return embeddings[0]
+        return self.embedder.embed_text(prompt)
 
     def compute_clip_score(
-        self, image_path: str, positive_prompt: str, negative_prompt: Optional[str] = None
+        self, image_path: ImageInput, positive_prompt: str, negative_prompt: Optional[str] = None
     ) -> Dict[str, float]:
         """Compute CLIP similarity scores for an image.
 
-        Handles long prompts by chunking them into 77-token segments,
-        processing each separately, and averaging the embeddings.
+        Handles long prompts by chunking them into 77-token segments, encoding
+        all chunks of both prompts in one batch, and averaging the embeddings.
+        The image and prompt embeddings are shared with QualityScorer.
 
         Args:
-            image_path: Path to the generated image
+            image_path: Path to the generated image or a shared ImageContext
             positive_prompt: The positive text prompt used for generation
             negative_prompt: Optional negative prompt to check against
 
@@ -171,36 +159,16 @@ class ImageValidator:
         """
         try:
             # Validate that the image file exists
-            if not Path(image_path).exists():
-                return {"positive_score": 0.0, "error": f"Image file not found: {image_path}"}
-
-            # Load image
-            image = Image.open(image_path).convert("RGB")
-
-            # Get image embedding
-            image_inputs = self.processor(images=image, return_tensors="pt").to(self.device)
-
-            with torch.no_grad():
-                image_features = self.model.get_image_features(**image_inputs)
-                image_features = image_features / image_features.norm(dim=-1, keepdim=True)
-
-                # Get text embeddings (chunked for long prompts)
-                positive_embedding = self._get_text_embedding(positive_prompt)
+            image = ImageContext.coerce(image_path)
+            if not image.exists:
+                return {"positive_score": 0.0, "error": f"Image file not found: {image.name}"}
 
-                # Compute cosine similarity for positive prompt
-                positive_sim = (image_features @ positive_embedding.T).squeeze()
-                # Transform cosine similarity [-1, 1] to probability-like score [0, 1]
-                # Good matches typically have cosine sim of 0.2-0.35
-                positive_score = float(torch.clamp((positive_sim + 1) / 2, 0.0, 1.0))
+            scores = self.embedder.score(image, positive_prompt, negative_prompt)
 
-                result = {"positive_score": positive_score}
-
-                if negative_prompt:
-                    negative_embedding = self._get_text_embedding(negative_prompt)
-                    negative_sim = (image_features @ negative_embedding.T).squeeze()
-                    negative_score = float(torch.clamp((negative_sim + 1) / 2, 0.0, 1.0))
-                    result["negative_score"] = negative_score
-                    result["score_delta"] = positive_score - negative_score
+            result = {"positive_score": scores["positive_score"]}
+            if negative_prompt:
+                result["negative_score"] = scores["negative_score"]
+                result["score_delta"] = scores["score_delta"]
 
             return result
 
@@ -211,9 +179,33 @@ class ImageValidator:
             traceback.print_exc()
             return {"positive_score": 0.0, "error": str(e)}
 
+    def compute_clip_scores_batch(
+        self,
+        images: List[ImageInput],
+        prompts: List[str],
+        negatives: Optional[List[Optional[str]]] = None,
+        batch_size: int = DEFAULT_IMAGE_BATCH_SIZE,
+    ) -> Dict[str, Any]:
+        """Compute CLIP scores for every image against every prompt in batches.
+
+        Image tensors and text chunks are stacked into padded batches instead
+        of one forward pass per image/chunk.
+
+        Args:
+            images: Paths to the images or ImageContext objects (N)
+            prompts: Positive prompts (M)
+            negatives: Optional negative prompts, one per positive prompt
+            batch_size: Maximum images per forward pass
+
+        Returns:
+            Dictionary of (N, M) numpy arrays: positive_score, quality_score and,
+            if negatives given, negative_score and score_delta (see ClipEmbedder.score_batch)
+        """
+        return self.embedder.score_batch(images, prompts, negatives, batch_size=batch_size)
+
     def validate_image(
         self,
-        image_path: str,
+        image_path: ImageInput,
         positive_prompt: str,
         negative_prompt: Optional[str] = None,
         positive_threshold: float = 0.25,
@@ -222,7 +214,7 @@ class ImageValidator:
         """Validate an image against prompt constraints.
 
         Args:
-            image_path: Path to the generated image
+            image_path: Path to the generated image or a shared ImageContext
             positive_prompt: The positive text prompt
             negative_prompt: Optional negative prompt
             positive_threshold: Minimum acceptable positive CLIP score (default 0.25)
@@ -312,13 +304,14 @@ def extract_expected_person_count(prompt: str) -> Optional[int]:
     return None
 
 
-def count_persons_yolo(image_path: str, confidence: float = 0.5) -> Dict[str, Any]:
+def count_persons_yolo(image_path: ImageInput, confidence: float = 0.5) -> Dict[str, Any]:
     """Count persons in image using YOLO object detection.
 
     Uses cached YOLO model instance for efficiency across multiple calls.
+    With an ImageContext, YOLO runs on its already decoded BGR pixels.
 
     Args:
-        image_path: Path to the image
+        image_path: Path to the image or a shared ImageContext
         confidence: Minimum confidence threshold for detections (default: 0.5)
 
     Returns:
@@ -332,16 +325,18 @@ def count_persons_yolo(image_path: str, confidence: float = 0.5) -> Dict[str, An
 
     try:
         # Validate image exists
-        if not Path(image_path).exists():
-            return {"person_count": None, "error": f"Image file not found: {image_path}"}
+        image = ImageContext.coerce(image_path)
+        if not image.exists:
+            return {"person_count": None, "error": f"Image file not found: {image.name}"}
 
         # Get cached model instance
         model = _get_yolo_model()
         if model is None:
             return {"person_count": None, "error": "Failed to load YOLO model"}
 
-        # Run inference
-        results = model(image_path, verbose=False)
+        # Run inference (serialized: pose validation may share the model concurrently)
+        with get_model_cache().inference_lock(f"yolo:{YOLO_WEIGHTS}"):
+            results = model(image.bgr, verbose=False)
 
         # COCO class ID for person is 0
         person_class_id = 0
@@ -369,7 +364,7 @@ def count_persons_yolo(image_path: str, confidence: float = 0.5) -> Dict[str, An
 
 
 def validate_image(
-    image_path: str,
+    image_path: ImageInput,
     positive_prompt: str,
     negative_prompt: Optional[str] = None,
     positive_threshold: float = 0.25,
@@ -378,11 +373,12 @@ def validate_image(
 ) -> Dict[str, Any]:
     """Convenience function to validate an image without creating a validator instance.
 
-    This creates a new validator for each call, which is less efficient for batch
-    validation but simpler for single-use cases.
+    The CLIP and YOLO models come from the process-wide model cache, so repeated
+    calls (e.g. inside a retry loop) only load them once. Pass an ImageContext
+    to share one decoded image between CLIP and YOLO.
 
     Args:
-        image_path: Path to the generated image
+        image_path: Path to the generated image or a shared ImageContext
         positive_prompt: The positive text prompt
         negative_prompt: Optional negative prompt
         positive_threshold: Minimum acceptable positive CLIP score
@@ -395,6 +391,7 @@ def validate_image(
     if not CLIP_AVAILABLE:
         result = {"passed": False, "reason": "CLIP dependencies not available", "positive_score": 0.0}
     else:
+        image_path = ImageContext.coerce(image_path)
         validator = ImageValidator()
         result = validator.validate_image(
             image_path, positive_prompt, negative_prompt, positive_threshold, delta_threshold
@@ -402,43 +399,285 @@ def validate_image(
 
     # Add person count validation if requested
     if validate_person_count:
-        expected_count = extract_expected_person_count(positive_prompt)
-        yolo_result = count_persons_yolo(image_path)
-
-        # Add YOLO results to validation result
-        result["person_count"] = yolo_result.get("person_count")
-        result["expected_person_count"] = expected_count
-
-        # Check if YOLO detection failed
-        if "error" in yolo_result:
-            result["person_count_error"] = yolo_result["error"]
-            # Store warning in result instead of printing
-            # The calling code in generate.py will handle displaying this
-        elif expected_count is not None and yolo_result.get("person_count") is not None:
-            # Validate count matches expectation
-            actual_count = yolo_result["person_count"]
-            if actual_count != expected_count:
-                result["passed"] = False
-                result["reason"] = f"Person count mismatch: expected {expected_count}, detected {actual_count}"
+        apply_person_count(result, check_person_count(image_path, positive_prompt))
+
+    return result
+
+
+def check_person_count(image_path: ImageInput, positive_prompt: str) -> Dict[str, Any]:
+    """Compare the YOLO person count with the count implied by the prompt.
+
+    Args:
+        image_path: Path to the generated image or a shared ImageContext
+        positive_prompt: The positive text prompt
+
+    Returns:
+        Dictionary with:
+            - passed: False only if both counts are known and differ
+            - person_count: Detected persons (None if YOLO failed)
+            - expected_person_count: Count extracted from the prompt (or None)
+            - person_count_error: YOLO error message (only on failure)
+            - reason: Mismatch description (only on mismatch)
+    """
+    expected_count = extract_expected_person_count(positive_prompt)
+    yolo_result = count_persons_yolo(ImageContext.coerce(image_path))
+
+    check = {
+        "passed": True,
+        "person_count": yolo_result.get("person_count"),
+        "expected_person_count": expected_count,
+    }
+
+    # Check if YOLO detection failed
+    if "error" in yolo_result:
+        check["person_count_error"] = yolo_result["error"]
+        # Store warning in result instead of printing
+        # The calling code in generate.py will handle displaying this
+    elif expected_count is not None and yolo_result.get("person_count") is not None:
+        # Validate count matches expectation
+        actual_count = yolo_result["person_count"]
+        if actual_count != expected_count:
+            check["passed"] = False
+            check["reason"] = f"Person count mismatch: expected {expected_count}, detected {actual_count}"
+
+    return check
+
+
+def apply_person_count(result: Dict[str, Any], check: Dict[str, Any]) -> Dict[str, Any]:
+    """Merge a check_person_count() result into a validation result dict (in place).
+
+    Args:
+        result: Validation result from validate_image()
+        check: Result of check_person_count()
+
+    Returns:
+        The updated result
+    """
+    result["person_count"] = check.get("person_count")
+    result["expected_person_count"] = check.get("expected_person_count")
+    if "person_count_error" in check:
+        result["person_count_error"] = check["person_count_error"]
+    if not check.get("passed", True):
+        result["passed"] = False
+        result["reason"] = check["reason"]
+    return result
+
+
+def check_image_sanity(image_path: ImageInput, min_pixel_std: float = MIN_PIXEL_STD) -> Dict[str, Any]:
+    """Cheap structural check run before any model-based validator.
+
+    Catches outputs no model needs to look at: missing or empty files,
+    undecodable images and near-uniform frames (e.g. the all-black images a
+    NaN in the VAE decode produces).
+
+    Args:
+        image_path: Path to the generated image or a shared ImageContext
+        min_pixel_std: Minimum pixel standard deviation (0-255) for a non-blank image
+
+    Returns:
+        Dictionary with:
+            - passed: Whether the image is worth validating further
+            - reason: Failure reason or "Image file is sane"
+            - width / height / pixel_std: Image stats (when decodable)
+    """
+    image = ImageContext.coerce(image_path)
+    if not image.exists:
+        return {"passed": False, "reason": f"Image file not found: {image.name}"}
+
+    try:
+        if not image.data:
+            return {"passed": False, "reason": f"Image file is empty: {image.name}"}
+        pixels = image.rgb
+    except Exception as e:
+        return {"passed": False, "reason": f"Image could not be decoded: {e}"}
+
+    # Subsample large images; a blank frame has ~0 spread either way
+    step = max(1, min(pixels.shape[0], pixels.shape[1]) // 256)
+    pixel_std = float(pixels[::step, ::step].std())
+    result = {
+        "passed": True,
+        "reason": "Image file is sane",
+        "width": image.width,
+        "height": image.height,
+        "pixel_std": round(pixel_std, 3),
+    }
+
+    if pixel_std < min_pixel_std:
+        result["passed"] = False
+        result["reason"] = f"Blank image: pixel std {pixel_std:.2f} < {min_pixel_std}"
 
     return result
 
 
+def compute_clip_scores_batch(
+    images: List[ImageInput],
+    prompts: List[str],
+    negatives: Optional[List[Optional[str]]] = None,
+    batch_size: int = DEFAULT_IMAGE_BATCH_SIZE,
+) -> Dict[str, Any]:
+    """Convenience function to score many images against many prompts in batches.
+
+    Args:
+        images: Paths to the images or ImageContext objects (N)
+        prompts: Positive prompts (M)
+        negatives: Optional negative prompts, one per positive prompt
+        batch_size: Maximum images per forward pass
+
+    Returns:
+        Dictionary of (N, M) score matrices (see ImageValidator.compute_clip_scores_batch)
+    """
+    validator = ImageValidator()
+    return validator.compute_clip_scores_batch(images, prompts, negatives, batch_size)
+
+
+def _iter_image_batches(target: str, download_dir: str, batch_size: int) -> Iterator[List[str]]:
+    """Yield a directory or MinIO prefix as sorted batches of local image paths.
+
+    MinIO objects are downloaded one batch at a time and deleted once the
+    caller asks for the next batch, so scoring a large prefix needs disk
+    space for a single batch rather than the whole prefix.
+
+    Args:
+        target: Local directory, or "minio://<bucket>/<prefix>"
+        download_dir: Where to download MinIO objects
+        batch_size: Images per batch
+
+    Yields:
+        Lists of at most batch_size image file paths
+    """
+    if not target.startswith("minio://"):
+        paths = sorted(str(p) for p in Path(target).iterdir() if p.suffix.lower() in IMAGE_EXTENSIONS)
+        for i in range(0, len(paths), batch_size):
+            yield paths[i : i + batch_size]
+        return
+
+    from clients.minio_client import MinIOClient
+
+    bucket, _, prefix = target[len("minio://") :].partition("/")
+    client = MinIOClient(bucket=bucket)
+    names = sorted(
+        obj["name"]
+        for obj in client.list_objects(prefix=prefix)
+        if Path(obj["name"]).suffix.lower() in IMAGE_EXTENSIONS
+    )
+    for i in range(0, len(names), batch_size):
+        paths = []
+        for name in names[i : i + batch_size]:
+            local_path = str(Path(download_dir) / name.replace("/", "_"))
+            if client.download_file(name, local_path):
+                paths.append(local_path)
+            else:
+                print(f"[WARN] Failed to download {name}")
+        try:
+            yield paths
+        finally:
+            for path in paths:
+                Path(path).unlink(missing_ok=True)
+
+
+def _score_rows(images: List[str], scores: Dict[str, Any], positive_threshold: float) -> List[Dict[str, Any]]:
+    """Turn one batch of CLIP score matrices into per-image result rows (printed as they go).
+
+    Args:
+        images: Image paths of the batch
+        scores: Score matrices for the batch (see ImageValidator.compute_clip_scores_batch)
+        positive_threshold: Minimum positive score to count as passed
+
+    Returns:
+        One row dict per image
+    """
+    rows = []
+    for i, image in enumerate(images):
+        if math.isnan(scores["positive_score"][i, 0]):
+            # Unreadable image (already warned about by the embedder)
+            rows.append({"image": Path(image).name, "positive_score": None, "passed": False, "error": "unreadable"})
+            print(f"[FAILED] {Path(image).name}: unreadable")
+            continue
+        row = {
+            "image": Path(image).name,
+            "positive_score": float(scores["positive_score"][i, 0]),
+            "quality_score": float(scores["quality_score"][i, 0]),
+        }
+        if "score_delta" in scores:
+            row["negative_score"] = float(scores["negative_score"][i, 0])
+            row["score_delta"] = float(scores["score_delta"][i, 0])
+        row["passed"] = row["positive_score"] >= positive_threshold
+        rows.append(row)
+
+        delta = f"  delta={row['score_delta']:.3f}" if "score_delta" in row else ""
+        status = "[OK]" if row["passed"] else "[FAILED]"
+        print(f"{status} {row['image']}: positive={row['positive_score']:.3f}{delta}")
+    return rows
+
+
+def main():
+    """CLI entry point for single-image or batch validation."""
+    import argparse
+    import json
+    import tempfile
+
+    parser = argparse.ArgumentParser(
+        description="Score images against a prompt with CLIP",
+        epilog="Examples:\n"
+        '  python -m utils.validation image.png "a red car" "blurry"\n'
+        '  python -m utils.validation /tmp/outputs "a red car" --batch-size 32\n'
+        '  python -m utils.validation minio://comfy-gen/2025 "a red car" --json scores.json',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("target", help="Image file, directory, or minio://<bucket>/<prefix>")
+    parser.add_argument("prompt", help="Positive prompt")
+    parser.add_argument("negative_prompt", nargs="?", default=None, help="Optional negative prompt")
+    parser.add_argument(
+        "--batch-size", type=int, default=DEFAULT_IMAGE_BATCH_SIZE, help="Images per forward pass (batch mode)"
+    )
+    parser.add_argument(
+        "--positive-threshold", type=float, default=0.25, help="Minimum positive score to count as passed"
+    )
+    parser.add_argument("--json", dest="json_path", help="Write per-image scores to this JSON file (batch mode)")
+    args = parser.parse_args()
+
+    if not args.target.startswith("minio://") and Path(args.target).is_file():
+        result = validate_image(args.target, args.prompt, args.negative_prompt)
+        print("\nValidation Result:")
+        print(f"  Passed: {result['passed']}")
+        print(f"  Reason: {result['reason']}")
+        print(f"  Positive Score: {result.get('positive_score', 0.0):.3f}")
+        if "negative_score" in result:
+            print(f"  Negative Score: {result['negative_score']:.3f}")
+            print(f"  Delta: {result.get('score_delta', 0.0):.3f}")
+        return 0
+
+    if not CLIP_AVAILABLE:
+        print("[ERROR] CLIP dependencies not available. Install with: pip install torch transformers pillow")
+        return 1
+
+    validator = ImageValidator()
+    negatives = [args.negative_prompt] if args.negative_prompt else None
+    rows = []
+    print(f"[INFO] Scoring {args.target} (batch size {args.batch_size})")
+    start = time.perf_counter()
+    with tempfile.TemporaryDirectory() as download_dir:
+        for images in _iter_image_batches(args.target, download_dir, args.batch_size):
+            if not images:
+                continue
+            scores = validator.compute_clip_scores_batch(images, [args.prompt], negatives, args.batch_size)
+            rows.extend(_score_rows(images, scores, args.positive_threshold))
+    elapsed = time.perf_counter() - start
+
+    if not rows:
+        print(f"[ERROR] No images found in {args.target}")
+        return 1
+
+    passed = sum(1 for row in rows if row["passed"])
+    print(f"\n[INFO] {passed}/{len(rows)} passed in {elapsed:.2f}s ({len(rows) / max(elapsed, 1e-9):.1f} images/sec)")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(rows, f, indent=2)
+        print(f"[OK] Scores written to {args.json_path}")
+
+    return 0
+
+
 if __name__ == "__main__":
-    # Simple CLI for testing
-    if len(sys.argv) < 3:
-        print("Usage: python validation.py <image_path> <prompt> [negative_prompt]")
-        sys.exit(1)
-
-    image_path = sys.argv[1]
-    prompt = sys.argv[2]
-    negative = sys.argv[3] if len(sys.argv) > 3 else None
-
-    result = validate_image(image_path, prompt, negative)
-    print("\nValidation Result:")
-    print(f"  Passed: {result['passed']}")
-    print(f"  Reason: {result['reason']}")
-    print(f"  Positive Score: {result.get('positive_score', 0.0):.3f}")
-    if "negative_score" in result:
-        print(f"  Negative Score: {result['negative_score']:.3f}")
-        print(f"  Delta: {result.get('score_delta', 0.0):.3f}")
+    sys.exit(main())
@@ -0,0 +1,472 @@
+#!/usr/bin/env python3
+"""Warm validation/scoring daemon for CLI invocations.
+
+Every ``python generate.py ... --validate --quality-score`` process used to pay
+the torch/transformers import plus loading CLIP, pyiqa, YOLO, MediaPipe and
+BLIP before it could score a single image. The daemon is a long-running
+localhost HTTP service that keeps validation.py, quality.py,
+pose_validation.py and content_validator.py loaded and warm in one process.
+
+generate.py uses it automatically when it is running and falls back to
+in-process validation when it is not (or when a request fails to connect).
+The daemon and the CLI share the filesystem, so requests carry the image
+path; a daemon on another host receives the encoded image bytes instead.
+
+The daemon reads any path it is given, so it only binds to loopback
+addresses. Serving other hosts needs an explicit ``--allow-remote``, and then
+``image_path`` reads are limited to the ``--allow-dir`` directories (with none
+configured, remote clients must send the image bytes).
+
+Endpoints:
+    GET  /health    - {"status": "ok", "pid", "uptime_seconds", "requests", "models"}
+    POST /validate  - {"validator": "clip", "image_path": "/abs/out.png", "params": {...}}
+                      -> {"result": {...}, "seconds": 0.41}
+
+Usage:
+    python -m utils.validation_daemon serve               # warm up and serve on 127.0.0.1:8199
+    python -m utils.validation_daemon serve --no-warmup
+    python -m utils.validation_daemon serve --host 0.0.0.0 --allow-remote --allow-dir /data/outputs
+    python -m utils.validation_daemon status
+
+    COMFYGEN_VALIDATION_DAEMON=http://127.0.0.1:8199      # daemon URL used by clients
+    COMFYGEN_VALIDATION_DAEMON=off                        # never use the daemon
+"""
+
+import argparse
+import base64
+import http.server
+import ipaddress
+import json
+import os
+import socketserver
+import sys
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+from urllib.parse import urlparse
+
+import numpy as np
+import requests
+
+from utils.image_context import ImageContext
+from utils.model_cache import get_model_cache
+from utils.validation_runner import VALIDATOR_NAMES, run_validator
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8199
+DEFAULT_DAEMON_URL = f"http://{DEFAULT_HOST}:{DEFAULT_PORT}"
+
+# Health probe timeout; the daemon is local, so anything slower means it is not there
+HEALTH_TIMEOUT_SECONDS = 0.3
+
+# How long a failed probe is remembered before trying the daemon again
+UNAVAILABLE_RETRY_SECONDS = 30.0
+
+# Read timeout for a single validator request (first requests may still load models)
+REQUEST_TIMEOUT_SECONDS = 600.0
+
+# Decoded images kept by the daemon, so concurrent validators of one output share a decode
+MAX_CACHED_CONTEXTS = 8
+
+
+class DaemonUnavailableError(Exception):
+    """The validation daemon could not be reached; callers fall back to in-process validation."""
+
+
+def is_loopback_host(host: str) -> bool:
+    """Whether a hostname or IP address refers to this machine only."""
+    try:
+        return host == "localhost" or ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def _to_jsonable(value: Any) -> Any:
+    """Convert numpy scalars/arrays and tuples in validator results to JSON types."""
+    if isinstance(value, dict):
+        return {str(k): _to_jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_jsonable(v) for v in value]
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    return value
+
+
+class ValidationService:
+    """In-daemon state: shared image contexts and request counters."""
+
+    def __init__(self, allowed_dirs: Optional[List[str]] = None):
+        """Initialize the service.
+
+        Args:
+            allowed_dirs: Directories image_path may point into. None allows any
+                path (loopback only); an empty list refuses all path reads.
+        """
+        self.allowed_dirs = None if allowed_dirs is None else [Path(d).resolve() for d in allowed_dirs]
+        self.started = time.time()
+        self.requests = 0
+        self._contexts: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def context_for(self, image_path: Optional[str], image_b64: Optional[str]) -> ImageContext:
+        """Get the (cached) decoded image for a request.
+
+        Requests for the same unchanged file share one ImageContext, so the
+        validators generate.py sends concurrently decode the output once.
+        """
+        if image_b64 is not None:
+            return ImageContext.from_bytes(base64.b64decode(image_b64), path=image_path)
+
+        self.check_path(image_path)
+        context = ImageContext.from_path(image_path)
+        if not context.exists:
+            return context
+
+        key = context.cache_key
+        with self._lock:
+            cached = self._contexts.get(key)
+            if cached is not None:
+                self._contexts.move_to_end(key)
+                return cached
+            self._contexts[key] = context
+            while len(self._contexts) > MAX_CACHED_CONTEXTS:
+                self._contexts.popitem(last=False)
+        return context
+
+    def check_path(self, image_path: Optional[str]) -> None:
+        """Refuse to read files outside the allowed directories.
+
+        Raises:
+            PermissionError: If the path resolves outside every allowed directory
+        """
+        if self.allowed_dirs is None or image_path is None:
+            return
+        resolved = Path(image_path).resolve()
+        for directory in self.allowed_dirs:
+            try:
+                resolved.relative_to(directory)
+                return
+            except ValueError:
+                continue
+        raise PermissionError(f"image_path is outside the daemon's allowed directories: {image_path}")
+
+    def validate(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Run one validator request.
+
+        Args:
+            request: {"validator": name, "image_path": path, "image_b64": optional, "params": {...}}
+
+        Returns:
+            {"result": validator result, "seconds": wall time}
+        """
+        with self._lock:
+            self.requests += 1
+        context = self.context_for(request.get("image_path"), request.get("image_b64"))
+        start = time.perf_counter()
+        result = run_validator(request["validator"], context, **(request.get("params") or {}))
+        return {"result": _to_jsonable(result), "seconds": round(time.perf_counter() - start, 4)}
+
+    def health(self) -> Dict[str, Any]:
+        """Liveness and model residency report."""
+        return {
+            "status": "ok",
+            "pid": os.getpid(),
+            "uptime_seconds": round(time.time() - self.started, 1),
+            "requests": self.requests,
+            "models": get_model_cache().stats()["models"],
+        }
+
+    def warm_up(self) -> None:
+        """Load every model by running each validator once on a synthetic image."""
+        rng = np.random.default_rng(0)
+        context = ImageContext.from_array(rng.integers(0, 255, (512, 512, 3), dtype=np.uint8))
+        for name in VALIDATOR_NAMES:
+            start = time.perf_counter()
+            try:
+                run_validator(name, context, prompt="a photo of a person", negative_prompt="blurry")
+                print(f"[OK] Warmed up {name} in {time.perf_counter() - start:.1f}s")
+            except Exception as e:
+                print(f"[WARN] Could not warm up {name}: {e}")
+
+
+class ValidationHandler(http.server.BaseHTTPRequestHandler):
+    """JSON request handler for the validation daemon."""
+
+    # Keep-alive: a CLI run sends several requests over one pooled connection
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        """Silence per-request access logs (the CLI polls /health)."""
+
+    def _send_json(self, status: int, payload: Dict[str, Any]) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, self.server.service.health())
+        else:
+            self._send_json(404, {"error": f"Unknown endpoint: {self.path}"})
+
+    def do_POST(self):
+        if self.path != "/validate":
+            self._send_json(404, {"error": f"Unknown endpoint: {self.path}"})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+        except (ValueError, json.JSONDecodeError) as e:
+            self._send_json(400, {"error": f"Invalid JSON request: {e}", "error_type": "ValueError"})
+            return
+
+        if request.get("validator") not in VALIDATOR_NAMES:
+            self._send_json(
+                400, {"error": f"Unknown validator: {request.get('validator')}", "error_type": "ValueError"}
+            )
+            return
+
+        try:
+            self._send_json(200, self.server.service.validate(request))
+        except PermissionError as e:
+            self._send_json(403, {"error": str(e), "error_type": "PermissionError"})
+        except Exception as e:
+            self._send_json(500, {"error": str(e) or type(e).__name__, "error_type": type(e).__name__})
+
+
+class ValidationServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    """Threaded HTTP server so concurrent validators of one image run side by side."""
+
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, address: tuple, allowed_dirs: Optional[List[str]] = None):
+        super().__init__(address, ValidationHandler)
+        self.service = ValidationService(allowed_dirs)
+
+
+def create_server(
+    host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, allowed_dirs: Optional[List[str]] = None
+) -> ValidationServer:
+    """Create a validation server bound to host:port (port 0 picks a free port).
+
+    Args:
+        host: Bind address
+        port: Port
+        allowed_dirs: Directories image_path may point into (None allows any path)
+    """
+    return ValidationServer((host, port), allowed_dirs)
+
+
+class ValidationDaemonClient:
+    """Client for a running validation daemon."""
+
+    def __init__(self, url: str = DEFAULT_DAEMON_URL):
+        """Initialize a client.
+
+        Args:
+            url: Daemon base URL (e.g. "http://127.0.0.1:8199")
+        """
+        self.url = url.rstrip("/")
+        self.session = requests.Session()
+        self.local = is_loopback_host(urlparse(self.url).hostname or "")
+
+    def health(self, timeout: float = HEALTH_TIMEOUT_SECONDS) -> Optional[Dict[str, Any]]:
+        """Return the daemon's health report, or None if it is not reachable."""
+        try:
+            response = self.session.get(f"{self.url}/health", timeout=timeout)
+            if response.status_code == 200:
+                return response.json()
+        except (requests.RequestException, ValueError):
+            pass
+        return None
+
+    def run(self, name: str, image: Union[str, ImageContext], **params) -> Dict[str, Any]:
+        """Run a validator on the daemon.
+
+        Args:
+            name: Validator name (see utils.validation_runner.run_validator)
+            image: Image path or ImageContext (must have a path or bytes)
+            **params: Validator parameters (prompt, negative_prompt, positive_threshold)
+
+        Returns:
+            The validator's result dict
+
+        Raises:
+            DaemonUnavailableError: If the daemon cannot be reached
+            ImportError: If the validator's dependencies are missing on the daemon
+            RuntimeError: If the validator failed on the daemon
+        """
+        context = ImageContext.coerce(image)
+        request = {"validator": name, "params": params}
+        if context.path is not None:
+            request["image_path"] = str(Path(context.path).resolve())
+        if not self.local or context.path is None:
+            request["image_b64"] = base64.b64encode(context.data).decode("ascii")
+
+        try:
+            response = self.session.post(f"{self.url}/validate", json=request, timeout=(1.0, REQUEST_TIMEOUT_SECONDS))
+        except requests.ConnectionError as e:
+            raise DaemonUnavailableError(str(e)) from e
+
+        try:
+            payload = response.json()
+        except ValueError:
+            raise RuntimeError(f"Validation daemon returned HTTP {response.status_code}") from None
+
+        if response.status_code != 200:
+            message = f"{name} failed on validation daemon: {payload.get('error')}"
+            if payload.get("error_type") in ("ImportError", "ModuleNotFoundError"):
+                raise ImportError(message)
+            raise RuntimeError(message)
+        return payload["result"]
+
+
+# Global client shared by all validators in this process (None while the daemon is down)
+_client: Optional[ValidationDaemonClient] = None
+_client_checked_at: Optional[float] = None
+_client_lock = threading.Lock()
+
+
+def daemon_url() -> Optional[str]:
+    """Configured daemon URL, or None if the daemon is disabled via COMFYGEN_VALIDATION_DAEMON=off."""
+    url = os.getenv("COMFYGEN_VALIDATION_DAEMON", DEFAULT_DAEMON_URL).strip()
+    if url.lower() in ("", "0", "off", "false", "no"):
+        return None
+    return url
+
+
+def _probe_is_fresh() -> bool:
+    """Whether the last probe result can be reused (a found daemon is kept until a request fails)."""
+    if _client_checked_at is None:
+        return False
+    return _client is not None or time.monotonic() - _client_checked_at < UNAVAILABLE_RETRY_SECONDS
+
+
+def get_daemon_client(refresh: bool = False) -> Optional[ValidationDaemonClient]:
+    """Get a client for the running daemon, or None if it is not running (thread-safe).
+
+    A missing daemon is remembered for UNAVAILABLE_RETRY_SECONDS, so callers
+    pay the health probe at most once per interval.
+
+    Args:
+        refresh: Probe again even if the last probe is recent
+
+    Returns:
+        ValidationDaemonClient or None
+    """
+    global _client, _client_checked_at
+    if not refresh and _probe_is_fresh():
+        return _client
+
+    with _client_lock:
+        # Double-check locking pattern
+        if not refresh and _probe_is_fresh():
+            return _client
+        url = daemon_url()
+        client = ValidationDaemonClient(url) if url else None
+        _client = client if client is not None and client.health() is not None else None
+        _client_checked_at = time.monotonic()
+        return _client
+
+
+def mark_daemon_unavailable() -> None:
+    """Forget the daemon after a failed request (re-probed after UNAVAILABLE_RETRY_SECONDS)."""
+    global _client, _client_checked_at
+    with _client_lock:
+        _client = None
+        _client_checked_at = time.monotonic()
+
+
+def run_validator_auto(name: str, image: Union[str, ImageContext], use_daemon: bool = True, **params) -> Any:
+    """Run a validator on the warm daemon if it is running, otherwise in this process.
+
+    Args:
+        name: Validator name (see utils.validation_runner.run_validator)
+        image: Image path or ImageContext
+        use_daemon: Set False to always validate in-process
+        **params: Validator parameters
+
+    Returns:
+        The validator's result dict
+    """
+    client = get_daemon_client() if use_daemon else None
+    if client is not None:
+        try:
+            return client.run(name, image, **params)
+        except DaemonUnavailableError:
+            print(f"[WARN] Validation daemon at {client.url} went away, validating {name} in-process")
+            mark_daemon_unavailable()
+    return run_validator(name, image, **params)
+
+
+def main() -> int:
+    """CLI entry point: serve or query the validation daemon."""
+    parser = argparse.ArgumentParser(description="Warm validation/scoring daemon")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    serve = subparsers.add_parser("serve", help="Load all validators and serve requests")
+    serve.add_argument("--host", default=DEFAULT_HOST, help=f"Bind address (default: {DEFAULT_HOST})")
+    serve.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Port (default: {DEFAULT_PORT})")
+    serve.add_argument("--no-warmup", action="store_true", help="Load models lazily on first request")
+    serve.add_argument(
+        "--allow-remote", action="store_true", help="Allow binding to a non-loopback address (serves other hosts)"
+    )
+    serve.add_argument(
+        "--allow-dir",
+        action="append",
+        default=None,
+        metavar="DIR",
+        help="Directory image_path may point into (repeatable; required for path requests with --allow-remote)",
+    )
+
+    status = subparsers.add_parser("status", help="Show the running daemon's health")
+    status.add_argument("--url", default=None, help="Daemon URL (default: COMFYGEN_VALIDATION_DAEMON or local)")
+
+    args = parser.parse_args()
+
+    if args.command == "status":
+        client = ValidationDaemonClient(args.url or daemon_url() or DEFAULT_DAEMON_URL)
+        health = client.health(timeout=2.0)
+        if health is None:
+            print(f"[ERROR] Validation daemon not reachable at {client.url}")
+            return 1
+        print(json.dumps(health, indent=2))
+        return 0
+
+    if not is_loopback_host(args.host) and not args.allow_remote:
+        parser.error(
+            f"refusing to serve on non-loopback address {args.host}: the daemon reads any image path it is "
+            "sent. Pass --allow-remote (and --allow-dir) to expose it."
+        )
+
+    allowed_dirs = args.allow_dir
+    if args.allow_remote and allowed_dirs is None:
+        # Remote clients must send image bytes; no file reads at all
+        allowed_dirs = []
+
+    server = create_server(args.host, args.port, allowed_dirs)
+    if not args.no_warmup:
+        print("[INFO] Warming up validators...")
+        server.service.warm_up()
+
+    with server:
+        print(f"[OK] Validation daemon running at http://{args.host}:{server.server_address[1]}")
+        print("[INFO] Press Ctrl+C to stop")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("\n[OK] Validation daemon stopped")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,457 @@
+#!/usr/bin/env python3
+"""Concurrent, cheap-first execution of post-generation validators.
+
+CLIP validation, pose validation, content validation and quality scoring are
+independent of each other once the output image is decoded, but generate.py
+used to run them one after another. On a CPU-only validation host their sum
+exceeded the GPU generation time. ``ValidationOrchestrator`` runs them on a
+thread pool instead:
+- Every validator gets its own timeout; a slow one is reported as timed out
+  without holding up the others
+- Per-validator wall time is recorded for the metadata sidecar
+- ``result_or_raise()`` hands back each result (or re-raises its failure), so
+  callers merge results into ``validation_result`` with their existing code
+
+Cascade mode (``early_exit=True``, used under --auto-retry) runs validators in
+stages ordered by cost (file sanity -> YOLO count -> CLIP -> pose -> BLIP ->
+pyiqa by default) and stops at the first hard failure. Later stages are
+skipped and still-running validators are abandoned, so the next GPU attempt
+can be queued sooner. The report estimates the time saved from the
+validators' observed (or configured) cost.
+
+Threads rather than processes: the validators spend their time in torch,
+ONNX/OpenCV and MediaPipe kernels that release the GIL, and worker processes
+would each reload every model instead of sharing the process-wide ModelCache.
+
+Usage:
+    from utils.validation_runner import ValidationOrchestrator, result_or_raise
+
+    orchestrator = ValidationOrchestrator(timeouts={"content": 300})
+    orchestrator.add("clip", validate_image, image_ctx, prompt)
+    orchestrator.add("pose", validate_pose, image_ctx, expected_persons=2)
+    runs = orchestrator.run()
+    validation_result = result_or_raise(runs["clip"])
+    report = orchestrator.report(runs)
+
+    # Cheap-first cascade with early exit
+    cascade = ValidationOrchestrator(stages=DEFAULT_CASCADE_ORDER, early_exit=True)
+    cascade.add("yolo", check_person_count, image_ctx, prompt, hard_failure=lambda r: not r["passed"])
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from utils.image_context import ImageContext
+
+# Default per-validator timeouts in seconds (first runs include model loading)
+DEFAULT_VALIDATOR_TIMEOUTS = {
+    "clip": 300.0,
+    "pose": 300.0,
+    "content": 600.0,
+    "quality": 600.0,
+}
+DEFAULT_TIMEOUT = 300.0
+
+# Validators known to run_validator(), cheapest first
+VALIDATOR_NAMES = ("file", "yolo", "clip", "pose", "content", "quality")
+
+# Cheap-first cascade order; a nested list is a stage whose validators run concurrently
+DEFAULT_CASCADE_ORDER = list(VALIDATOR_NAMES)
+
+# Rough CPU cost per validator in seconds, used for time-saved estimates until observed
+DEFAULT_COST_ESTIMATES = {
+    "file": 0.05,
+    "yolo": 0.5,
+    "clip": 1.5,
+    "pose": 2.0,
+    "content": 8.0,
+    "quality": 6.0,
+}
+
+# How often to check whether a queued validator has started (max_workers < validators)
+QUEUED_POLL_SECONDS = 0.05
+
+# Run statuses
+STATUS_OK = "ok"
+STATUS_ERROR = "error"
+STATUS_TIMEOUT = "timeout"
+STATUS_SKIPPED = "skipped"  # Never started: an earlier stage failed hard
+STATUS_ABANDONED = "abandoned"  # Still running when an earlier result failed hard
+
+# Observed validator durations in this process (name -> [total_seconds, count])
+_observed_seconds: Dict[str, List[float]] = {}
+_observed_lock = threading.Lock()
+
+
+def record_duration(name: str, seconds: float) -> None:
+    """Record a completed validator's wall time for later cost estimates."""
+    with _observed_lock:
+        total = _observed_seconds.setdefault(name, [0.0, 0])
+        total[0] += seconds
+        total[1] += 1
+
+
+def observed_seconds(name: str) -> Optional[float]:
+    """Mean observed wall time of a validator in this process (None if never run)."""
+    with _observed_lock:
+        total = _observed_seconds.get(name)
+        return total[0] / total[1] if total else None
+
+
+def _normalize_stages(order: List[Union[str, List[str]]]) -> List[List[str]]:
+    """Turn a cascade order (names or lists of names) into a list of stages."""
+    return [[item] if isinstance(item, str) else list(item) for item in order]
+
+
+class ValidationOrchestrator:
+    """Runs validators concurrently (or as a cheap-first cascade) with per-validator timeouts."""
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        timeouts: Optional[Dict[str, float]] = None,
+        default_timeout: Optional[float] = None,
+        stages: Optional[List[Union[str, List[str]]]] = None,
+        early_exit: bool = False,
+        cost_estimates: Optional[Dict[str, float]] = None,
+    ):
+        """Initialize an orchestrator with no validators.
+
+        Args:
+            max_workers: Thread pool size (None = one thread per validator, 1 = sequential)
+            timeouts: Per-validator timeouts in seconds, merged over DEFAULT_VALIDATOR_TIMEOUTS
+            default_timeout: Timeout for validators without an entry in timeouts
+                (None = DEFAULT_TIMEOUT; also overrides the built-in defaults when given)
+            stages: Cascade order (names, or lists of names run concurrently); only
+                used with early_exit. Validators not listed run in a final stage.
+            early_exit: Stop at the first hard failure, skipping later stages
+            cost_estimates: Per-validator cost in seconds for the time-saved report,
+                merged over DEFAULT_COST_ESTIMATES (observed times take precedence)
+        """
+        self.max_workers = max_workers
+        self.default_timeout = default_timeout if default_timeout is not None else DEFAULT_TIMEOUT
+        self.timeouts = {} if default_timeout is not None else dict(DEFAULT_VALIDATOR_TIMEOUTS)
+        self.timeouts.update(timeouts or {})
+        self.stages = _normalize_stages(stages if stages is not None else DEFAULT_CASCADE_ORDER)
+        self.early_exit = early_exit
+        self.cost_estimates = dict(DEFAULT_COST_ESTIMATES)
+        self.cost_estimates.update(cost_estimates or {})
+        self._tasks: Dict[str, tuple] = {}
+        self._hard_failure: Dict[str, Callable[[Any], bool]] = {}
+        self._wall_seconds: Optional[float] = None
+        self._stopped_at: Optional[str] = None
+
+    def add(
+        self,
+        name: str,
+        func: Callable[..., Any],
+        *args,
+        timeout: Optional[float] = None,
+        hard_failure: Optional[Callable[[Any], bool]] = None,
+        **kwargs,
+    ) -> None:
+        """Register a validator call.
+
+        Args:
+            name: Validator name (e.g. "file", "yolo", "clip", "pose", "content", "quality")
+            func: Validator function
+            *args: Positional arguments for func
+            timeout: Timeout override for this validator in seconds
+            hard_failure: Predicate on the result; True stops a cascade (early_exit only)
+            **kwargs: Keyword arguments for func
+        """
+        if timeout is not None:
+            self.timeouts[name] = timeout
+        if hard_failure is not None:
+            self._hard_failure[name] = hard_failure
+        self._tasks[name] = (func, args, kwargs)
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    @property
+    def names(self) -> list:
+        """Registered validator names in submission order."""
+        return [name for stage in self._plan() for name in stage]
+
+    def timeout_for(self, name: str) -> float:
+        """Timeout in seconds for a validator."""
+        return float(self.timeouts.get(name, self.default_timeout))
+
+    def estimate_for(self, name: str) -> float:
+        """Expected wall time of a validator: observed mean, else the configured estimate."""
+        observed = observed_seconds(name)
+        return observed if observed is not None else float(self.cost_estimates.get(name, 0.0))
+
+    def _plan(self) -> List[List[str]]:
+        """Stages of registered validators in execution order.
+
+        Without early exit everything runs in one concurrent stage, since no
+        result can make the others unnecessary.
+        """
+        if not self.early_exit:
+            return [list(self._tasks)] if self._tasks else []
+
+        plan = []
+        listed = set()
+        for stage in self.stages:
+            names = [name for name in stage if name in self._tasks]
+            listed.update(stage)
+            if names:
+                plan.append(names)
+        unlisted = [name for name in self._tasks if name not in listed]
+        if unlisted:
+            plan.append(unlisted)
+        return plan
+
+    @staticmethod
+    def _call(func: Callable[..., Any], args: tuple, kwargs: dict, record: Dict[str, Any]) -> Any:
+        """Run a validator, recording its start and wall time into record."""
+        record["started"] = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            record["seconds"] = time.perf_counter() - record["started"]
+
+    def _is_hard_failure(self, name: str, run: Dict[str, Any]) -> bool:
+        """Whether a finished run should stop the cascade."""
+        predicate = self._hard_failure.get(name)
+        if predicate is None or run["status"] != STATUS_OK:
+            return False
+        try:
+            return bool(predicate(run["result"]))
+        except Exception:
+            return False
+
+    def run(self) -> Dict[str, Dict[str, Any]]:
+        """Run all registered validators and wait for them (or their timeouts).
+
+        Timeouts are measured from the moment a validator starts running. A
+        timed-out validator cannot be interrupted; its thread is abandoned and
+        its eventual result discarded. With early exit, a hard failure skips
+        all later stages and abandons validators of the same stage that are
+        still running.
+
+        Returns:
+            Dictionary mapping validator name to a run record:
+                - status: "ok", "error", "timeout", "skipped" or "abandoned"
+                - result: Validator return value (None unless status is "ok")
+                - error: Error message for "error"/"timeout"
+                - exception: The raised exception for "error" (not serializable)
+                - seconds: Wall time of the validator (the timeout for "timeout",
+                  elapsed time for "abandoned", 0 for "skipped")
+        """
+        runs: Dict[str, Dict[str, Any]] = {}
+        self._stopped_at = None
+        plan = self._plan()
+        if not plan:
+            self._wall_seconds = 0.0
+            return runs
+
+        workers = self.max_workers or max(len(stage) for stage in plan)
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="validator")
+        start = time.perf_counter()
+
+        try:
+            for stage in plan:
+                if self._stopped_at is not None:
+                    for name in stage:
+                        runs[name] = {"status": STATUS_SKIPPED, "result": None, "seconds": 0.0}
+                    continue
+
+                records: Dict[str, Dict[str, Any]] = {name: {} for name in stage}
+                futures = {}
+                for name in stage:
+                    func, args, kwargs = self._tasks[name]
+                    futures[name] = executor.submit(self._call, func, args, kwargs, records[name])
+
+                for name in stage:
+                    if self._stopped_at is not None and not futures[name].done():
+                        runs[name] = self._abandon(futures[name], records[name])
+                        continue
+                    runs[name] = self._wait(name, futures[name], records[name])
+                    if runs[name]["status"] == STATUS_OK:
+                        record_duration(name, runs[name]["seconds"])
+                    if self.early_exit and self._stopped_at is None and self._is_hard_failure(name, runs[name]):
+                        self._stopped_at = name
+        finally:
+            # Don't block on timed-out or abandoned validators; they finish in the background
+            executor.shutdown(wait=False, cancel_futures=True)
+            self._wall_seconds = time.perf_counter() - start
+
+        return runs
+
+    @staticmethod
+    def _abandon(future: Any, record: Dict[str, Any]) -> Dict[str, Any]:
+        """Stop waiting for a validator made unnecessary by an earlier hard failure."""
+        future.cancel()
+        started = record.get("started")
+        elapsed = time.perf_counter() - started if started is not None else 0.0
+        return {"status": STATUS_ABANDONED, "result": None, "seconds": elapsed}
+
+    def _wait(self, name: str, future: Any, record: Dict[str, Any]) -> Dict[str, Any]:
+        """Wait for one validator until it finishes or its timeout (from its start) expires."""
+        timeout = self.timeout_for(name)
+        while not future.done():
+            started = record.get("started")
+            if started is None:
+                # Still queued behind other validators; its clock has not started
+                wait([future], timeout=QUEUED_POLL_SECONDS)
+                continue
+            remaining = started + timeout - time.perf_counter()
+            if remaining <= 0:
+                return {
+                    "status": STATUS_TIMEOUT,
+                    "result": None,
+                    "error": f"{name} validator timed out after {timeout:.0f}s",
+                    "seconds": timeout,
+                }
+            wait([future], timeout=remaining)
+
+        try:
+            return {"status": STATUS_OK, "result": future.result(), "seconds": record["seconds"]}
+        except Exception as e:
+            return {
+                "status": STATUS_ERROR,
+                "result": None,
+                "error": str(e) or type(e).__name__,
+                "exception": e,
+                "seconds": record.get("seconds", 0.0),
+            }
+
+    def report(self, runs: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """Build the timing report stored in the metadata "validation" section.
+
+        Args:
+            runs: Result of run()
+
+        Returns:
+            Dictionary with:
+                - mode: "parallel", "sequential" or "cascade"
+                - workers: Thread pool size
+                - wall_seconds: Elapsed time of run()
+                - sequential_seconds: Sum of per-validator times (cost if run one by one)
+                - validators: Per-validator dict with status and seconds
+                - cascade: Early-exit details (cascade mode only): order, stopped_at,
+                  skipped, abandoned and time_saved_seconds (estimated cost of the
+                  skipped validators plus the remaining cost of abandoned ones)
+        """
+        plan = self._plan()
+        workers = self.max_workers or max((len(stage) for stage in plan), default=0)
+        validators = {
+            name: {"status": run["status"], "seconds": round(run["seconds"], 3)} for name, run in runs.items()
+        }
+
+        if self.early_exit:
+            mode = "cascade"
+        else:
+            mode = "sequential" if workers <= 1 else "parallel"
+
+        report = {
+            "mode": mode,
+            "workers": workers,
+            "wall_seconds": round(self._wall_seconds or 0.0, 3),
+            "sequential_seconds": round(sum(run["seconds"] for run in runs.values()), 3),
+            "validators": validators,
+        }
+
+        if self.early_exit:
+            skipped = [name for name, run in runs.items() if run["status"] == STATUS_SKIPPED]
+            abandoned = [name for name, run in runs.items() if run["status"] == STATUS_ABANDONED]
+            saved = sum(self.estimate_for(name) for name in skipped)
+            saved += sum(max(0.0, self.estimate_for(name) - runs[name]["seconds"]) for name in abandoned)
+            report["cascade"] = {
+                "order": [stage if len(stage) > 1 else stage[0] for stage in plan],
+                "stopped_at": self._stopped_at,
+                "skipped": skipped,
+                "abandoned": abandoned,
+                "time_saved_seconds": round(saved, 3),
+            }
+
+        return report
+
+
+def run_validator(name: str, image: Union[str, ImageContext], **params) -> Dict[str, Any]:
+    """Run one named validator in this process.
+
+    Single dispatch table for the validator names used by the cascade, so
+    generate.py and the validation daemon run exactly the same checks.
+
+    Args:
+        name: "file", "yolo", "clip", "pose", "content" or "quality"
+        image: Image path or shared ImageContext
+        **params: prompt, negative_prompt, positive_threshold (as applicable)
+
+    Returns:
+        The validator's result dict
+
+    Raises:
+        ValueError: If the validator name is unknown
+        ImportError: If the validator's module cannot be imported
+    """
+    image = ImageContext.coerce(image)
+    prompt = params.get("prompt") or ""
+
+    if name == "file":
+        from utils.validation import check_image_sanity
+
+        return check_image_sanity(image)
+    if name == "yolo":
+        from utils.validation import check_person_count
+
+        return check_person_count(image, prompt)
+    if name == "clip":
+        # Person counting runs separately as the "yolo" validator
+        from utils.validation import validate_image
+
+        return validate_image(
+            image,
+            prompt,
+            params.get("negative_prompt") or None,
+            positive_threshold=params.get("positive_threshold", 0.25),
+        )
+    if name == "pose":
+        from utils.pose_validation import validate_pose
+        from utils.validation import extract_expected_person_count
+
+        return validate_pose(image, expected_persons=extract_expected_person_count(prompt))
+    if name == "content":
+        from utils.content_validator import validate_content
+
+        return validate_content(image, prompt)
+    if name == "quality":
+        from utils.quality import score_image
+
+        return score_image(image, params.get("prompt"))
+
+    raise ValueError(f"Unknown validator: {name}")
+
+
+def is_skipped(run: Optional[Dict[str, Any]]) -> bool:
+    """Whether a validator did not produce a result because the cascade stopped early."""
+    return run is not None and run["status"] in (STATUS_SKIPPED, STATUS_ABANDONED)
+
+
+def result_or_raise(run: Dict[str, Any]) -> Any:
+    """Return a run's result, re-raising its failure as the sequential call would have.
+
+    Lets callers keep their existing try/except handling around validators:
+    the original exception is re-raised for "error" runs and a TimeoutError
+    for "timeout" runs. Check is_skipped() first for cascade runs.
+
+    Args:
+        run: One run record from ValidationOrchestrator.run()
+
+    Returns:
+        The validator's return value
+
+    Raises:
+        The validator's exception, or TimeoutError if it timed out
+    """
+    if run["status"] == STATUS_ERROR:
+        raise run["exception"]
+    if run["status"] == STATUS_TIMEOUT:
+        raise TimeoutError(run["error"])
+    return run["result"]